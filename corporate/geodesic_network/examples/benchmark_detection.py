@@ -0,0 +1,72 @@
+"""
+Benchmark de la detección de beaconing y escaneos de GeodesicNetwork.
+
+Genera ``n`` flujos sintéticos (tráfico aleatorio, algunos beacons y un
+escaneo) y mide ``detect_beacons`` y ``detect_scans`` sobre las columnas del
+store con NumPy (si está instalado) y con la implementación sin NumPy.
+
+Uso:
+    python examples/benchmark_detection.py [n_flows]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from geodesic_network.detection import HAS_NUMPY, detect_beacons, detect_scans  # noqa: E402
+from geodesic_network.store import ConnectionStore  # noqa: E402
+
+START = 1700000000.0
+SPAN = 86400.0
+
+
+def build_store(flows: int) -> ConnectionStore:
+    rng = random.Random(1)
+    store = ConnectionStore(flows)
+    batch = 100_000
+    for offset in range(0, flows, batch):
+        size = min(batch, flows - offset)
+        store.extend(
+            [
+                f"10.{rng.randrange(4)}.{rng.randrange(256)}.{rng.randrange(256)}"
+                for _ in range(size)
+            ],
+            [f"172.16.{rng.randrange(64)}.{rng.randrange(256)}" for _ in range(size)],
+            dest_ports=[rng.choice((80, 443, 53, 22, 8080)) for _ in range(size)],
+            timestamps=[START + rng.random() * SPAN for _ in range(size)],
+        )
+    for beacon in range(20):
+        times = [START + index * 60 + rng.uniform(-1, 1) for index in range(1000)]
+        store.extend([f"10.9.9.{beacon}"] * 1000, ["203.0.113.1"] * 1000, timestamps=times)
+    store.extend(
+        ["10.8.8.8"] * 1000,
+        ["172.16.0.1"] * 1000,
+        dest_ports=list(range(1, 1001)),
+        timestamps=[START + index * 0.01 for index in range(1000)],
+    )
+    return store
+
+
+def main() -> None:
+    flows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    columns = build_store(flows).ordered()
+    print(f"{len(columns['timestamp']):,} flujos")
+    for use_numpy in ([True] if HAS_NUMPY else []) + [False]:
+        label = "numpy" if use_numpy else "python"
+        start = time.perf_counter()
+        beacons = detect_beacons(columns, use_numpy=use_numpy)
+        beacon_time = time.perf_counter() - start
+        start = time.perf_counter()
+        scans = detect_scans(columns, use_numpy=use_numpy)
+        scan_time = time.perf_counter() - start
+        print(
+            f"  {label:6}  beacons: {beacon_time:6.2f} s ({len(beacons)})  "
+            f"scans: {scan_time:6.2f} s ({len(scans)})"
+        )
+
+
+if __name__ == "__main__":
+    main()
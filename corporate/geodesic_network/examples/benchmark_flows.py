@@ -0,0 +1,112 @@
+"""
+Benchmark de la ingesta de flow logs de GeodesicNetwork.
+
+Genera archivos VPC Flow Logs comprimidos y compara la ruta histórica
+(parsear a una lista de dicts y llamar a ``analyze(connections=...)``) con
+``load_flows`` en serie y con varios procesos: tiempo y pico de memoria
+(tracemalloc, en una segunda pasada). La ruta histórica no conserva el
+instante de cada flujo (todas las conexiones caen en "ahora"), así que sus
+tasas por ventana se calculan sobre un único bucket; ``load_flows`` las
+calcula con el tiempo de cada flujo.
+
+Uso:
+    python examples/benchmark_flows.py [n_files] [rows_per_file] [workers]
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from geodesic_network.core import GeodesicNetwork  # noqa: E402
+from geodesic_network.flows import open_flow_file  # noqa: E402
+
+HOSTS = 2000
+
+
+def write_files(directory: str, files: int, rows: int) -> list:
+    paths = []
+    for index in range(files):
+        path = os.path.join(directory, f"vpc-{index:03d}.log.gz")
+        with gzip.open(path, "wt") as handle:
+            for row in range(rows):
+                handle.write(
+                    f"2 123456789010 eni-{index} 10.{index % 256}.{row % HOSTS >> 8}.{row % 256} "
+                    f"172.31.{row % 16}.{row % 200} {32768 + row % 28000} "
+                    f"{(80, 443, 22, 53)[row % 4]} "
+                    f"6 10 840 {1700000000 + row // 10} {1700000060 + row // 10} ACCEPT OK\n"
+                )
+        paths.append(path)
+    return paths
+
+
+def legacy_dicts(paths: list) -> list:
+    """Conversión a dicts en memoria previa a ``load_flows``."""
+    connections = []
+    for path in paths:
+        with open_flow_file(path) as handle:
+            for line in handle:
+                fields = line.split()
+                connections.append(
+                    {
+                        "source_ip": fields[3],
+                        "dest_ip": fields[4],
+                        "source_port": int(fields[5]),
+                        "dest_port": int(fields[6]),
+                        "protocol": "TCP",
+                    }
+                )
+    return connections
+
+
+def main() -> None:
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    total = files * rows
+    config = {"max_connections": total}
+    directory = tempfile.mkdtemp(prefix="geodesic-bench-")
+    try:
+        paths = write_files(directory, files, rows)
+
+        start = time.perf_counter()
+        GeodesicNetwork(config=config).analyze(connections=legacy_dicts(paths))
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        GeodesicNetwork(config=config).load_flows(paths, workers=1)
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        GeodesicNetwork(config=config).load_flows(paths, workers=workers)
+        parallel = time.perf_counter() - start
+
+        tracemalloc.start()
+        GeodesicNetwork(config=config).analyze(connections=legacy_dicts(paths))
+        legacy_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        GeodesicNetwork(config=config).load_flows(paths, workers=1)
+        serial_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{files} archivos x {rows} flujos ({total} conexiones)")
+    print(f"  dicts + analyze:        {legacy:7.2f} s  ({total / legacy:,.0f} flujos/s)")
+    print(f"  load_flows (1 proceso): {serial:7.2f} s  ({total / serial:,.0f} flujos/s)")
+    print(
+        f"  load_flows ({workers} procesos): {parallel:7.2f} s  ({total / parallel:,.0f} flujos/s)"
+    )
+    print(
+        f"  pico de memoria: dicts {legacy_peak / 2**20:,.1f} MB, "
+        f"load_flows {serial_peak / 2**20:,.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark del almacenamiento de conexiones de GeodesicNetwork.
+
+Compara el almacenamiento histórico (un ``NetworkConnection`` por conexión y
+recorte de la lista por slicing al superar ``max_connections``) con el
+buffer circular columnar, conexión a conexión y por columnas.
+
+Uso:
+    python examples/benchmark_store.py [n_connections]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from geodesic_network.core import GeodesicNetwork  # noqa: E402
+from geodesic_network.models import NetworkConnection  # noqa: E402
+
+MAX_CONNECTIONS = 10_000
+HOSTS = 5000
+
+
+def legacy_add(connections: list, source_ip: str, dest_ip: str, dest_port: int) -> list:
+    """Alta histórica de GeodesicNetwork.add_connection."""
+    connections.append(
+        NetworkConnection(
+            source_ip=source_ip,
+            dest_ip=dest_ip,
+            source_port=None,
+            dest_port=dest_port,
+            protocol="TCP",
+            timestamp=datetime.now().isoformat(),
+        )
+    )
+    if len(connections) > MAX_CONNECTIONS:
+        connections = connections[-MAX_CONNECTIONS:]
+    return connections
+
+
+def report(label: str, n: int, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {n / elapsed / 1000:8.0f} k conexiones/s")
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sources = [f"10.0.{i % HOSTS >> 8}.{i % HOSTS & 255}" for i in range(n)]
+    dests = [f"192.168.{i % 7}.{i % 250}" for i in range(n)]
+    ports = [(443, 80, 22, 53)[i % 4] for i in range(n)]
+
+    started = time.perf_counter()
+    connections: list = []
+    for src, dst, port in zip(sources, dests, ports):
+        connections = legacy_add(connections, src, dst, port)
+    report("lista de modelos", n, started)
+
+    monitor = GeodesicNetwork(config={"max_connections": MAX_CONNECTIONS})
+    started = time.perf_counter()
+    for src, dst, port in zip(sources, dests, ports):
+        monitor.add_connection(src, dst, dest_port=port, protocol="TCP")
+    report("add_connection", n, started)
+
+    monitor.reset()
+    started = time.perf_counter()
+    monitor.add_connections(sources, dests, dest_ports=ports, protocols=["TCP"] * n)
+    report("add_connections", n, started)
+    assert len(monitor.connections) == MAX_CONNECTIONS
+
+
+if __name__ == "__main__":
+    main()
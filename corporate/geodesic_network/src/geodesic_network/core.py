@@ -7,14 +7,22 @@ Rol: network-monitor
 """
 
 import logging
-from collections import defaultdict
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 
+from .detection import detect_beacons, detect_scans
+from .flows import AUTO_FORMAT, DEFAULT_BATCH_SIZE, FlowIngest
 from .models import AnalysisResult, NetworkConnection, TrafficAnalysis
+from .rates import DEFAULT_WINDOWS, RateMonitor, window_label
+from .sketches import TrafficSketches
+from .store import ConnectionStore, coerce_port, coerce_ports
 
 logger = logging.getLogger(__name__)
 
+# Puertos comunes de ataque
+SUSPICIOUS_PORTS = frozenset({22, 23, 3389, 1433, 3306, 5432})
+
 
 class GeodesicNetwork:
     """
@@ -33,6 +41,32 @@ class GeodesicNetwork:
             config: Diccionario de configuración opcional:
                 - max_connections: Máximo de conexiones (default: 1000)
                 - alert_threshold: Umbral de alerta (default: 100/min)
+                - rate_windows: Ventanas de tasa (nombre -> segundos; default:
+                  minute=60, hour=3600)
+                - rate_thresholds: Umbrales por ventana y dimensión (total,
+                  source_ip, dest_port); default: {"minute": {"total":
+                  alert_threshold}}
+                - rate_buckets: Buckets por ventana (default: 60)
+                - max_rate_keys: Máximo de IPs/puertos con tasa propia
+                  (default: 10000)
+                - sketches: Resúmenes aproximados (HyperLogLog, Count-Min y
+                  top-k) en lugar de la lista exacta de IPs (default: False)
+                - sketch_precision: Precisión del HyperLogLog (default: 14)
+                - top_k: Talkers y puertos en el top (default: 10)
+                - flow_format: Formato de flow logs (vpc, zeek, zeek_json,
+                  netflow_csv o auto; default: auto)
+                - flow_workers: Procesos para leer flow logs (default: 1)
+                - detections: Detectar beaconing y escaneos en
+                  ``analyze_traffic`` (default: True)
+                - beacon_min_connections: Conexiones mínimas por par para
+                  beaconing (default: 8)
+                - beacon_max_jitter: Coeficiente de variación máximo de los
+                  intervalos (default: 0.1)
+                - beacon_min_interval: Intervalo medio mínimo en segundos
+                  (default: 1.0)
+                - scan_window: Ventana de escaneos en segundos (default: 60)
+                - scan_min_ports: Puertos distintos por ventana (default: 100)
+                - scan_min_hosts: Hosts distintos por ventana (default: 50)
                 - track_ports: Rastrear puertos (default: True)
                 - track_protocols: Rastrear protocolos (default: True)
         """
@@ -45,9 +79,38 @@ class GeodesicNetwork:
         self.alert_threshold = int(self.config.get("alert_threshold", 100))
         self.track_ports = bool(self.config.get("track_ports", True))
         self.track_protocols = bool(self.config.get("track_protocols", True))
-
-        # Almacenamiento interno de conexiones
-        self.connections: List[NetworkConnection] = []
+        self.rate_windows = dict(self.config.get("rate_windows") or DEFAULT_WINDOWS)
+        rate_thresholds = self.config.get("rate_thresholds")
+        if rate_thresholds is None:
+            # alert_threshold es el umbral histórico de conexiones por minuto
+            rate_thresholds = {}
+            if "minute" in self.rate_windows:
+                rate_thresholds["minute"] = {"total": self.alert_threshold}
+        self.rates = RateMonitor(
+            self.rate_windows,
+            rate_thresholds,
+            buckets=int(self.config.get("rate_buckets", 60)),
+            max_keys=int(self.config.get("max_rate_keys", 10000)),
+        )
+        self.flow_format = str(self.config.get("flow_format", AUTO_FORMAT))
+        self.flow_workers = int(self.config.get("flow_workers", 1))
+        self.detections = bool(self.config.get("detections", True))
+        self.beacon_min_connections = int(self.config.get("beacon_min_connections", 8))
+        self.beacon_max_jitter = float(self.config.get("beacon_max_jitter", 0.1))
+        self.beacon_min_interval = float(self.config.get("beacon_min_interval", 1.0))
+        self.scan_window = float(self.config.get("scan_window", 60))
+        self.scan_min_ports = int(self.config.get("scan_min_ports", 100))
+        self.scan_min_hosts = int(self.config.get("scan_min_hosts", 50))
+        self.sketches: Optional[TrafficSketches] = None
+        if self.config.get("sketches", False):
+            self.sketches = TrafficSketches(
+                self.rate_windows,
+                precision=int(self.config.get("sketch_precision", 14)),
+                top_k=int(self.config.get("top_k", 10)),
+            )
+
+        # Buffer circular columnar: las conexiones más antiguas se sobrescriben
+        self.connections = ConnectionStore(self.max_connections)
 
         logger.info(
             "Initialized %s - %s (max_conn=%d, threshold=%d/min)",
@@ -64,6 +127,7 @@ class GeodesicNetwork:
         source_port: Optional[int] = None,
         dest_port: Optional[int] = None,
         protocol: Optional[str] = None,
+        timestamp: Optional[float] = None,
     ) -> None:
         """
         Añade una conexión al monitor.
@@ -74,100 +138,318 @@ class GeodesicNetwork:
             source_port: Puerto de origen (opcional)
             dest_port: Puerto de destino (opcional)
             protocol: Protocolo (opcional)
+            timestamp: Instante epoch (default: ahora)
+
+        Raises:
+            ValueError: Si un puerto no es un entero entre 0 y 65535 (se
+                aceptan cadenas numéricas como "443")
+        """
+        source_port = coerce_port(source_port)
+        dest_port = coerce_port(dest_port)
+        when = time.time() if timestamp is None else timestamp
+        self.connections.append(source_ip, dest_ip, source_port, dest_port, protocol, when)
+        self.rates.add(when, source_ip, dest_port)
+        if self.sketches is not None:
+            self.sketches.add(when, source_ip, dest_ip, dest_port)
+
+    def add_connections(
+        self,
+        source_ips: Sequence[str],
+        dest_ips: Sequence[str],
+        source_ports: Optional[Sequence[Optional[int]]] = None,
+        dest_ports: Optional[Sequence[Optional[int]]] = None,
+        protocols: Optional[Sequence[Optional[str]]] = None,
+        timestamps: Optional[Sequence[float]] = None,
+    ) -> int:
+        """
+        Añade conexiones en bloque, una secuencia por columna.
+
+        Args:
+            source_ips: IPs de origen
+            dest_ips: IPs de destino
+            source_ports: Puertos de origen (opcional)
+            dest_ports: Puertos de destino (opcional)
+            protocols: Protocolos (opcional)
+            timestamps: Instantes epoch (default: ahora para todas)
+
+        Returns:
+            Conexiones añadidas
+
+        Raises:
+            ValueError: Si un puerto no es válido (no se añade ninguna conexión)
         """
-        conn = NetworkConnection(
-            source_ip=source_ip,
-            dest_ip=dest_ip,
-            source_port=source_port,
-            dest_port=dest_port,
-            protocol=protocol,
-            timestamp=datetime.now().isoformat(),
+        if source_ports is not None:
+            source_ports = coerce_ports(source_ports)
+        if dest_ports is not None:
+            dest_ports = coerce_ports(dest_ports)
+        now = time.time()
+        count = self.connections.extend(
+            source_ips,
+            dest_ips,
+            source_ports,
+            dest_ports,
+            protocols,
+            timestamps,
+            default_timestamp=now,
         )
-        self.connections.append(conn)
+        times = timestamps if timestamps is not None else [now] * count
+        ports = dest_ports if dest_ports is not None else [None] * count
+        self.rates.add_batch(times, source_ips, ports)
+        if self.sketches is not None:
+            self.sketches.add_batch(times, source_ips, dest_ips, ports)
+        return count
+
+    def load_flows(
+        self,
+        paths: Iterable[str],
+        flow_format: Optional[str] = None,
+        workers: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        Ingiere flow logs (archivos o directorios, planos o gzip) por lotes.
 
-        # Limitar tamaño
-        if len(self.connections) > self.max_connections:
-            self.connections = self.connections[-self.max_connections :]
+        Los archivos se leen en orden de ruta; con varios workers el parseo y
+        la descompresión se hacen en paralelo y los lotes se añaden aquí con
+        ``add_connections``. No limpia el estado previo.
 
-    def analyze_traffic(self) -> TrafficAnalysis:
+        Args:
+            paths: Archivos o directorios
+            flow_format: Formato (default: config ``flow_format``)
+            workers: Procesos (default: config ``flow_workers``)
+            batch_size: Registros por lote
+
+        Returns:
+            Estadísticas: files_read, file_errors, records, skipped y formats;
+            ``records`` y ``skipped`` incluyen lo leído de archivos que
+            fallaron a mitad (sus lotes anteriores al error se ingieren)
         """
-        Analiza el tráfico acumulado.
+        stats: Dict[str, Any] = {
+            "files_read": 0,
+            "file_errors": {},
+            "records": 0,
+            "skipped": 0,
+            "formats": {},
+        }
+        with FlowIngest(
+            paths,
+            flow_format or self.flow_format,
+            self.flow_workers if workers is None else workers,
+            batch_size,
+        ) as ingest:
+            for batch in ingest.batches():
+                self.add_connections(**batch)
+            for flow_file in ingest.files:
+                # Los lotes leídos antes de un error ya están en el store
+                stats["records"] += flow_file.records
+                stats["skipped"] += flow_file.skipped
+                if flow_file.error is not None:
+                    logger.warning("Cannot read flow log %s: %s", flow_file.path, flow_file.error)
+                    stats["file_errors"][flow_file.path] = flow_file.error
+                    continue
+                stats["files_read"] += 1
+                if flow_file.flow_format:
+                    formats = stats["formats"]
+                    formats[flow_file.flow_format] = formats.get(flow_file.flow_format, 0) + 1
+        return stats
+
+    def merge_sketches(self, other: "GeodesicNetwork") -> None:
+        """
+        Une los resúmenes aproximados de otro monitor (p.ej. de otro worker)
+        en los de este. Ambos deben tener ``sketches`` activado con los
+        mismos parámetros.
+        """
+        if self.sketches is None or other.sketches is None:
+            raise ValueError("sketches are not enabled")
+        self.sketches.merge(other.sketches)
+
+    def detect_beacons(self, columns: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Pares (origen, destino) con conexiones periódicas en el buffer.
+
+        Args:
+            columns: Columnas ya ordenadas (default: ``connections.ordered()``)
 
         Returns:
-            TrafficAnalysis con resultados del análisis
+            Dicts con source_ip, dest_ip, connections, interval, jitter,
+            first_seen y last_seen
         """
-        unique_ips = set()
-        port_usage: Dict[str, int] = defaultdict(int)
-        protocol_usage: Dict[str, int] = defaultdict(int)
-        suspicious: List[NetworkConnection] = []
+        return detect_beacons(
+            self.connections.ordered() if columns is None else columns,
+            min_connections=self.beacon_min_connections,
+            max_jitter=self.beacon_max_jitter,
+            min_interval=self.beacon_min_interval,
+            hosts=self.connections.hosts,
+        )
 
-        for conn in self.connections:
-            unique_ips.add(conn.source_ip)
-            unique_ips.add(conn.dest_ip)
+    def detect_scans(self, columns: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Orígenes con muchos puertos u hosts de destino distintos por ventana.
 
-            if self.track_ports and conn.dest_port:
-                port_usage[str(conn.dest_port)] += 1
+        Args:
+            columns: Columnas ya ordenadas (default: ``connections.ordered()``)
 
-            if self.track_protocols and conn.protocol:
-                protocol_usage[conn.protocol.upper()] += 1
+        Returns:
+            Dicts con source_ip, window_start, distinct_ports, distinct_hosts
+            y type
+        """
+        return detect_scans(
+            self.connections.ordered() if columns is None else columns,
+            window=self.scan_window,
+            min_ports=self.scan_min_ports,
+            min_hosts=self.scan_min_hosts,
+            hosts=self.connections.hosts,
+        )
 
-            # Detectar conexiones sospechosas (puertos comunes de ataque)
-            suspicious_ports = {22, 23, 3389, 1433, 3306, 5432}
-            if conn.dest_port and conn.dest_port in suspicious_ports:
-                suspicious.append(conn)
+    def analyze_traffic(self) -> TrafficAnalysis:
+        """
+        Analiza el tráfico acumulado.
 
-        # Análisis por minuto
-        connections_per_minute = len(self.connections)
+        Returns:
+            TrafficAnalysis con resultados del análisis
+        """
+        store = self.connections
+        columns = store.ordered()
+        sketch_summary: Optional[Dict[str, Any]] = None
+        if self.sketches is not None:
+            # Con sketches no se construye el conjunto exacto de IPs
+            sketch_summary = self.sketches.summary()
+            unique_ips: List[str] = []
+            unique_ip_count = sketch_summary["distinct_ips"]
+        else:
+            packed = set(zip(columns["src_hi"], columns["src_lo"]))
+            packed.update(zip(columns["dst_hi"], columns["dst_lo"]))
+            unique_ips = sorted(store.unpack_host(hi << 64 | lo) for hi, lo in packed)
+            unique_ip_count = len(unique_ips)
+
+        port_usage: Dict[str, int] = {}
+        if self.track_ports:
+            port_counts = Counter(columns["dst_port"])
+            port_counts.pop(0, None)
+            port_usage = {str(port): count for port, count in port_counts.items()}
+
+        protocol_usage: Dict[str, int] = {}
+        if self.track_protocols:
+            protocol_counts = Counter(columns["protocol"])
+            protocol_counts.pop(0, None)
+            protocol_usage = {
+                store.protocols[code]: count for code, count in protocol_counts.items()
+            }
+
+        # Conexiones sospechosas (puertos comunes de ataque): solo se
+        # materializan las que se devuelven
+        suspicious: List[NetworkConnection] = []
+        for position, port in enumerate(columns["dst_port"]):
+            if port in SUSPICIOUS_PORTS:
+                suspicious.append(store.row(position))
+                if len(suspicious) == 50:  # Limitar a 50
+                    break
+
+        # Tasas por ventana de tiempo (no por tamaño del buffer)
+        rates = self.rates
+        connections_per_minute = rates.rate("minute") if "minute" in self.rate_windows else None
         alerts = []
-
-        if connections_per_minute > self.alert_threshold:
-            alerts.append(f"High connection rate: {connections_per_minute}/min")
+        for alert in rates.active_alerts():
+            count = rates.rate(alert["window"], alert["dimension"], alert["key"])
+            unit = window_label(self.rate_windows[alert["window"]])
+            if alert["dimension"] == "total":
+                alerts.append(f"High connection rate: {count}/{unit}")
+            else:
+                subject = f"{alert['dimension']} {alert['key']}"
+                alerts.append(f"High connection rate for {subject}: {count}/{unit}")
+
+        summary: Dict[str, Any] = {
+            "total_connections": len(self.connections),
+            "unique_ip_count": unique_ip_count,
+            "connections_per_minute": connections_per_minute,
+            "rates": rates.summary(),
+            "alerts": alerts,
+            "rate_alerts": list(rates.alerts),
+            "most_used_port": (
+                max(port_usage.items(), key=lambda x: x[1])[0] if port_usage else None
+            ),
+            "most_used_protocol": (
+                max(protocol_usage.items(), key=lambda x: x[1])[0] if protocol_usage else None
+            ),
+        }
+        if self.detections:
+            # Beaconing y escaneos sobre las mismas columnas
+            summary["beacons"] = self.detect_beacons(columns)
+            summary["scans"] = self.detect_scans(columns)
+        if sketch_summary is not None:
+            summary["approximate"] = True
+            summary["sketches"] = sketch_summary
 
         return TrafficAnalysis(
             total_connections=len(self.connections),
-            unique_ips=sorted(list(unique_ips)),
-            port_usage=dict(port_usage),
-            protocol_usage=dict(protocol_usage),
-            suspicious_connections=suspicious[:50],  # Limitar a 50
-            analysis_summary={
-                "total_connections": len(self.connections),
-                "unique_ip_count": len(unique_ips),
-                "connections_per_minute": connections_per_minute,
-                "alerts": alerts,
-                "most_used_port": max(port_usage.items(), key=lambda x: x[1])[0] if port_usage else None,
-                "most_used_protocol": max(protocol_usage.items(), key=lambda x: x[1])[0] if protocol_usage else None,
-            },
+            unique_ips=unique_ips,
+            port_usage=port_usage,
+            protocol_usage=protocol_usage,
+            suspicious_connections=suspicious,
+            analysis_summary=summary,
         )
 
-    def analyze(self, connections: Optional[List[Dict[str, Any]]] = None) -> AnalysisResult:
+    def analyze(
+        self,
+        connections: Optional[List[Dict[str, Any]]] = None,
+        flow_paths: Optional[Iterable[str]] = None,
+    ) -> AnalysisResult:
         """
         Analiza tráfico: usa conexiones existentes o acepta nuevas.
 
+        Las conexiones con puertos no válidos se omiten y se informan en
+        ``errors``.
+
         Args:
             connections: Lista opcional de conexiones a analizar
+            flow_paths: Flow logs a ingerir antes del análisis (se suman a
+                ``connections``)
 
         Returns:
             AnalysisResult con resultados
         """
+        errors = []
         if connections:
             # Limpiar y añadir nuevas conexiones
-            self.connections.clear()
-            for conn_data in connections:
-                self.add_connection(
-                    source_ip=conn_data.get("source_ip", ""),
-                    dest_ip=conn_data.get("dest_ip", ""),
-                    source_port=conn_data.get("source_port"),
-                    dest_port=conn_data.get("dest_port"),
-                    protocol=conn_data.get("protocol"),
-                )
+            self.reset()
+            accepted = []
+            source_ports: List[Optional[int]] = []
+            dest_ports: List[Optional[int]] = []
+            for position, conn in enumerate(connections):
+                try:
+                    source_port = coerce_port(conn.get("source_port"))
+                    dest_port = coerce_port(conn.get("dest_port"))
+                except ValueError as exc:
+                    errors.append(f"connection {position}: {exc}")
+                    continue
+                accepted.append(conn)
+                source_ports.append(source_port)
+                dest_ports.append(dest_port)
+            self.add_connections(
+                source_ips=[conn.get("source_ip", "") for conn in accepted],
+                dest_ips=[conn.get("dest_ip", "") for conn in accepted],
+                source_ports=source_ports,
+                dest_ports=dest_ports,
+                protocols=[conn.get("protocol") for conn in accepted],
+            )
+        flow_stats = None
+        if flow_paths:
+            if not connections:
+                self.reset()
+            flow_stats = self.load_flows(flow_paths)
 
         analysis = self.analyze_traffic()
         status = "success" if analysis.total_connections > 0 else "warning"
+        data = analysis.model_dump()
+        if flow_stats is not None:
+            data["flows"] = flow_stats
+            errors.extend(f"{path}: {error}" for path, error in flow_stats["file_errors"].items())
 
         return AnalysisResult(
             status=status,
             message=f"Traffic analysis completed: {analysis.total_connections} connections",
-            data=analysis.model_dump(),
+            data=data,
+            errors=errors or None,
         )
 
     def validate(self, data: Any) -> bool:
@@ -196,6 +478,9 @@ class GeodesicNetwork:
     def reset(self) -> None:
         """Resetea el estado del monitor."""
         self.connections.clear()
+        self.rates.clear()
+        if self.sketches is not None:
+            self.sketches.clear()
         logger.info("GeodesicNetwork state reset")
 
 
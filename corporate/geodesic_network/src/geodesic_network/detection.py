@@ -0,0 +1,329 @@
+"""
+Batch beaconing and scan detection for GeodesicNetwork.
+
+Los detectores trabajan sobre las columnas del ``ConnectionStore``
+(``store.ordered()``):
+
+    - Beaconing: por par (origen, destino) se ordenan los instantes y se
+      calculan los intervalos entre conexiones; un par es periódico si tiene
+      suficientes conexiones y el coeficiente de variación de sus intervalos
+      (desviación típica / media) es bajo. Las conexiones simultáneas (varios
+      flujos en el mismo instante) cuentan como una.
+    - Escaneos: por IP de origen y ventana fija de ``window`` segundos se
+      cuentan los puertos de destino distintos (escaneo vertical) y los
+      hosts de destino distintos (barrido horizontal).
+
+Con NumPy instalado (extra ``fast``) las agrupaciones son vectorizadas:
+``lexsort`` sobre las columnas, fronteras de grupo con diferencias,
+agregados con ``bincount`` y umbrales aplicados como máscaras, de modo que
+solo se convierten a objetos Python los pares que los superan. Sin NumPy se
+usa una implementación con diccionarios que da los mismos resultados.
+"""
+
+import math
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .store import unpack_host
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+HAS_NUMPY = np is not None
+
+Columns = Dict[str, array]
+Pair = Tuple[int, int, int, int]
+
+
+def _ip(hi: int, lo: int, hosts: Sequence[str]) -> str:
+    return unpack_host(int(hi) << 64 | int(lo), hosts)
+
+
+def _use_numpy(use_numpy: Optional[bool]) -> bool:
+    if use_numpy and not HAS_NUMPY:
+        raise ValueError("NumPy is not installed")
+    return HAS_NUMPY if use_numpy is None else use_numpy
+
+
+def detect_beacons(
+    columns: Columns,
+    min_connections: int = 8,
+    max_jitter: float = 0.1,
+    min_interval: float = 1.0,
+    limit: int = 50,
+    use_numpy: Optional[bool] = None,
+    hosts: Sequence[str] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Pares (origen, destino) con conexiones periódicas.
+
+    Args:
+        columns: Columnas del store (``ConnectionStore.ordered()``)
+        min_connections: Conexiones (instantes distintos) mínimas por par
+        max_jitter: Coeficiente de variación máximo de los intervalos
+        min_interval: Intervalo medio mínimo en segundos (descarta ráfagas)
+        limit: Máximo de resultados, los más regulares primero
+        use_numpy: Forzar (True) o evitar (False) NumPy; None = si está
+        hosts: Tabla de hosts no IP del store (``ConnectionStore.hosts``)
+
+    Returns:
+        Dicts con source_ip, dest_ip, connections, interval, jitter,
+        first_seen y last_seen
+    """
+    stats = _beacon_stats_numpy if _use_numpy(use_numpy) else _beacon_stats_python
+    findings = [
+        {
+            "source_ip": _ip(pair[0], pair[1], hosts),
+            "dest_ip": _ip(pair[2], pair[3], hosts),
+            "connections": intervals + 1,
+            "interval": round(mean, 3),
+            "jitter": round(jitter, 4),
+            "first_seen": first,
+            "last_seen": last,
+        }
+        for pair, intervals, mean, jitter, first, last in stats(
+            columns, min_connections, max_jitter, min_interval
+        )
+    ]
+    findings.sort(key=lambda f: (f["jitter"], -f["connections"], f["source_ip"], f["dest_ip"]))
+    return findings[:limit]
+
+
+# (par, intervalos, intervalo medio, jitter, primera, última)
+BeaconStats = Tuple[Pair, int, float, float, float, float]
+
+
+def _beacon_stats_python(
+    columns: Columns, min_connections: int, max_jitter: float, min_interval: float
+) -> List[BeaconStats]:
+    times: Dict[Pair, List[float]] = {}
+    for key, when in zip(
+        zip(columns["src_hi"], columns["src_lo"], columns["dst_hi"], columns["dst_lo"]),
+        columns["timestamp"],
+    ):
+        bucket = times.get(key)
+        if bucket is None:
+            times[key] = [when]
+        else:
+            bucket.append(when)
+
+    stats = []
+    for pair, values in times.items():
+        if len(values) < min_connections:
+            continue
+        values.sort()
+        intervals = 0
+        total = squares = 0.0
+        previous = values[0]
+        for when in values[1:]:
+            gap = when - previous
+            if gap > 0:
+                intervals += 1
+                total += gap
+                squares += gap * gap
+            previous = when
+        if not intervals or intervals + 1 < min_connections:
+            continue
+        mean = total / intervals
+        if mean < min_interval:
+            continue
+        jitter = math.sqrt(max(0.0, squares / intervals - mean * mean)) / mean
+        if jitter <= max_jitter:
+            stats.append((pair, intervals, mean, jitter, values[0], values[-1]))
+    return stats
+
+
+def _beacon_stats_numpy(
+    columns: Columns, min_connections: int, max_jitter: float, min_interval: float
+) -> List[BeaconStats]:
+    keys = [
+        np.frombuffer(columns[name], dtype=np.uint64)
+        for name in ("src_hi", "src_lo", "dst_hi", "dst_lo")
+    ]
+    times = np.frombuffer(columns["timestamp"], dtype=np.float64)
+    if len(times) < 2:
+        return []
+    # Orden por par y, dentro del par, por instante (la última clave es la principal)
+    order = np.lexsort((times,) + tuple(reversed(keys)))
+    keys = [key[order] for key in keys]
+    times = times[order]
+
+    same_pair = np.ones(len(times) - 1, dtype=bool)
+    for key in keys:
+        same_pair &= key[1:] == key[:-1]
+    pair_ids = np.concatenate(([0], np.cumsum(~same_pair)))
+    starts = np.flatnonzero(np.concatenate(([True], ~same_pair)))
+    ends = np.concatenate((starts[1:], [len(times)])) - 1
+
+    gaps = np.diff(times)
+    valid = same_pair & (gaps > 0)
+    ids = pair_ids[1:][valid]
+    gaps = gaps[valid]
+    pairs = len(starts)
+    intervals = np.bincount(ids, minlength=pairs)
+    total = np.bincount(ids, weights=gaps, minlength=pairs)
+    squares = np.bincount(ids, weights=gaps * gaps, minlength=pairs)
+
+    # Umbrales aplicados por columnas: solo se materializan los pares que pasan
+    candidates = np.flatnonzero((intervals > 0) & (intervals + 1 >= min_connections))
+    counts = intervals[candidates]
+    mean = total[candidates] / counts
+    keep = mean >= min_interval
+    candidates, counts, mean = candidates[keep], counts[keep], mean[keep]
+    variance = np.maximum(0.0, squares[candidates] / counts - mean * mean)
+    jitter = np.sqrt(variance) / mean
+    keep = jitter <= max_jitter
+    candidates, counts, mean, jitter = candidates[keep], counts[keep], mean[keep], jitter[keep]
+
+    rows = starts[candidates]
+    pair_columns = [key[rows].tolist() for key in keys]
+    return list(
+        zip(
+            zip(*pair_columns),
+            counts.tolist(),
+            mean.tolist(),
+            jitter.tolist(),
+            times[rows].tolist(),
+            times[ends[candidates]].tolist(),
+        )
+    )
+
+
+def detect_scans(
+    columns: Columns,
+    window: float = 60.0,
+    min_ports: int = 100,
+    min_hosts: int = 50,
+    limit: int = 50,
+    use_numpy: Optional[bool] = None,
+    hosts: Sequence[str] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Orígenes con fan-out alto de puertos o hosts de destino en una ventana.
+
+    Las ventanas son fijas (``floor(timestamp / window)``).
+
+    Args:
+        columns: Columnas del store (``ConnectionStore.ordered()``)
+        window: Ventana en segundos
+        min_ports: Puertos de destino distintos para un escaneo vertical
+        min_hosts: Hosts de destino distintos para un barrido horizontal
+        limit: Máximo de resultados, mayor fan-out primero
+        use_numpy: Forzar (True) o evitar (False) NumPy; None = si está
+        hosts: Tabla de hosts no IP del store (``ConnectionStore.hosts``)
+
+    Returns:
+        Dicts con source_ip, window_start, distinct_ports, distinct_hosts y
+        type (port_scan, host_sweep o mixed)
+    """
+    if _use_numpy(use_numpy):
+        groups = _fan_out_numpy(columns, window, min_ports, min_hosts)
+    else:
+        groups = _fan_out_python(columns, window, min_ports, min_hosts)
+
+    findings = []
+    for (src_hi, src_lo, slot), ports, host_count in groups:
+        if ports >= min_ports and host_count >= min_hosts:
+            kind = "mixed"
+        elif ports >= min_ports:
+            kind = "port_scan"
+        else:
+            kind = "host_sweep"
+        findings.append(
+            {
+                "source_ip": _ip(src_hi, src_lo, hosts),
+                "window_start": slot * window,
+                "distinct_ports": ports,
+                "distinct_hosts": host_count,
+                "type": kind,
+            }
+        )
+    findings.sort(
+        key=lambda f: (
+            -max(f["distinct_ports"], f["distinct_hosts"]),
+            f["source_ip"],
+            f["window_start"],
+        )
+    )
+    return findings[:limit]
+
+
+def _fan_out_python(
+    columns: Columns, window: float, min_ports: int, min_hosts: int
+) -> List[Tuple[Tuple[int, int, int], int, int]]:
+    slots = [math.floor(when / window) for when in columns["timestamp"]]
+    # Pares (grupo, valor) distintos y luego cuántos hay por grupo
+    port_pairs = {
+        (src_hi, src_lo, slot, port)
+        for src_hi, src_lo, slot, port in zip(
+            columns["src_hi"], columns["src_lo"], slots, columns["dst_port"]
+        )
+        if port
+    }
+    host_pairs = set(
+        zip(columns["src_hi"], columns["src_lo"], slots, columns["dst_hi"], columns["dst_lo"])
+    )
+    ports = Counter(pair[:3] for pair in port_pairs)
+    hosts = Counter(pair[:3] for pair in host_pairs)
+    return [
+        (key, ports[key], count)
+        for key, count in hosts.items()
+        if ports[key] >= min_ports or count >= min_hosts
+    ]
+
+
+def _fan_out_numpy(
+    columns: Columns, window: float, min_ports: int, min_hosts: int
+) -> List[Tuple[Tuple[int, int, int], int, int]]:
+    times = np.frombuffer(columns["timestamp"], dtype=np.float64)
+    if not len(times):
+        return []
+    group_keys = [
+        np.frombuffer(columns["src_hi"], dtype=np.uint64),
+        np.frombuffer(columns["src_lo"], dtype=np.uint64),
+        np.floor(times / window).astype(np.int64),
+    ]
+    ports = np.frombuffer(columns["dst_port"], dtype=np.uint16)
+    hosts = [
+        np.frombuffer(columns["dst_hi"], dtype=np.uint64),
+        np.frombuffer(columns["dst_lo"], dtype=np.uint64),
+    ]
+    # Los grupos quedan en el mismo orden (por clave) en ambas agregaciones
+    starts, port_counts, port_rows = _distinct_per_group(group_keys, [ports])
+    _, host_counts, _ = _distinct_per_group(group_keys, hosts)
+    # El puerto 0 (sin puerto) no cuenta como puerto distinto
+    group_ids = np.cumsum(starts) - 1
+    has_unset = np.bincount(group_ids, weights=ports[port_rows] == 0, minlength=len(port_counts))
+    port_counts = port_counts - (has_unset > 0)
+
+    first_rows = port_rows[np.flatnonzero(starts)]
+    groups = []
+    for index in np.flatnonzero((port_counts >= min_ports) | (host_counts >= min_hosts)):
+        row = first_rows[index]
+        key = (int(group_keys[0][row]), int(group_keys[1][row]), int(group_keys[2][row]))
+        groups.append((key, int(port_counts[index]), int(host_counts[index])))
+    return groups
+
+
+def _distinct_per_group(group_keys: List[Any], value_keys: List[Any]) -> Tuple[Any, Any, Any]:
+    """
+    Valores distintos por grupo.
+
+    Returns:
+        (inicio de grupo por fila ordenada, distintos por grupo, orden)
+    """
+    order = np.lexsort(tuple(reversed(group_keys + value_keys)))
+    new_group = np.zeros(len(order), dtype=bool)
+    new_group[0] = True
+    for key in group_keys:
+        sorted_key = key[order]
+        new_group[1:] |= sorted_key[1:] != sorted_key[:-1]
+    new_value = new_group.copy()
+    for key in value_keys:
+        sorted_key = key[order]
+        new_value[1:] |= sorted_key[1:] != sorted_key[:-1]
+    distinct = np.bincount(np.cumsum(new_group) - 1, weights=new_value).astype(np.int64)
+    return new_group, distinct, order
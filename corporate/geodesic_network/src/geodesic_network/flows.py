@@ -0,0 +1,484 @@
+"""
+Flow-log ingestion for GeodesicNetwork.
+
+Lectores en streaming de registros de flujo, que producen lotes de columnas
+(las mismas que acepta ``GeodesicNetwork.add_connections``) sin construir
+una lista de dicts por conexión:
+
+    - ``vpc``: AWS VPC Flow Logs (formato por defecto v2 o el de la cabecera)
+    - ``zeek``: Zeek ``conn.log`` TSV (cabeceras ``#fields``)
+    - ``zeek_json``: Zeek ``conn.log`` JSON (un objeto por línea)
+    - ``netflow_csv``: exportaciones CSV de NetFlow/IPFIX (nfdump, nfcapd,
+      colectores), con nombres de columna habituales
+
+Los archivos pueden ser texto plano o gzip (detectado por los bytes
+mágicos); el formato se detecta con las primeras líneas. Con varios workers
+cada archivo se parsea en un proceso del pool y sus lotes se vuelcan a un
+archivo temporal que el proceso principal lee lote a lote, de modo que la
+memoria no depende del tamaño de los archivos.
+"""
+
+import csv
+import gzip
+import itertools
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+GZIP_MAGIC = b"\x1f\x8b"
+AUTO_FORMAT = "auto"
+FLOW_FORMATS = ("vpc", "zeek", "zeek_json", "netflow_csv")
+DEFAULT_BATCH_SIZE = 8192
+
+# Números de protocolo IANA habituales
+PROTOCOL_NAMES = {
+    1: "ICMP",
+    6: "TCP",
+    17: "UDP",
+    47: "GRE",
+    50: "ESP",
+    51: "AH",
+    58: "ICMPV6",
+    132: "SCTP",
+}
+
+VPC_DEFAULT_FIELDS = (
+    "version account-id interface-id srcaddr dstaddr srcport dstport protocol "
+    "packets bytes start end action log-status"
+).split()
+
+# Nombres de columna equivalentes en exportaciones CSV de NetFlow
+CSV_ALIASES = {
+    "source_ip": (
+        "srcaddr",
+        "src_ip",
+        "sa",
+        "srcip",
+        "source_ip",
+        "src_addr",
+        "ipv4_src_addr",
+        "src",
+    ),
+    "dest_ip": ("dstaddr", "dst_ip", "da", "dstip", "dest_ip", "dst_addr", "ipv4_dst_addr", "dst"),
+    "source_port": ("srcport", "src_port", "sp", "l4_src_port", "source_port", "sport"),
+    "dest_port": ("dstport", "dst_port", "dp", "l4_dst_port", "dest_port", "dport"),
+    "protocol": ("proto", "protocol", "pr", "prot"),
+    "timestamp": (
+        "ts",
+        "start",
+        "first",
+        "first_switched",
+        "timestamp",
+        "start_time",
+        "stime",
+        "time",
+    ),
+}
+
+# (source_ip, dest_ip, source_port, dest_port, protocol, timestamp)
+FlowRecord = Tuple[str, str, Optional[int], Optional[int], Optional[str], float]
+FlowBatch = Dict[str, List[Any]]
+BATCH_COLUMNS = ("source_ips", "dest_ips", "source_ports", "dest_ports", "protocols", "timestamps")
+# Errores de lectura de un archivo (ilegible, gzip truncado o corrupto, formato)
+READ_ERRORS = (OSError, EOFError, ValueError, csv.Error, zlib.error)
+
+
+def open_flow_file(path: str) -> TextIO:
+    """Abre un archivo de flujos en modo texto (gzip detectado por bytes mágicos)."""
+    with open(path, "rb") as handle:
+        compressed = handle.read(2) == GZIP_MAGIC
+    if compressed:
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace", newline="")
+    return open(path, "r", encoding="utf-8", errors="replace", newline="")
+
+
+def iter_flow_files(paths: Iterable[str]) -> Iterator[str]:
+    """Expande directorios (recursivo) en archivos, en orden de ruta."""
+    for root in paths:
+        if not os.path.isdir(root):
+            yield root
+            continue
+        found: List[str] = []
+        for directory, _, files in os.walk(root):
+            found.extend(os.path.join(directory, name) for name in files)
+        yield from sorted(found)
+
+
+def detect_flow_format(lines: List[str]) -> Optional[str]:
+    """Formato de flujos a partir de las primeras líneas (None si no se reconoce)."""
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith("#separator") or stripped.startswith("#fields"):
+            return "zeek"
+        if stripped.startswith("{"):
+            return "zeek_json" if '"id.orig_h"' in stripped else None
+        tokens = stripped.split()
+        if "srcaddr" in tokens:
+            return "vpc"
+        if "," in stripped:
+            return "netflow_csv"
+        if len(tokens) >= 10 and tokens[0].isdigit() and any(c in tokens[3] for c in ".:-"):
+            return "vpc"
+        return None
+    return None
+
+
+def to_epoch(value: Any) -> Optional[float]:
+    """Epoch desde número o texto ISO 8601 (las fechas sin zona se toman como UTC)."""
+    if value is None or value in ("", "-"):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        pass
+    else:
+        # Milisegundos (exportaciones que usan epoch en ms)
+        return number / 1000.0 if number > 1e11 else number
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _port(value: Any) -> Optional[int]:
+    try:
+        port = int(value)
+    except (TypeError, ValueError):
+        try:
+            port = int(float(value))
+        except (TypeError, ValueError):
+            return None
+    return port if 0 < port <= 0xFFFF else None
+
+
+@lru_cache(maxsize=1024)
+def _protocol(value: Any) -> Optional[str]:
+    if value is None or value in ("", "-"):
+        return None
+    text = str(value).strip()
+    if text.isdigit():
+        number = int(text)
+        return PROTOCOL_NAMES.get(number, text)
+    return text.upper()
+
+
+def parse_vpc(lines: Iterable[str]) -> Iterator[Optional[FlowRecord]]:
+    """AWS VPC Flow Logs; la cabecera (si existe) define el orden de campos."""
+    positions = _vpc_positions(VPC_DEFAULT_FIELDS)
+    last = max(position for position in positions if position is not None)
+    for line in lines:
+        tokens = line.split()
+        if not tokens:
+            continue
+        if "srcaddr" in tokens:
+            positions = _vpc_positions(tokens)
+            if positions[0] is None or positions[1] is None:
+                raise ValueError("VPC flow log header without srcaddr/dstaddr")
+            last = max(position for position in positions if position is not None)
+            continue
+        src_at, dst_at, sport_at, dport_at, protocol_at, start_at = positions
+        if len(tokens) <= last:
+            # Registro corto: campos ausentes como None
+            tokens = tokens + [None] * (last + 1 - len(tokens))
+        src = tokens[src_at]
+        dst = tokens[dst_at]
+        if src is None or dst is None or src == "-" or dst == "-":
+            # NODATA / SKIPDATA
+            yield None
+            continue
+        yield (
+            src,
+            dst,
+            _port(tokens[sport_at]) if sport_at is not None else None,
+            _port(tokens[dport_at]) if dport_at is not None else None,
+            _protocol(tokens[protocol_at]) if protocol_at is not None else None,
+            to_epoch(tokens[start_at]) or 0.0 if start_at is not None else 0.0,
+        )
+
+
+def _vpc_positions(fields: Iterable[str]) -> Tuple[Optional[int], ...]:
+    index = {name: position for position, name in enumerate(fields)}
+    return tuple(
+        index.get(name)
+        for name in ("srcaddr", "dstaddr", "srcport", "dstport", "protocol", "start")
+    )
+
+
+def parse_zeek(lines: Iterable[str]) -> Iterator[Optional[FlowRecord]]:
+    """Zeek conn.log TSV con cabeceras ``#separator``/``#fields``."""
+    separator = "\t"
+    unset = "-"
+    index: Dict[str, int] = {}
+    for line in lines:
+        if line.startswith("#"):
+            if line.startswith("#separator"):
+                value = line.split(None, 1)[1].strip() if " " in line else "\\x09"
+                separator = value.encode().decode("unicode_escape")
+            elif line.startswith("#unset_field"):
+                unset = line.split(separator, 1)[1].strip()
+            elif line.startswith("#fields"):
+                names = line.rstrip("\r\n").split(separator)[1:]
+                index = {name: position for position, name in enumerate(names)}
+            continue
+        if not line.strip():
+            continue
+        values = line.rstrip("\r\n").split(separator)
+        try:
+            src = values[index["id.orig_h"]]
+            dst = values[index["id.resp_h"]]
+        except (KeyError, IndexError):
+            yield None
+            continue
+        proto = values[index["proto"]] if "proto" in index else unset
+        yield (
+            src,
+            dst,
+            _port(values[index["id.orig_p"]]) if "id.orig_p" in index else None,
+            _port(values[index["id.resp_p"]]) if "id.resp_p" in index else None,
+            _protocol(None if proto == unset else proto),
+            to_epoch(values[index["ts"]]) or 0.0 if "ts" in index else 0.0,
+        )
+
+
+def parse_zeek_json(lines: Iterable[str]) -> Iterator[Optional[FlowRecord]]:
+    """Zeek conn.log JSON (``LogAscii::use_json``)."""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            src = record["id.orig_h"]
+            dst = record["id.resp_h"]
+        except (ValueError, KeyError, TypeError):
+            yield None
+            continue
+        yield (
+            src,
+            dst,
+            _port(record.get("id.orig_p")),
+            _port(record.get("id.resp_p")),
+            _protocol(record.get("proto")),
+            to_epoch(record.get("ts")) or 0.0,
+        )
+
+
+def parse_netflow_csv(lines: Iterable[str]) -> Iterator[Optional[FlowRecord]]:
+    """CSV de NetFlow/IPFIX con cabecera; las columnas se buscan por alias."""
+    reader = csv.reader(line for line in lines if line.strip())
+    header = next(reader, None)
+    if header is None:
+        return
+    lowered = [name.strip().lower() for name in header]
+    columns: Dict[str, Optional[int]] = {}
+    for field, aliases in CSV_ALIASES.items():
+        columns[field] = next((lowered.index(alias) for alias in aliases if alias in lowered), None)
+    src_column, dst_column = columns["source_ip"], columns["dest_ip"]
+    if src_column is None or dst_column is None:
+        raise ValueError("CSV flow export without source/destination address columns")
+
+    def cell(row: List[str], field: str) -> Optional[str]:
+        column = columns[field]
+        return row[column].strip() if column is not None and column < len(row) else None
+
+    for row in reader:
+        if len(row) <= max(src_column, dst_column):
+            # Líneas de resumen (nfdump "Summary") o registros incompletos
+            yield None
+            continue
+        src = row[src_column].strip()
+        dst = row[dst_column].strip()
+        if not src or not dst:
+            yield None
+            continue
+        yield (
+            src,
+            dst,
+            _port(cell(row, "source_port")),
+            _port(cell(row, "dest_port")),
+            _protocol(cell(row, "protocol")),
+            to_epoch(cell(row, "timestamp")) or 0.0,
+        )
+
+
+FLOW_PARSERS: Dict[str, Callable[[Iterable[str]], Iterator[Optional[FlowRecord]]]] = {
+    "vpc": parse_vpc,
+    "zeek": parse_zeek,
+    "zeek_json": parse_zeek_json,
+    "netflow_csv": parse_netflow_csv,
+}
+
+
+class FlowFile:
+    """Resultado de la lectura de un archivo de flujos."""
+
+    def __init__(self, index: int, path: str):
+        self.index = index
+        self.path = path
+        self.flow_format: Optional[str] = None
+        self.records = 0
+        self.skipped = 0
+        self.error: Optional[str] = None
+        self.spill_path: Optional[str] = None
+
+
+def read_flows(
+    path: str,
+    flow_format: str = AUTO_FORMAT,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    result: Optional[FlowFile] = None,
+) -> Iterator[FlowBatch]:
+    """
+    Lee un archivo de flujos en lotes de columnas.
+
+    Args:
+        path: Archivo (texto plano o gzip)
+        flow_format: Formato o "auto" para detectarlo
+        batch_size: Registros por lote
+        result: FlowFile donde anotar formato, registros y descartes
+
+    Yields:
+        Dicts con ``source_ips``, ``dest_ips``, ``source_ports``,
+        ``dest_ports``, ``protocols`` y ``timestamps``
+    """
+    result = result if result is not None else FlowFile(0, path)
+    with open_flow_file(path) as handle:
+        lines: Iterable[str] = handle
+        if flow_format == AUTO_FORMAT:
+            head = list(itertools.islice(handle, 20))
+            flow_format = detect_flow_format(head)
+            if flow_format is None:
+                raise ValueError(f"Unrecognized flow log format: {path}")
+            lines = itertools.chain(head, handle)
+        parser = FLOW_PARSERS.get(flow_format)
+        if parser is None:
+            raise ValueError(f"Unknown flow format: {flow_format}")
+        result.flow_format = flow_format
+
+        records: List[FlowRecord] = []
+        for record in parser(lines):
+            if record is None:
+                result.skipped += 1
+                continue
+            records.append(record)
+            if len(records) >= batch_size:
+                result.records += len(records)
+                yield _to_batch(records)
+                records = []
+        if records:
+            result.records += len(records)
+            yield _to_batch(records)
+
+
+def _to_batch(records: List[FlowRecord]) -> FlowBatch:
+    """Transpone registros a columnas."""
+    return dict(zip(BATCH_COLUMNS, map(list, zip(*records))))
+
+
+def spill_flows(
+    index: int, path: str, flow_format: str, batch_size: int, spill_dir: str
+) -> FlowFile:
+    """
+    Lee un archivo y vuelca sus lotes (pickle) a un archivo temporal.
+
+    Si la lectura falla a mitad (p.ej. un gzip truncado), el volcado conserva
+    los lotes completos anteriores al error, igual que la lectura en serie
+    conserva los lotes ya ingeridos.
+    """
+    result = FlowFile(index, path)
+    result.spill_path = os.path.join(spill_dir, f"{index:06d}.flows")
+    written = records = 0
+    try:
+        with open(result.spill_path, "wb") as handle:
+            for batch in read_flows(path, flow_format, batch_size, result):
+                pickle.dump(batch, handle, pickle.HIGHEST_PROTOCOL)
+                written, records = handle.tell(), result.records
+    except READ_ERRORS as exc:
+        result.error = str(exc)
+        # Descarta un lote a medio escribir
+        result.records = records
+        try:
+            os.truncate(result.spill_path, written)
+        except OSError:
+            result.spill_path = None
+    return result
+
+
+def _spill_worker(args: Tuple[int, str, str, int, str]) -> FlowFile:
+    return spill_flows(*args)
+
+
+def read_spill(path: str) -> Iterator[FlowBatch]:
+    """Lotes de un volcado."""
+    with open(path, "rb") as handle:
+        while True:
+            try:
+                yield pickle.load(handle)
+            except EOFError:
+                return
+
+
+class FlowIngest:
+    """
+    Lectura de varios archivos de flujos, en serie o en un pool de procesos.
+
+    Uso como context manager (los volcados se borran al salir); ``batches()``
+    entrega los lotes archivo por archivo, en orden de ruta.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str],
+        flow_format: str = AUTO_FORMAT,
+        workers: int = 1,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.paths = list(iter_flow_files(paths))
+        self.flow_format = flow_format
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.files: List[FlowFile] = []
+        self._spill_dir: Optional[str] = None
+
+    def __enter__(self) -> "FlowIngest":
+        if self.workers > 1 and len(self.paths) > 1:
+            self._spill_dir = tempfile.mkdtemp(prefix="geodesic-flows-")
+            jobs = [
+                (index, path, self.flow_format, self.batch_size, self._spill_dir)
+                for index, path in enumerate(self.paths)
+            ]
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                self.files = list(pool.map(_spill_worker, jobs))
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    def batches(self) -> Iterator[FlowBatch]:
+        if self._spill_dir is not None:
+            for flow_file in self.files:
+                if flow_file.spill_path:
+                    yield from read_spill(flow_file.spill_path)
+            return
+        # En serie: se parsea al vuelo, sin volcados
+        self.files = []
+        for index, path in enumerate(self.paths):
+            flow_file = FlowFile(index, path)
+            self.files.append(flow_file)
+            try:
+                yield from read_flows(path, self.flow_format, self.batch_size, flow_file)
+            except READ_ERRORS as exc:
+                flow_file.error = str(exc)
@@ -19,6 +19,43 @@ class ModuleConfig(BaseModel):
     alert_threshold: int = Field(default=100, ge=1, description="Alert threshold for connections per minute")
     track_ports: bool = Field(default=True, description="Track port usage")
     track_protocols: bool = Field(default=True, description="Track protocol usage")
+    rate_windows: Optional[Dict[str, int]] = Field(
+        default=None, description="Rate windows (name -> seconds); None uses minute and hour"
+    )
+    rate_thresholds: Optional[Dict[str, Dict[str, int]]] = Field(
+        default=None,
+        description="Rate thresholds (window -> total/source_ip/dest_port -> connections)",
+    )
+    rate_buckets: int = Field(default=60, ge=1, description="Buckets per rate window")
+    max_rate_keys: int = Field(
+        default=10000, ge=1, description="Max source IPs/ports with their own rates"
+    )
+    sketches: bool = Field(
+        default=False, description="Approximate summaries instead of exact IP lists"
+    )
+    sketch_precision: int = Field(default=14, ge=4, le=18, description="HyperLogLog precision")
+    top_k: int = Field(default=10, ge=1, description="Top talkers/ports reported by the sketches")
+    flow_format: str = Field(
+        default="auto", description="Flow log format: vpc, zeek, zeek_json, netflow_csv or auto"
+    )
+    flow_workers: int = Field(default=1, ge=1, description="Processes used to parse flow logs")
+    detections: bool = Field(default=True, description="Run beaconing and scan detection")
+    beacon_min_connections: int = Field(
+        default=8, ge=3, description="Min connections per pair for beaconing"
+    )
+    beacon_max_jitter: float = Field(
+        default=0.1, ge=0, description="Max coefficient of variation of beacon intervals"
+    )
+    beacon_min_interval: float = Field(
+        default=1.0, ge=0, description="Min mean beacon interval in seconds"
+    )
+    scan_window: float = Field(default=60, gt=0, description="Scan detection window in seconds")
+    scan_min_ports: int = Field(
+        default=100, ge=1, description="Distinct destination ports for a port scan"
+    )
+    scan_min_hosts: int = Field(
+        default=50, ge=1, description="Distinct destination hosts for a host sweep"
+    )
     debug: bool = Field(default=False, description="Enable debug mode")
 
 
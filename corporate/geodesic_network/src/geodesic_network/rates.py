@@ -0,0 +1,272 @@
+"""
+Sliding-window rate counters for GeodesicNetwork.
+
+Cada ventana (p.ej. minuto y hora) es un anillo de ``buckets`` contadores
+de ``ventana / buckets`` segundos (por defecto 60: buckets de 1 s para el
+minuto y de 1 min para la hora) con el total de la ventana mantenido de
+forma incremental: añadir y consultar son O(1) amortizado (avanzar el anillo
+solo limpia los buckets que vencen).
+
+``RateMonitor`` mantiene estas ventanas para el total de conexiones, por IP
+de origen y por puerto de destino, y evalúa los umbrales en cada alta: una
+alerta se emite al cruzar el umbral y se rearma cuando la tasa vuelve a
+bajar. El tiempo es el de las conexiones (marca de agua del instante más
+reciente visto), no el reloj del sistema.
+"""
+
+from collections import Counter, OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, List, Optional, Sequence, Tuple
+
+DEFAULT_WINDOWS = {"minute": 60, "hour": 3600}
+DIMENSIONS = ("total", "source_ip", "dest_port")
+
+AlertKey = Tuple[str, str, Hashable]
+
+
+class WindowCounter:
+    """
+    Contador deslizante por buckets.
+
+    Args:
+        window: Ventana en segundos
+        buckets: Número de buckets del anillo
+    """
+
+    __slots__ = ("resolution", "size", "buckets", "total", "current")
+
+    def __init__(self, window: float, buckets: int = 60):
+        self.size = max(1, int(buckets))
+        self.resolution = float(window) / self.size
+        self.buckets = [0] * self.size
+        self.total = 0
+        self.current: Optional[int] = None  # Número absoluto del bucket más reciente
+
+    def _advance(self, slot: int) -> None:
+        current = self.current
+        if current is None or slot <= current:
+            if current is None:
+                self.current = slot
+            return
+        buckets = self.buckets
+        size = self.size
+        if slot - current >= size:
+            buckets[:] = [0] * size
+            self.total = 0
+        else:
+            for step in range(current + 1, slot + 1):
+                index = step % size
+                self.total -= buckets[index]
+                buckets[index] = 0
+        self.current = slot
+
+    def add(self, when: float, count: int = 1) -> int:
+        """
+        Suma ``count`` en el instante ``when``.
+
+        Returns:
+            Total de la ventana tras la suma
+        """
+        slot = int(when // self.resolution)
+        if slot != self.current:
+            self._advance(slot)
+            if slot <= self.current - self.size:
+                # Demasiado antiguo para la ventana
+                return self.total
+        # Los eventos atrasados dentro de la ventana van a su bucket
+        self.buckets[slot % self.size] += count
+        self.total += count
+        return self.total
+
+    def value(self, now: Optional[float] = None) -> int:
+        """Total de la ventana (avanzada hasta ``now`` si se indica)."""
+        if now is not None:
+            self._advance(int(now // self.resolution))
+        return self.total
+
+
+class RateMonitor:
+    """
+    Tasas de conexiones por ventana: total, por IP de origen y por puerto.
+
+    Args:
+        windows: Ventanas (nombre -> segundos)
+        thresholds: Umbrales (ventana -> dimensión -> conexiones); las
+            dimensiones son ``total``, ``source_ip`` y ``dest_port``
+        buckets: Buckets por ventana
+        max_keys: Máximo de IPs/puertos con contadores propios; al
+            superarlo se descarta el menos reciente
+        max_alerts: Alertas recientes conservadas
+    """
+
+    def __init__(
+        self,
+        windows: Optional[Dict[str, float]] = None,
+        thresholds: Optional[Dict[str, Dict[str, int]]] = None,
+        buckets: int = 60,
+        max_keys: int = 10000,
+        max_alerts: int = 100,
+    ):
+        self.windows = dict(DEFAULT_WINDOWS if windows is None else windows)
+        self.thresholds = {window: dict(limits) for window, limits in (thresholds or {}).items()}
+        for window, limits in self.thresholds.items():
+            if window not in self.windows:
+                raise ValueError(f"Unknown rate window: {window}")
+            for dimension in limits:
+                if dimension not in DIMENSIONS:
+                    raise ValueError(f"Unknown rate dimension: {dimension}")
+        self.buckets = int(buckets)
+        self.max_keys = max(1, int(max_keys))
+        self.watermark: Optional[float] = None
+        self.total = self._new_counters()
+        self.keys: Dict[str, "OrderedDict[Hashable, List[WindowCounter]]"] = {
+            "source_ip": OrderedDict(),
+            "dest_port": OrderedDict(),
+        }
+        self.alerts: Deque[Dict[str, Any]] = deque(maxlen=max_alerts)
+        self.active: Dict[AlertKey, Dict[str, Any]] = {}
+        self.evicted_keys = 0
+        # (índice de ventana, nombre, umbral) por dimensión, para no buscarlos en cada alta
+        names = list(self.windows)
+        self._checks: Dict[str, List[Tuple[int, str, int]]] = {
+            dimension: [
+                (names.index(window), window, int(limits[dimension]))
+                for window, limits in self.thresholds.items()
+                if dimension in limits
+            ]
+            for dimension in DIMENSIONS
+        }
+
+    def _new_counters(self) -> List[WindowCounter]:
+        return [WindowCounter(seconds, self.buckets) for seconds in self.windows.values()]
+
+    def _key_counters(self, dimension: str, key: Hashable) -> List[WindowCounter]:
+        table = self.keys[dimension]
+        counters = table.get(key)
+        if counters is None:
+            if len(table) >= self.max_keys:
+                table.popitem(last=False)
+                self.evicted_keys += 1
+            counters = table[key] = self._new_counters()
+        else:
+            table.move_to_end(key)
+        return counters
+
+    def add(self, when: float, source_ip: str, dest_port: Optional[int], count: int = 1) -> None:
+        """Registra ``count`` conexiones y evalúa los umbrales afectados."""
+        if self.watermark is None or when > self.watermark:
+            self.watermark = when
+        self._update("total", None, self.total, when, count)
+        counters = self._key_counters("source_ip", source_ip)
+        self._update("source_ip", source_ip, counters, when, count)
+        if dest_port:
+            counters = self._key_counters("dest_port", dest_port)
+            self._update("dest_port", dest_port, counters, when, count)
+
+    def add_batch(
+        self,
+        times: Sequence[float],
+        source_ips: Sequence[str],
+        dest_ports: Sequence[Optional[int]],
+    ) -> None:
+        """
+        Registra un lote de conexiones.
+
+        Las conexiones con el mismo instante y clave se suman en una sola
+        actualización (los flow logs suelen tener resolución de segundos); los
+        umbrales se evalúan en orden de tiempo.
+        """
+        updates: List[Tuple[float, int, Hashable, int]] = []
+        for dimension, counts in (
+            (0, Counter(times)),
+            (1, Counter(zip(times, source_ips))),
+            (2, Counter(zip(times, dest_ports))),
+        ):
+            if dimension == 0:
+                updates.extend((when, 0, None, count) for when, count in counts.items())
+            else:
+                updates.extend((key[0], dimension, key[1], count) for key, count in counts.items())
+        updates.sort(key=lambda update: (update[0], update[1]))
+        for when, dimension, key, count in updates:
+            if self.watermark is None or when > self.watermark:
+                self.watermark = when
+            if dimension == 0:
+                self._update("total", None, self.total, when, count)
+            elif dimension == 1:
+                self._update("source_ip", key, self._key_counters("source_ip", key), when, count)
+            elif key:
+                self._update("dest_port", key, self._key_counters("dest_port", key), when, count)
+
+    def _update(
+        self,
+        dimension: str,
+        key: Optional[Hashable],
+        counters: List[WindowCounter],
+        when: float,
+        count: int,
+    ) -> None:
+        for counter in counters:
+            counter.add(when, count)
+        for index, window, threshold in self._checks[dimension]:
+            value = counters[index].total
+            alert_key = (window, dimension, key)
+            if value > threshold:
+                if alert_key not in self.active:
+                    alert = {
+                        "window": window,
+                        "dimension": dimension,
+                        "key": key,
+                        "count": value,
+                        "threshold": threshold,
+                        "timestamp": when,
+                    }
+                    self.active[alert_key] = alert
+                    self.alerts.append(alert)
+            elif alert_key in self.active:
+                del self.active[alert_key]
+
+    def rate(self, window: str, dimension: str = "total", key: Optional[Hashable] = None) -> int:
+        """
+        Conexiones en la ventana, a la marca de agua actual.
+
+        Args:
+            window: Nombre de la ventana
+            dimension: total, source_ip o dest_port
+            key: IP o puerto (dimensiones por clave)
+        """
+        index = list(self.windows).index(window)
+        if dimension == "total":
+            counters = self.total
+        else:
+            counters = self.keys[dimension].get(key)
+            if counters is None:
+                return 0
+        return counters[index].value(self.watermark)
+
+    def active_alerts(self) -> List[Dict[str, Any]]:
+        """Alertas cuya tasa sigue por encima del umbral a la marca de agua."""
+        for alert_key in list(self.active):
+            window, dimension, key = alert_key
+            if self.rate(window, dimension, key) <= self.active[alert_key]["threshold"]:
+                del self.active[alert_key]
+        return list(self.active.values())
+
+    def summary(self) -> Dict[str, int]:
+        """Total de conexiones por ventana."""
+        return {window: self.rate(window) for window in self.windows}
+
+    def clear(self) -> None:
+        self.watermark = None
+        self.total = self._new_counters()
+        for table in self.keys.values():
+            table.clear()
+        self.alerts.clear()
+        self.active.clear()
+
+
+def window_label(seconds: float) -> str:
+    """Unidad legible de una ventana (60 -> "min", 3600 -> "h")."""
+    if seconds == 60:
+        return "min"
+    if seconds == 3600:
+        return "h"
+    return f"{int(seconds)}s"
@@ -0,0 +1,403 @@
+"""
+Probabilistic traffic summaries for GeodesicNetwork.
+
+Resúmenes de memoria constante para flujos con millones de IPs distintas:
+
+    - ``HyperLogLog``: cardinalidad aproximada (IPs distintas), error típico
+      ~1.04/sqrt(2^precision) (0.8% con precision=14, 16 KB)
+    - ``CountMinSketch``: frecuencia aproximada por clave (solo sobreestima)
+    - ``HeavyHitters``: top-k de claves sobre un Count-Min Sketch
+    - ``WindowedHyperLogLog``: cardinalidad en una ventana deslizante (anillo
+      de HLL por bucket de tiempo, unidos al consultar)
+
+Todos son combinables con ``merge`` (mismos parámetros): los monitores de
+varios workers o procesos se pueden unir en uno. Los hashes son de 64 bits y
+deterministas (no dependen de ``PYTHONHASHSEED``), para que las sketches de
+procesos distintos sean compatibles.
+"""
+
+import hashlib
+import itertools
+import math
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+MASK64 = (1 << 64) - 1
+
+
+def mix64(value: int) -> int:
+    """Mezclador splitmix64 (hash de enteros de 64 bits)."""
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+@lru_cache(maxsize=65536)
+def hash64(item: Hashable) -> int:
+    """Hash de 64 bits estable entre procesos (str, bytes o int)."""
+    if isinstance(item, int):
+        return mix64(mix64(item >> 64) ^ (item & MASK64))
+    if isinstance(item, str):
+        item = item.encode("utf-8")
+    elif not isinstance(item, bytes):
+        item = repr(item).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(item, digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """
+    Estimador de cardinalidad HyperLogLog.
+
+    Args:
+        precision: Bits del índice de registro (4-18); 2^precision registros
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self._rank_bits = 64 - precision
+        self._rank_mask = (1 << self._rank_bits) - 1
+
+    def add_hash(self, hashed: int) -> None:
+        index = hashed >> self._rank_bits
+        rank = self._rank_bits - (hashed & self._rank_mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, item: Hashable) -> None:
+        self.add_hash(hash64(item))
+
+    def count(self) -> int:
+        """Cardinalidad estimada."""
+        return _estimate(self.registers)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Une otro HLL (misma precisión) en este."""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLog with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def clear(self) -> None:
+        self.registers = bytearray(len(self.registers))
+
+
+def _estimate(registers: bytes) -> int:
+    size = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / size)
+    histogram = Counter(registers)
+    harmonic = sum(count * 2.0**-rank for rank, count in histogram.items())
+    estimate = alpha * size * size / harmonic
+    zeros = histogram.get(0, 0)
+    if estimate <= 2.5 * size and zeros:
+        # Corrección de rango pequeño (linear counting)
+        estimate = size * math.log(size / zeros)
+    return int(round(estimate))
+
+
+class WindowedHyperLogLog:
+    """
+    Cardinalidad en una ventana deslizante.
+
+    Un HLL por bucket de ``window / buckets`` segundos; la consulta une los
+    buckets vivos. El tiempo es el de los eventos (marca de agua).
+
+    Args:
+        window: Ventana en segundos
+        buckets: HLL en el anillo
+        precision: Precisión de cada HLL
+    """
+
+    def __init__(self, window: float, buckets: int = 6, precision: int = 12):
+        self.size = max(1, int(buckets))
+        self.resolution = float(window) / self.size
+        self.precision = precision
+        self.sketches = [HyperLogLog(precision) for _ in range(self.size)]
+        self.current: Optional[int] = None
+
+    def _advance(self, slot: int) -> None:
+        if self.current is None:
+            self.current = slot
+            return
+        if slot <= self.current:
+            return
+        for step in range(self.current + 1, min(slot, self.current + self.size) + 1):
+            self.sketches[step % self.size].clear()
+        self.current = slot
+
+    def add_hash(self, hashed: int, when: float) -> None:
+        self.add_slot(hashed, int(when // self.resolution))
+
+    def add_slot(self, hashed: int, slot: int) -> None:
+        """Añade un hash al bucket absoluto ``slot`` (instante // resolución)."""
+        if slot != self.current:
+            self._advance(slot)
+            if slot <= self.current - self.size:
+                return
+        self.sketches[slot % self.size].add_hash(hashed)
+
+    def count(self, now: Optional[float] = None) -> int:
+        """Cardinalidad de la ventana (avanzada hasta ``now`` si se indica)."""
+        if now is not None:
+            self._advance(int(now // self.resolution))
+        registers = self.sketches[0].registers
+        for sketch in self.sketches[1:]:
+            registers = bytearray(map(max, registers, sketch.registers))
+        return _estimate(registers)
+
+    def merge(self, other: "WindowedHyperLogLog") -> None:
+        """Une otra ventana con los mismos parámetros, bucket a bucket."""
+        if (other.size, other.resolution, other.precision) != (
+            self.size,
+            self.resolution,
+            self.precision,
+        ):
+            raise ValueError("cannot merge windows with different parameters")
+        if other.current is None:
+            return
+        if self.current is None:
+            self.current = other.current
+        else:
+            self._advance(other.current)
+        # Solo los buckets de ``other`` que siguen vivos en esta ventana
+        for step in range(other.current - self.size + 1, other.current + 1):
+            if step > self.current - self.size:
+                self.sketches[step % self.size].merge(other.sketches[step % self.size])
+
+    def clear(self) -> None:
+        for sketch in self.sketches:
+            sketch.clear()
+        self.current = None
+
+
+class CountMinSketch:
+    """
+    Frecuencias aproximadas (Count-Min Sketch).
+
+    Con ``width`` w y ``depth`` d, la sobreestimación es como mucho
+    e/w * total con probabilidad 1 - e^-d.
+
+    Args:
+        width: Contadores por fila
+        depth: Filas (funciones hash)
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be >= 1")
+        self.width = int(width)
+        self.depth = int(depth)
+        self.rows = [array("Q", bytes(8 * self.width)) for _ in range(self.depth)]
+        self.total = 0
+
+    def _indexes(self, hashed: int) -> List[int]:
+        # Kirsch-Mitzenmacher: d índices a partir de dos mitades del hash
+        low = hashed & 0xFFFFFFFF
+        high = (hashed >> 32) | 1
+        width = self.width
+        return [(low + row * high) % width for row in range(self.depth)]
+
+    def add_hash(self, hashed: int, count: int = 1) -> int:
+        """Suma ``count`` y devuelve la frecuencia estimada."""
+        self.total += count
+        estimate = None
+        for row, index in zip(self.rows, self._indexes(hashed)):
+            value = row[index] + count
+            row[index] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        return estimate
+
+    def add(self, item: Hashable, count: int = 1) -> int:
+        return self.add_hash(hash64(item), count)
+
+    def estimate(self, item: Hashable) -> int:
+        """Frecuencia estimada (nunca menor que la real)."""
+        hashed = hash64(item)
+        return min(row[index] for row, index in zip(self.rows, self._indexes(hashed)))
+
+    def merge(self, other: "CountMinSketch") -> None:
+        """Suma otra sketch con las mismas dimensiones."""
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("cannot merge Count-Min sketches with different dimensions")
+        self.rows = [
+            array("Q", map(int.__add__, mine, theirs))
+            for mine, theirs in zip(self.rows, other.rows)
+        ]
+        self.total += other.total
+
+    def clear(self) -> None:
+        for row in self.rows:
+            row[:] = array("Q", bytes(8 * self.width))
+        self.total = 0
+
+
+class HeavyHitters:
+    """
+    Top-k aproximado: Count-Min Sketch y las k claves con mayor estimación.
+
+    Args:
+        k: Claves conservadas
+        width: Ancho de la Count-Min Sketch
+        depth: Profundidad de la Count-Min Sketch
+    """
+
+    def __init__(self, k: int = 10, width: int = 2048, depth: int = 4):
+        self.k = max(1, int(k))
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates: Dict[Hashable, int] = {}
+        self._floor = 0  # Menor estimación entre los candidatos (con k llenos)
+
+    def add(self, item: Hashable, count: int = 1) -> None:
+        self.add_hash(item, hash64(item), count)
+
+    def add_hash(self, item: Hashable, hashed: int, count: int = 1) -> None:
+        """Como ``add``, con el hash de ``item`` ya calculado."""
+        estimate = self.sketch.add_hash(hashed, count)
+        candidates = self.candidates
+        if item in candidates:
+            candidates[item] = estimate
+        elif len(candidates) < self.k:
+            candidates[item] = estimate
+            if len(candidates) == self.k:
+                self._floor = min(candidates.values())
+        elif estimate > self._floor:
+            del candidates[min(candidates, key=candidates.__getitem__)]
+            candidates[item] = estimate
+            self._floor = min(candidates.values())
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """Claves más frecuentes con su frecuencia estimada, de mayor a menor."""
+        ranked = sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)
+        return ranked[: limit or self.k]
+
+    def merge(self, other: "HeavyHitters") -> None:
+        """Une otro top-k: suma las sketches y reevalúa los candidatos de ambos."""
+        self.sketch.merge(other.sketch)
+        keys = set(self.candidates) | set(other.candidates)
+        estimates = {key: self.sketch.estimate(key) for key in keys}
+        ranked = sorted(estimates.items(), key=lambda item: item[1], reverse=True)[: self.k]
+        self.candidates = dict(ranked)
+        self._floor = min(self.candidates.values()) if len(self.candidates) == self.k else 0
+
+    def clear(self) -> None:
+        self.sketch.clear()
+        self.candidates.clear()
+        self._floor = 0
+
+
+class TrafficSketches:
+    """
+    Resúmenes aproximados del tráfico de un monitor.
+
+    Args:
+        windows: Ventanas para IPs distintas (nombre -> segundos)
+        precision: Precisión del HLL total (los de ventana usan 2 bits menos)
+        top_k: Claves del top de talkers y puertos
+        width: Ancho de las Count-Min Sketch
+        depth: Profundidad de las Count-Min Sketch
+    """
+
+    def __init__(
+        self,
+        windows: Dict[str, float],
+        precision: int = 14,
+        top_k: int = 10,
+        width: int = 2048,
+        depth: int = 4,
+    ):
+        self.distinct_ips = HyperLogLog(precision)
+        self.windowed_ips = {
+            name: WindowedHyperLogLog(seconds, precision=max(4, precision - 2))
+            for name, seconds in windows.items()
+        }
+        self.talkers = HeavyHitters(top_k, width, depth)
+        self.ports = HeavyHitters(top_k, width, depth)
+        self.watermark: Optional[float] = None
+
+    def add(self, when: float, source_ip: str, dest_ip: str, dest_port: Optional[int]) -> None:
+        """Registra una conexión."""
+        if self.watermark is None or when > self.watermark:
+            self.watermark = when
+        source_hash = hash64(source_ip)
+        dest_hash = hash64(dest_ip)
+        self.distinct_ips.add_hash(source_hash)
+        self.distinct_ips.add_hash(dest_hash)
+        for sketch in self.windowed_ips.values():
+            sketch.add_hash(source_hash, when)
+            sketch.add_hash(dest_hash, when)
+        self.talkers.add_hash(source_ip, source_hash)
+        if dest_port:
+            self.ports.add(dest_port)
+
+    def add_batch(
+        self,
+        times: Sequence[float],
+        source_ips: Sequence[str],
+        dest_ips: Sequence[str],
+        dest_ports: Sequence[Optional[int]],
+    ) -> None:
+        """
+        Registra un lote de conexiones (columnas).
+
+        Las repeticiones dentro del lote se agregan antes de tocar las
+        sketches: cada IP se hashea una vez, cada (bucket, IP) se añade una
+        vez a su ventana y los tops reciben un solo incremento por clave.
+        """
+        if not times:
+            return
+        latest = max(times)
+        if self.watermark is None or latest > self.watermark:
+            self.watermark = latest
+        hashes = {ip: hash64(ip) for ip in itertools.chain(set(source_ips), set(dest_ips))}
+        add_hash = self.distinct_ips.add_hash
+        for hashed in hashes.values():
+            add_hash(hashed)
+        for sketch in self.windowed_ips.values():
+            resolution = sketch.resolution
+            slots = [int(when // resolution) for when in times]
+            seen = set(zip(slots, source_ips))
+            seen.update(zip(slots, dest_ips))
+            # El orden no importa: el anillo admite buckets atrasados
+            add_slot = sketch.add_slot
+            for slot, ip in seen:
+                add_slot(hashes[ip], slot)
+        for ip, count in Counter(source_ips).items():
+            self.talkers.add_hash(ip, hashes[ip], count)
+        for port, count in Counter(dest_ports).items():
+            if port:
+                self.ports.add(port, count)
+
+    def merge(self, other: "TrafficSketches") -> None:
+        """Une los resúmenes de otro monitor (mismos parámetros)."""
+        self.distinct_ips.merge(other.distinct_ips)
+        for name, sketch in self.windowed_ips.items():
+            if name in other.windowed_ips:
+                sketch.merge(other.windowed_ips[name])
+        self.talkers.merge(other.talkers)
+        self.ports.merge(other.ports)
+        if other.watermark is not None:
+            self.watermark = max(other.watermark, self.watermark or other.watermark)
+
+    def summary(self) -> Dict[str, Any]:
+        """IPs distintas (total y por ventana) y tops de talkers y puertos."""
+        return {
+            "distinct_ips": self.distinct_ips.count(),
+            "distinct_ips_by_window": {
+                name: sketch.count(self.watermark) for name, sketch in self.windowed_ips.items()
+            },
+            "top_talkers": [{"ip": ip, "connections": count} for ip, count in self.talkers.top()],
+            "top_ports": [{"port": port, "connections": count} for port, count in self.ports.top()],
+        }
+
+    def clear(self) -> None:
+        self.distinct_ips.clear()
+        for sketch in self.windowed_ips.values():
+            sketch.clear()
+        self.talkers.clear()
+        self.ports.clear()
+        self.watermark = None
@@ -0,0 +1,369 @@
+"""
+Columnar connection store for GeodesicNetwork.
+
+Las conexiones se guardan en un buffer circular de capacidad fija respaldado
+por arrays tipados (módulo ``array``), una columna por campo:
+
+    - IPs empaquetadas en 128 bits (dos columnas ``Q``; las IPv4 se guardan
+      como IPv4-mapped ``::ffff:a.b.c.d``). Los hosts que no son una IP
+      (nombres) se guardan en una tabla aparte del store y la columna lleva
+      su índice bajo el prefijo reservado ``100::/64`` (RFC 6666, descarte)
+    - puertos (``H``, 0 = sin puerto; se validan con ``coerce_port``)
+    - código de protocolo (``H``, índice en la tabla de protocolos del
+      store; 0 = sin protocolo)
+    - timestamp epoch (``d``)
+
+Añadir una conexión escribe en la posición de cabeza y, al llenarse, se
+sobrescribe la más antigua sin copiar nada. Los modelos ``NetworkConnection``
+solo se construyen al leer filas sueltas.
+"""
+
+import socket
+from array import array
+from datetime import datetime
+from functools import lru_cache
+from numbers import Integral
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .models import NetworkConnection
+
+IPV4_MAPPED = 0xFFFF << 32
+LOW_MASK = (1 << 64) - 1
+# Palabra alta de los hosts no IP: prefijo de descarte 100::/64
+HOST_HI = 0x0100 << 48
+# Entradas de la tabla de hosts (por fila de capacidad) que fuerzan su compactación
+HOST_TABLE_FACTOR = 4
+
+# (src_hi, src_lo, dst_hi, dst_lo, src_port, dst_port, protocol, timestamp)
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("src_hi", "Q"),
+    ("src_lo", "Q"),
+    ("dst_hi", "Q"),
+    ("dst_lo", "Q"),
+    ("src_port", "H"),
+    ("dst_port", "H"),
+    ("protocol", "H"),
+    ("timestamp", "d"),
+)
+
+
+@lru_cache(maxsize=65536)
+def pack_ip(ip: str) -> int:
+    """
+    IP como entero de 128 bits (IPv4 como IPv4-mapped).
+
+    Los valores que no son una IP (vacío, nombres de host) se empaquetan
+    como 0; ``ConnectionStore.pack_host`` guarda los nombres en su tabla.
+    """
+    try:
+        return IPV4_MAPPED | int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except (OSError, TypeError):
+        pass
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+    except (OSError, TypeError):
+        return 0
+
+
+@lru_cache(maxsize=65536)
+def unpack_ip(packed: int) -> str:
+    """Inversa de ``pack_ip`` (0 -> cadena vacía)."""
+    if not packed:
+        return ""
+    if packed >> 32 == 0xFFFF:
+        return socket.inet_ntop(socket.AF_INET, (packed & 0xFFFFFFFF).to_bytes(4, "big"))
+    return socket.inet_ntop(socket.AF_INET6, packed.to_bytes(16, "big"))
+
+
+def unpack_host(packed: int, hosts: Sequence[str]) -> str:
+    """Inversa de ``ConnectionStore.pack_host``: IP o nombre de la tabla ``hosts``."""
+    if packed >> 64 == HOST_HI and (packed & LOW_MASK) < len(hosts):
+        return hosts[packed & LOW_MASK]
+    return unpack_ip(packed)
+
+
+def coerce_port(value: Any) -> Optional[int]:
+    """
+    Puerto como entero (acepta cadenas como "443").
+
+    Vacío, None y 0 equivalen a sin puerto (None).
+
+    Raises:
+        ValueError: Si no es un entero entre 0 y 65535
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, str) and value.strip().isdecimal():
+        value = int(value)
+    if not isinstance(value, Integral) or isinstance(value, bool) or not 0 <= value <= 0xFFFF:
+        raise ValueError(f"invalid port: {value!r}")
+    return int(value) or None
+
+
+def coerce_ports(ports: Sequence[Any]) -> List[Optional[int]]:
+    """``coerce_port`` para una columna (los enteros válidos no se tocan)."""
+    return [
+        port if type(port) is int and 0 < port <= 0xFFFF else coerce_port(port) for port in ports
+    ]
+
+
+class ConnectionStore:
+    """
+    Buffer circular columnar de conexiones.
+
+    Args:
+        capacity: Máximo de conexiones; al superarlo se descartan las más
+            antiguas
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = int(capacity)
+        self.columns: Dict[str, array] = {
+            name: array(typecode, bytes(array(typecode).itemsize * self.capacity))
+            for name, typecode in COLUMNS
+        }
+        self.protocols: List[Optional[str]] = [None]
+        self._protocol_codes: Dict[str, int] = {}
+        # Hosts que no son una IP (nombres), por índice
+        self.hosts: List[str] = []
+        self._host_codes: Dict[str, int] = {}
+        self.head = 0  # Próxima posición de escritura
+        self.size = 0
+        self.total_added = 0
+
+    def protocol_code(self, protocol: Optional[str]) -> int:
+        """Código interno de un protocolo (se normaliza a mayúsculas)."""
+        if not protocol:
+            return 0
+        code = self._protocol_codes.get(protocol)
+        if code is None:
+            name = protocol.upper()
+            code = self._protocol_codes.get(name)
+            if code is None:
+                code = len(self.protocols)
+                if code > 0xFFFF:
+                    raise ValueError("too many distinct protocols")
+                self.protocols.append(name)
+                self._protocol_codes[name] = code
+            self._protocol_codes[protocol] = code
+        return code
+
+    def pack_host(self, host: Any) -> int:
+        """IP empaquetada o, para nombres de host, su índice en ``hosts``."""
+        packed = pack_ip(host)
+        if packed or not host:
+            return packed
+        host = str(host)
+        code = self._host_codes.get(host)
+        if code is None:
+            code = self._host_codes[host] = len(self.hosts)
+            self.hosts.append(host)
+        return HOST_HI << 64 | code
+
+    def unpack_host(self, packed: int) -> str:
+        """Inversa de ``pack_host``."""
+        return unpack_host(packed, self.hosts)
+
+    def _compact_hosts(self) -> None:
+        """
+        Reconstruye la tabla de hosts con los nombres aún presentes en el buffer.
+
+        Las filas sobrescritas dejan nombres huérfanos en la tabla; como en el
+        buffer caben como mucho ``2 * capacity`` nombres vivos, al superar
+        ``4 * capacity`` entradas se renumeran los vivos. La tabla queda
+        acotada y el coste (una pasada por las columnas) se amortiza entre al
+        menos ``2 * capacity`` nombres nuevos.
+        """
+        old = self.hosts
+        if len(old) <= HOST_TABLE_FACTOR * self.capacity:
+            return
+        hosts: List[str] = []
+        codes: Dict[str, int] = {}
+        size = self.size
+        for hi_name, lo_name in (("src_hi", "src_lo"), ("dst_hi", "dst_lo")):
+            hi_column = self.columns[hi_name]
+            lo_column = self.columns[lo_name]
+            for index in range(size):
+                if hi_column[index] != HOST_HI or lo_column[index] >= len(old):
+                    continue
+                name = old[lo_column[index]]
+                code = codes.get(name)
+                if code is None:
+                    code = codes[name] = len(hosts)
+                    hosts.append(name)
+                lo_column[index] = code
+        self.hosts = hosts
+        self._host_codes = codes
+
+    def append(
+        self,
+        source_ip: str,
+        dest_ip: str,
+        source_port: Optional[int],
+        dest_port: Optional[int],
+        protocol: Optional[str],
+        timestamp: float,
+    ) -> None:
+        """
+        Añade una conexión.
+
+        Raises:
+            ValueError: Si un puerto no es válido (ver ``coerce_port``)
+        """
+        source_port = coerce_port(source_port)
+        dest_port = coerce_port(dest_port)
+        src = self.pack_host(source_ip)
+        dst = self.pack_host(dest_ip)
+        columns = self.columns
+        index = self.head
+        columns["src_hi"][index] = src >> 64
+        columns["src_lo"][index] = src & LOW_MASK
+        columns["dst_hi"][index] = dst >> 64
+        columns["dst_lo"][index] = dst & LOW_MASK
+        columns["src_port"][index] = source_port or 0
+        columns["dst_port"][index] = dest_port or 0
+        columns["protocol"][index] = self.protocol_code(protocol)
+        columns["timestamp"][index] = timestamp
+        self.head = (index + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+        self.total_added += 1
+        self._compact_hosts()
+
+    def extend(
+        self,
+        source_ips: Sequence[str],
+        dest_ips: Sequence[str],
+        source_ports: Optional[Sequence[Optional[int]]] = None,
+        dest_ports: Optional[Sequence[Optional[int]]] = None,
+        protocols: Optional[Sequence[Optional[str]]] = None,
+        timestamps: Optional[Sequence[float]] = None,
+        default_timestamp: float = 0.0,
+    ) -> int:
+        """
+        Añade conexiones columna a columna.
+
+        Las columnas opcionales ausentes se rellenan con 0/None y
+        ``default_timestamp``.
+
+        Returns:
+            Conexiones añadidas
+
+        Raises:
+            ValueError: Si las columnas difieren en longitud o un puerto no es
+                válido (no se añade ninguna fila)
+        """
+        count = len(source_ips)
+        if len(dest_ips) != count:
+            raise ValueError("columns must have the same length")
+        # Puertos y longitudes se validan antes de registrar nombres de host
+        batch = {
+            "src_port": _port_column(source_ports, count),
+            "dst_port": _port_column(dest_ports, count),
+            "timestamp": (
+                array("d", timestamps)
+                if timestamps is not None
+                else array("d", [default_timestamp]) * count
+            ),
+        }
+        if protocols is not None and len(protocols) != count:
+            raise ValueError("columns must have the same length")
+        for name, column in batch.items():
+            if len(column) != count:
+                raise ValueError("columns must have the same length")
+        protocol_code = self.protocol_code
+        batch["protocol"] = (
+            array("H", [protocol_code(p) for p in protocols])
+            if protocols is not None
+            else array("H", bytes(2 * count))
+        )
+        pack = self.pack_host
+        src = [pack_ip(ip) or pack(ip) for ip in source_ips]
+        dst = [pack_ip(ip) or pack(ip) for ip in dest_ips]
+        batch["src_hi"] = array("Q", [value >> 64 for value in src])
+        batch["src_lo"] = array("Q", [value & LOW_MASK for value in src])
+        batch["dst_hi"] = array("Q", [value >> 64 for value in dst])
+        batch["dst_lo"] = array("Q", [value & LOW_MASK for value in dst])
+        self.extend_packed(batch)
+        self._compact_hosts()
+        return count
+
+    def extend_packed(self, batch: Dict[str, array]) -> None:
+        """
+        Añade columnas ya empaquetadas (mismos nombres y tipos que ``COLUMNS``).
+
+        Solo se escriben las últimas ``capacity`` filas; la escritura usa
+        asignación por slices (como mucho dos por columna).
+        """
+        count = len(batch["timestamp"])
+        if not count:
+            return
+        skip = max(0, count - self.capacity)
+        written = count - skip
+        head = self.head
+        first = min(written, self.capacity - head)
+        for name, column in self.columns.items():
+            values = batch[name]
+            column[head : head + first] = values[skip : skip + first]
+            if first < written:
+                column[: written - first] = values[skip + first :]
+        self.head = (head + written) % self.capacity
+        self.size = min(self.capacity, self.size + written)
+        self.total_added += count
+
+    def ordered(self) -> Dict[str, array]:
+        """Copia de las columnas en orden cronológico de llegada."""
+        if self.size < self.capacity:
+            return {name: column[: self.size] for name, column in self.columns.items()}
+        head = self.head
+        return {name: column[head:] + column[:head] for name, column in self.columns.items()}
+
+    def _slot(self, position: int) -> int:
+        return (self.head - self.size + position) % self.capacity
+
+    def row(self, position: int) -> NetworkConnection:
+        """Conexión en la posición dada (0 = la más antigua)."""
+        index = self._slot(position)
+        columns = self.columns
+        protocol = self.protocols[columns["protocol"][index]]
+        return NetworkConnection(
+            source_ip=self.unpack_host(columns["src_hi"][index] << 64 | columns["src_lo"][index]),
+            dest_ip=self.unpack_host(columns["dst_hi"][index] << 64 | columns["dst_lo"][index]),
+            source_port=columns["src_port"][index] or None,
+            dest_port=columns["dst_port"][index] or None,
+            protocol=protocol,
+            timestamp=datetime.fromtimestamp(columns["timestamp"][index]).isoformat(),
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, position: int) -> NetworkConnection:
+        if position < 0:
+            position += self.size
+        if not 0 <= position < self.size:
+            raise IndexError("connection index out of range")
+        return self.row(position)
+
+    def __iter__(self) -> Iterator[NetworkConnection]:
+        for position in range(self.size):
+            yield self.row(position)
+
+    def clear(self) -> None:
+        self.head = 0
+        self.size = 0
+        self.hosts = []
+        self._host_codes = {}
+
+
+def _port_column(ports: Optional[Sequence[Optional[int]]], count: int) -> array:
+    if ports is None:
+        return array("H", bytes(2 * count))
+    try:
+        return array("H", [port or 0 for port in ports])
+    except (TypeError, OverflowError):
+        return array("H", [port or 0 for port in coerce_ports(ports)])
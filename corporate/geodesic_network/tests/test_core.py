@@ -2,6 +2,8 @@
 Unit tests for GeodesicNetwork (Production)
 """
 
+import gzip
+import json
 import sys
 from pathlib import Path
 
@@ -15,7 +17,18 @@ if str(SRC) not in sys.path:
 import pytest
 
 from geodesic_network.core import GeodesicNetwork
+from geodesic_network.detection import HAS_NUMPY, detect_beacons, detect_scans
+from geodesic_network.flows import detect_flow_format, read_flows
 from geodesic_network.models import AnalysisResult, TrafficAnalysis
+from geodesic_network.rates import RateMonitor, WindowCounter
+from geodesic_network.sketches import (
+    CountMinSketch,
+    HeavyHitters,
+    HyperLogLog,
+    WindowedHyperLogLog,
+    hash64,
+)
+from geodesic_network.store import ConnectionStore, pack_ip, unpack_ip
 
 
 @pytest.fixture
@@ -60,6 +73,469 @@ class TestConnectionTracking:
         assert len(analysis.unique_ips) == 4
 
 
+class TestConnectionStore:
+    """Tests para el buffer circular columnar"""
+
+    def test_ring_buffer_keeps_latest(self):
+        """Test que al llenarse se sobrescriben las más antiguas, en orden"""
+        modulo = GeodesicNetwork(config={"max_connections": 3})
+        for index in range(5):
+            modulo.add_connection(
+                f"10.0.0.{index}", "10.0.1.1", dest_port=80 + index, timestamp=index
+            )
+        assert len(modulo.connections) == 3
+        assert [conn.source_ip for conn in modulo.connections] == [
+            "10.0.0.2",
+            "10.0.0.3",
+            "10.0.0.4",
+        ]
+        assert modulo.connections[-1].dest_port == 84
+        assert modulo.connections.total_added == 5
+
+    def test_bulk_columns_wrap_around(self):
+        """Test carga por columnas que da la vuelta y que supera la capacidad"""
+        store = ConnectionStore(4)
+        store.append("10.0.0.100", "10.0.1.1", None, 443, "tcp", 0.0)
+        store.extend(
+            ["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4"],
+            ["10.0.1.1"] * 4,
+            timestamps=[1, 2, 3, 4],
+        )
+        assert [conn.source_ip for conn in store] == [
+            "10.0.0.1",
+            "10.0.0.2",
+            "10.0.0.3",
+            "10.0.0.4",
+        ]
+        store.extend([f"10.0.0.{i}" for i in range(10, 16)], ["10.0.1.1"] * 6, dest_ports=[22] * 6)
+        assert [conn.source_ip for conn in store] == [
+            "10.0.0.12",
+            "10.0.0.13",
+            "10.0.0.14",
+            "10.0.0.15",
+        ]
+        assert list(store.ordered()["dst_port"]) == [22, 22, 22, 22]
+        with pytest.raises(ValueError):
+            store.extend(["10.0.0.1"], [])
+
+    def test_packed_values_round_trip(self):
+        """Test IPv4/IPv6 empaquetadas y protocolos normalizados"""
+        store = ConnectionStore(2)
+        store.append("2001:db8::1", "192.168.1.1", 51000, 53, "udp", 1700000000.0)
+        conn = store[0]
+        assert (conn.source_ip, conn.dest_ip, conn.source_port, conn.protocol) == (
+            "2001:db8::1",
+            "192.168.1.1",
+            51000,
+            "UDP",
+        )
+        assert unpack_ip(pack_ip("not-an-ip")) == ""
+
+    def test_host_names_and_port_strings(self):
+        """Test nombres de host en tabla aparte y puertos como cadenas"""
+        modulo = GeodesicNetwork()
+        modulo.add_connection("db.internal", "10.0.0.1", source_port="51000", dest_port="443")
+        modulo.add_connections(
+            ["10.0.0.2", "api.example.com"], ["db.internal", ""], dest_ports=["22", 8080]
+        )
+        assert [(c.source_ip, c.dest_ip, c.dest_port) for c in modulo.connections] == [
+            ("db.internal", "10.0.0.1", 443),
+            ("10.0.0.2", "db.internal", 22),
+            ("api.example.com", "", 8080),
+        ]
+        assert modulo.connections.hosts == ["db.internal", "api.example.com"]
+        analysis = modulo.analyze_traffic()
+        assert {"db.internal", "api.example.com", "10.0.0.1"} <= set(analysis.unique_ips)
+        assert analysis.port_usage == {"443": 1, "22": 1, "8080": 1}
+        for port in ("https", 70000, -1, 443.5):
+            with pytest.raises(ValueError):
+                modulo.add_connection("10.0.0.1", "10.0.0.2", dest_port=port)
+        with pytest.raises(ValueError):
+            modulo.add_connections(
+                ["10.0.0.1", "10.0.0.2"], ["10.0.0.3"] * 2, dest_ports=[80, 65536]
+            )
+        assert len(modulo.connections) == 3
+
+    def test_host_table_is_bounded(self):
+        """Test que la tabla de hosts se compacta con los nombres vivos"""
+        store = ConnectionStore(8)
+        for index in range(200):
+            store.append(f"host-{index}.lan", "gateway.lan", None, 80, "tcp", float(index))
+        assert len(store.hosts) <= 4 * 8
+        store.extend([f"bulk-{i}.lan" for i in range(50)], ["10.0.0.1"] * 50)
+        assert len(store.hosts) <= 4 * 8
+        store.append("last.lan", "gateway.lan", None, 80, "tcp", 300.0)
+        assert [conn.source_ip for conn in store][-3:] == ["bulk-48.lan", "bulk-49.lan", "last.lan"]
+        assert store[-1].dest_ip == "gateway.lan"
+        with pytest.raises(ValueError):
+            store.extend(["new.lan"], ["other.lan"], dest_ports=["http"])
+        assert "new.lan" not in store.hosts
+
+
+class TestRates:
+    """Tests para tasas por ventana de tiempo"""
+
+    def test_window_counter_slides(self):
+        """Test que los buckets vencidos salen del total"""
+        counter = WindowCounter(60, buckets=60)
+        for second in range(0, 120, 2):
+            counter.add(1000 + second)
+        assert counter.value() == 30
+        counter.add(1000 + 90, count=5)  # atrasado, dentro de la ventana
+        assert counter.value() == 35
+        counter.add(1000 + 10)  # fuera de la ventana
+        assert counter.value() == 35
+        assert counter.value(now=1000 + 500) == 0
+
+    def test_threshold_alerts_fire_once_and_rearm(self):
+        """Test alerta al cruzar el umbral, una sola vez, y rearme"""
+        rates = RateMonitor({"minute": 60}, {"minute": {"source_ip": 3}})
+        for second in range(6):
+            rates.add(second, "10.0.0.1", 22)
+        assert len(rates.alerts) == 1
+        assert rates.alerts[0]["key"] == "10.0.0.1"
+        assert rates.alerts[0]["count"] == 4
+        rates.add(500, "10.0.0.2", 22)
+        assert rates.active_alerts() == []
+        for second in range(600, 604):
+            rates.add(second, "10.0.0.1", 22)
+        assert len(rates.alerts) == 2
+
+    def test_rate_depends_on_time_not_buffer(self):
+        """Test que la tasa por minuto usa el tiempo de las conexiones"""
+        modulo = GeodesicNetwork(config={"alert_threshold": 10})
+        modulo.add_connections(
+            ["10.0.0.1"] * 250,
+            ["10.0.1.1"] * 250,
+            dest_ports=[443] * 250,
+            timestamps=[1700000000 + second * 12 for second in range(250)],
+        )
+        summary = modulo.analyze_traffic().analysis_summary
+        assert summary["connections_per_minute"] == 5
+        assert summary["rates"]["hour"] == 250
+        assert summary["alerts"] == []
+
+        for _ in range(20):
+            modulo.add_connection("10.0.0.9", "10.0.1.1", dest_port=22, timestamp=1700003600)
+        summary = modulo.analyze_traffic().analysis_summary
+        assert summary["alerts"] == ["High connection rate: 20/min"]
+        assert summary["rate_alerts"][0]["count"] == 11
+
+
+class TestSketches:
+    """Tests para resúmenes aproximados"""
+
+    def test_hyperloglog_estimate_and_merge(self):
+        """Test error acotado y unión de HLL"""
+        first, second = HyperLogLog(14), HyperLogLog(14)
+        for index in range(60000):
+            first.add(f"10.0.{index >> 8}.{index & 255}")
+            second.add(f"10.0.{(index + 30000) >> 8}.{(index + 30000) & 255}")
+        assert abs(first.count() - 60000) / 60000 < 0.03
+        first.merge(second)
+        assert abs(first.count() - 90000) / 90000 < 0.03
+        with pytest.raises(ValueError):
+            first.merge(HyperLogLog(10))
+
+    def test_windowed_hyperloglog_forgets_old_buckets(self):
+        """Test IPs distintas solo dentro de la ventana"""
+        window = WindowedHyperLogLog(60, buckets=6, precision=12)
+        for second in range(0, 600):
+            window.add_hash(hash64(f"ip-{second}"), second)
+        assert 50 <= window.count() <= 70
+
+    def test_count_min_and_heavy_hitters(self):
+        """Test que Count-Min no subestima y que el top-k encuentra los grandes"""
+        sketch = CountMinSketch(width=64, depth=4)
+        hitters = HeavyHitters(k=3, width=256)
+        for index in range(5000):
+            key = f"talker-{index % 3}" if index % 2 else f"noise-{index}"
+            sketch.add(key)
+            hitters.add(key)
+        assert sketch.estimate("talker-0") >= 833
+        assert {key for key, _ in hitters.top()} == {"talker-0", "talker-1", "talker-2"}
+
+    def test_monitors_merge_sketches(self):
+        """Test monitores por worker combinados en uno"""
+        config = {"sketches": True, "top_k": 2}
+        workers = [GeodesicNetwork(config=config) for _ in range(2)]
+        for offset, worker in enumerate(workers):
+            sources = [f"10.0.{offset}.{index % 200}" for index in range(1000)] + ["10.9.9.9"] * 300
+            worker.add_connections(
+                sources, ["192.168.1.1"] * len(sources), dest_ports=[443] * len(sources)
+            )
+        workers[0].merge_sketches(workers[1])
+        summary = workers[0].analyze_traffic()
+        assert summary.unique_ips == []
+        sketches = summary.analysis_summary["sketches"]
+        assert abs(summary.analysis_summary["unique_ip_count"] - 402) < 10
+        assert sketches["top_talkers"][0] == {"ip": "10.9.9.9", "connections": 600}
+        assert sketches["top_ports"][0]["port"] == 443
+        assert abs(sketches["distinct_ips_by_window"]["minute"] - 402) < 10
+
+
+VPC_LOG = (
+    "version account-id interface-id srcaddr dstaddr srcport dstport protocol packets bytes"
+    " start end action log-status\n"
+    """2 123456789010 eni-1 10.0.1.5 172.31.0.10 49152 443 6 10 840 1700000000 1700000060 ACCEPT OK
+2 123456789010 eni-1 10.0.1.6 172.31.0.10 53000 53 17 1 76 1700000001 1700000061 ACCEPT OK
+2 123456789010 eni-1 - - - - - - - 1700000002 1700000062 - NODATA
+"""
+)
+
+ZEEK_LOG = """#separator \\x09
+#set_separator\t,
+#empty_field\t(empty)
+#unset_field\t-
+#path\tconn
+#fields\tts\tuid\tid.orig_h\tid.orig_p\tid.resp_h\tid.resp_p\tproto\tservice
+#types\ttime\tstring\taddr\tport\taddr\tport\tenum\tstring
+1700000000.5\tC1\t10.0.1.5\t49152\t172.31.0.10\t22\ttcp\tssh
+1700000001.5\tC2\tfe80::1\t5353\tff02::fb\t5353\tudp\t-
+"""
+
+NETFLOW_CSV = """ts,te,sa,da,sp,dp,pr,ipkt
+2023-11-14 22:13:20,2023-11-14 22:13:21,10.0.1.5,172.31.0.10,49152,3389,TCP,4
+2023-11-14 22:13:21,2023-11-14 22:13:22,10.0.1.7,172.31.0.11,0,0,1,1
+Summary
+"""
+
+
+class TestFlowIngestion:
+    """Tests para ingesta de flow logs"""
+
+    def test_vpc_flow_logs(self, modulo, tmp_path):
+        """Test VPC con cabecera, protocolos numéricos y registros NODATA"""
+        path = tmp_path / "vpc.log"
+        path.write_text(VPC_LOG)
+        stats = modulo.load_flows([str(path)])
+        assert stats["records"] == 2 and stats["skipped"] == 1
+        assert stats["formats"] == {"vpc": 1}
+        first = modulo.connections[0]
+        assert (first.source_ip, first.dest_port, first.protocol) == ("10.0.1.5", 443, "TCP")
+        assert modulo.connections[1].protocol == "UDP"
+        assert modulo.connections.ordered()["timestamp"][0] == 1700000000
+
+    def test_zeek_tsv_and_json(self, tmp_path):
+        """Test conn.log TSV (con IPv6) y JSON"""
+        tsv = tmp_path / "conn.log"
+        tsv.write_text(ZEEK_LOG)
+        batches = list(read_flows(str(tsv)))
+        assert batches[0]["dest_ips"] == ["172.31.0.10", "ff02::fb"]
+        assert batches[0]["protocols"] == ["TCP", "UDP"]
+        assert batches[0]["timestamps"][0] == 1700000000.5
+        lines = [
+            json.dumps(
+                {
+                    "ts": "2023-11-14T22:13:20Z",
+                    "id.orig_h": "10.0.1.5",
+                    "id.orig_p": 1234,
+                    "id.resp_h": "10.0.0.1",
+                    "id.resp_p": 80,
+                    "proto": "tcp",
+                }
+            ),
+            "not json",
+        ]
+        assert detect_flow_format(lines) == "zeek_json"
+        source = tmp_path / "conn.json"
+        source.write_text("\n".join(lines) + "\n")
+        batches = list(read_flows(str(source)))
+        assert batches[0]["timestamps"] == [1700000000.0]
+        assert batches[0]["dest_ports"] == [80]
+
+    def test_netflow_csv_gzip_and_directories(self, modulo, tmp_path):
+        """Test CSV comprimido dentro de un directorio, con archivo ilegible"""
+        flows = tmp_path / "flows"
+        flows.mkdir()
+        with gzip.open(flows / "nfdump.csv.gz", "wt") as handle:
+            handle.write(NETFLOW_CSV)
+        (flows / "notes.txt").write_text("nothing to see here\n")
+        stats = modulo.load_flows([str(flows)])
+        assert stats["records"] == 2 and stats["skipped"] == 1
+        assert list(stats["file_errors"]) == [str(flows / "notes.txt")]
+        assert modulo.connections[0].dest_port == 3389
+        assert modulo.connections[1].protocol == "ICMP"
+        assert modulo.connections[1].dest_port is None
+
+    def test_parallel_matches_serial(self, tmp_path):
+        """Test ingesta con varios procesos igual a la secuencial"""
+        paths = []
+        for index in range(3):
+            path = tmp_path / f"vpc-{index}.log.gz"
+            rows = [
+                f"2 1 eni-{index} 10.{index}.0.{row % 50} 172.31.0.{row % 7} 40000 "
+                f"{row % 1024} 6 1 60 {1700000000 + row} {1700000001 + row} ACCEPT OK"
+                for row in range(500)
+            ]
+            with gzip.open(path, "wt") as handle:
+                handle.write("\n".join(rows) + "\n")
+            paths.append(str(path))
+        serial = GeodesicNetwork(config={"max_connections": 5000})
+        parallel = GeodesicNetwork(config={"max_connections": 5000, "flow_workers": 2})
+        serial_stats = serial.load_flows(paths, batch_size=128)
+        parallel_stats = parallel.load_flows(paths, batch_size=128)
+        assert serial_stats == parallel_stats
+        assert serial_stats["records"] == 1500
+        assert serial.connections.ordered() == parallel.connections.ordered()
+
+    def test_truncated_file_same_in_parallel(self, tmp_path):
+        """Test que un gzip truncado conserva los mismos lotes en serie y en paralelo"""
+        paths = []
+        for index in range(2):
+            path = tmp_path / f"vpc-{index}.log.gz"
+            with gzip.open(path, "wt") as handle:
+                for row in range(5000):
+                    handle.write(
+                        f"2 1 eni-{index} 10.{index}.{row >> 8}.{row % 256} "
+                        f"172.31.0.{row % 7} 40000 {row % 1024} 6 1 60 "
+                        f"{1700000000 + row} {1700000001 + row} ACCEPT OK\n"
+                    )
+            paths.append(str(path))
+        data = Path(paths[0]).read_bytes()
+        Path(paths[0]).write_bytes(data[: len(data) // 2])
+
+        serial = GeodesicNetwork(config={"max_connections": 20000})
+        parallel = GeodesicNetwork(config={"max_connections": 20000, "flow_workers": 2})
+        serial_stats = serial.load_flows(paths, batch_size=128)
+        parallel_stats = parallel.load_flows(paths, batch_size=128)
+        assert serial_stats == parallel_stats
+        assert list(serial_stats["file_errors"]) == [paths[0]]
+        assert 5000 < len(serial.connections) < 10000
+        assert serial_stats["records"] == len(serial.connections)
+        assert serial_stats["files_read"] == 1
+        assert serial.connections.ordered() == parallel.connections.ordered()
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_corrupt_gzip_is_a_file_error(self, tmp_path, workers):
+        """Test que un gzip con datos corruptos (zlib.error) no aborta la carga"""
+        good = tmp_path / "good.log"
+        good.write_text(VPC_LOG)
+        rows = "".join(
+            f"2 1 eni-0 10.0.{row >> 8}.{row % 256} 172.31.0.{row % 7} 40000 {row % 1024} 6 1 60 "
+            f"{1700000000 + row} {1700000001 + row} ACCEPT OK\n"
+            for row in range(5000)
+        )
+        data = gzip.compress(rows.encode())
+        corrupt = tmp_path / "corrupt.csv.gz"
+        corrupt.write_bytes(data[:40] + bytes(byte ^ 0xFF for byte in data[40:80]) + data[80:])
+
+        monitor = GeodesicNetwork(config={"flow_workers": workers})
+        result = monitor.analyze(flow_paths=[str(corrupt), str(good)])
+        flows = result.data["flows"]
+        assert list(flows["file_errors"]) == [str(corrupt)]
+        assert "decompressing" in flows["file_errors"][str(corrupt)]
+        assert flows["files_read"] == 1
+        assert result.data["total_connections"] == flows["records"]
+
+    def test_analyze_flow_paths(self, modulo, tmp_path):
+        """Test analyze sobre flow logs"""
+        path = tmp_path / "vpc.log"
+        path.write_text(VPC_LOG)
+        result = modulo.analyze(flow_paths=[str(path), str(tmp_path / "missing.log")])
+        assert result.status == "success"
+        assert result.data["total_connections"] == 2
+        assert result.data["flows"]["records"] == 2
+        assert len(result.errors) == 1
+
+
+DETECTION_PATHS = [False] + ([True] if HAS_NUMPY else [])
+
+
+def detection_traffic():
+    """Beacon cada 300 s con jitter, ruido aleatorio, un escaneo y un barrido"""
+    import random
+
+    rng = random.Random(7)
+    monitor = GeodesicNetwork(config={"max_connections": 20000})
+    start = 1700000000.0
+    beacon_times = [start + index * 300 + rng.uniform(-5, 5) for index in range(40)]
+    monitor.add_connections(
+        ["10.0.0.66"] * 40, ["203.0.113.9"] * 40, dest_ports=[443] * 40, timestamps=beacon_times
+    )
+    noise = [start + rng.uniform(0, 12000) for _ in range(3000)]
+    monitor.add_connections(
+        [f"10.0.1.{rng.randrange(20)}" for _ in noise],
+        [f"198.51.100.{rng.randrange(30)}" for _ in noise],
+        dest_ports=[rng.choice((80, 443, 53)) for _ in noise],
+        timestamps=noise,
+    )
+    monitor.add_connections(
+        ["10.0.0.99"] * 500,
+        ["10.0.2.1"] * 500,
+        dest_ports=list(range(1, 501)),
+        timestamps=[start + 600 + index * 0.05 for index in range(500)],
+    )
+    monitor.add_connections(
+        ["10.0.0.77"] * 80,
+        [f"10.0.3.{index}" for index in range(80)],
+        timestamps=[start + 1200 + index * 0.1 for index in range(80)],
+    )
+    return monitor
+
+
+class TestDetection:
+    """Tests para detección de beaconing y escaneos"""
+
+    @pytest.mark.parametrize("use_numpy", DETECTION_PATHS)
+    def test_beaconing(self, use_numpy):
+        """Test que solo el par periódico es beacon"""
+        columns = detection_traffic().connections.ordered()
+        beacons = detect_beacons(columns, use_numpy=use_numpy)
+        assert [(b["source_ip"], b["dest_ip"]) for b in beacons] == [("10.0.0.66", "203.0.113.9")]
+        assert beacons[0]["connections"] == 40
+        assert abs(beacons[0]["interval"] - 300) < 1
+        assert beacons[0]["jitter"] < 0.05
+
+    @pytest.mark.parametrize("use_numpy", DETECTION_PATHS)
+    def test_scans(self, use_numpy):
+        """Test escaneo de puertos y barrido de hosts por ventana"""
+        columns = detection_traffic().connections.ordered()
+        scans = detect_scans(columns, window=60, use_numpy=use_numpy)
+        assert [(s["source_ip"], s["type"]) for s in scans] == [
+            ("10.0.0.99", "port_scan"),
+            ("10.0.0.77", "host_sweep"),
+        ]
+        assert scans[0]["distinct_ports"] == 500 and scans[0]["distinct_hosts"] == 1
+        assert scans[1]["distinct_hosts"] == 80 and scans[1]["distinct_ports"] == 0
+
+    @pytest.mark.parametrize("use_numpy", DETECTION_PATHS)
+    def test_hostname_scan_source(self, use_numpy):
+        """Test escaneo cuyo origen es un nombre de host (tabla de hosts)"""
+        monitor = GeodesicNetwork(config={"scan_min_ports": 20, "scan_min_hosts": 1000})
+        monitor.add_connections(
+            ["scanner.lan"] * 30,
+            ["10.0.2.1"] * 30,
+            dest_ports=list(range(1, 31)),
+            timestamps=[60.0] * 30,
+        )
+        scans = detect_scans(
+            monitor.connections.ordered(),
+            min_ports=20,
+            use_numpy=use_numpy,
+            hosts=monitor.connections.hosts,
+        )
+        assert [(s["source_ip"], s["distinct_ports"]) for s in scans] == [("scanner.lan", 30)]
+        result = monitor.analyze()
+        assert result.data["analysis_summary"]["scans"][0]["source_ip"] == "scanner.lan"
+
+    @pytest.mark.skipif(not HAS_NUMPY, reason="NumPy not installed")
+    def test_numpy_matches_fallback(self):
+        """Test que ambas implementaciones coinciden"""
+        columns = detection_traffic().connections.ordered()
+        for detector in (detect_beacons, detect_scans):
+            assert detector(columns, use_numpy=True) == detector(columns, use_numpy=False)
+
+    def test_analyze_traffic_reports_detections(self):
+        """Test resultados en el resumen y desactivación por config"""
+        monitor = detection_traffic()
+        summary = monitor.analyze_traffic().analysis_summary
+        assert summary["beacons"][0]["source_ip"] == "10.0.0.66"
+        assert {scan["source_ip"] for scan in summary["scans"]} == {"10.0.0.99", "10.0.0.77"}
+        quiet = GeodesicNetwork(config={"detections": False})
+        assert "beacons" not in quiet.analyze_traffic().analysis_summary
+
+
 class TestAnalyze:
     """Tests para funcionalidad de análisis"""
 
@@ -72,6 +548,22 @@ class TestAnalyze:
         assert isinstance(result, AnalysisResult)
         assert result.status == "success"
 
+    def test_analyze_reports_invalid_ports(self, modulo):
+        """Test que las conexiones con puertos no válidos se omiten e informan"""
+        connections = [
+            {"source_ip": "web01", "dest_ip": "10.0.0.1", "dest_port": "443"},
+            {"source_ip": "10.0.0.2", "dest_ip": "10.0.0.1", "dest_port": 70000},
+            {"source_ip": "10.0.0.3", "dest_ip": "10.0.0.1", "source_port": "x", "dest_port": 80},
+        ]
+        result = modulo.analyze(connections=connections)
+        assert result.data["total_connections"] == 1
+        assert result.data["port_usage"] == {"443": 1}
+        assert "web01" in result.data["unique_ips"]
+        assert result.errors == [
+            "connection 1: invalid port: 70000",
+            "connection 2: invalid port: 'x'",
+        ]
+
     def test_analyze_without_connections(self, modulo):
         """Test analyze sin conexiones previas"""
         result = modulo.analyze()
@@ -0,0 +1,83 @@
+"""
+Benchmark del clasificador de IOCs de HelixFilter.
+
+Compara el clasificador por clases de caracteres (``classify_ioc`` /
+``classify_many``) con la ruta histórica de expresiones regulares en
+secuencia, sobre una mezcla de IOCs dominada por dominios (como el tráfico
+de proxy).
+
+Uso:
+    python examples/benchmark_classifier.py [n_iocs]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from helix_filter.classify import classify_ioc, classify_many  # noqa: E402
+
+
+def legacy_classify(ioc: str) -> str:
+    """Clasificador histórico (regex sin compilar, en secuencia)."""
+    ioc_lower = ioc.lower().strip()
+    if ioc_lower.startswith(("http://", "https://", "ftp://")):
+        return "url"
+    if re.match(r"^(?:\d{1,3}\.){3}\d{1,3}$", ioc_lower):
+        return "ip"
+    if re.match(r"^[a-f0-9]{32}$|^[a-f0-9]{40}$|^[a-f0-9]{64}$", ioc_lower):
+        return "hash"
+    if re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", ioc_lower):
+        return "email"
+    if re.match(
+        r"^[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?"
+        r"(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*\.[a-zA-Z]{2,}$",
+        ioc_lower,
+    ):
+        return "domain"
+    return "unknown"
+
+
+def sample_iocs(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    domains = [f"cdn{i}.service-{i % 97}.example.com" for i in range(5000)]
+    iocs = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.70:
+            iocs.append(rng.choice(domains))
+        elif roll < 0.85:
+            iocs.append(f"https://{rng.choice(domains)}/path?q={rng.randint(0, 999)}")
+        elif roll < 0.93:
+            iocs.append(".".join(str(rng.randint(0, 255)) for _ in range(4)))
+        elif roll < 0.97:
+            iocs.append("%032x" % rng.getrandbits(128))
+        else:
+            iocs.append(f"user{rng.randint(0, 999)}@mail.example.org")
+    return iocs
+
+
+def bench(label: str, func, iocs: list) -> float:
+    started = time.perf_counter()
+    func(iocs)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed:8.3f}s  {len(iocs) / elapsed / 1e6:6.2f} M IOCs/s")
+    return elapsed
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    iocs = sample_iocs(n)
+    assert [legacy_classify(i) for i in iocs[:20000]] == [classify_ioc(i) for i in iocs[:20000]]
+
+    base = bench("regex (histórico)", lambda items: [legacy_classify(i) for i in items], iocs)
+    fast = bench("classify_ioc", lambda items: [classify_ioc(i) for i in items], iocs)
+    batch = bench("classify_many", classify_many, iocs)
+    print(f"\nspeedup: classify_ioc x{base / fast:.1f}, classify_many x{base / batch:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Verdict cache for HelixFilter.
+
+El tráfico de proxy repite constantemente los mismos dominios. La caché
+guarda, por IOC normalizado, el tipo clasificado y el veredicto del índice
+(amenaza o limpio), de modo que los IOCs repetidos no vuelven a clasificarse
+ni a consultarse.
+
+Invalidación:
+    - generación: cada veredicto pertenece a una generación del
+      ``ThreatStore``; al publicarse otra, la caché se vacía entera
+    - TTL: un veredicto caduca a los ``ttl`` segundos, o antes si la
+      entrada de amenaza que lo produjo expira
+    - tamaño: al superar ``max_size`` se descarta el menos usado (LRU)
+
+Las operaciones se serializan con un lock: la caché puede compartirse
+entre hilos que analizan a la vez.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# (tipo de IOC, información de amenaza o None si es limpio)
+Verdict = Tuple[str, Optional[Dict[str, Any]]]
+
+
+class VerdictCache:
+    """Caché LRU/TTL de veredictos basada en OrderedDict."""
+
+    def __init__(self, max_size: int = 100000, ttl: Optional[float] = 300.0):
+        self.max_size = max(0, int(max_size))
+        self.ttl = float(ttl) if ttl else None
+        self.generation: Optional[int] = None
+        self._data: "OrderedDict[str, Tuple[float, Verdict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(ioc: str) -> str:
+        """Forma normalizada con la que se clasifica y se consulta un IOC."""
+        return ioc.strip().lower()
+
+    def sync(self, generation: int) -> None:
+        """Vacía la caché si el índice publicó otra generación."""
+        with self._lock:
+            if generation != self.generation:
+                if self._data:
+                    self._data.clear()
+                    self.invalidations += 1
+                self.generation = generation
+
+    def get(self, key: str, now: float) -> Optional[Verdict]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            deadline, verdict = entry
+            if deadline <= now:
+                del self._data[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return verdict
+
+    def put(self, key: str, verdict: Verdict, now: float) -> None:
+        if self.max_size == 0:
+            return
+        deadline = now + self.ttl if self.ttl else float("inf")
+        info = verdict[1]
+        if info is not None and info.get("expires_at") is not None:
+            deadline = min(deadline, info["expires_at"])
+        with self._lock:
+            self._data[key] = (deadline, verdict)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Tamaño, aciertos, fallos y tasa de aciertos."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,112 @@
+"""
+Fast IOC type classifier for HelixFilter.
+
+Clasifica por clases de caracteres en lugar de probar expresiones regulares
+en secuencia: el conjunto de caracteres del IOC (comprobado en C con
+``frozenset.issuperset``) descarta de inmediato los tipos imposibles, y solo
+los casos ambiguos recurren a validadores precompilados (regex de email y
+``ipaddress`` para IPv6). El orden de precedencia es el histórico:
+url > ip > hash > email > domain > unknown.
+"""
+
+import ipaddress
+import re
+from typing import Dict, Iterable, List
+
+_URL_PREFIXES = ("http://", "https://", "ftp://")
+
+_DIGITS = frozenset("0123456789")
+_HEX = frozenset("0123456789abcdef")
+_IPV4_CHARS = _DIGITS | {"."}
+_IPV6_CHARS = _HEX | {":", "."}
+_ALPHA = frozenset("abcdefghijklmnopqrstuvwxyz")
+_DOMAIN_CHARS = _ALPHA | _DIGITS | {"-", "."}
+_HASH_LENGTHS = (32, 40, 64)
+
+_EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
+
+def _is_ipv4(value: str) -> bool:
+    # Misma semántica que el patrón histórico: 4 grupos de 1-3 dígitos
+    parts = value.split(".")
+    return len(parts) == 4 and all(0 < len(part) <= 3 for part in parts)
+
+
+def _is_ipv6(value: str) -> bool:
+    try:
+        return ipaddress.ip_address(value).version == 6
+    except ValueError:
+        return False
+
+
+def _is_domain(value: str) -> bool:
+    labels = value.split(".")
+    if len(labels) < 2:
+        return False
+    tld = labels[-1]
+    if len(tld) < 2 or not _ALPHA.issuperset(tld):
+        return False
+    for label in labels[:-1]:
+        if not label or len(label) > 63 or label[0] == "-" or label[-1] == "-":
+            return False
+    return True
+
+
+def classify_ioc(ioc: str) -> str:
+    """
+    Clasifica un IOC.
+
+    Args:
+        ioc: Indicator of Compromise
+
+    Returns:
+        Tipo de IOC (ip/domain/url/hash/email/unknown)
+    """
+    value = ioc.strip().lower()
+    if not value:
+        return "unknown"
+
+    if value.startswith(_URL_PREFIXES):
+        return "url"
+
+    if value[0] in _DIGITS and "." in value and _IPV4_CHARS.issuperset(value):
+        # Solo dígitos y puntos: IPv4 o nada (no hay TLD numérico)
+        return "ip" if _is_ipv4(value) else "unknown"
+
+    if ":" in value:
+        if _IPV6_CHARS.issuperset(value) and _is_ipv6(value):
+            return "ip"
+        if value.startswith("[") and value.endswith("]") and _is_ipv6(value[1:-1]):
+            return "ip"
+        return "unknown"
+
+    if len(value) in _HASH_LENGTHS and _HEX.issuperset(value):
+        return "hash"
+
+    if "@" in value:
+        return "email" if _EMAIL_PATTERN.match(value) else "unknown"
+
+    if "." in value and _DOMAIN_CHARS.issuperset(value) and _is_domain(value):
+        return "domain"
+
+    return "unknown"
+
+
+def classify_many(iocs: Iterable[str]) -> List[str]:
+    """
+    Clasifica un lote de IOCs.
+
+    Los valores repetidos dentro del lote se clasifican una sola vez.
+
+    Returns:
+        Tipos en el mismo orden que la entrada
+    """
+    seen: Dict[str, str] = {}
+    types: List[str] = []
+    append = types.append
+    for ioc in iocs:
+        ioc_type = seen.get(ioc)
+        if ioc_type is None:
+            ioc_type = seen[ioc] = classify_ioc(ioc)
+        append(ioc_type)
+    return types
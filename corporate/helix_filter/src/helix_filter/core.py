@@ -8,11 +8,15 @@ Rol: threat-filter
 
 import hashlib
 import logging
-import re
+import time
 from collections import defaultdict
 from typing import Any, Dict, List, Optional
 
+from .cache import Verdict, VerdictCache
+from .classify import classify_ioc, classify_many
+from .feeds import FeedManager
 from .models import AnalysisResult, IOCMatch, ThreatAnalysis
+from .threatdb import ThreatStore
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +39,15 @@ class HelixFilter:
                 - threat_types: Tipos de IOCs a detectar (default: ip, domain, url, hash, email)
                 - confidence_threshold: Umbral de confianza mínimo (default: 0.7)
                 - enable_reputation_check: Habilitar verificación de reputación (default: True)
+                - threat_feeds: Feeds locales a indexar: rutas CSV/JSON/NDJSON/STIX o
+                  dicts con name, path, kind (snapshot/delta), ttl, target
+                - match_subdomains: Un dominio listado cubre sus subdominios (default: True)
+                - bloom_capacity: Entradas del prefiltro Bloom (default: None, sin Bloom)
+                - feed_refresh_interval: Segundos entre refrescos de feeds en segundo
+                  plano (default: None, solo refresco manual)
+                - verdict_cache_size: Veredictos cacheados por IOC normalizado
+                  (default: 100000; 0 desactiva la caché)
+                - verdict_cache_ttl: Segundos de validez de un veredicto (default: 300)
         """
         self.name = "Helix Filter"
         self.mission = "Good, Honest Snake Oil"
@@ -56,80 +69,200 @@ class HelixFilter:
             "5d41402abc4b2a76b9719d911017c592": {"type": "hash", "category": "malware", "confidence": 0.80},
         }
 
+        bloom_capacity = self.config.get("bloom_capacity")
+        self.bloom_capacity = int(bloom_capacity) if bloom_capacity else None
+        self.match_subdomains = bool(self.config.get("match_subdomains", True))
+
+        # Veredictos de IOCs repetidos; se vacía al cambiar la generación del índice
+        self.verdict_cache = VerdictCache(
+            max_size=self.config.get("verdict_cache_size", 100000),
+            ttl=self.config.get("verdict_cache_ttl", 300.0),
+        )
+
+        # Generaciones del índice: el FeedManager construye y publica cada una
+        self.threat_store = self._new_threat_store()
+        self.feed_manager = FeedManager(
+            classify=self._classify_ioc_type,
+            store_factory=self._new_threat_store,
+            on_swap=self._swap_threat_store,
+            min_confidence=self.confidence_threshold,
+        )
+        self.feed_manager.set_static(
+            "threat_database",
+            ({"ioc": ioc, **info} for ioc, info in self.threat_database.items()),
+        )
+        # Los feeds de reputación solo se consultan con enable_reputation_check
+        if self.enable_reputation_check:
+            for feed in self.config.get("threat_feeds", []):
+                if isinstance(feed, dict):
+                    self.register_feed(**feed)
+                else:
+                    self.register_feed(feed, feed)
+        self.feed_manager.refresh()
+
+        refresh_interval = self.config.get("feed_refresh_interval")
+        if refresh_interval and self.enable_reputation_check:
+            self.feed_manager.start(float(refresh_interval))
+
         logger.info(
             "Initialized %s - %s (types=%s, threshold=%.2f, db_size=%d)",
             self.name,
             self.role,
             len(self.threat_types),
             self.confidence_threshold,
-            len(self.threat_database),
+            len(self.threat_store),
         )
 
-    def _classify_ioc_type(self, ioc: str) -> str:
+    def _new_threat_store(self) -> ThreatStore:
+        return ThreatStore(
+            bloom_capacity=self.bloom_capacity, match_subdomains=self.match_subdomains
+        )
+
+    def _swap_threat_store(self, store: ThreatStore) -> None:
+        # Una sola asignación: los lectores ven la generación anterior o la nueva
+        self.threat_store = store
+
+    @property
+    def threat_generation(self) -> int:
+        """Generación vigente del índice de amenazas."""
+        return self.threat_store.generation
+
+    def register_feed(
+        self,
+        name: str,
+        path: str,
+        kind: str = "snapshot",
+        feed_format: Optional[str] = None,
+        ttl: Optional[float] = None,
+        target: Optional[str] = None,
+    ) -> None:
         """
-        Clasifica el tipo de IOC.
+        Registra un feed local (snapshot o delta). Se ingiere en el siguiente
+        refresco (``refresh_feeds`` o el refresco periódico).
 
         Args:
-            ioc: Indicator of Compromise
+            name: Nombre de la fuente
+            path: Ruta del feed (CSV, JSON, NDJSON o bundle STIX 2.x)
+            kind: "snapshot" (estado completo) o "delta" (altas/bajas)
+            feed_format: "csv", "json" o "ndjson" (default: según extensión)
+            ttl: Segundos de vida de las entradas sin expiración propia
+            target: Fuente a la que aplica un delta (default: ``name``)
+        """
+        self.feed_manager.register(name, path, kind, feed_format, ttl, target)
+
+    def refresh_feeds(self, force: bool = False, wait: bool = True) -> bool:
+        """
+        Ingiere los feeds que cambiaron y publica una nueva generación del
+        índice sin bloquear los análisis en curso.
+
+        Args:
+            force: Releer todos los feeds aunque no hayan cambiado
+            wait: Si es False, la construcción se hace en segundo plano
 
         Returns:
-            Tipo de IOC (ip/domain/url/hash/email/unknown)
+            True si se publicó (o se lanzó) una nueva generación
         """
-        ioc_lower = ioc.lower().strip()
+        return self.feed_manager.refresh(force=force, wait=wait)
 
-        # URL
-        if ioc_lower.startswith(("http://", "https://", "ftp://")):
-            return "url"
+    def load_threat_feed(
+        self, path: str, feed_format: Optional[str] = None, source: Optional[str] = None
+    ) -> int:
+        """
+        Registra un feed local como snapshot y publica una nueva generación.
 
-        # IP address
-        ip_pattern = r'^(?:\d{1,3}\.){3}\d{1,3}$'
-        if re.match(ip_pattern, ioc_lower):
-            return "ip"
+        Args:
+            path: Ruta del feed
+            feed_format: "csv", "json" o "ndjson" (default: según extensión)
+            source: Nombre de la fuente (default: la ruta)
 
-        # Hash (MD5, SHA1, SHA256)
-        hash_pattern = r'^[a-f0-9]{32}$|^[a-f0-9]{40}$|^[a-f0-9]{64}$'
-        if re.match(hash_pattern, ioc_lower):
-            return "hash"
+        Returns:
+            Número de entradas vigentes de la fuente
+        """
+        name = source or path
+        self.register_feed(name, path, feed_format=feed_format)
+        self.refresh_feeds()
+        loaded = len(self.feed_manager.sources[name].entries)
+        logger.info("Loaded %d IOCs from %s", loaded, path)
+        return loaded
 
-        # Email
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if re.match(email_pattern, ioc_lower):
-            return "email"
+    def close(self) -> None:
+        """Detiene el refresco periódico de feeds."""
+        self.feed_manager.stop()
 
-        # Domain
-        domain_pattern = r'^[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*\.[a-zA-Z]{2,}$'
-        if re.match(domain_pattern, ioc_lower):
-            return "domain"
+    def _classify_ioc_type(self, ioc: str) -> str:
+        """
+        Clasifica el tipo de IOC (clasificador por clases de caracteres).
 
-        return "unknown"
+        Args:
+            ioc: Indicator of Compromise
+
+        Returns:
+            Tipo de IOC (ip/domain/url/hash/email/unknown)
+        """
+        return classify_ioc(ioc)
+
+    def classify_many(self, iocs: List[str]) -> List[str]:
+        """
+        Clasifica un lote de IOCs (los repetidos se clasifican una vez).
+
+        Args:
+            iocs: Lista de IOCs
+
+        Returns:
+            Tipos de IOC en el mismo orden
+        """
+        return classify_many(iocs)
 
-    def _check_threat(self, ioc: str) -> Optional[Dict[str, Any]]:
+    def _check_threat(self, ioc: str, ioc_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Verifica si un IOC es una amenaza conocida.
 
+        Consulta el almacén indexado: coincidencia exacta, dominio padre,
+        rango CIDR o host de una URL.
+
         Args:
             ioc: Indicator of Compromise
+            ioc_type: Tipo ya clasificado del IOC (opcional)
 
         Returns:
             Información de la amenaza si es conocida, None en caso contrario
         """
-        ioc_lower = ioc.lower().strip()
-
-        # Verificación directa
-        if ioc_lower in self.threat_database:
-            threat_info = self.threat_database[ioc_lower].copy()
-            threat_info["ioc"] = ioc
-            return threat_info
+        found = self.threat_store.lookup(ioc, ioc_type)
+        if found is None:
+            return None
+        matched, (threat_type, category, confidence, source, expires_at), match_type = found
+        if expires_at is not None and expires_at <= time.time():
+            # Expiró después de construirse la generación vigente
+            return None
+        return {
+            "type": threat_type,
+            "category": category,
+            "confidence": confidence,
+            "source": source,
+            "expires_at": expires_at,
+            "matched": matched,
+            "match_type": match_type,
+            "ioc": ioc,
+        }
 
-        # Verificación por dominio (para URLs)
-        if "/" in ioc_lower:
-            domain = ioc_lower.split("/")[2] if "//" in ioc_lower else ioc_lower.split("/")[0]
-            if domain in self.threat_database:
-                threat_info = self.threat_database[domain].copy()
-                threat_info["ioc"] = ioc
-                return threat_info
+    def _verdict(self, ioc: str, now: float) -> Verdict:
+        """
+        Tipo y veredicto de un IOC, desde la caché o calculados.
 
-        return None
+        Returns:
+            (tipo de IOC, información de la amenaza o None)
+        """
+        key = VerdictCache.key(ioc)
+        verdict = self.verdict_cache.get(key, now)
+        if verdict is None:
+            ioc_type = classify_ioc(key)
+            verdict = (ioc_type, self._check_threat(key, ioc_type))
+            self.verdict_cache.put(key, verdict, now)
+        return verdict
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Estadísticas de la caché de veredictos (aciertos, fallos, tasa)."""
+        return self.verdict_cache.stats()
 
     def analyze_threats(self, iocs: List[str]) -> ThreatAnalysis:
         """
@@ -145,16 +278,18 @@ class HelixFilter:
         threats_by_type: Dict[str, int] = defaultdict(int)
         threats_by_category: Dict[str, int] = defaultdict(int)
 
-        for ioc in iocs:
-            ioc_type = self._classify_ioc_type(ioc)
+        self.verdict_cache.sync(self.threat_store.generation)
+        now = time.time()
+        hits_before = self.verdict_cache.hits
 
-            # Verificar si es amenaza conocida
-            threat_info = self._check_threat(ioc)
+        for ioc in iocs:
+            # Verificar si es amenaza conocida (caché de veredictos delante del índice)
+            ioc_type, threat_info = self._verdict(ioc, now)
 
             if threat_info and threat_info.get("confidence", 0.0) >= self.confidence_threshold:
                 category = threat_info.get("category", "unknown")
                 confidence = threat_info.get("confidence", 0.5)
-                source = "threat_database"
+                source = threat_info.get("source", "threat_database")
 
                 match = IOCMatch(
                     ioc=ioc,
@@ -180,7 +315,9 @@ class HelixFilter:
             analysis_summary={
                 "confidence_threshold": self.confidence_threshold,
                 "reputation_check_enabled": self.enable_reputation_check,
-                "database_size": len(self.threat_database),
+                "database_size": len(self.threat_store),
+                "database_generation": self.threat_store.generation,
+                "verdict_cache_hits": self.verdict_cache.hits - hits_before,
             },
         )
 
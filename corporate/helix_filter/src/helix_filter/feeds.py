@@ -0,0 +1,331 @@
+"""
+Threat-feed manager for HelixFilter.
+
+Gestiona feeds locales de dos tipos:
+    - snapshot: el archivo contiene el estado completo de la fuente; cada
+      nueva versión reemplaza todas sus entradas
+    - delta: cada nueva versión del archivo añade, actualiza o retira
+      (``action=remove``) entradas de la fuente destino
+
+Cada entrada conserva su fuente, confianza y expiración (explícita o por el
+``ttl`` de la fuente). Un refresco relee solo los archivos que cambiaron
+(mtime/tamaño), construye una nueva generación del ``ThreatStore`` sin tocar
+la actual y la publica con una única asignación de atributo: las consultas en
+curso siguen usando la generación anterior hasta terminar. Las entradas
+expiradas o por debajo de la confianza mínima no pasan a la nueva generación.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from .threatdb import ThreatStore, iter_feed_records, normalize_ioc
+
+logger = logging.getLogger(__name__)
+
+# (tipo, valor normalizado) -> (categoría, confianza, expira_en, fuente)
+FeedEntries = Dict[Tuple[str, str], Tuple[str, float, Optional[float], str]]
+
+
+class FeedSource:
+    """Estado de una fuente de IOCs registrada."""
+
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str] = None,
+        kind: str = "snapshot",
+        feed_format: Optional[str] = None,
+        ttl: Optional[float] = None,
+        target: Optional[str] = None,
+        default_confidence: float = 0.8,
+    ):
+        if kind not in ("snapshot", "delta", "static"):
+            raise ValueError(f"Unknown feed kind: {kind}")
+        self.name = name
+        self.path = path
+        self.kind = kind
+        self.feed_format = feed_format
+        self.ttl = ttl
+        # Un delta modifica las entradas de otra fuente (default: la propia)
+        self.target = target or name
+        self.default_confidence = default_confidence
+        self.signature: Optional[Tuple[int, int]] = None
+        self.entries: FeedEntries = {}
+        self.loaded_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "kind": self.kind,
+            "target": self.target,
+            "entries": len(self.entries),
+            "loaded_at": self.loaded_at,
+            "error": self.error,
+        }
+
+
+class FeedManager:
+    """
+    Ingesta de feeds y publicación de generaciones del índice.
+
+    Args:
+        classify: Función IOC -> tipo, para registros sin tipo
+        store_factory: Crea un ThreatStore vacío con la configuración del filtro
+        on_swap: Recibe cada nueva generación ya construida
+        min_confidence: Confianza mínima para indexar una entrada
+    """
+
+    def __init__(
+        self,
+        classify: Callable[[str], str],
+        store_factory: Callable[[], ThreatStore],
+        on_swap: Callable[[ThreatStore], None],
+        min_confidence: float = 0.0,
+    ):
+        self.classify = classify
+        self.store_factory = store_factory
+        self.on_swap = on_swap
+        self.min_confidence = min_confidence
+
+        self.sources: Dict[str, FeedSource] = {}
+        self.generation = 0
+        self.last_build: Dict[str, Any] = {}
+
+        self._next_expiry: Optional[float] = None
+        self._build_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._scheduler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def set_static(self, name: str, records: Iterable[Dict[str, Any]]) -> None:
+        """Registra una fuente fija en memoria (p.ej. la base incorporada)."""
+        source = FeedSource(name, kind="static")
+        with self._build_lock:
+            self._apply(source.entries, records, source)
+            source.loaded_at = time.time()
+            self.sources[name] = source
+
+    def register(
+        self,
+        name: str,
+        path: str,
+        kind: str = "snapshot",
+        feed_format: Optional[str] = None,
+        ttl: Optional[float] = None,
+        target: Optional[str] = None,
+        default_confidence: float = 0.8,
+    ) -> FeedSource:
+        """
+        Registra un feed local. Se ingiere en el siguiente ``refresh``.
+
+        Args:
+            name: Nombre de la fuente (se informa como ``source`` en las coincidencias)
+            path: Ruta del archivo (CSV, JSON, NDJSON o bundle STIX)
+            kind: "snapshot" o "delta"
+            feed_format: Formato explícito (default: según extensión)
+            ttl: Segundos de vida de las entradas sin expiración propia
+            target: Fuente a la que aplica un delta (default: ``name``)
+            default_confidence: Confianza de registros sin confianza
+        """
+        source = FeedSource(name, path, kind, feed_format, ttl, target, default_confidence)
+        with self._build_lock:
+            self.sources[name] = source
+        return source
+
+    def unregister(self, name: str) -> bool:
+        """Elimina una fuente; sus entradas salen en la siguiente generación."""
+        with self._build_lock:
+            return self.sources.pop(name, None) is not None
+
+    def _apply(
+        self, entries: FeedEntries, records: Iterable[Dict[str, Any]], source: FeedSource
+    ) -> int:
+        now = time.time()
+        applied = 0
+        for record in records:
+            ioc = normalize_ioc(record["ioc"])
+            if not ioc:
+                continue
+            key = (record.get("type") or self.classify(ioc), ioc)
+            if record.get("action", "add") in ("remove", "delete"):
+                entries.pop(key, None)
+            else:
+                expires_at = record.get("expires_at")
+                if expires_at is None and source.ttl:
+                    expires_at = now + source.ttl
+                entries[key] = (
+                    record.get("category", "unknown"),
+                    float(record["confidence"]),
+                    expires_at,
+                    record.get("source") or source.name,
+                )
+            applied += 1
+        return applied
+
+    def _ingest(self, source: FeedSource, force: bool) -> bool:
+        """Relee el archivo de una fuente si cambió. Devuelve True si se aplicó."""
+        try:
+            stat = os.stat(source.path)
+        except OSError as exc:
+            source.error = str(exc)
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if not force and signature == source.signature:
+            return False
+
+        records = iter_feed_records(
+            source.path, source.feed_format, source.name, source.default_confidence
+        )
+        try:
+            if source.kind == "snapshot":
+                entries: FeedEntries = {}
+                self._apply(entries, records, source)
+                source.entries = entries
+            else:
+                # Leer el delta completo antes de aplicarlo: un archivo corrupto
+                # no deja la fuente destino a medio actualizar
+                pending = list(records)
+                target = self.sources.get(source.target, source)
+                self._apply(target.entries, pending, source)
+        except (OSError, ValueError, KeyError) as exc:
+            source.error = str(exc)
+            logger.error("Error ingesting feed %s: %s", source.name, exc)
+            return False
+
+        source.signature = signature
+        source.loaded_at = time.time()
+        source.error = None
+        return True
+
+    def build(self) -> ThreatStore:
+        """
+        Construye una nueva generación con las entradas vigentes.
+
+        Si varias fuentes tienen el mismo IOC, gana la de mayor confianza.
+        """
+        now = time.time()
+        merged: Dict[Tuple[str, str], Tuple[str, float, Optional[float], str]] = {}
+        expired = 0
+        below = 0
+        next_expiry: Optional[float] = None
+        for source in list(self.sources.values()):
+            stale = []
+            for key, (category, confidence, expires_at, origin) in source.entries.items():
+                if expires_at is not None and expires_at <= now:
+                    stale.append(key)
+                    continue
+                if confidence < self.min_confidence:
+                    below += 1
+                    continue
+                current = merged.get(key)
+                if current is None or confidence > current[1]:
+                    merged[key] = (category, confidence, expires_at, origin)
+                    if expires_at is not None and (next_expiry is None or expires_at < next_expiry):
+                        next_expiry = expires_at
+            # Las entradas expiradas salen también de la fuente
+            for key in stale:
+                del source.entries[key]
+            expired += len(stale)
+
+        store = self.store_factory()
+        for (ioc_type, ioc), (category, confidence, expires_at, name) in merged.items():
+            store.add(ioc, ioc_type, category, confidence, name, expires_at)
+
+        self._next_expiry = next_expiry
+        self.last_build = {
+            "entries": len(store),
+            "expired_dropped": expired,
+            "below_confidence_dropped": below,
+        }
+        return store
+
+    def refresh(self, force: bool = False, wait: bool = True) -> bool:
+        """
+        Ingiere los feeds que cambiaron y publica una nueva generación.
+
+        Args:
+            force: Releer todos los archivos aunque no hayan cambiado
+            wait: Si es False, el trabajo se hace en un hilo en segundo plano
+
+        Returns:
+            Con ``wait``: True si se publicó una nueva generación. Sin
+            ``wait``: True si se lanzó el hilo (False si ya hay uno en curso)
+        """
+        if not wait:
+            if self._refresher is not None and self._refresher.is_alive():
+                return False
+            self._refresher = threading.Thread(
+                target=self.refresh, kwargs={"force": force}, name="helix-feed-refresh", daemon=True
+            )
+            self._refresher.start()
+            return True
+
+        with self._build_lock:
+            started = time.perf_counter()
+            # Snapshots primero: un delta se aplica sobre la versión vigente
+            ordered = sorted(
+                (s for s in self.sources.values() if s.kind != "static"),
+                key=lambda s: s.kind != "snapshot",
+            )
+            changed = [source.name for source in ordered if self._ingest(source, force)]
+            # Sin cambios solo se reconstruye para purgar entradas expiradas
+            expiring = self._next_expiry is not None and self._next_expiry <= time.time()
+            if not changed and self.generation and not expiring:
+                return False
+
+            store = self.build()
+            self.generation += 1
+            store.generation = self.generation
+            self.last_build.update(
+                {
+                    "generation": self.generation,
+                    "changed_sources": changed,
+                    "seconds": round(time.perf_counter() - started, 6),
+                    "built_at": time.time(),
+                }
+            )
+            self.on_swap(store)
+
+        logger.info(
+            "Threat index generation %d published (%d entries, sources changed: %s)",
+            self.generation,
+            self.last_build["entries"],
+            ", ".join(changed) or "none",
+        )
+        return True
+
+    def start(self, interval: float) -> None:
+        """Refresca periódicamente en un hilo en segundo plano."""
+        self.stop()
+        self._stop.clear()
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as exc:  # el hilo no debe morir por un feed corrupto
+                    logger.error("Feed refresh failed: %s", exc)
+
+        self._scheduler = threading.Thread(target=loop, name="helix-feed-updates", daemon=True)
+        self._scheduler.start()
+
+    def stop(self) -> None:
+        """Detiene el refresco periódico y espera a los hilos en curso."""
+        self._stop.set()
+        for worker in (self._scheduler, self._refresher):
+            if worker is not None:
+                worker.join()
+        self._scheduler = self._refresher = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Generación vigente, última construcción y estado por fuente."""
+        return {
+            "generation": self.generation,
+            "last_build": dict(self.last_build),
+            "sources": [source.describe() for source in list(self.sources.values())],
+        }
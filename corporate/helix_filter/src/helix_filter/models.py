@@ -4,7 +4,7 @@ Data models for helix_filter (Production).
 Define Pydantic models for type validation and documentation.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -21,6 +21,23 @@ class ModuleConfig(BaseModel):
     )
     confidence_threshold: float = Field(default=0.7, ge=0.0, le=1.0, description="Minimum confidence threshold")
     enable_reputation_check: bool = Field(default=True, description="Enable reputation checking")
+    threat_feeds: List[Union[str, Dict[str, Any]]] = Field(
+        default_factory=list,
+        description="Local IOC feeds: paths or {name, path, kind, ttl, target} dicts",
+    )
+    match_subdomains: bool = Field(default=True, description="Listed domains also match subdomains")
+    bloom_capacity: Optional[int] = Field(
+        default=None, ge=1, description="Capacity of the optional Bloom prefilter"
+    )
+    feed_refresh_interval: Optional[float] = Field(
+        default=None, gt=0, description="Seconds between background feed refreshes"
+    )
+    verdict_cache_size: int = Field(
+        default=100000, ge=0, description="Max cached IOC verdicts (0 disables the cache)"
+    )
+    verdict_cache_ttl: Optional[float] = Field(
+        default=300.0, gt=0, description="Seconds a cached verdict stays valid"
+    )
     debug: bool = Field(default=False, description="Enable debug mode")
 
 
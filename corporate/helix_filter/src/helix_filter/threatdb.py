@@ -0,0 +1,574 @@
+"""
+Indexed threat-intelligence store for HelixFilter.
+
+Estructuras de consulta:
+    - Conjuntos exactos por tipo (dict valor -> metadatos) para IPs, URLs,
+      hashes y emails
+    - Trie de etiquetas invertidas para dominios ("com" -> "evil" -> ...),
+      que resuelve coincidencias del dominio padre (``a.b.evil.com`` coincide
+      con una entrada ``evil.com``)
+    - Tablas CIDR por longitud de prefijo (IPv4/IPv6) con coincidencia del
+      prefijo más largo
+    - Filtro Bloom opcional delante de los conjuntos exactos
+
+Los metadatos (tipo, categoría, confianza, fuente, expiración) se internan:
+las entradas de un mismo feed con la misma categoría comparten una sola tupla.
+
+Los feeds locales CSV y NDJSON se leen mediante ``mmap`` línea a línea: el
+archivo no se copia a memoria del proceso y, si varios workers cargan el
+mismo feed, comparten las páginas de la caché del sistema. Los documentos
+JSON (lista, ``{"indicators": [...]}`` o bundle STIX 2.x) se decodifican
+completos, con un coste en memoria proporcional al tamaño del feed.
+"""
+
+import csv
+import ipaddress
+import json
+import mmap
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+from math import ceil, log
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .classify import classify_ioc
+
+# (tipo, categoría, confianza, fuente, expira_en [epoch o None])
+ThreatMeta = Tuple[str, str, float, str, Optional[float]]
+
+EXACT_TYPES = ("ip", "url", "hash", "email")
+
+IOC_TYPES = EXACT_TYPES + ("cidr", "domain", "unknown")
+
+# Etiquetas de tipo habituales en feeds de terceros -> tipo interno
+_TYPE_ALIASES = {
+    "md5": "hash",
+    "sha1": "hash",
+    "sha256": "hash",
+    "sha512": "hash",
+    "file": "hash",
+    "filehash": "hash",
+    "file-hash": "hash",
+    "ipv4": "ip",
+    "ipv6": "ip",
+    "ip-src": "ip",
+    "ip-dst": "ip",
+    "ipv4-addr": "ip",
+    "ipv6-addr": "ip",
+    "domain-name": "domain",
+    "hostname": "domain",
+    "fqdn": "domain",
+    "email-addr": "email",
+    "email-address": "email",
+    "uri": "url",
+}
+
+_STIX_COMPARISON = re.compile(r"([\w-]+):([\w.'\-]+)\s*=\s*'((?:[^'\\]|\\.)*)'")
+_STIX_TYPES = {
+    "ipv4-addr": "ip",
+    "ipv6-addr": "ip",
+    "domain-name": "domain",
+    "url": "url",
+    "file": "hash",
+    "email-addr": "email",
+}
+
+
+def normalize_ioc(ioc: str) -> str:
+    """Forma canónica de un IOC para indexar y consultar."""
+    return ioc.strip().lower().rstrip(".")
+
+
+def normalize_ioc_type(label: Optional[str]) -> Optional[str]:
+    """
+    Tipo interno de una etiqueta de tipo de feed.
+
+    Ignora mayúsculas y traduce alias (``md5``, ``IPv4``, ``domain-name``...).
+
+    Returns:
+        Uno de ``IOC_TYPES`` o None si la etiqueta no se reconoce (el
+        llamador debe clasificar el IOC)
+    """
+    if not label:
+        return None
+    value = str(label).strip().lower()
+    if value in IOC_TYPES:
+        return value
+    return _TYPE_ALIASES.get(value)
+
+
+class BloomFilter:
+    """Filtro Bloom sobre bytearray con doble hashing."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, int(capacity))
+        self.size = max(64, int(ceil(-capacity * log(error_rate) / (log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / capacity * log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str) -> Iterator[int]:
+        h1 = hash(value)
+        h2 = hash(value + "\0") | 1
+        size = self.size
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % size
+
+    def add(self, value: str) -> None:
+        bits = self.bits
+        for pos in self._positions(value):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: str) -> bool:
+        bits = self.bits
+        for pos in self._positions(value):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class DomainTrie:
+    """
+    Trie de etiquetas de dominio invertidas.
+
+    Cada nodo es un dict etiqueta -> nodo; los metadatos de un dominio
+    registrado se guardan en su nodo bajo la clave ``None``.
+    """
+
+    def __init__(self) -> None:
+        self.root: Dict[Any, Any] = {}
+        self.size = 0
+
+    def add(self, domain: str, meta: ThreatMeta) -> None:
+        node = self.root
+        for label in reversed(domain.split(".")):
+            child = node.get(label)
+            if child is None:
+                child = node[label] = {}
+            node = child
+        if None not in node:
+            self.size += 1
+        node[None] = meta
+
+    def remove(self, domain: str) -> bool:
+        path = [self.root]
+        for label in reversed(domain.split(".")):
+            node = path[-1].get(label)
+            if node is None:
+                return False
+            path.append(node)
+        if path[-1].pop(None, None) is None:
+            return False
+        self.size -= 1
+        # Podar nodos vacíos
+        labels = list(reversed(domain.split(".")))
+        for depth in range(len(labels), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][labels[depth - 1]]
+        return True
+
+    def lookup(self, domain: str, match_parents: bool = True) -> Optional[Tuple[str, ThreatMeta]]:
+        """
+        Busca un dominio o, si ``match_parents``, su dominio padre registrado
+        más específico.
+
+        Returns:
+            (dominio registrado, metadatos) o None
+        """
+        labels = domain.split(".")
+        node = self.root
+        found: Optional[Tuple[int, ThreatMeta]] = None
+        depth = 0
+        for label in reversed(labels):
+            node = node.get(label)
+            if node is None:
+                break
+            depth += 1
+            meta = node.get(None)
+            if meta is not None and (match_parents or depth == len(labels)):
+                found = (depth, meta)
+        if found is None:
+            return None
+        depth, meta = found
+        return ".".join(labels[len(labels) - depth :]), meta
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class CIDRTable:
+    """
+    Rangos IP con coincidencia del prefijo más largo.
+
+    Una tabla hash por (versión, longitud de prefijo): la consulta prueba
+    solo las longitudes presentes, de la más larga a la más corta.
+    """
+
+    def __init__(self) -> None:
+        self.tables: Dict[int, Dict[int, Dict[int, Tuple[str, ThreatMeta]]]] = {4: {}, 6: {}}
+        self._lengths: Dict[int, List[int]] = {4: [], 6: []}
+        self.size = 0
+
+    def add(self, network: "ipaddress._BaseNetwork", meta: ThreatMeta) -> None:
+        by_length = self.tables[network.version]
+        table = by_length.get(network.prefixlen)
+        if table is None:
+            table = by_length[network.prefixlen] = {}
+            self._lengths[network.version] = sorted(by_length, reverse=True)
+        key = int(network.network_address)
+        if key not in table:
+            self.size += 1
+        table[key] = (str(network), meta)
+
+    def remove(self, network: "ipaddress._BaseNetwork") -> bool:
+        table = self.tables[network.version].get(network.prefixlen)
+        if not table or table.pop(int(network.network_address), None) is None:
+            return False
+        self.size -= 1
+        return True
+
+    def lookup(self, address: "ipaddress._BaseAddress") -> Optional[Tuple[str, ThreatMeta]]:
+        """(red registrada, metadatos) del prefijo más largo que contiene la IP."""
+        value = int(address)
+        bits = address.max_prefixlen
+        by_length = self.tables[address.version]
+        for length in self._lengths[address.version]:
+            entry = by_length[length].get(value >> (bits - length) << (bits - length))
+            if entry is not None:
+                return entry
+        return None
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def _parse_network(value: str) -> Optional["ipaddress._BaseNetwork"]:
+    try:
+        return ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        return None
+
+
+def _canonical_ip(value: str) -> str:
+    if ":" not in value:
+        return value
+    try:
+        return ipaddress.ip_address(value).compressed
+    except ValueError:
+        return value
+
+
+def url_host(url: str) -> str:
+    """Host (sin credenciales ni puerto) de una URL o ruta ``host/path``."""
+    rest = url.split("//", 1)[1] if "//" in url else url
+    host = rest.split("/", 1)[0].split("?", 1)[0].split("#", 1)[0]
+    host = host.rsplit("@", 1)[-1]
+    if host.startswith("["):
+        return host[1:].split("]", 1)[0]
+    if host.count(":") == 1:
+        host = host.split(":", 1)[0]
+    return host.rstrip(".")
+
+
+class ThreatStore:
+    """
+    Almacén indexado de IOCs.
+
+    Args:
+        bloom_capacity: Si se indica, crea un filtro Bloom para esa cantidad
+            de entradas exactas (prefiltro de negativos)
+        bloom_error_rate: Tasa de falsos positivos del filtro Bloom
+        match_subdomains: Un dominio registrado cubre sus subdominios
+    """
+
+    def __init__(
+        self,
+        bloom_capacity: Optional[int] = None,
+        bloom_error_rate: float = 0.01,
+        match_subdomains: bool = True,
+    ):
+        self.exact: Dict[str, Dict[str, ThreatMeta]] = {t: {} for t in EXACT_TYPES}
+        self.domains = DomainTrie()
+        self.networks = CIDRTable()
+        self.match_subdomains = match_subdomains
+        self.bloom: Optional[BloomFilter] = (
+            BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity else None
+        )
+        self._interned: Dict[ThreatMeta, ThreatMeta] = {}
+        # Generación del índice (la asigna quien lo construye, ver feeds.FeedManager)
+        self.generation = 0
+
+    def _intern(self, meta: ThreatMeta) -> ThreatMeta:
+        return self._interned.setdefault(meta, meta)
+
+    def add(
+        self,
+        ioc: str,
+        ioc_type: str,
+        category: str = "unknown",
+        confidence: float = 0.5,
+        source: str = "local",
+        expires_at: Optional[float] = None,
+    ) -> bool:
+        """
+        Indexa un IOC.
+
+        Un IP con ``/`` se indexa como rango CIDR. La etiqueta de tipo se
+        normaliza (``normalize_ioc_type``); si no se reconoce, el tipo se
+        obtiene con ``classify_ioc``. Los IOCs de tipo "unknown" se indexan
+        como coincidencia exacta de URL.
+
+        Returns:
+            False si el IOC no pudo indexarse
+        """
+        value = normalize_ioc(ioc)
+        if not value:
+            return False
+        ioc_type = normalize_ioc_type(ioc_type) or classify_ioc(value)
+        meta = self._intern((ioc_type, category, float(confidence), source, expires_at))
+
+        if ioc_type in ("ip", "cidr") or (ioc_type == "unknown" and "/" in value):
+            if "/" in value:
+                network = _parse_network(value)
+                if network is None:
+                    return False
+                if network.prefixlen != network.max_prefixlen:
+                    self.networks.add(network, meta)
+                    return True
+                value = str(network.network_address)
+            value = _canonical_ip(value)
+            ioc_type = "ip"
+        elif ioc_type == "domain":
+            self.domains.add(value, meta)
+            return True
+
+        table = self.exact.get(ioc_type, self.exact["url"])
+        table[value] = meta
+        if self.bloom is not None:
+            self.bloom.add(value)
+        return True
+
+    def remove(self, ioc: str, ioc_type: str) -> bool:
+        """Elimina un IOC indexado (el filtro Bloom no se modifica)."""
+        value = normalize_ioc(ioc)
+        ioc_type = normalize_ioc_type(ioc_type) or classify_ioc(value)
+        if ioc_type == "domain":
+            return self.domains.remove(value)
+        if ioc_type == "unknown" and "/" in value:
+            ioc_type = "cidr"
+        if ioc_type in ("ip", "cidr") and "/" in value:
+            network = _parse_network(value)
+            if network is None:
+                return False
+            if network.prefixlen != network.max_prefixlen:
+                return self.networks.remove(network)
+            value = str(network.network_address)
+        if ioc_type in ("ip", "cidr"):
+            value, ioc_type = _canonical_ip(value), "ip"
+        return self.exact.get(ioc_type, self.exact["url"]).pop(value, None) is not None
+
+    def _exact(self, value: str, ioc_type: str) -> Optional[ThreatMeta]:
+        if self.bloom is not None and value not in self.bloom:
+            return None
+        return self.exact[ioc_type].get(value)
+
+    def _lookup_host(self, host: str) -> Optional[Tuple[str, ThreatMeta, str]]:
+        if not host:
+            return None
+        if host[0].isdigit() or ":" in host:
+            try:
+                address = ipaddress.ip_address(host)
+            except ValueError:
+                address = None
+            if address is not None:
+                key = address.compressed
+                meta = self._exact(key, "ip")
+                if meta is not None:
+                    return key, meta, "exact"
+                entry = self.networks.lookup(address)
+                if entry is not None:
+                    return entry[0], entry[1], "cidr"
+                return None
+        found = self.domains.lookup(host, self.match_subdomains)
+        if found is not None:
+            matched, meta = found
+            return matched, meta, "exact" if matched == host else "parent_domain"
+        return None
+
+    def lookup(
+        self, ioc: str, ioc_type: Optional[str] = None
+    ) -> Optional[Tuple[str, ThreatMeta, str]]:
+        """
+        Busca un IOC.
+
+        Args:
+            ioc: IOC (se normaliza)
+            ioc_type: Tipo ya clasificado (None = probar todos los índices)
+
+        Returns:
+            (entrada registrada, metadatos, tipo de coincidencia) o None. El tipo
+            de coincidencia es "exact", "parent_domain", "cidr" o "url_host".
+        """
+        value = normalize_ioc(ioc)
+        if not value:
+            return None
+
+        if ioc_type in ("hash", "email"):
+            meta = self._exact(value, ioc_type)
+            return (value, meta, "exact") if meta is not None else None
+        if ioc_type in ("ip", "domain"):
+            return self._lookup_host(value)
+
+        # URL, desconocido o sin clasificar: entrada exacta y luego su host
+        for kind in EXACT_TYPES if ioc_type is None else ("url",):
+            meta = self._exact(value, kind)
+            if meta is not None:
+                return value, meta, "exact"
+        host = url_host(value) if ("/" in value or ioc_type == "url") else value
+        found = self._lookup_host(host)
+        if found is not None and host != value:
+            return found[0], found[1], "url_host"
+        return found
+
+    def __len__(self) -> int:
+        return (
+            sum(len(table) for table in self.exact.values())
+            + len(self.domains)
+            + len(self.networks)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Entradas por índice."""
+        stats = {kind: len(table) for kind, table in self.exact.items()}
+        stats["domain"] = len(self.domains)
+        stats["cidr"] = len(self.networks)
+        stats["distinct_metadata"] = len(self._interned)
+        return stats
+
+
+@lru_cache(maxsize=4096)
+def _epoch(value: Any) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _confidence(value: Any, default: float) -> float:
+    if value in (None, ""):
+        return default
+    confidence = float(value)
+    # STIX y muchos feeds usan 0-100
+    return confidence / 100.0 if confidence > 1.0 else confidence
+
+
+def _record(
+    raw: Dict[str, Any], source: str, default_confidence: float
+) -> Optional[Dict[str, Any]]:
+    ioc = raw.get("ioc") or raw.get("indicator") or raw.get("value")
+    if not ioc:
+        return None
+    return {
+        "ioc": str(ioc),
+        "type": normalize_ioc_type(raw.get("type") or raw.get("ioc_type")),
+        "category": raw.get("category") or raw.get("threat_category") or "unknown",
+        "confidence": _confidence(raw.get("confidence"), default_confidence),
+        "source": raw.get("source") or source,
+        "expires_at": _epoch(raw.get("expires_at") or raw.get("expires") or raw.get("valid_until")),
+        "action": str(raw.get("action") or "add").lower(),
+    }
+
+
+def _stix_records(
+    objects: List[Dict[str, Any]], source: str, default_confidence: float
+) -> Iterator[Dict[str, Any]]:
+    for obj in objects:
+        if obj.get("type") != "indicator":
+            continue
+        labels = obj.get("indicator_types") or obj.get("labels") or ["malicious-activity"]
+        base = {
+            "category": labels[0],
+            "confidence": _confidence(obj.get("confidence"), default_confidence),
+            "source": obj.get("created_by_ref") or source,
+            "expires_at": _epoch(obj.get("valid_until")),
+            # Un indicador revocado retira el IOC (útil en deltas)
+            "action": "remove" if obj.get("revoked") else "add",
+        }
+        for object_type, _, value in _STIX_COMPARISON.findall(obj.get("pattern", "")):
+            ioc_type = _STIX_TYPES.get(object_type)
+            if ioc_type is not None:
+                yield {"ioc": value.replace("\\'", "'"), "type": ioc_type, **base}
+
+
+def detect_feed_format(path: str) -> str:
+    """Formato del feed según su extensión ("csv", "ndjson" o "json")."""
+    lowered = path.lower()
+    if lowered.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if lowered.endswith((".json", ".stix")):
+        return "json"
+    return "csv"
+
+
+def iter_feed_records(
+    path: str,
+    feed_format: Optional[str] = None,
+    source: Optional[str] = None,
+    default_confidence: float = 0.8,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lee un feed local (CSV y NDJSON mediante mmap, línea a línea).
+
+    Formatos:
+        - csv: cabecera con columna ioc/indicator/value y opcionales type,
+          category, confidence, source, expires_at
+        - ndjson: un objeto por línea con las mismas claves
+        - json: lista de objetos, ``{"indicators": [...]}`` o bundle STIX 2.x
+
+    Yields:
+        Dicts con ioc, type (o None), category, confidence, source,
+        expires_at y action ("add" o "remove")
+    """
+    feed_format = feed_format or detect_feed_format(path)
+    source = source or path
+    with open(path, "rb") as handle:
+        if feed_format == "json":
+            # Un documento JSON se decodifica completo: el coste en memoria es
+            # proporcional al feed (para feeds grandes, usar NDJSON)
+            if not os.fstat(handle.fileno()).st_size:
+                return
+            document = json.load(handle)
+            if isinstance(document, dict) and document.get("type") == "bundle":
+                yield from _stix_records(document.get("objects", []), source, default_confidence)
+                return
+            if isinstance(document, dict):
+                document = document.get("indicators", [])
+            for raw in document:
+                record = _record(raw, source, default_confidence)
+                if record is not None:
+                    yield record
+            return
+
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # archivo vacío
+            return
+        with mapped:
+            lines = (line.decode("utf-8", "ignore") for line in iter(mapped.readline, b""))
+            if feed_format == "ndjson":
+                for line in lines:
+                    if line.strip():
+                        record = _record(json.loads(line), source, default_confidence)
+                        if record is not None:
+                            yield record
+                return
+
+            for raw in csv.DictReader(line for line in lines if not line.startswith("#")):
+                record = _record(raw, source, default_confidence)
+                if record is not None:
+                    yield record
@@ -2,7 +2,10 @@
 Unit tests for HelixFilter (Production)
 """
 
+import json
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Add src directory to Python path for local imports
@@ -14,8 +17,11 @@ if str(SRC) not in sys.path:
 
 import pytest
 
+from helix_filter.cache import VerdictCache
+from helix_filter.classify import classify_ioc, classify_many
 from helix_filter.core import HelixFilter
 from helix_filter.models import AnalysisResult, ThreatAnalysis
+from helix_filter.threatdb import ThreatStore, iter_feed_records
 
 
 @pytest.fixture
@@ -61,6 +67,315 @@ class TestThreatAnalysis:
         assert analysis.clean_count == 2
 
 
+@pytest.fixture
+def feed_dir(tmp_path):
+    """Feeds locales en CSV y bundle STIX"""
+    (tmp_path / "feed.csv").write_text(
+        "ioc,type,category,confidence,source\n"
+        "bad-actor.org,domain,c2,90,csv-feed\n"
+        "203.0.113.0/24,ip,scanner,0.85,csv-feed\n"
+        "2001:db8:bad::/48,ip,scanner,0.85,csv-feed\n"
+        "44d88612fea8a8f36de82e1278abb02f,,malware,0.99,csv-feed\n"
+    )
+    bundle = {
+        "type": "bundle",
+        "objects": [
+            {
+                "type": "indicator",
+                "pattern": (
+                    "[url:value = 'http://drop.example/payload.bin']"
+                    " OR [ipv4-addr:value = '198.51.100.7']"
+                ),
+                "indicator_types": ["malicious-activity"],
+                "confidence": 80,
+            },
+            {
+                "type": "indicator",
+                "pattern": "[domain-name:value = 'old.example']",
+                "revoked": True,
+            },
+        ],
+    }
+    (tmp_path / "bundle.json").write_text(json.dumps(bundle))
+    return tmp_path
+
+
+class TestThreatStore:
+    """Tests para el almacén indexado de amenazas"""
+
+    def test_parent_domain_and_cidr_matching(self):
+        """Test coincidencia de dominio padre y prefijo CIDR más largo"""
+        store = ThreatStore()
+        store.add("evil.com", "domain", "malware", 0.9)
+        store.add("10.0.0.0/8", "ip", "internal", 0.5)
+        store.add("10.1.0.0/16", "ip", "botnet", 0.9)
+        assert store.lookup("a.b.evil.com", "domain")[2] == "parent_domain"
+        assert store.lookup("notevil.com", "domain") is None
+        assert store.lookup("10.1.2.3", "ip")[0] == "10.1.0.0/16"
+        assert store.lookup("10.2.0.1", "ip")[0] == "10.0.0.0/8"
+        assert store.lookup("https://x.evil.com:8443/a?b", "url")[2] == "url_host"
+
+    def test_bloom_prefilter(self):
+        """Test que el prefiltro Bloom no pierde entradas indexadas"""
+        store = ThreatStore(bloom_capacity=1000)
+        for i in range(500):
+            store.add(f"{i:032x}", "hash", "malware", 0.9)
+        assert all(store.lookup(f"{i:032x}", "hash") for i in range(500))
+        assert store.lookup("f" * 32, "hash") is None
+
+    def test_interned_metadata(self):
+        """Test que entradas con los mismos metadatos comparten tupla"""
+        store = ThreatStore()
+        for i in range(100):
+            store.add(f"host{i}.bad.net", "domain", "c2", 0.9, "feed")
+        assert store.stats()["distinct_metadata"] == 1
+
+    def test_stix_bundle_records(self, feed_dir):
+        """Test lectura de indicadores STIX (revocados se marcan como remove)"""
+        records = list(iter_feed_records(str(feed_dir / "bundle.json")))
+        added = {r["ioc"] for r in records if r["action"] == "add"}
+        assert added == {"http://drop.example/payload.bin", "198.51.100.7"}
+        assert [r["ioc"] for r in records if r["action"] == "remove"] == ["old.example"]
+        assert records[0]["confidence"] == 0.8
+
+    def test_json_feed_records(self, tmp_path):
+        """Test lectura de documentos JSON (incluido un archivo vacío)"""
+        feed = tmp_path / "feed.json"
+        feed.write_text('{"indicators": [{"ioc": "evil.com", "category": "c2"}, {"ioc": ""}]}')
+        records = list(iter_feed_records(str(feed)))
+        assert [(r["ioc"], r["category"]) for r in records] == [("evil.com", "c2")]
+        empty = tmp_path / "empty.json"
+        empty.write_text("")
+        assert list(iter_feed_records(str(empty))) == []
+
+
+class TestThreatFeeds:
+    """Tests para carga de feeds en HelixFilter"""
+
+    def test_feeds_from_config(self, feed_dir):
+        """Test que los feeds configurados se indexan y detectan"""
+        modulo = HelixFilter(
+            {"threat_feeds": [str(feed_dir / "feed.csv"), str(feed_dir / "bundle.json")]}
+        )
+        iocs = [
+            "cdn.bad-actor.org",
+            "203.0.113.77",
+            "2001:db8:bad::1",
+            "44D88612FEA8A8F36DE82E1278ABB02F",
+            "http://drop.example/payload.bin",
+            "198.51.100.7",
+            "google.com",
+        ]
+        analysis = modulo.analyze_threats(iocs)
+        assert analysis.threats_detected == 6
+        assert analysis.matches[0].source == "csv-feed"
+        assert analysis.analysis_summary["database_size"] == len(modulo.threat_database) + 6
+
+    def test_feed_type_labels_are_normalized(self, tmp_path):
+        """Test que alias de tipo (md5, IPv4, domain-name...) se indexan bien"""
+        feed = tmp_path / "labels.csv"
+        feed.write_text(
+            "ioc,type,category\n"
+            "44d88612fea8a8f36de82e1278abb02f,md5,malware\n"
+            "203.0.113.9,IPv4,scanner\n"
+            "phish.example,Domain,phishing\n"
+            "c2.example,domain-name,c2\n"
+            "198.51.100.20,threat-actor-ip,scanner\n"
+        )
+        modulo = HelixFilter({"threat_feeds": [str(feed)]})
+        analysis = modulo.analyze_threats(
+            [
+                "44D88612FEA8A8F36DE82E1278ABB02F",
+                "203.0.113.9",
+                "login.phish.example",
+                "c2.example",
+                "198.51.100.20",
+            ]
+        )
+        assert analysis.threats_detected == 5
+
+        store = ThreatStore()
+        assert store.add("203.0.113.10", "ip-dst", "scanner")
+        assert store.add("198.51.100.21", "bogus", "scanner")
+        assert store.exact["url"] == {}
+        assert store.remove("198.51.100.21", "bogus")
+        assert not store.remove("198.51.100.21", "bogus")
+
+    def test_url_on_listed_domain(self, modulo):
+        """Test que una URL en un dominio listado se detecta"""
+        analysis = modulo.analyze_threats(["https://evil-snake-oil.com/login"])
+        assert analysis.threats_detected == 1
+
+
+class TestFeedManager:
+    """Tests para ingesta incremental y generaciones del índice"""
+
+    def test_snapshot_then_delta(self, tmp_path):
+        """Test que un delta añade y retira entradas de su snapshot"""
+        snapshot = tmp_path / "abuse.csv"
+        snapshot.write_text(
+            "ioc,type,category,confidence\nbad-one.net,domain,c2,0.9\nbad-two.net,domain,c2,0.9\n"
+        )
+        delta = tmp_path / "abuse-delta.ndjson"
+        modulo = HelixFilter()
+        modulo.register_feed("abuse", str(snapshot))
+        modulo.refresh_feeds()
+        generation = modulo.threat_generation
+        assert modulo.analyze_threats(["bad-two.net"]).threats_detected == 1
+
+        delta.write_text(
+            '{"ioc": "bad-two.net", "type": "domain", "action": "remove"}\n'
+            '{"ioc": "bad-three.net", "type": "domain", "category": "phishing", "confidence": 95}\n'
+        )
+        modulo.register_feed("abuse-delta", str(delta), kind="delta", target="abuse")
+        assert modulo.refresh_feeds() is True
+        assert modulo.threat_generation == generation + 1
+        analysis = modulo.analyze_threats(["bad-one.net", "bad-two.net", "bad-three.net"])
+        assert [m.ioc for m in analysis.matches] == ["bad-one.net", "bad-three.net"]
+        # Sin cambios en disco no se publica otra generación
+        assert modulo.refresh_feeds() is False
+
+    def test_expired_entries_age_out(self, tmp_path):
+        """Test que las entradas con TTL vencido dejan de coincidir"""
+        feed = tmp_path / "short.csv"
+        feed.write_text("ioc,type,category,confidence\nshort-lived.io,domain,c2,0.9\n")
+        modulo = HelixFilter()
+        modulo.register_feed("short", str(feed), ttl=0.05)
+        modulo.refresh_feeds()
+        assert modulo.analyze_threats(["short-lived.io"]).threats_detected == 1
+        time.sleep(0.1)
+        assert modulo.analyze_threats(["short-lived.io"]).threats_detected == 0
+        assert modulo.refresh_feeds() is True
+        assert modulo.feed_manager.last_build["expired_dropped"] == 1
+
+    def test_background_refresh_swaps_generation(self, tmp_path):
+        """Test que el refresco en segundo plano publica sin bloquear consultas"""
+        feed = tmp_path / "bg.csv"
+        feed.write_text(
+            "ioc,type,category,confidence\n"
+            + "".join(f"host{i}.bg-threat.net,domain,c2,0.9\n" for i in range(2000))
+        )
+        modulo = HelixFilter()
+        modulo.register_feed("bg", str(feed))
+        assert modulo.refresh_feeds(wait=False) is True
+        while modulo.feed_manager._refresher.is_alive():
+            modulo.analyze_threats(["evil-snake-oil.com"])
+        assert modulo.analyze_threats(["host7.bg-threat.net"]).threats_detected == 1
+        modulo.close()
+
+    def test_low_confidence_and_reputation_flag(self, tmp_path):
+        """Test umbral de confianza al indexar y enable_reputation_check"""
+        feed = tmp_path / "mixed.csv"
+        feed.write_text(
+            "ioc,type,category,confidence\nweak.net,domain,spam,0.3\nstrong.net,domain,c2,0.9\n"
+        )
+        modulo = HelixFilter({"threat_feeds": [str(feed)]})
+        assert modulo.feed_manager.last_build["below_confidence_dropped"] == 1
+        assert modulo.analyze_threats(["strong.net"]).threats_detected == 1
+
+        disabled = HelixFilter({"threat_feeds": [str(feed)], "enable_reputation_check": False})
+        assert disabled.analyze_threats(["strong.net"]).threats_detected == 0
+
+
+class TestClassifier:
+    """Tests para el clasificador de IOCs"""
+
+    @pytest.mark.parametrize(
+        "ioc,expected",
+        [
+            ("http://evil.com/x", "url"),
+            ("FTP://files.example.org", "url"),
+            ("192.168.1.1", "ip"),
+            ("1.2.3", "unknown"),
+            ("d41d8cd98f00b204e9800998ecf8427e", "hash"),
+            ("12345678901234567890123456789012", "hash"),
+            ("user@example.com", "email"),
+            ("bad@@example.com", "unknown"),
+            ("Sub.Example.COM", "domain"),
+            ("-bad.example.com", "unknown"),
+            ("example.c0m", "unknown"),
+            ("localhost", "unknown"),
+            ("", "unknown"),
+        ],
+    )
+    def test_matches_legacy_types(self, ioc, expected):
+        """Test que se conserva la clasificación histórica"""
+        assert classify_ioc(ioc) == expected
+
+    def test_ipv6(self):
+        """Test que IPv6 se clasifica como ip"""
+        assert classify_ioc("2001:db8::1") == "ip"
+        assert classify_ioc("[fe80::1]") == "ip"
+        assert classify_ioc("::ffff:10.0.0.1") == "ip"
+        assert classify_ioc("2001:zz8::1") == "unknown"
+
+    def test_classify_many_preserves_order(self, modulo):
+        """Test clasificación por lotes"""
+        iocs = ["evil.com", "1.2.3.4", "evil.com", "http://x.io"]
+        assert classify_many(iocs) == ["domain", "ip", "domain", "url"]
+        assert modulo.classify_many(iocs) == [modulo._classify_ioc_type(i) for i in iocs]
+
+
+class TestVerdictCache:
+    """Tests para la caché de veredictos"""
+
+    def test_repeated_iocs_hit_cache(self, modulo):
+        """Test que los IOCs repetidos (normalizados) se sirven desde la caché"""
+        analysis = modulo.analyze_threats(
+            ["Evil-Snake-Oil.com", "evil-snake-oil.com ", "google.com", "google.com"]
+        )
+        assert analysis.threats_detected == 2
+        assert [m.ioc_type for m in analysis.matches] == ["domain", "domain"]
+        assert analysis.analysis_summary["verdict_cache_hits"] == 2
+        stats = modulo.cache_stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 2)
+
+    def test_new_generation_invalidates(self, tmp_path):
+        """Test que una nueva generación del índice vacía la caché"""
+        feed = tmp_path / "late.csv"
+        modulo = HelixFilter()
+        assert modulo.analyze_threats(["late-threat.net"]).threats_detected == 0
+        feed.write_text("ioc,type,category,confidence\nlate-threat.net,domain,c2,0.9\n")
+        modulo.load_threat_feed(str(feed))
+        assert modulo.analyze_threats(["late-threat.net"]).threats_detected == 1
+        assert modulo.cache_stats()["invalidations"] == 1
+
+    def test_ttl_and_disabled_cache(self):
+        """Test caducidad por TTL y caché desactivada"""
+        modulo = HelixFilter({"verdict_cache_ttl": 0.05})
+        modulo.analyze_threats(["google.com"])
+        time.sleep(0.1)
+        modulo.analyze_threats(["google.com"])
+        assert modulo.cache_stats()["expired"] == 1
+
+        disabled = HelixFilter({"verdict_cache_size": 0})
+        assert disabled.analyze_threats(["evil-snake-oil.com"] * 3).threats_detected == 3
+        assert disabled.cache_stats()["hits"] == 0
+
+    def test_concurrent_access(self):
+        """Test que get/put concurrentes no corrompen la caché"""
+        cache = VerdictCache(max_size=64, ttl=None)
+
+        def worker(offset: int) -> None:
+            for i in range(5000):
+                key = f"host{(i + offset) % 200}.example"
+                cache.put(key, ("domain", None), 0.0)
+                cache.get(key, 0.0)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Forzar cambios de hilo frecuentes
+        try:
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert len(cache) <= 64
+        assert cache.hits + cache.misses == 8 * 5000
+
+
 class TestAnalyze:
     """Tests para funcionalidad de análisis"""
 
@@ -7,12 +7,17 @@ Rol: forensics-analyzer
 """
 
 import logging
+import os
 import re
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from .models import AnalysisResult, ArtifactAnalysis
+from .evidence import deduplicate, iter_files, map_artifacts
+from .index import IndicatorIndex, PostingMap
+from .models import AnalysisResult, ArtifactAnalysis, EvidenceSetAnalysis, IndicatorQueryResult
+from .stream import DEFAULT_BLOCK_SIZE, ArtifactScanner, iter_line_blocks
 
 logger = logging.getLogger(__name__)
 
@@ -32,24 +37,52 @@ class HelixTrace:
 
         Args:
             config: Diccionario de configuración opcional:
-                - max_file_size_mb: Tamaño máximo de archivo (default: 100)
+                - max_file_size_mb: MB a analizar por archivo (default: None, sin límite)
                 - supported_formats: Formatos soportados
                 - extract_timestamps: Extraer timestamps (default: True)
                 - extract_ips: Extraer IPs (default: True)
                 - extract_emails: Extraer emails (default: True)
+                - max_unique_indicators: Tope de valores únicos por tipo (default: None)
+                - max_suspicious_matches: Máximo de patrones sospechosos (default: 20)
+                - max_suspicious_per_pattern: Máximo por patrón sospechoso (default: 5)
+                - block_size: Bytes leídos por bloque (default: 1 MiB)
+                - evidence_workers: Procesos para evidence sets (default: nº de CPUs)
+                - index_path: Archivo SQLite del índice invertido de indicadores
+                  (default: None, sin índice)
+                - index_max_postings: Postings guardados por indicador y artifact
+                  (default: 100)
+                - index_flush_size: Postings acumulados antes de volcarlos al
+                  índice durante un análisis (default: 50000). Los workers de
+                  ``analyze_evidence`` no abren el índice: devuelven los
+                  postings de cada artifact y el proceso padre los escribe
         """
         self.name = "Helix Trace"
         self.mission = "The New South"
         self.role = "forensics-analyzer"
         self.config = config or {}
 
-        self.max_file_size_mb = int(self.config.get("max_file_size_mb", 100))
+        max_file_size_mb = self.config.get("max_file_size_mb")
+        self.max_file_size_mb = int(max_file_size_mb) if max_file_size_mb else None
         self.supported_formats = self.config.get(
             "supported_formats", [".log", ".txt", ".json", ".csv", ".xml"]
         )
         self.extract_timestamps = bool(self.config.get("extract_timestamps", True))
         self.extract_ips = bool(self.config.get("extract_ips", True))
         self.extract_emails = bool(self.config.get("extract_emails", True))
+        max_unique = self.config.get("max_unique_indicators")
+        self.max_unique_indicators = int(max_unique) if max_unique else None
+        self.max_suspicious_matches = int(self.config.get("max_suspicious_matches", 20))
+        self.max_suspicious_per_pattern = int(self.config.get("max_suspicious_per_pattern", 5))
+        self.block_size = max(4096, int(self.config.get("block_size", DEFAULT_BLOCK_SIZE)))
+        self.evidence_workers = max(
+            1, int(self.config.get("evidence_workers") or os.cpu_count() or 1)
+        )
+        self.index_path = self.config.get("index_path")
+        self.index_max_postings = max(0, int(self.config.get("index_max_postings", 100)))
+        self.index_flush_size = max(1, int(self.config.get("index_flush_size", 50000)))
+        self.index: Optional[IndicatorIndex] = (
+            IndicatorIndex(self.index_path) if self.index_path else None
+        )
 
         # Patrones regex para extracción (2025-2026 best practices)
         self.ip_pattern = re.compile(
@@ -67,23 +100,53 @@ class HelixTrace:
         ]
 
         logger.info(
-            "Initialized %s - %s (max_size=%dMB, formats=%s)",
+            "Initialized %s - %s (max_size=%s, formats=%s)",
             self.name,
             self.role,
-            self.max_file_size_mb,
+            f"{self.max_file_size_mb}MB" if self.max_file_size_mb else "unlimited",
             len(self.supported_formats),
         )
 
+    def _new_scanner(self, collect_postings: bool = False) -> ArtifactScanner:
+        """Acumulador de indicadores según la configuración de extracción."""
+        indexed = self.index is not None or collect_postings
+        return ArtifactScanner(
+            ip_pattern=self.ip_pattern if self.extract_ips else None,
+            email_pattern=self.email_pattern if self.extract_emails else None,
+            timestamp_patterns=self.timestamp_patterns if self.extract_timestamps else None,
+            suspicious_patterns=self.suspicious_patterns,
+            max_unique=self.max_unique_indicators,
+            max_suspicious=self.max_suspicious_matches,
+            max_suspicious_per_pattern=self.max_suspicious_per_pattern,
+            max_postings=self.index_max_postings if indexed else None,
+        )
+
     def analyze_artifact(self, artifact_path: str) -> ArtifactAnalysis:
         """
         Analiza un artifact forense (archivo de log, etc).
 
+        El archivo se lee en bloques de líneas con memoria constante, de modo
+        que no hay límite de tamaño; los conjuntos de indicadores pueden
+        acotarse con ``max_unique_indicators``.
+
         Args:
             artifact_path: Ruta al artifact a analizar
 
         Returns:
             ArtifactAnalysis con resultados del análisis
         """
+        return self._analyze_artifact(artifact_path)[0]
+
+    def _analyze_artifact(
+        self, artifact_path: str, collect_postings: bool = False
+    ) -> Tuple[ArtifactAnalysis, Optional[PostingMap]]:
+        """
+        Analiza un artifact y, con ``collect_postings``, devuelve sus postings
+        en lugar de escribirlos en el índice (workers de ``analyze_evidence``).
+
+        Returns:
+            (análisis, postings o None)
+        """
         path = Path(artifact_path)
         result = {
             "artifact_path": artifact_path,
@@ -98,74 +161,240 @@ class HelixTrace:
         }
 
         if not path.exists():
-            return ArtifactAnalysis(**result)
+            return ArtifactAnalysis(**result), None
 
-        # Verificar tamaño
         file_size = path.stat().st_size
-        file_size_mb = file_size / (1024 * 1024)
         result["file_size"] = file_size
 
-        if file_size_mb > self.max_file_size_mb:
-            logger.warning("File size exceeds limit: %dMB > %dMB", file_size_mb, self.max_file_size_mb)
-            return ArtifactAnalysis(**result)
+        # Sin límite duro: max_file_size_mb (opcional) acota los bytes analizados
+        limit = self.max_file_size_mb * 1024 * 1024 if self.max_file_size_mb else None
 
+        postings: Optional[PostingMap] = None
         try:
-            with path.open("r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-                lines = content.splitlines()
-                result["line_count"] = len(lines)
-
-                # Extraer IPs
-                if self.extract_ips:
-                    ips = set(self.ip_pattern.findall(content))
-                    result["ips_found"] = sorted(list(ips))
-
-                # Extraer emails
-                if self.extract_emails:
-                    emails = set(self.email_pattern.findall(content))
-                    result["emails_found"] = sorted(list(emails))
-
-                # Extraer timestamps
-                if self.extract_timestamps:
-                    timestamps = set()
-                    for pattern in self.timestamp_patterns:
-                        timestamps.update(pattern.findall(content))
-                    result["timestamps_found"] = sorted(list(timestamps))
-
-                # Buscar patrones sospechosos
-                suspicious = []
-                for pattern in self.suspicious_patterns:
-                    matches = pattern.findall(content)
-                    if matches:
-                        suspicious.extend(matches[:5])  # Limitar a 5 por patrón
-                result["suspicious_patterns"] = suspicious[:20]  # Máximo 20 en total
-
-                # Resumen
-                result["analysis_summary"] = {
-                    "total_lines": len(lines),
-                    "unique_ips": len(result["ips_found"]),
-                    "unique_emails": len(result["emails_found"]),
-                    "unique_timestamps": len(result["timestamps_found"]),
-                    "suspicious_count": len(result["suspicious_patterns"]),
-                }
+            scanner = self._new_scanner(collect_postings)
+            artifact_id = None
+            if self.index is not None:
+                artifact_id = self.index.begin_artifact(os.path.abspath(artifact_path), file_size)
+            with path.open("rb") as f:
+                for offset, block in iter_line_blocks(f, self.block_size, limit):
+                    scanner.feed(block, offset)
+                    if artifact_id is not None and len(scanner.postings) >= self.index_flush_size:
+                        self.index.add(artifact_id, scanner.drain_postings())
+            if artifact_id is not None:
+                self.index.add(artifact_id, scanner.drain_postings())
+            elif collect_postings:
+                postings = scanner.drain_postings()
+            scanned = scanner.finish()
+
+            result["line_count"] = scanned["line_count"]
+            result["ips_found"] = scanned["ips"]
+            result["emails_found"] = scanned["emails"]
+            result["timestamps_found"] = scanned["timestamps"]
+            result["suspicious_patterns"] = scanned["suspicious"]
+
+            # Resumen
+            summary: Dict[str, Any] = {
+                "total_lines": scanned["line_count"],
+                "unique_ips": len(result["ips_found"]),
+                "unique_emails": len(result["emails_found"]),
+                "unique_timestamps": len(result["timestamps_found"]),
+                "suspicious_count": len(result["suspicious_patterns"]),
+                "bytes_scanned": scanner.bytes_scanned,
+            }
+            if scanned["truncated"]:
+                summary["truncated_indicators"] = scanned["truncated"]
+            if artifact_id is not None:
+                summary["indexed"] = True
+            if scanner.bytes_scanned < file_size:
+                logger.warning(
+                    "Artifact %s analyzed partially: %d of %d bytes",
+                    artifact_path,
+                    scanner.bytes_scanned,
+                    file_size,
+                )
+                summary["partial"] = True
+            result["analysis_summary"] = summary
 
         except Exception as e:
             logger.error("Error analyzing artifact %s: %s", artifact_path, e)
             result["analysis_summary"]["error"] = str(e)
+            postings = None
+
+        return ArtifactAnalysis(**result), postings
+
+    def _index_postings(self, analysis: Dict[str, Any], postings: PostingMap) -> None:
+        """Escribe en el índice los postings que devolvió un worker."""
+        artifact_id = self.index.begin_artifact(
+            os.path.abspath(analysis["artifact_path"]), analysis["file_size"]
+        )
+        self.index.add(artifact_id, postings)
+        analysis["analysis_summary"]["indexed"] = True
+
+    def analyze_evidence(
+        self,
+        evidence_path: Union[str, List[str]],
+        workers: Optional[int] = None,
+        extensions: Optional[List[str]] = None,
+    ) -> EvidenceSetAnalysis:
+        """
+        Triage de un evidence set: directorio o lista de rutas.
+
+        Enumera los archivos con os.scandir, descarta duplicados por tamaño y
+        hash de contenido, analiza cada contenido distinto una vez (en un pool
+        de procesos) y fusiona los indicadores únicos de todos los artifacts.
+
+        Args:
+            evidence_path: Directorio, archivo o lista de rutas
+            workers: Procesos a usar (default: evidence_workers)
+            extensions: Sufijos a incluir (None = todos los archivos)
 
-        return ArtifactAnalysis(**result)
+        Returns:
+            EvidenceSetAnalysis con resultados por artifact, duplicados,
+            tiempos por archivo e indicadores fusionados
+        """
+        started = time.perf_counter()
+        roots = [evidence_path] if isinstance(evidence_path, str) else list(evidence_path)
+        workers = max(1, int(workers or self.evidence_workers))
+
+        # El propio índice (y sus archivos -wal/-shm) no es evidencia
+        index_file = os.path.abspath(self.index_path) if self.index_path else None
+
+        files: Dict[str, int] = {}
+        for root in roots:
+            for path, size in iter_files(root, extensions):
+                if index_file and os.path.abspath(path).startswith(index_file):
+                    continue
+                files.setdefault(path, size)
+
+        groups = deduplicate(files.items())
+        unique_paths = list(groups)
+
+        merged: Dict[str, set] = {"ips": set(), "emails": set(), "timestamps": set()}
+        truncated: set = set()
+        suspicious: List[str] = []
+        artifacts: List[ArtifactAnalysis] = []
+        timings: Dict[str, float] = {}
+
+        for analysis, elapsed in map_artifacts(self, unique_paths, self.config, workers):
+            artifact = ArtifactAnalysis(**analysis)
+            artifacts.append(artifact)
+            timings[artifact.artifact_path] = round(elapsed, 6)
+            truncated.update(artifact.analysis_summary.get("truncated_indicators", []))
+            for kind, values in (
+                ("ips", artifact.ips_found),
+                ("emails", artifact.emails_found),
+                ("timestamps", artifact.timestamps_found),
+            ):
+                found = merged[kind]
+                if self.max_unique_indicators is None:
+                    found.update(values)
+                    continue
+                for value in values:
+                    if len(found) >= self.max_unique_indicators and value not in found:
+                        truncated.add(kind)
+                        break
+                    found.add(value)
+            if len(suspicious) < self.max_suspicious_matches:
+                suspicious.extend(artifact.suspicious_patterns)
+
+        duplicates = {path: dups for path, dups in groups.items() if dups}
+        if self.index is not None:
+            # El contenido duplicado comparte postings con su copia analizada
+            for path, dups in duplicates.items():
+                for dup in dups:
+                    self.index.copy_artifact(
+                        os.path.abspath(path), os.path.abspath(dup), files[dup]
+                    )
+        return EvidenceSetAnalysis(
+            evidence_path=evidence_path if isinstance(evidence_path, str) else ", ".join(roots),
+            files_found=len(files),
+            unique_files=len(unique_paths),
+            duplicate_files=sum(len(dups) for dups in duplicates.values()),
+            bytes_total=sum(files.values()),
+            bytes_analyzed=sum(files[path] for path in unique_paths),
+            artifacts=artifacts,
+            duplicates=duplicates,
+            timings=timings,
+            timestamps_found=sorted(merged["timestamps"]),
+            ips_found=sorted(merged["ips"]),
+            emails_found=sorted(merged["emails"]),
+            suspicious_patterns=suspicious[: self.max_suspicious_matches],
+            truncated_indicators=sorted(truncated),
+            workers=workers if len(unique_paths) > 1 else 1,
+            elapsed_seconds=round(time.perf_counter() - started, 6),
+        )
 
-    def analyze(self, artifact_path: Optional[str] = None, artifact_paths: Optional[List[str]] = None) -> AnalysisResult:
+    def query(self, indicator: str, max_postings: Optional[int] = None) -> IndicatorQueryResult:
         """
-        Ejecuta análisis forense: un artifact o múltiples.
+        Busca un indicador en el índice invertido.
+
+        Args:
+            indicator: Valor exacto del indicador (IP, email o timestamp)
+            max_postings: Máximo de postings devueltos por artifact
+
+        Returns:
+            IndicatorQueryResult con artifacts, ocurrencias y (offset, línea)
+
+        Raises:
+            ValueError: Si no hay índice configurado (index_path)
+        """
+        if self.index is None:
+            raise ValueError("index_path is required to query the indicator index")
+        return IndicatorQueryResult(**self.index.query(indicator.strip(), max_postings))
+
+    def close(self) -> None:
+        """Cierra el índice invertido (si existe)."""
+        if self.index is not None:
+            self.index.close()
+
+    def analyze(
+        self,
+        artifact_path: Optional[str] = None,
+        artifact_paths: Optional[List[str]] = None,
+        evidence_path: Optional[str] = None,
+        indicator: Optional[str] = None,
+    ) -> AnalysisResult:
+        """
+        Ejecuta análisis forense: un artifact, múltiples, un evidence set o una
+        consulta al índice de indicadores.
 
         Args:
             artifact_path: Ruta a un artifact individual
             artifact_paths: Lista de rutas a múltiples artifacts
+            evidence_path: Directorio de evidencia (triage con deduplicación)
+            indicator: Indicador a buscar en el índice (requiere index_path)
 
         Returns:
             AnalysisResult con resultados del análisis
         """
+        if indicator:
+            if self.index is None:
+                return AnalysisResult(
+                    status="error",
+                    message="Indicator index not configured",
+                    data={},
+                    errors=["missing_index_path"],
+                )
+            found = self.query(indicator)
+            return AnalysisResult(
+                status="success",
+                message=(
+                    f"{found.total_occurrences} occurrences in {len(found.artifacts)} artifacts"
+                ),
+                data=found.model_dump(),
+            )
+
+        if evidence_path:
+            evidence = self.analyze_evidence(evidence_path)
+            return AnalysisResult(
+                status="success" if evidence.files_found else "error",
+                message=(
+                    f"Analyzed {evidence.unique_files} unique artifacts "
+                    f"({evidence.duplicate_files} duplicates skipped)"
+                ),
+                data=evidence.model_dump(),
+            )
+
         if artifact_paths:
             results = []
             for path in artifact_paths:
@@ -215,8 +444,9 @@ class HelixTrace:
             "mission": self.mission,
             "role": self.role,
             "status": "Production",
-            "max_file_size_mb": str(self.max_file_size_mb),
+            "max_file_size_mb": str(self.max_file_size_mb or "unlimited"),
             "supported_formats": ", ".join(self.supported_formats),
+            "index_path": str(self.index_path or "disabled"),
         }
 
 
@@ -0,0 +1,185 @@
+"""
+Evidence-set triage for HelixTrace.
+
+Un evidence set es un directorio (o una lista de rutas) con muchos artifacts,
+a menudo duplicados entre hosts. Los archivos se enumeran con ``os.scandir``,
+se agrupan por tamaño y, dentro de cada grupo con más de un archivo, por hash
+de contenido (primero de la cabecera y luego completo), de modo que cada
+contenido distinto se analiza una sola vez. Los análisis se reparten entre un
+pool de procesos.
+
+Solo el proceso padre escribe en el índice de indicadores: los workers
+devuelven los postings de cada artifact junto con su análisis.
+"""
+
+import hashlib
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .index import PostingMap
+
+HEAD_BYTES = 64 * 1024
+HASH_BLOCK = 1024 * 1024
+
+# Instancia por proceso worker (ver _init_worker)
+_worker_trace: Any = None
+_worker_postings = False
+
+
+def iter_files(
+    root: str, extensions: Optional[Iterable[str]] = None, follow_symlinks: bool = False
+) -> Iterator[Tuple[str, int]]:
+    """
+    Enumera archivos regulares bajo ``root`` con os.scandir (iterativo).
+
+    Args:
+        root: Directorio o archivo
+        extensions: Sufijos aceptados (None = todos)
+        follow_symlinks: Seguir enlaces simbólicos
+
+    Yields:
+        (ruta, tamaño en bytes)
+    """
+    suffixes = tuple(ext.lower() for ext in extensions) if extensions else None
+
+    if os.path.isfile(root):
+        if suffixes is None or root.lower().endswith(suffixes):
+            yield root, os.stat(root).st_size
+        return
+
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=follow_symlinks):
+                            if suffixes is not None and not entry.name.lower().endswith(suffixes):
+                                continue
+                            yield entry.path, entry.stat(follow_symlinks=follow_symlinks).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def content_hash(path: str, limit: Optional[int] = None) -> Optional[str]:
+    """BLAKE2b del contenido (o de los primeros ``limit`` bytes); None si falla."""
+    digest = hashlib.blake2b(digest_size=16)
+    remaining = limit
+    try:
+        with open(path, "rb") as handle:
+            while remaining is None or remaining > 0:
+                size = HASH_BLOCK if remaining is None else min(HASH_BLOCK, remaining)
+                raw = handle.read(size)
+                if not raw:
+                    break
+                digest.update(raw)
+                if remaining is not None:
+                    remaining -= len(raw)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def deduplicate(files: Iterable[Tuple[str, int]]) -> Dict[str, List[str]]:
+    """
+    Agrupa archivos de contenido idéntico.
+
+    Solo se calcula hash de los archivos cuyo tamaño coincide con el de otro;
+    el hash de cabecera descarta la mayoría de colisiones de tamaño antes de
+    leer los archivos completos.
+
+    Returns:
+        Dict ruta canónica -> rutas duplicadas (en orden de enumeración)
+    """
+    by_size: Dict[int, List[str]] = defaultdict(list)
+    for path, size in files:
+        by_size[size].append(path)
+
+    groups: Dict[str, List[str]] = {}
+    for size, paths in by_size.items():
+        if len(paths) == 1:
+            groups[paths[0]] = []
+            continue
+
+        candidates: List[List[str]] = [paths]
+        if size > HEAD_BYTES:
+            by_head: Dict[Optional[str], List[str]] = defaultdict(list)
+            for path in paths:
+                by_head[content_hash(path, HEAD_BYTES)].append(path)
+            candidates = list(by_head.values())
+
+        for candidate in candidates:
+            if len(candidate) == 1:
+                groups[candidate[0]] = []
+                continue
+            by_hash: Dict[str, List[str]] = {}
+            for path in candidate:
+                digest = content_hash(path)
+                if digest is None:
+                    # Ilegible: se analiza aparte y el análisis informará el error
+                    groups[path] = []
+                    continue
+                if digest in by_hash:
+                    by_hash[digest].append(path)
+                else:
+                    by_hash[digest] = [path]
+            for same in by_hash.values():
+                groups[same[0]] = same[1:]
+    return groups
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    global _worker_trace, _worker_postings
+    from .core import HelixTrace
+
+    # Sin índice propio: los postings vuelven al proceso padre
+    _worker_postings = bool(config.get("index_path"))
+    _worker_trace = HelixTrace({**config, "index_path": None})
+
+
+def _analyze_worker(path: str) -> Tuple[Dict[str, Any], float, Optional[PostingMap]]:
+    started = time.perf_counter()
+    analysis, postings = _worker_trace._analyze_artifact(path, _worker_postings)
+    return analysis.model_dump(), time.perf_counter() - started, postings
+
+
+def timed_analysis(trace: Any, path: str) -> Tuple[Dict[str, Any], float]:
+    """Analiza un artifact y devuelve (análisis como dict, segundos)."""
+    started = time.perf_counter()
+    analysis = trace.analyze_artifact(path).model_dump()
+    return analysis, time.perf_counter() - started
+
+
+def map_artifacts(
+    trace: Any, paths: List[str], config: Dict[str, Any], workers: int
+) -> Iterator[Tuple[Dict[str, Any], float]]:
+    """
+    Analiza artifacts en línea o en un pool de procesos, en orden.
+
+    Con índice, los postings que devuelven los workers se escriben en
+    ``trace.index`` desde este proceso.
+
+    Yields:
+        (análisis como dict, segundos)
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield timed_analysis(trace, path)
+        return
+
+    chunksize = max(1, min(64, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(config,)
+    ) as pool:
+        for analysis, elapsed, postings in pool.map(_analyze_worker, paths, chunksize=chunksize):
+            if postings is not None and trace.index is not None:
+                trace._index_postings(analysis, postings)
+            yield analysis, elapsed
@@ -0,0 +1,222 @@
+"""
+Persistent inverted index of HelixTrace findings.
+
+Guarda, por indicador (IP, email, timestamp), dónde fue encontrado: artifact,
+offset en bytes y número de línea. El índice es un archivo SQLite (WAL) que se
+construye durante el análisis y permite pivotar sobre un indicador sin volver
+a leer la evidencia.
+
+Tablas:
+    - artifacts: ruta y tamaño de cada artifact indexado
+    - indicators: valor y tipo de cada indicador
+    - hits: ocurrencias totales de un indicador en un artifact
+    - postings: (offset, línea) de las primeras ocurrencias (acotadas por
+      ``max_postings`` en el analizador)
+
+Las coincidencias sospechosas (posibles secretos) no se indexan.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Límite de parámetros por sentencia SQLite (SQLITE_MAX_VARIABLE_NUMBER conservador)
+_SQL_BATCH = 500
+
+# (tipo, valor) -> [ocurrencias, [(offset, línea), ...]]
+PostingMap = Dict[Tuple[str, str], List[Any]]
+
+
+class IndicatorIndex:
+    """Índice invertido indicador -> (artifact, offset, línea) en SQLite."""
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " id INTEGER PRIMARY KEY,"
+            " path TEXT NOT NULL UNIQUE,"
+            " size INTEGER NOT NULL,"
+            " indexed_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS indicators ("
+            " id INTEGER PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " value TEXT NOT NULL UNIQUE);"
+            "CREATE TABLE IF NOT EXISTS hits ("
+            " indicator_id INTEGER NOT NULL,"
+            " artifact_id INTEGER NOT NULL,"
+            " occurrences INTEGER NOT NULL,"
+            " PRIMARY KEY (indicator_id, artifact_id)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " indicator_id INTEGER NOT NULL,"
+            " artifact_id INTEGER NOT NULL,"
+            " offset INTEGER NOT NULL,"
+            " line INTEGER NOT NULL,"
+            " PRIMARY KEY (indicator_id, artifact_id, offset)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS hits_artifact ON hits (artifact_id);"
+        )
+        self._conn.commit()
+
+    def begin_artifact(self, path: str, size: int) -> int:
+        """
+        Registra un artifact y descarta sus entradas previas (re-indexado).
+
+        Returns:
+            id del artifact
+        """
+        with self._lock:
+            artifact_id = self._artifact_id(path, size)
+            self._conn.execute("DELETE FROM hits WHERE artifact_id = ?", (artifact_id,))
+            self._conn.execute("DELETE FROM postings WHERE artifact_id = ?", (artifact_id,))
+            self._conn.commit()
+        return artifact_id
+
+    def _artifact_id(self, path: str, size: int) -> int:
+        self._conn.execute(
+            "INSERT INTO artifacts (path, size, indexed_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(path) DO UPDATE"
+            " SET size = excluded.size, indexed_at = excluded.indexed_at",
+            (path, size, time.time()),
+        )
+        return int(
+            self._conn.execute("SELECT id FROM artifacts WHERE path = ?", (path,)).fetchone()[0]
+        )
+
+    def _indicator_ids(self, keys: List[Tuple[str, str]]) -> Dict[str, int]:
+        self._conn.executemany("INSERT OR IGNORE INTO indicators (kind, value) VALUES (?, ?)", keys)
+        ids: Dict[str, int] = {}
+        values = [value for _, value in keys]
+        for i in range(0, len(values), _SQL_BATCH):
+            chunk = values[i : i + _SQL_BATCH]
+            placeholders = ",".join("?" * len(chunk))
+            for indicator_id, value in self._conn.execute(
+                f"SELECT id, value FROM indicators WHERE value IN ({placeholders})", chunk
+            ):
+                ids[value] = indicator_id
+        return ids
+
+    def add(self, artifact_id: int, postings: PostingMap) -> None:
+        """Añade ocurrencias y postings de un artifact (acumulativo)."""
+        if not postings:
+            return
+        with self._lock:
+            ids = self._indicator_ids(list(postings))
+            self._conn.executemany(
+                "INSERT INTO hits (indicator_id, artifact_id, occurrences) VALUES (?, ?, ?)"
+                " ON CONFLICT(indicator_id, artifact_id)"
+                " DO UPDATE SET occurrences = occurrences + excluded.occurrences",
+                [(ids[value], artifact_id, entry[0]) for (_, value), entry in postings.items()],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO postings (indicator_id, artifact_id, offset, line)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (ids[value], artifact_id, offset, line)
+                    for (_, value), entry in postings.items()
+                    for offset, line in entry[1]
+                ],
+            )
+            self._conn.commit()
+
+    def copy_artifact(self, source_path: str, target_path: str, size: int) -> bool:
+        """
+        Indexa ``target_path`` con las entradas de ``source_path`` (mismo contenido).
+
+        Returns:
+            False si ``source_path`` no está indexado
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM artifacts WHERE path = ?", (source_path,)
+            ).fetchone()
+            if row is None:
+                return False
+            source_id = row[0]
+            target_id = self._artifact_id(target_path, size)
+            self._conn.execute("DELETE FROM hits WHERE artifact_id = ?", (target_id,))
+            self._conn.execute("DELETE FROM postings WHERE artifact_id = ?", (target_id,))
+            self._conn.execute(
+                "INSERT INTO hits (indicator_id, artifact_id, occurrences)"
+                " SELECT indicator_id, ?, occurrences FROM hits WHERE artifact_id = ?",
+                (target_id, source_id),
+            )
+            self._conn.execute(
+                "INSERT INTO postings (indicator_id, artifact_id, offset, line)"
+                " SELECT indicator_id, ?, offset, line FROM postings WHERE artifact_id = ?",
+                (target_id, source_id),
+            )
+            self._conn.commit()
+        return True
+
+    def query(self, indicator: str, max_postings: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Busca un indicador.
+
+        Args:
+            indicator: Valor exacto (IP, email o timestamp)
+            max_postings: Máximo de postings devueltos por artifact (None = todos)
+
+        Returns:
+            Dict con ``indicator``, ``kind``, ``total_occurrences`` y
+            ``artifacts`` (ruta, ocurrencias y postings por artifact)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind FROM indicators WHERE value = ?", (indicator,)
+            ).fetchone()
+            if row is None:
+                return {
+                    "indicator": indicator,
+                    "kind": None,
+                    "total_occurrences": 0,
+                    "artifacts": [],
+                }
+            indicator_id, kind = row
+
+            artifacts: List[Dict[str, Any]] = []
+            by_id: Dict[int, Dict[str, Any]] = {}
+            for artifact_id, path, occurrences in self._conn.execute(
+                "SELECT a.id, a.path, h.occurrences FROM hits h"
+                " JOIN artifacts a ON a.id = h.artifact_id"
+                " WHERE h.indicator_id = ? ORDER BY a.path",
+                (indicator_id,),
+            ):
+                entry = {"artifact_path": path, "occurrences": occurrences, "postings": []}
+                by_id[artifact_id] = entry
+                artifacts.append(entry)
+
+            for artifact_id, offset, line in self._conn.execute(
+                "SELECT artifact_id, offset, line FROM postings"
+                " WHERE indicator_id = ? ORDER BY artifact_id, offset",
+                (indicator_id,),
+            ):
+                entry = by_id.get(artifact_id)
+                if entry is None or (
+                    max_postings is not None and len(entry["postings"]) >= max_postings
+                ):
+                    continue
+                entry["postings"].append({"offset": offset, "line": line})
+
+        return {
+            "indicator": indicator,
+            "kind": kind,
+            "total_occurrences": sum(entry["occurrences"] for entry in artifacts),
+            "artifacts": artifacts,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Estadísticas del índice."""
+        with self._lock:
+            return {
+                table: int(self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+                for table in ("artifacts", "indicators", "hits", "postings")
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -16,7 +16,9 @@ class ModuleConfig(BaseModel):
     model_config = ConfigDict(frozen=True)
 
     name: str = Field(default="Helix Trace", description="Module name")
-    max_file_size_mb: int = Field(default=100, ge=1, description="Maximum file size in MB")
+    max_file_size_mb: Optional[int] = Field(
+        default=None, ge=1, description="Maximum MB analyzed per file (None = unlimited)"
+    )
     supported_formats: List[str] = Field(
         default_factory=lambda: [".log", ".txt", ".json", ".csv", ".xml"],
         description="Supported file formats",
@@ -24,6 +26,21 @@ class ModuleConfig(BaseModel):
     extract_timestamps: bool = Field(default=True, description="Extract timestamps from logs")
     extract_ips: bool = Field(default=True, description="Extract IP addresses")
     extract_emails: bool = Field(default=True, description="Extract email addresses")
+    max_unique_indicators: Optional[int] = Field(
+        default=None, ge=1, description="Cap on unique values kept per indicator type"
+    )
+    max_suspicious_matches: int = Field(default=20, ge=0, description="Suspicious matches kept")
+    max_suspicious_per_pattern: int = Field(
+        default=5, ge=0, description="Suspicious matches kept per pattern"
+    )
+    block_size: int = Field(default=1024 * 1024, ge=4096, description="Read block size in bytes")
+    index_path: Optional[str] = Field(default=None, description="SQLite indicator index file")
+    index_max_postings: int = Field(
+        default=100, ge=0, description="Postings kept per indicator and artifact"
+    )
+    index_flush_size: int = Field(
+        default=50000, ge=1, description="Pending postings flushed to the index at once"
+    )
     debug: bool = Field(default=False, description="Enable debug mode")
 
 
@@ -41,6 +58,49 @@ class ArtifactAnalysis(BaseModel):
     analysis_summary: Dict[str, Any] = Field(default_factory=dict, description="Summary statistics")
 
 
+class EvidenceSetAnalysis(BaseModel):
+    """Result of an evidence-set (directory or path list) triage"""
+
+    evidence_path: str = Field(description="Evidence root (or comma-joined path list)")
+    files_found: int = Field(default=0, description="Files enumerated")
+    unique_files: int = Field(default=0, description="Files with distinct content (analyzed)")
+    duplicate_files: int = Field(default=0, description="Files skipped as content duplicates")
+    bytes_total: int = Field(default=0, description="Bytes across all enumerated files")
+    bytes_analyzed: int = Field(default=0, description="Bytes across analyzed files")
+    artifacts: List[ArtifactAnalysis] = Field(
+        default_factory=list, description="Per-artifact results"
+    )
+    duplicates: Dict[str, List[str]] = Field(
+        default_factory=dict, description="Analyzed path -> paths with identical content"
+    )
+    timings: Dict[str, float] = Field(default_factory=dict, description="Analysis seconds per path")
+    timestamps_found: List[str] = Field(
+        default_factory=list, description="Merged unique timestamps"
+    )
+    ips_found: List[str] = Field(default_factory=list, description="Merged unique IP addresses")
+    emails_found: List[str] = Field(default_factory=list, description="Merged unique emails")
+    suspicious_patterns: List[str] = Field(default_factory=list, description="Suspicious patterns")
+    truncated_indicators: List[str] = Field(
+        default_factory=list, description="Indicator types capped by max_unique_indicators"
+    )
+    workers: int = Field(default=1, description="Worker processes used")
+    elapsed_seconds: float = Field(default=0.0, description="Wall-clock triage time")
+
+
+class IndicatorQueryResult(BaseModel):
+    """Result of an indicator lookup in the inverted index"""
+
+    indicator: str = Field(description="Queried indicator value")
+    kind: Optional[str] = Field(
+        default=None, description="Indicator type (ips, emails, timestamps)"
+    )
+    total_occurrences: int = Field(default=0, description="Occurrences across all artifacts")
+    artifacts: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Per artifact: artifact_path, occurrences and postings (offset, line)",
+    )
+
+
 class AnalysisResult(BaseModel):
     """Result model for analysis operations"""
 
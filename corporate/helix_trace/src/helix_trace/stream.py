@@ -0,0 +1,233 @@
+"""
+Streaming artifact scanning for HelixTrace.
+
+Los artifacts se leen en bloques de bytes que terminan en salto de línea, de
+modo que la memoria no depende del tamaño del archivo. Las expresiones
+regulares se aplican directamente sobre los bytes (versiones ``bytes`` de los
+patrones del analizador) y solo se decodifican los valores encontrados.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+# Una línea más larga que esto se corta aunque no tenga salto de línea
+MAX_CARRY = 64 * 1024
+
+
+@lru_cache(maxsize=64)
+def _compile_bytes(pattern: str, flags: int) -> "re.Pattern[bytes]":
+    return re.compile(pattern.encode("utf-8"), flags & ~re.UNICODE)
+
+
+def as_bytes_pattern(pattern: "re.Pattern[str]") -> "re.Pattern[bytes]":
+    """Versión ``bytes`` (memoizada) de un patrón compilado sobre ``str``."""
+    if isinstance(pattern.pattern, bytes):
+        return pattern
+    return _compile_bytes(pattern.pattern, pattern.flags)
+
+
+def iter_line_blocks(
+    handle: BinaryIO,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    limit: Optional[int] = None,
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Lee un archivo binario en bloques alineados a líneas.
+
+    Cada bloque termina en el último salto de línea leído; el resto se arrastra
+    al bloque siguiente para no partir coincidencias entre bloques.
+
+    Args:
+        handle: Archivo abierto en modo binario
+        block_size: Bytes a leer por iteración
+        limit: Máximo de bytes a leer (None = todo el archivo)
+
+    Yields:
+        (offset en bytes del inicio del bloque, bloque)
+    """
+    carry = b""
+    offset = 0
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = block_size if remaining is None else min(block_size, remaining)
+        raw = handle.read(size)
+        if not raw:
+            break
+        if remaining is not None:
+            remaining -= len(raw)
+
+        window = carry + raw if carry else raw
+        cut = window.rfind(b"\n") + 1
+        if cut == 0 and len(window) > MAX_CARRY:
+            cut = len(window)
+        if cut:
+            yield offset, window[:cut]
+            offset += cut
+        carry = window[cut:]
+
+    if carry:
+        yield offset, carry
+
+
+class ArtifactScanner:
+    """
+    Acumulador incremental de indicadores de un artifact.
+
+    Recibe bloques de bytes (ver ``iter_line_blocks``) y mantiene los
+    conjuntos de IPs, emails y timestamps, con un tope opcional de valores
+    únicos por tipo, y solo las primeras coincidencias sospechosas.
+    """
+
+    def __init__(
+        self,
+        ip_pattern: Optional["re.Pattern[str]"] = None,
+        email_pattern: Optional["re.Pattern[str]"] = None,
+        timestamp_patterns: Optional[List["re.Pattern[str]"]] = None,
+        suspicious_patterns: Optional[List["re.Pattern[str]"]] = None,
+        max_unique: Optional[int] = None,
+        max_suspicious: int = 20,
+        max_suspicious_per_pattern: int = 5,
+        max_postings: Optional[int] = None,
+    ):
+        self.max_unique = max_unique
+        # Si no es None se registran postings (offset, línea) para el índice
+        self.max_postings = max_postings
+        self.max_suspicious = max_suspicious
+        self.max_suspicious_per_pattern = max_suspicious_per_pattern
+
+        # tipo -> patrones bytes
+        self._extractors: Dict[str, List["re.Pattern[bytes]"]] = {}
+        if ip_pattern is not None:
+            self._extractors["ips"] = [as_bytes_pattern(ip_pattern)]
+        if email_pattern is not None:
+            self._extractors["emails"] = [as_bytes_pattern(email_pattern)]
+        if timestamp_patterns:
+            self._extractors["timestamps"] = [as_bytes_pattern(p) for p in timestamp_patterns]
+
+        self.values: Dict[str, Set[bytes]] = {kind: set() for kind in self._extractors}
+        self.truncated: Dict[str, bool] = {kind: False for kind in self._extractors}
+
+        self._suspicious = [as_bytes_pattern(p) for p in suspicious_patterns or []]
+        self.suspicious: List[List[bytes]] = [[] for _ in self._suspicious]
+
+        # (tipo, valor) -> [ocurrencias, [(offset, línea), ...]] pendientes de volcar
+        self.postings: Dict[Tuple[str, str], List[Any]] = {}
+        self._posting_counts: Dict[Tuple[str, bytes], int] = {}
+
+        self.bytes_scanned = 0
+        self.line_count = 0
+        self._ends_with_newline = True
+
+    def feed(self, block: bytes, offset: int = 0) -> None:
+        """
+        Procesa un bloque alineado a líneas.
+
+        Args:
+            block: Bytes del bloque
+            offset: Offset del bloque en el archivo (para los postings)
+        """
+        if not block:
+            return
+        first_line = self.line_count + 1
+        self.bytes_scanned += len(block)
+        self.line_count += block.count(b"\n")
+        self._ends_with_newline = block.endswith(b"\n")
+
+        max_unique = self.max_unique
+        for kind, patterns in self._extractors.items():
+            if self.max_postings is not None:
+                for pattern in patterns:
+                    self._index_matches(kind, pattern, block, offset, first_line)
+                continue
+            if self.truncated[kind]:
+                continue
+            found = self.values[kind]
+            for pattern in patterns:
+                if max_unique is None:
+                    found.update(pattern.findall(block))
+                    continue
+                for value in pattern.findall(block):
+                    if value in found:
+                        continue
+                    if len(found) >= max_unique:
+                        self.truncated[kind] = True
+                        break
+                    found.add(value)
+
+        per_pattern = self.max_suspicious_per_pattern
+        for pattern, matches in zip(self._suspicious, self.suspicious):
+            if len(matches) >= per_pattern:
+                continue
+            for match in pattern.finditer(block):
+                matches.append(match.group(1) if pattern.groups else match.group(0))
+                if len(matches) >= per_pattern:
+                    break
+
+    def _index_matches(
+        self, kind: str, pattern: "re.Pattern[bytes]", block: bytes, offset: int, first_line: int
+    ) -> None:
+        """
+        Extrae valores de un bloque registrando ocurrencias y postings.
+
+        Con ``max_unique`` solo se indexan los valores retenidos, así que los
+        contadores de postings tampoco crecen más allá del tope.
+        """
+        found = self.values[kind]
+        max_unique = self.max_unique
+        counts = self._posting_counts
+        postings = self.postings
+        line = first_line
+        last = 0
+        for match in pattern.finditer(block):
+            value = match.group(0)
+            if value not in found:
+                if max_unique is not None and len(found) >= max_unique:
+                    # Fuera del tope no se indexa: memoria acotada por max_unique
+                    self.truncated[kind] = True
+                    continue
+                found.add(value)
+
+            start = match.start()
+            line += block.count(b"\n", last, start)
+            last = start
+
+            key = (kind, value.decode("utf-8", "ignore"))
+            entry = postings.get(key)
+            if entry is None:
+                entry = postings[key] = [0, []]
+            entry[0] += 1
+            seen = counts.get((kind, value), 0)
+            if seen < self.max_postings:
+                entry[1].append((offset + start, line))
+            counts[(kind, value)] = seen + 1
+
+    def drain_postings(self) -> Dict[Tuple[str, str], List[Any]]:
+        """Devuelve y vacía los postings pendientes (para volcarlos al índice)."""
+        postings, self.postings = self.postings, {}
+        return postings
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Cierra el escaneo.
+
+        Returns:
+            Dict con ``line_count``, ``ips``, ``emails``, ``timestamps``
+            (listas ordenadas), ``suspicious`` y ``truncated``
+        """
+        line_count = self.line_count
+        if self.bytes_scanned and not self._ends_with_newline:
+            line_count += 1
+
+        result: Dict[str, Any] = {"line_count": line_count}
+        for kind in ("ips", "emails", "timestamps"):
+            found = self.values.get(kind, set())
+            result[kind] = sorted({value.decode("utf-8", "ignore") for value in found})
+
+        suspicious: List[str] = []
+        for matches in self.suspicious:
+            suspicious.extend(value.decode("utf-8", "ignore") for value in matches)
+        result["suspicious"] = suspicious[: self.max_suspicious]
+        result["truncated"] = [kind for kind, flag in self.truncated.items() if flag]
+        return result
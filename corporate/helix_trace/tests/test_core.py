@@ -15,8 +15,10 @@ if str(SRC) not in sys.path:
 
 import pytest
 
+from helix_trace import evidence
 from helix_trace.core import HelixTrace
-from helix_trace.models import AnalysisResult, ArtifactAnalysis
+from helix_trace.models import AnalysisResult, ArtifactAnalysis, EvidenceSetAnalysis
+from helix_trace.stream import ArtifactScanner
 
 
 @pytest.fixture
@@ -78,12 +80,169 @@ class TestArtifactAnalysis:
         result = modulo.analyze_artifact(sample_log_file)
         assert len(result.suspicious_patterns) > 0
 
+    def test_analyze_artifact_streams_in_blocks(self, sample_log_file):
+        """Test que el análisis por bloques pequeños coincide con el de un bloque"""
+        whole = HelixTrace().analyze_artifact(sample_log_file)
+        streamed = HelixTrace({"block_size": 4096})
+        streamed.block_size = 16  # forzar muchos bloques
+        result = streamed.analyze_artifact(sample_log_file)
+        assert result.line_count == whole.line_count == 6
+        assert result.ips_found == whole.ips_found
+        assert result.emails_found == whole.emails_found
+        assert result.timestamps_found == whole.timestamps_found
+        assert result.suspicious_patterns == whole.suspicious_patterns
+
+    def test_analyze_artifact_no_size_limit(self, tmp_path):
+        """Test que archivos grandes se analizan (sin límite duro por defecto)"""
+        artifact = tmp_path / "big.log"
+        line = b"2025-01-15 10:30:45 login from 10.0.0.1 " + b"x" * 100 + b"\n"
+        artifact.write_bytes(line * 12000)  # > 1 MiB
+        result = HelixTrace().analyze_artifact(str(artifact))
+        assert result.line_count == 12000
+        assert result.ips_found == ["10.0.0.1"]
+        assert result.analysis_summary["bytes_scanned"] == result.file_size
+
+        partial = HelixTrace({"max_file_size_mb": 1}).analyze_artifact(str(artifact))
+        assert partial.analysis_summary["partial"] is True
+        assert partial.analysis_summary["bytes_scanned"] == 1024 * 1024
+
+    def test_analyze_artifact_caps_indicators(self, tmp_path):
+        """Test que max_unique_indicators acota los conjuntos y lo informa"""
+        artifact = tmp_path / "ips.log"
+        artifact.write_text("".join(f"conn 10.0.{i // 256}.{i % 256}\n" for i in range(1000)))
+        result = HelixTrace({"max_unique_indicators": 10}).analyze_artifact(str(artifact))
+        assert len(result.ips_found) == 10
+        assert result.analysis_summary["truncated_indicators"] == ["ips"]
+
     def test_analyze_artifact_nonexistent(self, modulo):
         """Test que analyze_artifact maneja archivos inexistentes"""
         result = modulo.analyze_artifact("/nonexistent/file.log")
         assert result.file_size == 0
 
 
+@pytest.fixture
+def evidence_dir(tmp_path):
+    """Evidence set con artifacts duplicados entre hosts"""
+    root = tmp_path / "evidence"
+    shared = "2025-01-15 10:30:45 login from 192.168.1.100 by admin@example.com\n"
+    for host in ("host-a", "host-b", "host-c"):
+        (root / host).mkdir(parents=True)
+        (root / host / "auth.log").write_text(shared)
+    (root / "host-a" / "app.log").write_text("token: abc123 from 10.0.0.7\n")
+    # Mismo tamaño que auth.log pero distinto contenido
+    (root / "host-b" / "other.log").write_text(shared.replace("100", "101"))
+    return root
+
+
+class TestEvidenceSet:
+    """Tests para triage de evidence sets"""
+
+    def test_analyze_evidence_deduplicates(self, modulo, evidence_dir):
+        """Test que el contenido duplicado se analiza una sola vez"""
+        result = modulo.analyze_evidence(str(evidence_dir), workers=1)
+        assert isinstance(result, EvidenceSetAnalysis)
+        assert result.files_found == 5
+        assert result.unique_files == 3
+        assert result.duplicate_files == 2
+        assert set(result.timings) == {a.artifact_path for a in result.artifacts}
+        assert result.ips_found == ["10.0.0.7", "192.168.1.100", "192.168.1.101"]
+        assert result.emails_found == ["admin@example.com"]
+
+    def test_analyze_evidence_parallel_matches_serial(self, modulo, evidence_dir):
+        """Test que el pool de procesos produce los mismos indicadores"""
+        serial = modulo.analyze_evidence(str(evidence_dir), workers=1)
+        parallel = modulo.analyze_evidence(str(evidence_dir), workers=2)
+        assert parallel.workers == 2
+        assert parallel.ips_found == serial.ips_found
+        assert parallel.timestamps_found == serial.timestamps_found
+        assert [a.artifact_path for a in parallel.artifacts] == [
+            a.artifact_path for a in serial.artifacts
+        ]
+
+    def test_analyze_with_evidence_path(self, modulo, evidence_dir):
+        """Test analyze con evidence_path"""
+        result = modulo.analyze(evidence_path=str(evidence_dir))
+        assert result.status == "success"
+        assert result.data["unique_files"] == 3
+
+
+class TestIndicatorIndex:
+    """Tests para el índice invertido de indicadores"""
+
+    def test_query_returns_offsets_and_lines(self, tmp_path, sample_log_file):
+        """Test que query devuelve artifact, offset y línea de cada ocurrencia"""
+        trace = HelixTrace({"index_path": str(tmp_path / "index.db")})
+        trace.analyze_artifact(sample_log_file)
+        found = trace.query("192.168.1.100")
+        assert found.kind == "ips"
+        assert found.total_occurrences == 1
+        posting = found.artifacts[0]["postings"][0]
+        assert posting["line"] == 1
+        with open(sample_log_file, "rb") as f:
+            data = f.read()
+        assert data[posting["offset"] : posting["offset"] + 13] == b"192.168.1.100"
+        assert trace.query("10.0.0.1").artifacts[0]["postings"][0]["line"] == 3
+        assert trace.query("203.0.113.9").total_occurrences == 0
+        trace.close()
+
+    def test_index_respects_max_unique(self, tmp_path):
+        """Test que el índice no crece más allá de max_unique_indicators"""
+        artifact = tmp_path / "ips.log"
+        artifact.write_text("".join(f"conn 10.0.{i // 256}.{i % 256}\n" for i in range(1000)))
+        scanner = ArtifactScanner(ip_pattern=HelixTrace().ip_pattern, max_unique=10, max_postings=5)
+        scanner.feed(artifact.read_bytes())
+        assert len(scanner._posting_counts) == 10
+        assert len(scanner.drain_postings()) == 10
+        assert scanner.finish()["truncated"] == ["ips"]
+
+        trace = HelixTrace({"index_path": str(tmp_path / "index.db"), "max_unique_indicators": 10})
+        trace.analyze_artifact(str(artifact))
+        assert trace.query("10.0.0.9").total_occurrences == 1
+        assert trace.query("10.0.3.231").total_occurrences == 0
+        trace.close()
+
+    def test_index_persists_and_covers_duplicates(self, tmp_path, evidence_dir):
+        """Test que el índice persiste y los duplicados comparten postings"""
+        index_path = str(tmp_path / "index.db")
+        trace = HelixTrace({"index_path": index_path})
+        trace.analyze_evidence(str(evidence_dir), workers=1)
+        trace.close()
+
+        reopened = HelixTrace({"index_path": index_path})
+        found = reopened.query("192.168.1.100")
+        assert found.total_occurrences == 3
+        assert len(found.artifacts) == 3
+        result = reopened.analyze(indicator="admin@example.com")
+        assert result.status == "success"
+        assert result.data["kind"] == "emails"
+        reopened.close()
+
+    def test_pool_workers_return_postings(self, tmp_path, evidence_dir):
+        """Test que con un pool el proceso padre escribe los postings de los workers"""
+        trace = HelixTrace({"index_path": str(tmp_path / "index.db")})
+        result = trace.analyze_evidence(str(evidence_dir), workers=2)
+        assert all(a.analysis_summary.get("indexed") for a in result.artifacts)
+        found = trace.query("192.168.1.100")
+        assert found.total_occurrences == 3
+        assert found.artifacts[0]["postings"] == [{"offset": 31, "line": 1}]
+        assert trace.query("10.0.0.7").total_occurrences == 1
+        assert trace.index.stats()["artifacts"] == 5
+        trace.close()
+
+        evidence._init_worker({"index_path": str(tmp_path / "worker.db")})
+        assert evidence._worker_trace.index is None
+        analysis, _, postings = evidence._analyze_worker(str(evidence_dir / "host-a" / "app.log"))
+        assert postings[("ips", "10.0.0.7")] == [1, [(19, 1)]]
+        assert "indexed" not in analysis["analysis_summary"]
+        assert not (tmp_path / "worker.db").exists()
+
+    def test_query_without_index(self, modulo):
+        """Test que query sin index_path falla de forma explícita"""
+        with pytest.raises(ValueError):
+            modulo.query("10.0.0.1")
+        assert modulo.analyze(indicator="10.0.0.1").status == "error"
+
+
 class TestAnalyze:
     """Tests para funcionalidad de análisis"""
 
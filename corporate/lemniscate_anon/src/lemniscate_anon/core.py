@@ -6,13 +6,31 @@ Misión: Charlotte Balfour
 Rol: anonymizer
 """
 
+import csv
 import hashlib
 import logging
 import secrets
 import string
-from typing import Any, Dict, List, Optional
-
-from .models import AnalysisResult, AnonymizationRecord, AnonymizationResult
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from .mapping import MappingStore, MemoryMappingStore, create_mapping_store
+from .models import (
+    AnalysisResult,
+    AnonymizationRecord,
+    AnonymizationResult,
+    TabularAnonymizationResult,
+)
+from .tabular import (
+    MISSING,
+    detect_format,
+    iter_csv_chunks,
+    iter_ndjson_chunks,
+    map_chunks,
+    write_csv_chunk,
+    write_ndjson_chunk,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +54,11 @@ class LemniscateAnon:
                 - preserve_format: Preservar formato (default: True)
                 - reversible: Habilitar reversibilidad (default: False)
                 - seed: Semilla para anonimización determinística (opcional)
+                - memo_size: Valores distintos memoizados por campo en modo tabular
+                  (default: 1_000_000)
+                - mapping_backend: Almacén del mapeo reversible (memory/sqlite) (default: "memory")
+                - mapping_path: Archivo del almacén persistente (requerido para sqlite)
+                - mapping_cache_size: Entradas de la caché LRU del almacén (default: 100000)
         """
         self.name = "Lemniscate Anon"
         self.mission = "Charlotte Balfour"
@@ -46,9 +69,18 @@ class LemniscateAnon:
         self.preserve_format = bool(self.config.get("preserve_format", True))
         self.reversible = bool(self.config.get("reversible", False))
         self.seed = self.config.get("seed")
+        self.memo_size = int(self.config.get("memo_size", 1_000_000))
+
+        # Mapeo (campo, valor) -> pseudónimo para reversibilidad (si está habilitada)
+        self.mapping_store: MappingStore = create_mapping_store(
+            self.config.get("mapping_backend", "memory"),
+            path=self.config.get("mapping_path"),
+            cache_size=int(self.config.get("mapping_cache_size", 100000)),
+        )
 
-        # Mapeo para reversibilidad (si está habilitada)
-        self.mapping: Dict[str, str] = {}
+        # Transformaciones por columna (modo tabular), con memo por campo
+        self._column_transforms: Dict[str, Callable[[str], str]] = {}
+        self._column_memos: Dict[str, Any] = {}
 
         logger.info(
             "Initialized %s - %s (method=%s, reversible=%s)",
@@ -69,14 +101,24 @@ class LemniscateAnon:
         Returns:
             Valor pseudonimizado
         """
-        if self.reversible and value in self.mapping:
-            return self.mapping[value]
-
         # Hash determinístico
         hash_input = f"{self.seed or 'default'}:{field_name}:{value}"
         hash_obj = hashlib.sha256(hash_input.encode("utf-8"))
         hash_hex = hash_obj.hexdigest()[:16]  # Primeros 16 caracteres
 
+        return self._format_pseudonym(hash_hex, value)
+
+    def _format_pseudonym(self, hash_hex: str, value: str) -> str:
+        """
+        Da formato al pseudónimo a partir del hash del valor.
+
+        Args:
+            hash_hex: Primeros 16 caracteres hexadecimales del hash
+            value: Valor original (para preservar formato)
+
+        Returns:
+            Valor pseudonimizado
+        """
         if self.preserve_format:
             # Intentar preservar formato básico
             if "@" in value:
@@ -153,6 +195,12 @@ class LemniscateAnon:
         if not isinstance(value, str):
             value = str(value)
 
+        # Un valor ya mapeado conserva su pseudónimo (también entre procesos)
+        if self.reversible:
+            existing = self.mapping_store.get(field_name, value)
+            if existing is not None:
+                return existing
+
         if self.anonymization_method == "pseudonymize":
             anonymized = self._pseudonymize(value, field_name)
         elif self.anonymization_method == "generalize":
@@ -164,10 +212,259 @@ class LemniscateAnon:
 
         # Guardar mapeo si es reversible
         if self.reversible:
-            self.mapping[value] = anonymized
+            anonymized = self.mapping_store.put(field_name, value, anonymized)
 
         return anonymized
 
+    def reidentify(self, field_name: str, pseudonym: str) -> Optional[str]:
+        """
+        Re-identifica un pseudónimo (requiere ``reversible=True``).
+
+        Args:
+            field_name: Campo en el que se generó el pseudónimo
+            pseudonym: Valor anonimizado
+
+        Returns:
+            Valor original o None si no está en el almacén
+        """
+        if not self.reversible:
+            return None
+        return self.mapping_store.reverse(field_name, pseudonym)
+
+    def reidentify_many(self, field_name: str, pseudonyms: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Re-identifica pseudónimos en bloque con un único lookup.
+
+        Args:
+            field_name: Campo en el que se generaron los pseudónimos
+            pseudonyms: Valores anonimizados
+
+        Returns:
+            Dict pseudónimo -> valor original (None si no existe)
+        """
+        if not self.reversible:
+            return {pseudonym: None for pseudonym in pseudonyms}
+        found = self.mapping_store.reverse_many(field_name, pseudonyms)
+        return {pseudonym: found.get(pseudonym) for pseudonym in pseudonyms}
+
+    def close(self) -> None:
+        """Cierra el almacén de mapeo (necesario en backends persistentes)."""
+        self.mapping_store.close()
+
+    def column_transform(self, field_name: str) -> Callable[[str], str]:
+        """
+        Devuelve la transformación de valores de una columna completa.
+
+        El resultado coincide con ``anonymize_field`` para cada valor nuevo
+        (sin consultar el almacén reversible, que ``anonymize_columns`` resuelve
+        en bloque). Para pseudonimización el estado del hash con el prefijo
+        "seed:campo:" se calcula una sola vez y se copia por valor; los métodos
+        deterministas memoizan cada valor distinto del campo (hasta ``memo_size``).
+
+        Args:
+            field_name: Nombre del campo
+
+        Returns:
+            Función valor -> valor anonimizado
+        """
+        transform = self._column_transforms.get(field_name)
+        if transform is not None:
+            return transform
+
+        method = self.anonymization_method
+        if method == "pseudonymize":
+            prefix = hashlib.sha256(f"{self.seed or 'default'}:{field_name}:".encode("utf-8"))
+            format_pseudonym = self._format_pseudonym
+
+            def base(value: str) -> str:
+                hash_obj = prefix.copy()
+                hash_obj.update(value.encode("utf-8"))
+                return format_pseudonym(hash_obj.hexdigest()[:16], value)
+
+        elif method == "generalize":
+
+            def base(value: str) -> str:
+                return self._generalize(value, field_name)
+
+        elif method == "randomize":
+
+            def base(value: str) -> str:
+                return self._randomize(value, field_name)
+
+        else:
+
+            def base(value: str) -> str:
+                return value
+
+        if method in ("pseudonymize", "generalize"):
+            base = self._column_memos[field_name] = lru_cache(maxsize=self.memo_size)(base)
+
+        self._column_transforms[field_name] = base
+        return base
+
+    def anonymize_columns(
+        self, columns: Dict[str, List[Any]], fields_to_anonymize: Optional[List[str]] = None
+    ) -> Dict[str, List[Any]]:
+        """
+        Anonimiza datos tabulares organizados por columnas.
+
+        Con ``reversible=True`` cada columna hace un único lookup y una única
+        inserción en el almacén de mapeo para sus valores distintos.
+
+        Args:
+            columns: Dict campo -> lista de valores (None o ``MISSING`` = celda
+                vacía o ausente; se conservan tal cual)
+            fields_to_anonymize: Campos a anonimizar (None = todos)
+
+        Returns:
+            Dict con las mismas columnas; las seleccionadas, anonimizadas
+        """
+        fields = fields_to_anonymize if fields_to_anonymize else list(columns)
+        result = dict(columns)
+
+        for field_name in fields:
+            column = columns.get(field_name)
+            if column is None:
+                continue
+            transform = self.column_transform(field_name)
+            if self.reversible:
+                distinct = list(
+                    dict.fromkeys(
+                        str(value) for value in column if value is not None and value is not MISSING
+                    )
+                )
+                resolved = self.mapping_store.get_many(field_name, distinct)
+                new_pairs = [
+                    (value, transform(value)) for value in distinct if value not in resolved
+                ]
+                if new_pairs:
+                    resolved.update(self.mapping_store.put_many(field_name, new_pairs))
+                transform = resolved.__getitem__
+
+            result[field_name] = [
+                (
+                    value
+                    if value is None or value is MISSING
+                    else transform(value if isinstance(value, str) else str(value))
+                )
+                for value in column
+            ]
+
+        return result
+
+    def memo_statistics(self) -> Dict[str, Dict[str, int]]:
+        """Aciertos y valores distintos memoizados por campo (modo tabular)."""
+        stats: Dict[str, Dict[str, int]] = {}
+        for field_name, memo in self._column_memos.items():
+            info = memo.cache_info()
+            stats[field_name] = {
+                "hits": info.hits,
+                "misses": info.misses,
+                "distinct": info.currsize,
+            }
+        return stats
+
+    def anonymize_file(
+        self,
+        input_path: str,
+        output_path: str,
+        fields_to_anonymize: Optional[List[str]] = None,
+        file_format: Optional[str] = None,
+        chunk_size: int = 10000,
+        workers: int = 1,
+    ) -> TabularAnonymizationResult:
+        """
+        Anonimiza un dataset CSV/NDJSON en streaming, columna a columna.
+
+        El archivo se procesa por bloques de ``chunk_size`` filas, por lo que la
+        memoria no depende del tamaño del dataset. Con ``workers > 1`` los
+        bloques se reparten entre procesos (cada uno con su propio memo) y la
+        salida conserva el orden de entrada. Con ``reversible`` y el almacén en
+        memoria, el proceso principal consolida los mapeos de los workers y
+        reescribe cada bloque con el seudónimo canónico de cada valor.
+
+        Args:
+            input_path: Dataset de entrada (CSV con cabecera o NDJSON)
+            output_path: Archivo de salida (mismo formato)
+            fields_to_anonymize: Campos a anonimizar (None = todos)
+            file_format: "csv" o "ndjson" (default: según la extensión)
+            chunk_size: Filas por bloque
+            workers: Procesos a usar
+
+        Returns:
+            TabularAnonymizationResult con estadísticas
+        """
+        file_format = file_format or detect_format(input_path)
+        started = time.perf_counter()
+        rows = 0
+        chunks = 0
+        seen_fields: Dict[str, None] = {}
+
+        with (
+            open(input_path, "r", encoding="utf-8", newline="") as source,
+            open(output_path, "w", encoding="utf-8", newline="") as target,
+        ):
+            if file_format == "csv":
+                header, column_chunks = iter_csv_chunks(source, chunk_size)
+                writer = csv.writer(target)
+                writer.writerow(header)
+            else:
+                header, column_chunks = [], iter_ndjson_chunks(source, chunk_size)
+
+            def anonymize(columns: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+                return self.anonymize_columns(columns, fields_to_anonymize)
+
+            for original, anonymized in map_chunks(
+                anonymize, column_chunks, self.config, fields_to_anonymize, workers
+            ):
+                shared_store = not isinstance(self.mapping_store, MemoryMappingStore)
+                if workers > 1 and self.reversible and not shared_store:
+                    # Un almacén en memoria no se comparte con los workers: consolidar
+                    # aquí y reescribir el bloque con el seudónimo canónico (con
+                    # métodos aleatorios cada worker genera el suyo para un valor)
+                    for field_name in fields_to_anonymize or list(original):
+                        if field_name in original:
+                            column = original[field_name]
+                            canonical = self.mapping_store.put_many(
+                                field_name,
+                                (
+                                    (str(value), anon)
+                                    for value, anon in zip(column, anonymized[field_name])
+                                    if value is not None and value is not MISSING
+                                ),
+                            )
+                            anonymized[field_name] = [
+                                (
+                                    value
+                                    if value is None or value is MISSING
+                                    else canonical[str(value)]
+                                )
+                                for value in column
+                            ]
+                seen_fields.update(dict.fromkeys(original))
+                if file_format == "csv":
+                    rows += write_csv_chunk(writer, header, anonymized)
+                else:
+                    rows += write_ndjson_chunk(target, anonymized)
+                chunks += 1
+
+        fields = [f for f in (fields_to_anonymize or list(seen_fields)) if f in seen_fields]
+        return TabularAnonymizationResult(
+            input_path=input_path,
+            output_path=output_path,
+            file_format=file_format,
+            rows_processed=rows,
+            chunks_processed=chunks,
+            anonymized_fields=fields,
+            elapsed_seconds=round(time.perf_counter() - started, 6),
+            statistics={
+                "method": self.anonymization_method,
+                "reversible": self.reversible,
+                "workers": workers,
+                "memo": self.memo_statistics() if workers <= 1 else {},
+            },
+        )
+
     def anonymize_data(self, data: Dict[str, Any], fields_to_anonymize: Optional[List[str]] = None) -> AnonymizationResult:
         """
         Anonimiza un diccionario de datos.
@@ -261,6 +558,7 @@ class LemniscateAnon:
             "status": "Production",
             "anonymization_method": self.anonymization_method,
             "reversible": str(self.reversible),
+            "mapping_backend": self.mapping_store.backend,
         }
 
 
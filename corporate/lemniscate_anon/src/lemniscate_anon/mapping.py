@@ -0,0 +1,299 @@
+"""
+Mapping stores for reversible anonymization in LemniscateAnon.
+
+Un almacén guarda (campo, valor) -> pseudónimo con índice inverso
+(campo, pseudónimo) -> valor para re-identificación. La clave incluye el
+campo, de modo que el mismo valor en campos distintos no se confunde.
+
+Backends:
+    - MemoryMappingStore: diccionarios en proceso
+    - SQLiteMappingStore: archivo SQLite compartido (WAL) con clave por hash
+      y caché LRU acotada por proceso; varios procesos pueden leerlo a la vez
+      y coinciden en el pseudónimo (el primero en escribir gana)
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Límite de parámetros por sentencia SQLite (SQLITE_MAX_VARIABLE_NUMBER conservador)
+_SQL_BATCH = 500
+
+MappingKey = Tuple[str, str]
+
+
+class LRUCache:
+    """
+    Caché LRU acotada basada en OrderedDict.
+
+    ``get`` reordena el diccionario, así que get/put se serializan con un
+    lock: la caché puede compartirse entre hilos.
+    """
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max(0, int(max_size))
+        self._data: "OrderedDict[MappingKey, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: MappingKey) -> Optional[str]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: MappingKey, value: str) -> None:
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MappingStore:
+    """Interfaz común de los almacenes de mapeo reversible."""
+
+    backend = "base"
+
+    def get(self, field_name: str, value: str) -> Optional[str]:
+        """Pseudónimo existente de un valor en un campo (o None)."""
+        return self.get_many(field_name, [value]).get(value)
+
+    def reverse(self, field_name: str, pseudonym: str) -> Optional[str]:
+        """Valor original de un pseudónimo en un campo (o None)."""
+        return self.reverse_many(field_name, [pseudonym]).get(pseudonym)
+
+    def put(self, field_name: str, value: str, pseudonym: str) -> str:
+        """Registra un mapeo y devuelve el pseudónimo canónico del valor."""
+        return self.put_many(field_name, [(value, pseudonym)]).get(value, pseudonym)
+
+    def get_many(self, field_name: str, values: Iterable[str]) -> Dict[str, str]:
+        """Lookup masivo valor -> pseudónimo (solo los encontrados)."""
+        raise NotImplementedError
+
+    def reverse_many(self, field_name: str, pseudonyms: Iterable[str]) -> Dict[str, str]:
+        """Lookup masivo pseudónimo -> valor (solo los encontrados)."""
+        raise NotImplementedError
+
+    def put_many(self, field_name: str, pairs: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        """
+        Inserción masiva de pares (valor, pseudónimo) de un campo.
+
+        Un valor ya mapeado conserva su pseudónimo. Devuelve el mapeo
+        canónico valor -> pseudónimo de los valores insertados.
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """Estadísticas del almacén."""
+        return {"entries": len(self)}
+
+    def close(self) -> None:
+        """Libera recursos del backend."""
+
+
+class MemoryMappingStore(MappingStore):
+    """Almacén en memoria (se pierde al terminar el proceso)."""
+
+    backend = "memory"
+
+    def __init__(self) -> None:
+        self.forward: Dict[MappingKey, str] = {}
+        self.backward: Dict[MappingKey, str] = {}
+
+    def get(self, field_name: str, value: str) -> Optional[str]:
+        return self.forward.get((field_name, value))
+
+    def reverse(self, field_name: str, pseudonym: str) -> Optional[str]:
+        return self.backward.get((field_name, pseudonym))
+
+    def get_many(self, field_name: str, values: Iterable[str]) -> Dict[str, str]:
+        forward = self.forward
+        found: Dict[str, str] = {}
+        for value in values:
+            pseudonym = forward.get((field_name, value))
+            if pseudonym is not None:
+                found[value] = pseudonym
+        return found
+
+    def reverse_many(self, field_name: str, pseudonyms: Iterable[str]) -> Dict[str, str]:
+        backward = self.backward
+        found: Dict[str, str] = {}
+        for pseudonym in pseudonyms:
+            value = backward.get((field_name, pseudonym))
+            if value is not None:
+                found[pseudonym] = value
+        return found
+
+    def put_many(self, field_name: str, pairs: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        canonical: Dict[str, str] = {}
+        for value, pseudonym in pairs:
+            existing = self.forward.setdefault((field_name, value), pseudonym)
+            self.backward.setdefault((field_name, existing), value)
+            canonical[value] = existing
+        return canonical
+
+    def __len__(self) -> int:
+        return len(self.forward)
+
+
+class SQLiteMappingStore(MappingStore):
+    """
+    Almacén persistente en SQLite.
+
+    La clave primaria es el SHA-256 de "campo\\0valor" (tamaño fijo) y el
+    índice inverso cubre (campo, pseudónimo). WAL permite lectores
+    concurrentes desde varios procesos mientras uno escribe.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, cache_size: int = 100000, timeout: float = 30.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS mappings ("
+            " key_hash BLOB PRIMARY KEY,"
+            " field TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " pseudonym TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS mappings_reverse ON mappings (field, pseudonym)"
+        )
+        self._conn.commit()
+
+        self.forward_cache = LRUCache(cache_size)
+        self.reverse_cache = LRUCache(cache_size)
+
+    @staticmethod
+    def _key(field_name: str, value: str) -> bytes:
+        return hashlib.sha256(f"{field_name}\0{value}".encode("utf-8")).digest()
+
+    def get_many(self, field_name: str, values: Iterable[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        pending: Dict[bytes, str] = {}
+        for value in values:
+            if value in found:
+                continue
+            pseudonym = self.forward_cache.get((field_name, value))
+            if pseudonym is not None:
+                found[value] = pseudonym
+            else:
+                pending[self._key(field_name, value)] = value
+
+        keys = list(pending)
+        with self._lock:
+            for i in range(0, len(keys), _SQL_BATCH):
+                chunk = keys[i : i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key_hash, pseudonym FROM mappings WHERE key_hash IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key_hash, pseudonym in rows:
+                    value = pending[key_hash]
+                    found[value] = pseudonym
+                    self.forward_cache.put((field_name, value), pseudonym)
+        return found
+
+    def reverse_many(self, field_name: str, pseudonyms: Iterable[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        pending: List[str] = []
+        for pseudonym in pseudonyms:
+            if pseudonym in found:
+                continue
+            value = self.reverse_cache.get((field_name, pseudonym))
+            if value is not None:
+                found[pseudonym] = value
+            else:
+                pending.append(pseudonym)
+
+        pending = list(dict.fromkeys(pending))
+        with self._lock:
+            for i in range(0, len(pending), _SQL_BATCH):
+                chunk = pending[i : i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(chunk))
+                # Si varios valores comparten pseudónimo (generalización) gana el primero
+                rows = self._conn.execute(
+                    "SELECT pseudonym, value FROM mappings"
+                    f" WHERE field = ? AND pseudonym IN ({placeholders}) ORDER BY rowid DESC",
+                    [field_name, *chunk],
+                ).fetchall()
+                for pseudonym, value in rows:
+                    found[pseudonym] = value
+                    self.reverse_cache.put((field_name, pseudonym), value)
+        return found
+
+    def put_many(self, field_name: str, pairs: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        rows = [(self._key(field_name, v), field_name, v, p) for v, p in pairs]
+        if not rows:
+            return {}
+        with self._lock:
+            # Un valor ya mapeado (quizá por otro proceso) conserva su pseudónimo
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO mappings (key_hash, field, value, pseudonym)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return self.get_many(field_name, (value for _, _, value, _ in rows))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM mappings").fetchone()[0])
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self),
+            "cache_hits": self.forward_cache.hits + self.reverse_cache.hits,
+            "cache_misses": self.forward_cache.misses + self.reverse_cache.misses,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_mapping_store(
+    backend: str = "memory", path: Optional[str] = None, cache_size: int = 100000
+) -> MappingStore:
+    """
+    Crea un almacén de mapeo según el backend configurado.
+
+    Args:
+        backend: "memory" o "sqlite"
+        path: Ruta del archivo (requerida para sqlite)
+        cache_size: Entradas de la caché LRU por dirección (sqlite)
+
+    Returns:
+        MappingStore
+
+    Raises:
+        ValueError: Si el backend es desconocido o falta la ruta
+    """
+    if backend == "memory":
+        return MemoryMappingStore()
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("mapping_path is required for the 'sqlite' mapping backend")
+        return SQLiteMappingStore(path, cache_size=cache_size)
+    raise ValueError(f"Unknown mapping backend: {backend}")
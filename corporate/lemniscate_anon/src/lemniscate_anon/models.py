@@ -19,6 +19,18 @@ class ModuleConfig(BaseModel):
     preserve_format: bool = Field(default=True, description="Preserve data format")
     reversible: bool = Field(default=False, description="Enable reversible anonymization")
     seed: Optional[str] = Field(default=None, description="Seed for deterministic anonymization")
+    memo_size: int = Field(
+        default=1_000_000, ge=0, description="Distinct values memoized per field (tabular mode)"
+    )
+    mapping_backend: str = Field(
+        default="memory", description="Reversible mapping store (memory/sqlite)"
+    )
+    mapping_path: Optional[str] = Field(
+        default=None, description="Persistent mapping store file (sqlite backend)"
+    )
+    mapping_cache_size: int = Field(
+        default=100000, ge=0, description="LRU cache entries in front of the store"
+    )
     debug: bool = Field(default=False, description="Enable debug mode")
 
 
@@ -44,6 +56,19 @@ class AnonymizationResult(BaseModel):
     statistics: Dict[str, Any] = Field(default_factory=dict, description="Anonymization statistics")
 
 
+class TabularAnonymizationResult(BaseModel):
+    """Result of a streaming CSV/NDJSON anonymization run"""
+
+    input_path: str = Field(description="Input dataset")
+    output_path: str = Field(description="Anonymized output dataset")
+    file_format: str = Field(description="Dataset format (csv/ndjson)")
+    rows_processed: int = Field(description="Rows written")
+    chunks_processed: int = Field(description="Row chunks processed")
+    anonymized_fields: List[str] = Field(default_factory=list, description="Fields anonymized")
+    elapsed_seconds: float = Field(description="Wall-clock duration")
+    statistics: Dict[str, Any] = Field(default_factory=dict, description="Run statistics")
+
+
 class AnalysisResult(BaseModel):
     """Result model for analysis operations"""
 
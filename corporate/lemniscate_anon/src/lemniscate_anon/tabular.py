@@ -0,0 +1,141 @@
+"""
+Tabular (CSV/NDJSON) streaming support for LemniscateAnon.
+
+Los datasets se leen por bloques de filas, cada bloque se transpone a columnas
+y se anonimiza columna a columna con ``LemniscateAnon.anonymize_columns``.
+Los bloques pueden repartirse entre procesos; el orden de salida se conserva.
+"""
+
+import csv
+import json
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class _Missing:
+    """Clave ausente en una fila NDJSON (distinta de un ``null`` explícito)."""
+
+    __slots__ = ()
+
+    def __reduce__(self) -> str:
+        # Se deserializa como el singleton del módulo (bloques enviados a workers)
+        return "MISSING"
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+# Instancia por proceso worker (ver _init_worker)
+_worker_anonymizer: Any = None
+
+
+def detect_format(path: str) -> str:
+    """Formato del dataset según su extensión ("csv" o "ndjson")."""
+    lowered = path.lower()
+    if lowered.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return "csv"
+
+
+def iter_csv_chunks(
+    handle: Any, chunk_size: int
+) -> Tuple[List[str], Iterator[Dict[str, List[Any]]]]:
+    """
+    Lee un CSV con cabecera en bloques columnares.
+
+    Returns:
+        (cabecera, iterador de bloques {campo: valores})
+    """
+    reader = csv.reader(handle)
+    header = next(reader, [])
+
+    def chunks() -> Iterator[Dict[str, List[Any]]]:
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            width = len(header)
+            rows = [row + [""] * (width - len(row)) if len(row) < width else row for row in rows]
+            yield {name: list(values) for name, values in zip(header, zip(*rows))}
+
+    return header, chunks()
+
+
+def iter_ndjson_chunks(handle: Any, chunk_size: int) -> Iterator[Dict[str, List[Any]]]:
+    """Lee NDJSON en bloques columnares; las claves ausentes quedan como ``MISSING``."""
+    lines = (line for line in handle if line.strip())
+    while True:
+        rows = [json.loads(line) for line in islice(lines, chunk_size)]
+        if not rows:
+            return
+        fields = list(dict.fromkeys(key for row in rows for key in row))
+        yield {name: [row.get(name, MISSING) for row in rows] for name in fields}
+
+
+def write_csv_chunk(writer: Any, header: List[str], columns: Dict[str, List[Any]]) -> int:
+    rows = list(zip(*(columns[name] for name in header)))
+    writer.writerows(rows)
+    return len(rows)
+
+
+def write_ndjson_chunk(handle: Any, columns: Dict[str, List[Any]]) -> int:
+    names = list(columns)
+    count = 0
+    for values in zip(*(columns[name] for name in names)):
+        row = {name: value for name, value in zip(names, values) if value is not MISSING}
+        handle.write(json.dumps(row, ensure_ascii=False))
+        handle.write("\n")
+        count += 1
+    return count
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    global _worker_anonymizer
+    from .core import LemniscateAnon
+
+    _worker_anonymizer = LemniscateAnon(config)
+
+
+def _anonymize_chunk(
+    columns: Dict[str, List[Any]], fields: Optional[List[str]]
+) -> Dict[str, List[Any]]:
+    return _worker_anonymizer.anonymize_columns(columns, fields)
+
+
+def map_chunks(
+    func: Callable[[Dict[str, List[Any]]], Dict[str, List[Any]]],
+    chunks: Iterable[Dict[str, List[Any]]],
+    config: Dict[str, Any],
+    fields: Optional[List[str]],
+    workers: int,
+) -> Iterator[Tuple[Dict[str, List[Any]], Dict[str, List[Any]]]]:
+    """
+    Anonimiza bloques en línea o en un pool de procesos, en orden.
+
+    En modo paralelo se mantienen como máximo ``2 * workers`` bloques en vuelo
+    para que la memoria no dependa del tamaño del dataset.
+
+    Yields:
+        (bloque original, bloque anonimizado)
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, func(chunk)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(config,)
+    ) as pool:
+        in_flight: Deque[Tuple[Dict[str, List[Any]], Future]] = deque()
+        for chunk in chunks:
+            in_flight.append((chunk, pool.submit(_anonymize_chunk, chunk, fields)))
+            if len(in_flight) >= 2 * workers:
+                original, future = in_flight.popleft()
+                yield original, future.result()
+        while in_flight:
+            original, future = in_flight.popleft()
+            yield original, future.result()
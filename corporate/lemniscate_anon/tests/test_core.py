@@ -2,7 +2,9 @@
 Unit tests for LemniscateAnon (Production)
 """
 
+import json
 import sys
+import threading
 from pathlib import Path
 
 # Add src directory to Python path for local imports
@@ -15,7 +17,8 @@ if str(SRC) not in sys.path:
 import pytest
 
 from lemniscate_anon.core import LemniscateAnon
-from lemniscate_anon.models import AnalysisResult, AnonymizationResult
+from lemniscate_anon.mapping import LRUCache
+from lemniscate_anon.models import AnalysisResult, AnonymizationResult, TabularAnonymizationResult
 
 
 @pytest.fixture
@@ -59,6 +62,168 @@ class TestAnonymization:
         assert result.anonymized_data["email"] != "john@example.com"
 
 
+class TestTabular:
+    """Tests para anonimización tabular"""
+
+    def test_column_transform_matches_row_mode(self):
+        """Test que el modo columnar produce los mismos pseudónimos"""
+        modulo = LemniscateAnon(config={"seed": "s1"})
+        values = ["john@example.com", "555-1234", "John", "john@example.com"]
+        expected = [modulo.anonymize_field("name", v) for v in values]
+        result = modulo.anonymize_columns({"name": values, "id": [1, 2, 3, 4]}, ["name"])
+        assert result["name"] == expected
+        assert result["id"] == [1, 2, 3, 4]
+        assert modulo.memo_statistics()["name"] == {"hits": 1, "misses": 3, "distinct": 3}
+
+    def test_generalize_column(self):
+        """Test generalización de columna completa"""
+        modulo = LemniscateAnon(config={"anonymization_method": "generalize"})
+        result = modulo.anonymize_columns({"age": ["12", "25", "40", "70", "x"]})
+        assert result["age"] == ["0-17", "18-29", "30-49", "50+", "[GENERALIZED]"]
+
+    def test_reversible_columns_record_mapping(self):
+        """Test que el modo reversible guarda el mapeo"""
+        modulo = LemniscateAnon(config={"reversible": True})
+        result = modulo.anonymize_columns({"email": ["a@b.com", None]})
+        assert result["email"][1] is None
+        assert modulo.mapping_store.get("email", "a@b.com") == result["email"][0]
+        assert modulo.reidentify("email", result["email"][0]) == "a@b.com"
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_anonymize_csv_file(self, tmp_path, workers):
+        """Test CSV en streaming (en línea y en paralelo)"""
+        source = tmp_path / "in.csv"
+        source.write_text(
+            "name,age,city\n" + "".join(f"user{i % 7},{20 + i % 50},X\n" for i in range(25))
+        )
+        target = tmp_path / "out.csv"
+        modulo = LemniscateAnon(config={"seed": "s"})
+        result = modulo.anonymize_file(
+            str(source), str(target), ["name"], chunk_size=4, workers=workers
+        )
+        assert isinstance(result, TabularAnonymizationResult)
+        assert result.rows_processed == 25
+        assert result.chunks_processed == 7
+        lines = target.read_text().splitlines()
+        assert lines[0] == "name,age,city"
+        assert lines[1] == f"{modulo.anonymize_field('name', 'user0')},20,X"
+
+    def test_anonymize_ndjson_file(self, tmp_path):
+        """Test NDJSON con claves ausentes"""
+        source = tmp_path / "in.ndjson"
+        source.write_text('{"email": "a@b.com", "n": 1}\n\n{"n": 2}\n')
+        target = tmp_path / "out.ndjson"
+        modulo = LemniscateAnon()
+        result = modulo.anonymize_file(str(source), str(target), ["email"])
+        rows = [json.loads(line) for line in target.read_text().splitlines()]
+        assert result.rows_processed == 2
+        assert rows[0]["email"].endswith("@example.com")
+        assert rows[0]["n"] == 1
+        assert rows[1] == {"n": 2}
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_ndjson_round_trip_keeps_nulls(self, tmp_path, workers):
+        """Test que los null explícitos se conservan y las claves ausentes no aparecen"""
+        source = tmp_path / "in.ndjson"
+        source.write_text('{"email": null, "note": null}\n{"email": "a@b.com"}\n' * 2)
+        target = tmp_path / "out.ndjson"
+        LemniscateAnon().anonymize_file(
+            str(source), str(target), ["email"], chunk_size=1, workers=workers
+        )
+        rows = [json.loads(line) for line in target.read_text().splitlines()]
+        assert rows[0] == {"email": None, "note": None}
+        assert list(rows[1]) == ["email"] and rows[1]["email"].endswith("@example.com")
+        assert rows[2:] == rows[:2]
+
+
+class TestMappingStore:
+    """Tests para el almacén de mapeo reversible"""
+
+    def test_mapping_is_field_scoped(self):
+        """Test que el mismo valor en campos distintos no se confunde"""
+        modulo = LemniscateAnon(config={"reversible": True})
+        first = modulo.anonymize_field("name", "alex")
+        second = modulo.anonymize_field("nickname", "alex")
+        assert first != second
+        assert modulo.reidentify("name", first) == "alex"
+        assert modulo.reidentify("nickname", first) is None
+
+    def test_randomize_reversible_is_stable(self):
+        """Test que un valor reversible conserva su pseudónimo aleatorio"""
+        modulo = LemniscateAnon(config={"reversible": True, "anonymization_method": "randomize"})
+        assert modulo.anonymize_field("email", "a@b.com") == modulo.anonymize_field(
+            "email", "a@b.com"
+        )
+
+    def test_parallel_randomize_memory_store_is_consistent(self, tmp_path):
+        """Test un único seudónimo por valor con workers y almacén en memoria"""
+        source = tmp_path / "in.csv"
+        source.write_text("email\n" + "alice@x.com\n" * 4)
+        target = tmp_path / "out.csv"
+        modulo = LemniscateAnon(config={"reversible": True, "anonymization_method": "randomize"})
+        modulo.anonymize_file(str(source), str(target), chunk_size=1, workers=2)
+        pseudonyms = target.read_text().splitlines()[1:]
+        assert len(set(pseudonyms)) == 1
+        assert modulo.reidentify("email", pseudonyms[0]) == "alice@x.com"
+
+    def test_sqlite_store_shared_between_instances(self, tmp_path):
+        """Test que instancias sobre el mismo archivo coinciden en pseudónimos"""
+        config = {
+            "reversible": True,
+            "anonymization_method": "randomize",
+            "mapping_backend": "sqlite",
+            "mapping_path": str(tmp_path / "map.db"),
+        }
+        writer = LemniscateAnon(config=config)
+        reader = LemniscateAnon(config=config)
+        pseudonym = writer.anonymize_field("ssn", "123-45-6789")
+        assert reader.anonymize_field("ssn", "123-45-6789") == pseudonym
+        assert reader.reidentify_many("ssn", [pseudonym, "x"]) == {
+            pseudonym: "123-45-6789",
+            "x": None,
+        }
+        writer.close()
+        reader.close()
+
+        reopened = LemniscateAnon(config=config)
+        assert reopened.reidentify("ssn", pseudonym) == "123-45-6789"
+        assert reopened.mapping_store.stats()["entries"] == 1
+        reopened.close()
+
+    def test_lru_cache_is_thread_safe(self):
+        """Test que get/put concurrentes no corrompen la caché LRU"""
+        cache = LRUCache(max_size=64)
+
+        def worker(offset: int) -> None:
+            for i in range(5000):
+                key = ("f", f"k{(i + offset) % 200}")
+                cache.put(key, "v")
+                cache.get(key)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Forzar cambios de hilo frecuentes
+        try:
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert len(cache) <= 64
+        assert cache.hits + cache.misses == 8 * 5000
+
+    def test_sqlite_store_requires_path(self):
+        """Test que el backend sqlite exige mapping_path"""
+        with pytest.raises(ValueError):
+            LemniscateAnon(config={"mapping_backend": "sqlite"})
+
+    def test_reidentify_disabled_without_reversible(self, modulo):
+        """Test re-identificación deshabilitada sin reversible"""
+        pseudonym = modulo.anonymize_field("email", "a@b.com")
+        assert modulo.reidentify("email", pseudonym) is None
+
+
 class TestAnalyze:
     """Tests para funcionalidad de análisis"""
 
@@ -0,0 +1,182 @@
+"""
+Policy compiler for PolytopeDlp.
+
+Fusiona las políticas habilitadas en un único patrón con grupos nombrados
+que actúa de prefiltro: el contenido sin ninguna coincidencia (el caso
+habitual) se descarta en una sola pasada. El filtro de sensibilidad se
+evalúa al compilar: las políticas por debajo del nivel configurado ni
+siquiera forman parte del patrón.
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+SEVERITY_LEVELS = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+
+_OCTAL_DIGITS = "01234567"
+# Python solo admite referencias numéricas ``\N`` a los grupos 1-99
+_MAX_BACKREFERENCE = 99
+
+
+def policies_fingerprint(policies: Dict[str, Dict[str, Any]], sensitivity_level: str) -> Tuple:
+    """Huella de las políticas y la sensibilidad (para invalidar la compilación)."""
+    return (
+        sensitivity_level,
+        tuple(
+            (
+                name,
+                config.get("pattern", ""),
+                config.get("severity", "medium"),
+                bool(config.get("enabled", True)),
+            )
+            for name, config in policies.items()
+        ),
+    )
+
+
+def shift_group_references(pattern: str, offset: int) -> str:
+    """
+    Desplaza las referencias numéricas a grupos de un patrón.
+
+    Al envolver un patrón en la alternancia fusionada sus grupos cambian de
+    número; ``\\1`` y los condicionales ``(?(1)...)`` se reescriben para que
+    sigan apuntando al mismo grupo. Los escapes octales y las clases de
+    caracteres no se tocan.
+
+    Raises:
+        ValueError: Si una referencia desplazada supera el grupo 99
+    """
+    if not offset:
+        return pattern
+    out: List[str] = []
+    i = 0
+    length = len(pattern)
+    in_class = False
+    while i < length:
+        char = pattern[i]
+        if char == "\\" and i + 1 < length:
+            digits = pattern[i + 1 : i + 4]
+            if in_class or not digits[0].isdigit() or digits[0] == "0":
+                out.append(pattern[i : i + 2])
+                i += 2
+                continue
+            if len(digits) == 3 and all(digit in _OCTAL_DIGITS for digit in digits):
+                # Escape octal de tres dígitos (p.ej. \101)
+                out.append(pattern[i : i + 4])
+                i += 4
+                continue
+            width = 2 if len(digits) > 1 and digits[1].isdigit() else 1
+            group = int(digits[:width]) + offset
+            if group > _MAX_BACKREFERENCE:
+                raise ValueError("backreference beyond group 99 after fusion")
+            # (?:) separa la referencia de un dígito literal que la siga
+            out.append(f"\\{group}(?:)")
+            i += 1 + width
+            continue
+        if in_class:
+            if char == "]":
+                in_class = False
+            out.append(char)
+            i += 1
+            continue
+        if char == "[":
+            in_class = True
+            out.append(char)
+            i += 1
+            # "]" justo tras "[" o "[^" es literal
+            if pattern.startswith("^", i):
+                out.append("^")
+                i += 1
+            if pattern.startswith("]", i):
+                out.append("]")
+                i += 1
+            continue
+        if pattern.startswith("(?(", i):
+            close = pattern.find(")", i + 3)
+            reference = pattern[i + 3 : close]
+            if close != -1 and reference.isdigit():
+                out.append(f"(?({int(reference) + offset})")
+                i = close + 1
+                continue
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+class CompiledPolicySet:
+    """
+    Conjunto de políticas DLP compilado con un prefiltro fusionado.
+
+    La alternancia fusionada (un grupo nombrado por política) solo decide si
+    hay alguna coincidencia y dónde empieza la primera: ninguna política
+    coincide antes. Las coincidencias se obtienen después con el patrón
+    propio de cada política desde esa posición, de modo que políticas que se
+    solapan (p.ej. un email genérico y uno concreto) se detectan todas, igual
+    que escaneando política a política. Las referencias numéricas (``\\1``)
+    se renumeran al fusionar; si los patrones no pueden fusionarse (p.ej.
+    definen los mismos grupos nombrados), no hay prefiltro.
+    """
+
+    def __init__(self, policies: Dict[str, Dict[str, Any]], sensitivity_level: str = "medium"):
+        self.fingerprint = policies_fingerprint(policies, sensitivity_level)
+        min_level = SEVERITY_LEVELS.get(sensitivity_level, 2)
+
+        self.policy_names: List[str] = []
+        self.severities: List[str] = []
+        patterns: List[str] = []
+        for name, config in policies.items():
+            if not config.get("enabled", True):
+                continue
+            severity = config.get("severity", "medium")
+            if SEVERITY_LEVELS.get(severity, 1) < min_level:
+                continue
+            self.policy_names.append(name)
+            self.severities.append(severity)
+            patterns.append(config.get("pattern", ""))
+
+        self.fused = None
+        self.separate: List[re.Pattern] = [re.compile(p, re.IGNORECASE) for p in patterns]
+
+        if patterns:
+            try:
+                wrapped = []
+                groups = 0
+                for i, pattern in enumerate(patterns):
+                    # Grupos previos a los del patrón: los anteriores y su envoltorio
+                    offset = groups + 1
+                    wrapped.append(f"(?P<p{i}>{shift_group_references(pattern, offset)})")
+                    groups = offset + re.compile(pattern).groups
+                self.fused = re.compile("|".join(wrapped), re.IGNORECASE)
+            except (re.error, ValueError):
+                self.fused = None
+
+    def __len__(self) -> int:
+        return len(self.policy_names)
+
+    def scan(self, content: str) -> Tuple[List[int], List[int], List[int], List[str]]:
+        """
+        Escanea contenido y devuelve columnas paralelas de coincidencias.
+
+        Returns:
+            (índice de política, inicio, fin, texto detectado)
+        """
+        policy_index: List[int] = []
+        starts: List[int] = []
+        ends: List[int] = []
+        detected: List[str] = []
+
+        first = 0
+        if self.fused is not None:
+            prefilter = self.fused.search(content)
+            if prefilter is None:
+                return policy_index, starts, ends, detected
+            first = prefilter.start()
+
+        for idx, pattern in enumerate(self.separate):
+            for match in pattern.finditer(content, first):
+                policy_index.append(idx)
+                starts.append(match.start())
+                ends.append(match.end())
+                detected.append(match.group(0))
+
+        return policy_index, starts, ends, detected
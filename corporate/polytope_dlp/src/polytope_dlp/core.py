@@ -6,14 +6,25 @@ Misión: The New Austin
 Rol: data-loss-prevention
 """
 
+import hashlib
 import logging
-import re
+import os
 import secrets
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-
-from .models import AnalysisResult, DLPAnalysis, PolicyViolation
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .compiler import SEVERITY_LEVELS, CompiledPolicySet, policies_fingerprint
+from .filescan import DEFAULT_CHUNK_SIZE, ScanIndex, iter_files, scan_changed_file
+from .models import (
+    AnalysisResult,
+    CompactScanResult,
+    FileVerdict,
+    PathScanResult,
+    PolicyViolation,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +48,9 @@ class PolytopeDlp:
                 - sensitivity_level: Nivel de sensibilidad (default: "medium")
                 - enable_blocking: Habilitar bloqueo automático (default: True)
                 - alert_threshold: Umbral de alertas (default: 3)
+                - scan_index_path: Índice SQLite para escaneos incrementales (default: None)
+                - scan_workers: Procesos para scan_path (default: os.cpu_count())
+                - scan_chunk_size: Bytes por lectura de archivo (default: 1 MiB)
         """
         self.name = "Polytope DLP"
         self.mission = "The New Austin"
@@ -47,6 +61,9 @@ class PolytopeDlp:
         self.sensitivity_level = self.config.get("sensitivity_level", "medium")
         self.enable_blocking = bool(self.config.get("enable_blocking", True))
         self.alert_threshold = int(self.config.get("alert_threshold", 3))
+        self.scan_index_path = self.config.get("scan_index_path")
+        self.scan_workers = int(self.config.get("scan_workers", os.cpu_count() or 1))
+        self.scan_chunk_size = int(self.config.get("scan_chunk_size", DEFAULT_CHUNK_SIZE))
 
         # Políticas DLP predefinidas
         self.policies: Dict[str, Dict[str, Any]] = {
@@ -72,6 +89,8 @@ class PolytopeDlp:
             },
         }
 
+        self._compiled: Optional[CompiledPolicySet] = None
+
         logger.info(
             "Initialized %s - %s (modes=%s, sensitivity=%s, blocking=%s)",
             self.name,
@@ -83,11 +102,53 @@ class PolytopeDlp:
 
     def _check_sensitivity(self, severity: str) -> bool:
         """Verifica si la severidad cumple con el nivel de sensibilidad configurado."""
-        levels = {"low": 1, "medium": 2, "high": 3, "critical": 4}
-        current_level = levels.get(self.sensitivity_level, 2)
-        violation_level = levels.get(severity, 1)
+        current_level = SEVERITY_LEVELS.get(self.sensitivity_level, 2)
+        violation_level = SEVERITY_LEVELS.get(severity, 1)
         return violation_level >= current_level
 
+    def compile_policies(self) -> CompiledPolicySet:
+        """
+        Devuelve las políticas compiladas en un único escáner.
+
+        La compilación se reutiliza mientras ``policies`` y ``sensitivity_level``
+        no cambien; cualquier modificación provoca una recompilación.
+
+        Returns:
+            CompiledPolicySet vigente
+        """
+        fingerprint = policies_fingerprint(self.policies, self.sensitivity_level)
+        if self._compiled is None or self._compiled.fingerprint != fingerprint:
+            self._compiled = CompiledPolicySet(self.policies, self.sensitivity_level)
+            logger.debug("Compiled %s DLP policies", len(self._compiled))
+        return self._compiled
+
+    def scan_content_compact(self, content: str) -> CompactScanResult:
+        """
+        Escanea contenido y devuelve las violaciones en forma columnar.
+
+        El identificador y la marca de tiempo se asignan una vez por escaneo;
+        cada violación se identifica por su posición en las columnas.
+
+        Args:
+            content: Contenido a escanear
+
+        Returns:
+            CompactScanResult con columnas paralelas de coincidencias
+        """
+        compiled = self.compile_policies()
+        policy_index, starts, ends, detected = compiled.scan(content)
+
+        return CompactScanResult(
+            scan_id=secrets.token_urlsafe(8),
+            timestamp=datetime.now().isoformat(),
+            policy_names=compiled.policy_names,
+            severities=compiled.severities,
+            policy_index=policy_index,
+            starts=starts,
+            ends=ends,
+            detected_data=[data[:50] for data in detected],  # Limitar longitud
+        )
+
     def scan_content(self, content: str, context: Optional[str] = None) -> List[PolicyViolation]:
         """
         Escanea contenido en busca de violaciones de políticas.
@@ -99,50 +160,200 @@ class PolytopeDlp:
         Returns:
             Lista de PolicyViolation detectadas
         """
-        violations: List[PolicyViolation] = []
-
-        for policy_name, policy_config in self.policies.items():
-            if not policy_config.get("enabled", True):
-                continue
-
-            pattern = policy_config.get("pattern", "")
-            severity = policy_config.get("severity", "medium")
-
-            # Verificar nivel de sensibilidad
-            if not self._check_sensitivity(severity):
-                continue
-
-            # Buscar coincidencias
-            matches = re.finditer(pattern, content, re.IGNORECASE)
-
-            for match in matches:
-                violation_id = secrets.token_urlsafe(8)
-                detected_data = match.group(0)
-
-                violation = PolicyViolation(
-                    violation_id=violation_id,
-                    policy_name=policy_name,
-                    violation_type="content",
-                    severity=severity,
-                    detected_data=detected_data[:50],  # Limitar longitud
-                    location=f"position_{match.start()}",
-                    timestamp=datetime.now().isoformat(),
-                )
-                violations.append(violation)
+        compact = self.scan_content_compact(content)
+
+        return [
+            PolicyViolation(
+                violation_id=f"{compact.scan_id}-{i}",
+                policy_name=compact.policy_names[idx],
+                violation_type="content",
+                severity=compact.severities[idx],
+                detected_data=compact.detected_data[i],
+                location=f"position_{compact.starts[i]}",
+                timestamp=compact.timestamp,
+            )
+            for i, idx in enumerate(compact.policy_index)
+        ]
+
+    def _scan_files(
+        self, paths: List[str], known_hashes: List[Optional[str]], workers: int
+    ) -> Iterable[Dict[str, Any]]:
+        """
+        Escanea archivos en línea o repartidos en un pool de procesos.
+
+        Los archivos con hash conocido solo se escanean si su contenido cambió.
+        """
+        scan = partial(
+            scan_changed_file,
+            policies=self.policies,
+            sensitivity_level=self.sensitivity_level,
+            chunk_size=self.scan_chunk_size,
+        )
+        if workers <= 1 or len(paths) <= 1:
+            yield from map(scan, paths, known_hashes)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, min(64, len(paths) // (workers * 4)))
+            yield from pool.map(scan, paths, known_hashes, chunksize=chunksize)
+
+    def scan_path(
+        self,
+        path: str,
+        index_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        force: bool = False,
+    ) -> PathScanResult:
+        """
+        Escanea un archivo o directorio de forma incremental.
+
+        Con índice, los archivos cuyo tamaño y mtime no cambiaron desde el
+        último barrido (con las mismas políticas) no se leen: se reutiliza su
+        veredicto. Si solo cambió el mtime, se compara el hash de contenido
+        antes de aplicar las políticas. Los archivos nuevos o modificados se
+        leen por bloques en un pool de procesos y su veredicto se guarda en el
+        índice.
 
-        return violations
+        Args:
+            path: Archivo o directorio raíz
+            index_path: Índice SQLite (default: ``scan_index_path`` de la config)
+            workers: Procesos a usar (default: ``scan_workers`` de la config)
+            force: Reescanear todo ignorando el índice
 
-    def analyze(self, content: Optional[str] = None, contents: Optional[List[str]] = None) -> AnalysisResult:
+        Returns:
+            PathScanResult con el resumen y los archivos con violaciones
+        """
+        root = os.path.abspath(path)
+        index_path = index_path or self.scan_index_path
+        index = ScanIndex(index_path) if index_path else None
+        fingerprint = hashlib.sha256(
+            repr(policies_fingerprint(self.policies, self.sensitivity_level)).encode("utf-8")
+        ).hexdigest()[:32]
+
+        result = PathScanResult(root=root)
+        by_policy: Dict[str, int] = defaultdict(int)
+        by_severity: Dict[str, int] = defaultdict(int)
+        metadata: Dict[str, Tuple[int, int]] = {}
+        # Veredictos previos de archivos con igual tamaño y otro mtime
+        candidates: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        seen = set()
+
+        def reuse(stored: Dict[str, Any]) -> FileVerdict:
+            verdict = FileVerdict(**stored)
+            verdict.blocked = self.enable_blocking and verdict.max_severity == "critical"
+            verdict.from_index = True
+            result.files_skipped += 1
+            return verdict
+
+        def record(verdict: FileVerdict) -> None:
+            result.violations_detected += verdict.violations_detected
+            for policy_name, count in verdict.violations_by_policy.items():
+                by_policy[policy_name] += count
+            if verdict.violations_detected:
+                if verdict.blocked:
+                    result.blocked_count += 1
+                result.file_verdicts.append(verdict)
+
+        try:
+            for file_path, size, mtime_ns in iter_files(root):
+                seen.add(file_path)
+                result.files_seen += 1
+                if index is not None and not force:
+                    entry = index.get(file_path)
+                    if entry and entry[0] == size and entry[3] == fingerprint:
+                        if entry[1] == mtime_ns:
+                            record(reuse(entry[4]))
+                            continue
+                        candidates[file_path] = (entry[2], entry[4])
+                metadata[file_path] = (size, mtime_ns)
+
+            pending: List[Tuple[str, int, int, str, str, Dict[str, Any]]] = []
+            paths = list(metadata)
+            known_hashes = [candidates[p][0] if p in candidates else None for p in paths]
+            for raw in self._scan_files(paths, known_hashes, workers or self.scan_workers):
+                file_path = raw["path"]
+                if "error" in raw:
+                    result.errors.append(f"{file_path}: {raw['error']}")
+                    continue
+                size, mtime_ns = metadata[file_path]
+                if raw.get("unchanged"):
+                    # Mismo contenido: veredicto previo con el nuevo mtime
+                    stored = candidates[file_path][1]
+                    record(reuse(stored))
+                    if index is not None:
+                        pending.append(
+                            (file_path, size, mtime_ns, raw["content_hash"], fingerprint, stored)
+                        )
+                    continue
+                raw["size"] = size
+                raw["blocked"] = self.enable_blocking and raw["max_severity"] == "critical"
+                verdict = FileVerdict(**raw)
+                result.files_scanned += 1
+                result.bytes_scanned += size
+                record(verdict)
+
+                if index is not None:
+                    pending.append(
+                        (file_path, size, mtime_ns, verdict.content_hash, fingerprint, raw)
+                    )
+                    if len(pending) >= 1000:
+                        index.put_many(pending)
+                        pending = []
+
+            if index is not None:
+                if pending:
+                    index.put_many(pending)
+                result.files_removed = index.prune(root, seen)
+        finally:
+            if index is not None:
+                index.close()
+
+        for policy_name, count in by_policy.items():
+            by_severity[self.policies.get(policy_name, {}).get("severity", "medium")] += count
+        result.violations_by_policy = dict(by_policy)
+        result.violations_by_severity = dict(by_severity)
+        return result
+
+    def analyze(
+        self,
+        content: Optional[str] = None,
+        contents: Optional[List[str]] = None,
+        path: Optional[str] = None,
+    ) -> AnalysisResult:
         """
-        Ejecuta análisis: un contenido o múltiples.
+        Ejecuta análisis: un contenido, múltiples o un archivo/directorio.
 
         Args:
             content: Contenido individual
             contents: Lista de contenidos
+            path: Archivo o directorio a escanear (incremental con scan_index_path)
 
         Returns:
             AnalysisResult con resultados
         """
+        if path:
+            if not os.path.exists(path):
+                return AnalysisResult(
+                    status="error",
+                    message=f"Path not found: {path}",
+                    data={},
+                    errors=["path_not_found"],
+                )
+            scan = self.scan_path(path)
+            status = "warning" if scan.violations_detected else "success"
+            if scan.blocked_count > 0:
+                status = "error"
+            return AnalysisResult(
+                status=status,
+                message=(
+                    f"DLP path scan completed: {scan.violations_detected} violations in "
+                    f"{len(scan.file_verdicts)} files ({scan.files_scanned} scanned, "
+                    f"{scan.files_skipped} unchanged)"
+                ),
+                data=scan.model_dump(),
+                errors=scan.errors or None,
+            )
+
         if contents:
             all_violations: List[PolicyViolation] = []
             violations_by_severity: Dict[str, int] = defaultdict(int)
@@ -0,0 +1,264 @@
+"""
+Incremental file and directory scanning for PolytopeDlp.
+
+Recorre directorios con ``os.scandir``, lee cada archivo por bloques (memoria
+acotada), reparte los archivos entre un pool de procesos y mantiene un índice
+local SQLite con (ruta, tamaño, mtime, hash de contenido, último veredicto)
+para omitir en el siguiente barrido los archivos que no cambiaron.
+"""
+
+import codecs
+import hashlib
+import json
+import os
+import sqlite3
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .compiler import SEVERITY_LEVELS, CompiledPolicySet, policies_fingerprint
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+# Una línea más larga que esto se corta aunque no tenga salto de línea
+MAX_CARRY = 64 * 1024
+
+_compiled_cache: Dict[Tuple, CompiledPolicySet] = {}
+
+
+def iter_files(root: str, follow_symlinks: bool = False) -> Iterator[Tuple[str, int, int]]:
+    """
+    Enumera archivos regulares bajo ``root`` con os.scandir (iterativo).
+
+    Yields:
+        (ruta, tamaño en bytes, mtime en ns)
+    """
+    if os.path.isfile(root):
+        stat = os.stat(root)
+        yield root, stat.st_size, stat.st_mtime_ns
+        return
+
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=follow_symlinks):
+                            stat = entry.stat(follow_symlinks=follow_symlinks)
+                            yield entry.path, stat.st_size, stat.st_mtime_ns
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def _get_compiled(policies: Dict[str, Dict[str, Any]], sensitivity_level: str) -> CompiledPolicySet:
+    """Compilación por proceso (cada worker compila una sola vez)."""
+    key = policies_fingerprint(policies, sensitivity_level)
+    compiled = _compiled_cache.get(key)
+    if compiled is None:
+        compiled = _compiled_cache[key] = CompiledPolicySet(policies, sensitivity_level)
+    return compiled
+
+
+def scan_file(
+    path: str,
+    policies: Dict[str, Dict[str, Any]],
+    sensitivity_level: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_samples: int = 20,
+    skip_binary: bool = True,
+) -> Dict[str, Any]:
+    """
+    Escanea un archivo por bloques de líneas y calcula su hash de contenido.
+
+    Cada bloque termina en el último salto de línea leído; el resto se arrastra
+    al siguiente bloque para no partir coincidencias. Es una función de módulo
+    para poder ejecutarse en un pool de procesos.
+
+    Returns:
+        Veredicto del archivo como dict (ver FileVerdict); si el archivo no
+        puede leerse, un dict con la clave ``error``
+    """
+    compiled = _get_compiled(policies, sensitivity_level)
+    digest = hashlib.blake2b(digest_size=16)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    by_policy: Dict[str, int] = defaultdict(int)
+    samples: List[Dict[str, Any]] = []
+    total = 0
+    carry = ""
+    base = 0  # offset (en caracteres) del inicio de ``carry``
+    binary = False
+
+    def scan_block(block: str, offset: int) -> None:
+        nonlocal total
+        policy_index, starts, _, detected = compiled.scan(block)
+        total += len(policy_index)
+        for idx, start, data in zip(policy_index, starts, detected):
+            by_policy[compiled.policy_names[idx]] += 1
+            if len(samples) < max_samples:
+                samples.append(
+                    {
+                        "policy_name": compiled.policy_names[idx],
+                        "severity": compiled.severities[idx],
+                        "detected_data": data[:50],
+                        "location": f"offset_{offset + start}",
+                    }
+                )
+
+    try:
+        with open(path, "rb") as handle:
+            first = True
+            while True:
+                raw = handle.read(chunk_size)
+                if not raw:
+                    break
+                digest.update(raw)
+                if first and skip_binary and b"\0" in raw[:8192]:
+                    binary = True
+                    # Completar el hash sin escanear
+                    for raw in iter(lambda: handle.read(chunk_size), b""):
+                        digest.update(raw)
+                    break
+                first = False
+
+                window = carry + decoder.decode(raw)
+                cut = window.rfind("\n") + 1
+                if cut == 0 and len(window) > MAX_CARRY:
+                    cut = len(window)
+                if cut:
+                    scan_block(window[:cut], base)
+                    base += cut
+                carry = window[cut:]
+
+            if not binary:
+                carry += decoder.decode(b"", final=True)
+                if carry:
+                    scan_block(carry, base)
+    except OSError as exc:
+        return {"path": path, "error": str(exc), "violations_detected": 0}
+
+    max_severity = None
+    for name in by_policy:
+        severity = compiled.severities[compiled.policy_names.index(name)]
+        if max_severity is None or SEVERITY_LEVELS[severity] > SEVERITY_LEVELS[max_severity]:
+            max_severity = severity
+
+    return {
+        "path": path,
+        "content_hash": digest.hexdigest(),
+        "binary": binary,
+        "violations_detected": total,
+        "violations_by_policy": dict(by_policy),
+        "max_severity": max_severity,
+        "sample_violations": samples,
+    }
+
+
+def file_hash(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """Hash de contenido (BLAKE2b-128, el mismo que calcula ``scan_file``)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for raw in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(raw)
+    return digest.hexdigest()
+
+
+def scan_changed_file(
+    path: str,
+    known_hash: Optional[str],
+    policies: Dict[str, Dict[str, Any]],
+    sensitivity_level: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_samples: int = 20,
+    skip_binary: bool = True,
+) -> Dict[str, Any]:
+    """
+    Escanea un archivo salvo que su contenido coincida con ``known_hash``.
+
+    Para archivos con el mismo tamaño pero distinto mtime (p.ej. tocados sin
+    cambios): hashear es mucho más barato que aplicar las políticas.
+
+    Returns:
+        ``{"path", "content_hash", "unchanged": True}`` si el hash coincide;
+        si no, el resultado de ``scan_file``
+    """
+    if known_hash is not None:
+        try:
+            content_hash = file_hash(path, chunk_size)
+        except OSError as exc:
+            return {"path": path, "error": str(exc), "violations_detected": 0}
+        if content_hash == known_hash:
+            return {"path": path, "content_hash": content_hash, "unchanged": True}
+    return scan_file(path, policies, sensitivity_level, chunk_size, max_samples, skip_binary)
+
+
+class ScanIndex:
+    """
+    Índice local de archivos escaneados (SQLite).
+
+    Guarda por ruta: tamaño, mtime (ns), hash de contenido, veredicto (JSON)
+    y la huella de las políticas con las que se obtuvo. Un cambio de políticas
+    invalida los veredictos almacenados; un archivo con otro mtime pero el
+    mismo tamaño y hash conserva su veredicto.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " policy_fingerprint TEXT NOT NULL,"
+            " verdict TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, path: str) -> Optional[Tuple[int, int, str, str, Dict[str, Any]]]:
+        """(tamaño, mtime_ns, hash, huella de políticas, veredicto) de una ruta."""
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, content_hash, policy_fingerprint, verdict"
+            " FROM files WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], row[2], row[3], json.loads(row[4])
+
+    def put_many(self, rows: List[Tuple[str, int, int, str, str, Dict[str, Any]]]) -> None:
+        """Inserta o actualiza (ruta, tamaño, mtime_ns, hash, huella, veredicto)."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO files"
+            " (path, size, mtime_ns, content_hash, policy_fingerprint, verdict)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [(p, s, m, h, f, json.dumps(v)) for p, s, m, h, f, v in rows],
+        )
+        self._conn.commit()
+
+    def prune(self, root: str, seen: set) -> int:
+        """Elimina entradas bajo ``root`` que ya no existen. Devuelve cuántas."""
+        prefix = os.path.join(root, "")
+        stale = [
+            path
+            for (path,) in self._conn.execute(
+                "SELECT path FROM files WHERE path = ? OR substr(path, 1, ?) = ?",
+                (root, len(prefix), prefix),
+            )
+            if path not in seen
+        ]
+        self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in stale])
+        self._conn.commit()
+        return len(stale)
+
+    def __len__(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0])
+
+    def close(self) -> None:
+        self._conn.close()
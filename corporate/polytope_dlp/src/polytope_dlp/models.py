@@ -37,6 +37,65 @@ class PolicyViolation(BaseModel):
     timestamp: str = Field(description="Violation timestamp")
 
 
+class CompactScanResult(BaseModel):
+    """Columnar scan result: one entry per match across parallel lists"""
+
+    scan_id: str = Field(description="Scan identifier (violation i is '<scan_id>-<i>')")
+    timestamp: str = Field(description="Scan timestamp shared by all violations")
+    policy_names: List[str] = Field(default_factory=list, description="Compiled policy table")
+    severities: List[str] = Field(default_factory=list, description="Severity per compiled policy")
+    policy_index: List[int] = Field(
+        default_factory=list, description="Policy table index per match"
+    )
+    starts: List[int] = Field(default_factory=list, description="Match start offsets")
+    ends: List[int] = Field(default_factory=list, description="Match end offsets")
+    detected_data: List[str] = Field(default_factory=list, description="Detected data (truncated)")
+
+
+class FileVerdict(BaseModel):
+    """DLP verdict for a single scanned file"""
+
+    path: str = Field(description="File path")
+    size: int = Field(default=0, description="File size in bytes")
+    content_hash: str = Field(description="BLAKE2b-128 content hash")
+    binary: bool = Field(default=False, description="File skipped as binary")
+    violations_detected: int = Field(default=0, description="Number of violations in the file")
+    violations_by_policy: Dict[str, int] = Field(
+        default_factory=dict, description="Violations by policy"
+    )
+    max_severity: Optional[str] = Field(default=None, description="Highest severity found")
+    blocked: bool = Field(default=False, description="Whether the file would be blocked")
+    sample_violations: List[Dict[str, Any]] = Field(
+        default_factory=list, description="First violations found"
+    )
+    from_index: bool = Field(default=False, description="Verdict reused from the scan index")
+
+
+class PathScanResult(BaseModel):
+    """Result of a (possibly incremental) file/directory DLP scan"""
+
+    root: str = Field(description="Scanned root path")
+    files_seen: int = Field(default=0, description="Files enumerated")
+    files_scanned: int = Field(default=0, description="Files read and scanned")
+    files_skipped: int = Field(default=0, description="Unchanged files skipped via the index")
+    files_removed: int = Field(default=0, description="Index entries pruned for deleted files")
+    bytes_scanned: int = Field(default=0, description="Bytes read")
+    violations_detected: int = Field(
+        default=0, description="Total violations (including unchanged files)"
+    )
+    violations_by_policy: Dict[str, int] = Field(
+        default_factory=dict, description="Violations by policy"
+    )
+    violations_by_severity: Dict[str, int] = Field(
+        default_factory=dict, description="Violations by severity"
+    )
+    blocked_count: int = Field(default=0, description="Number of files blocked")
+    file_verdicts: List[FileVerdict] = Field(
+        default_factory=list, description="Files with violations"
+    )
+    errors: List[str] = Field(default_factory=list, description="Unreadable files")
+
+
 class DLPAnalysis(BaseModel):
     """Result of DLP analysis"""
 
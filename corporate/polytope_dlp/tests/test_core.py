@@ -2,6 +2,7 @@
 Unit tests for PolytopeDlp (Production)
 """
 
+import os
 import sys
 from pathlib import Path
 
@@ -14,8 +15,9 @@ if str(SRC) not in sys.path:
 
 import pytest
 
+from polytope_dlp.compiler import CompiledPolicySet, shift_group_references
 from polytope_dlp.core import PolytopeDlp
-from polytope_dlp.models import AnalysisResult, PolicyViolation
+from polytope_dlp.models import AnalysisResult, CompactScanResult, PathScanResult
 
 
 @pytest.fixture
@@ -65,6 +67,166 @@ class TestContentScanning:
         assert len(violations) == 0
 
 
+class TestCompiledPolicies:
+    """Tests para el motor de políticas compilado"""
+
+    def test_compile_filters_by_sensitivity(self):
+        """Test que el filtro de sensibilidad se aplica al compilar"""
+        modulo = PolytopeDlp(config={"sensitivity_level": "high"})
+        compiled = modulo.compile_policies()
+        assert compiled.policy_names == ["credit_card", "ssn"]
+        assert modulo.compile_policies() is compiled
+
+    def test_compile_invalidated_on_policy_change(self, modulo):
+        """Test recompilación al modificar políticas"""
+        compiled = modulo.compile_policies()
+        modulo.policies["ssn"]["enabled"] = False
+        assert modulo.compile_policies() is not compiled
+        assert "ssn" not in modulo.compile_policies().policy_names
+
+    def test_fused_backreferences_keep_their_group(self):
+        """Test que las referencias numéricas siguen apuntando a su grupo"""
+        policies = {
+            "dated": {"pattern": r"(\d{4})-(\d{2})", "severity": "high"},
+            "repeated": {"pattern": r"\b(\w+) \1\b", "severity": "high"},
+            "octal": {"pattern": r"[\1]x\101", "severity": "high"},
+        }
+        compiled = CompiledPolicySet(policies)
+        assert compiled.fused is not None
+        assert compiled.fused.search("x the the").group(0) == "the the"
+        index, _, _, detected = compiled.scan("the the 2024-05 cat dog \x01xA")
+        assert [compiled.policy_names[i] for i in index] == ["dated", "repeated", "octal"]
+        assert detected[1] == "the the"
+        assert compiled.scan("cat dog")[0] == []
+
+    def test_overlapping_policies_all_match(self, modulo):
+        """Test que una política solapada con otra anterior no se pierde"""
+        modulo.policies["exec_email"] = {"pattern": r"ceo@corp\.com", "severity": "critical"}
+        violations = modulo.scan_content("send to ceo@corp.com and a@b.com")
+        assert [v.policy_name for v in violations] == ["email", "email", "exec_email"]
+        assert modulo.analyze(content="send to ceo@corp.com").status == "error"
+
+    def test_shift_group_references(self):
+        """Test reescritura de referencias y condicionales"""
+        assert shift_group_references(r"(a)\1(?(1)b|c)", 3) == r"(a)\4(?:)(?(4)b|c)"
+        assert shift_group_references(r"\0\123[\1]", 3) == r"\0\123[\1]"
+
+    def test_scan_content_compact(self, modulo):
+        """Test resultado columnar con id y timestamp por escaneo"""
+        result = modulo.scan_content_compact("SSN 123-45-6789 mail a@b.com")
+        assert isinstance(result, CompactScanResult)
+        names = [result.policy_names[i] for i in result.policy_index]
+        assert names == ["ssn", "email"]
+        assert result.starts[0] == 4
+        assert result.detected_data[1] == "a@b.com"
+
+    def test_scan_content_shares_scan_metadata(self, modulo):
+        """Test que las violaciones comparten timestamp y prefijo de id"""
+        violations = modulo.scan_content("123-45-6789 and 987-65-4321")
+        assert len(violations) == 2
+        assert violations[0].timestamp == violations[1].timestamp
+        assert (
+            violations[0].violation_id.rsplit("-", 1)[0]
+            == violations[1].violation_id.rsplit("-", 1)[0]
+        )
+
+    def test_custom_policy_with_named_group_falls_back(self, modulo):
+        """Test política con grupo nombrado propio"""
+        modulo.policies["api_key"] = {"pattern": r"(?P<key>sk_[a-z0-9]{8})", "severity": "high"}
+        violations = modulo.scan_content("token sk_abcd1234")
+        assert any(v.policy_name == "api_key" for v in violations)
+
+
+class TestPathScanning:
+    """Tests para escaneo incremental de archivos y directorios"""
+
+    @pytest.fixture
+    def share(self, tmp_path):
+        root = tmp_path / "share"
+        (root / "sub").mkdir(parents=True)
+        (root / "clean.txt").write_text("nothing to see here\n")
+        (root / "sub" / "ssn.txt").write_text("line\nSSN: 123-45-6789\nmail a@b.com\n")
+        (root / "blob.bin").write_bytes(b"\0\x01123-45-6789")
+        return root
+
+    def test_scan_path_directory(self, share):
+        """Test escaneo de directorio completo"""
+        modulo = PolytopeDlp(config={"scan_workers": 1})
+        result = modulo.scan_path(str(share))
+        assert isinstance(result, PathScanResult)
+        assert result.files_seen == 3
+        assert result.files_scanned == 3
+        assert result.violations_by_policy == {"ssn": 1, "email": 1}
+        assert result.blocked_count == 1
+        [verdict] = result.file_verdicts
+        assert verdict.path.endswith("ssn.txt")
+        assert verdict.sample_violations[0]["location"] == "offset_10"
+
+    def test_scan_path_small_chunks_preserve_matches(self, tmp_path):
+        """Test que los bloques no parten coincidencias"""
+        target = tmp_path / "big.txt"
+        target.write_text("padding line\n" * 50 + "SSN: 123-45-6789 and more\n")
+        modulo = PolytopeDlp(config={"scan_workers": 1, "scan_chunk_size": 7})
+        result = modulo.scan_path(str(target))
+        assert result.violations_by_policy == {"ssn": 1}
+
+    def test_scan_path_incremental_index(self, share, tmp_path):
+        """Test que los archivos sin cambios se omiten en el re-escaneo"""
+        modulo = PolytopeDlp(
+            config={"scan_workers": 1, "scan_index_path": str(tmp_path / "idx.db")}
+        )
+        first = modulo.scan_path(str(share))
+        assert first.files_scanned == 3
+
+        second = modulo.scan_path(str(share))
+        assert second.files_scanned == 0
+        assert second.files_skipped == 3
+        assert second.violations_detected == first.violations_detected
+        assert second.file_verdicts[0].from_index is True
+
+        (share / "clean.txt").write_text("now with 987-65-4321 inside\n")
+        (share / "blob.bin").unlink()
+        third = modulo.scan_path(str(share))
+        assert third.files_scanned == 1
+        assert third.files_removed == 1
+        assert third.violations_by_policy["ssn"] == 2
+
+    def test_scan_path_touched_file_reuses_verdict(self, share, tmp_path):
+        """Test que un archivo con nuevo mtime y mismo contenido no se reescanea"""
+        modulo = PolytopeDlp(
+            config={"scan_workers": 1, "scan_index_path": str(tmp_path / "idx.db")}
+        )
+        modulo.scan_path(str(share))
+        target = share / "sub" / "ssn.txt"
+        stat = target.stat()
+        os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        touched = modulo.scan_path(str(share))
+        assert touched.files_scanned == 0
+        assert touched.files_skipped == 3
+        assert touched.violations_by_policy == {"ssn": 1, "email": 1}
+        assert modulo.scan_path(str(share)).files_skipped == 3
+
+        # Mismo tamaño, contenido distinto: se reescanea
+        target.write_text(target.read_text().replace("123-45-6789", "123-45-6780"))
+        os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+        edited = modulo.scan_path(str(share))
+        assert edited.files_scanned == 1
+        assert edited.violations_by_policy == {"ssn": 1, "email": 1}
+
+    def test_scan_path_parallel(self, share):
+        """Test escaneo con pool de procesos"""
+        modulo = PolytopeDlp(config={"scan_workers": 2})
+        result = modulo.scan_path(str(share))
+        assert result.violations_by_policy == {"ssn": 1, "email": 1}
+
+    def test_analyze_path(self, share):
+        """Test analyze con ruta"""
+        modulo = PolytopeDlp(config={"scan_workers": 1})
+        assert modulo.analyze(path=str(share)).status == "error"
+        assert modulo.analyze(path=str(share / "missing")).errors == ["path_not_found"]
+
+
 class TestAnalyze:
     """Tests para funcionalidad de análisis"""
 
@@ -6,18 +6,36 @@ Misión: Paradise Mercifully Departed
 Rol: tokenization-engine
 """
 
+import json
 import logging
 import re
 import secrets
 import uuid
 from collections import defaultdict
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
-from .models import AnalysisResult, DetokenizationResult, TokenizationRecord, TokenizationResult
+from .models import (
+    AnalysisResult,
+    DetokenizationResult,
+    TextDetokenizationResult,
+    TokenizationRecord,
+    TokenizationResult,
+)
+from .vault import TokenVault, create_vault
 
 logger = logging.getLogger(__name__)
 
+# Reintentos de generación cuando un token ya pertenece a otro valor
+_MAX_TOKEN_ATTEMPTS = 5
+
+# Cuerpo de token por formato (ver _generate_token)
+_TOKEN_BODY_PATTERNS = {
+    "uuid": r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
+    "random": r"[A-Za-z0-9_-]{22}",
+    "sequential": r"SEQ_\d{8,}",
+}
+
 
 class SimplexToken:
     """
@@ -36,7 +54,9 @@ class SimplexToken:
             config: Diccionario de configuración opcional:
                 - token_format: Formato de token (uuid/random/sequential) (default: "uuid")
                 - preserve_format: Preservar formato (default: True)
-                - token_mapping_backend: Backend de mapeo (default: "memory")
+                - token_mapping_backend: Backend de mapeo (memory/sqlite) (default: "memory")
+                - vault_path: Archivo del vault persistente (requerido para sqlite)
+                - vault_cache_size: Entradas de la caché LRU del vault (default: 10000)
                 - enable_detokenization: Habilitar detokenización (default: True)
                 - token_prefix: Prefijo opcional para tokens (default: None)
         """
@@ -50,10 +70,22 @@ class SimplexToken:
         self.token_mapping_backend = self.config.get("token_mapping_backend", "memory")
         self.enable_detokenization = bool(self.config.get("enable_detokenization", True))
         self.token_prefix = self.config.get("token_prefix")
+        self.vault_path = self.config.get("vault_path")
+        self.vault_cache_size = int(self.config.get("vault_cache_size", 10000))
 
-        # Mapeo token -> valor original (si detokenización está habilitada)
+        # Mapeo token -> valor original (backend memory; el vault lo comparte)
         self.token_mapping: Dict[str, str] = {}
+        self.vault: TokenVault = create_vault(
+            self.token_mapping_backend,
+            path=self.vault_path,
+            cache_size=self.vault_cache_size,
+            mapping=self.token_mapping,
+        )
+        # Último número secuencial emitido; los bloques se reservan en el vault
+        # (atómico entre instancias que comparten un vault persistente)
         self.sequential_counter = 0
+        self._sequence_end = 0
+        self.token_pattern = self._compile_token_pattern()
 
         logger.info(
             "Initialized %s - %s (format=%s, detokenization=%s)",
@@ -78,6 +110,8 @@ class SimplexToken:
         elif self.token_format == "random":
             token = secrets.token_urlsafe(16)
         elif self.token_format == "sequential":
+            if self.sequential_counter >= self._sequence_end:
+                self._reserve_sequence(1)
             self.sequential_counter += 1
             token = f"SEQ_{self.sequential_counter:08d}"
         else:
@@ -88,6 +122,24 @@ class SimplexToken:
 
         return token
 
+    def _reserve_sequence(self, count: int) -> None:
+        """Reserva en el vault el bloque de números de los próximos ``count`` tokens."""
+        first = self.vault.reserve_sequence(count)
+        self.sequential_counter = first - 1
+        self._sequence_end = first - 1 + count
+
+    def _compile_token_pattern(self) -> "re.Pattern[str]":
+        """
+        Compila el patrón que reconoce tokens de este motor en un documento.
+
+        El patrón se deriva de ``token_format`` y ``token_prefix``; los límites
+        impiden reconocer tokens dentro de palabras más largas.
+        """
+        body = _TOKEN_BODY_PATTERNS.get(self.token_format, _TOKEN_BODY_PATTERNS["random"])
+        if self.token_prefix:
+            body = f"{re.escape(self.token_prefix)}_{body}"
+        return re.compile(rf"(?<![A-Za-z0-9_-]){body}(?![A-Za-z0-9_-])")
+
     def _detect_data_type(self, value: str) -> str:
         """Detecta el tipo de dato."""
         if "@" in value:
@@ -107,18 +159,47 @@ class SimplexToken:
         """
         Tokeniza un valor individual.
 
+        Con detokenización habilitada la tokenización es determinista: un valor
+        ya registrado en el vault devuelve siempre su token existente.
+
         Args:
             value: Valor a tokenizar
 
         Returns:
-            Token generado
+            Token del valor
         """
-        token = self._generate_token(value)
+        return self.tokenize_values([value])[0]
 
-        if self.enable_detokenization:
-            self.token_mapping[token] = value
+    def tokenize_values(self, values: List[str]) -> List[str]:
+        """
+        Tokeniza valores en bloque con un único lookup y una única inserción.
 
-        return token
+        Args:
+            values: Valores a tokenizar (pueden repetirse)
+
+        Returns:
+            Lista de tokens alineada con ``values``
+        """
+        if not self.enable_detokenization:
+            # Sin vault no hay mapeo que consultar: tokens irreversibles
+            return [self._generate_token(value) for value in values]
+
+        known = self.vault.get_tokens(values)
+        pending = [value for value in dict.fromkeys(values) if value not in known]
+        for _ in range(_MAX_TOKEN_ATTEMPTS):
+            if not pending:
+                break
+            if self.token_format == "sequential":
+                self._reserve_sequence(len(pending))
+            new_pairs = [(self._generate_token(value), value) for value in pending]
+            canonical = self.vault.put_many(new_pairs)
+            known.update(canonical)
+            # Un token que ya pertenecía a otro valor no se registra: generar otro
+            pending = [value for value in pending if value not in canonical]
+        if pending:
+            raise RuntimeError(f"Could not register unique tokens for {len(pending)} values")
+
+        return [known[value] for value in values]
 
     def tokenize_text(self, text: str, pii_patterns: Optional[Dict[str, str]] = None) -> TokenizationResult:
         """
@@ -201,10 +282,11 @@ class SimplexToken:
                 message="Detokenization is disabled",
             )
 
-        if token in self.token_mapping:
+        original_value = self.vault.get_value(token)
+        if original_value is not None:
             return DetokenizationResult(
                 token=token,
-                original_value=self.token_mapping[token],
+                original_value=original_value,
                 found=True,
                 message="Token successfully detokenized",
             )
@@ -216,17 +298,137 @@ class SimplexToken:
                 message="Token not found in mapping",
             )
 
-    def analyze(self, text: Optional[str] = None, token: Optional[str] = None) -> AnalysisResult:
+    def detokenize_many(self, tokens: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Detokeniza tokens en bloque con un único lookup en el vault.
+
+        Args:
+            tokens: Tokens a detokenizar
+
+        Returns:
+            Dict token -> valor original (None si no existe o está deshabilitado)
+        """
+        if not self.enable_detokenization:
+            return {token: None for token in tokens}
+
+        found = self.vault.get_values(tokens)
+        return {token: found.get(token) for token in tokens}
+
+    def detokenize_text(self, text: str) -> TextDetokenizationResult:
+        """
+        Restaura un documento tokenizado completo.
+
+        Los tokens se localizan en una sola pasada del patrón compilado y se
+        resuelven con un único lookup masivo en el vault.
+
+        Args:
+            text: Documento tokenizado (p.ej. ``tokenized_data``)
+
+        Returns:
+            TextDetokenizationResult con el documento restaurado
+        """
+        return self.detokenize_texts([text])[0]
+
+    def detokenize_texts(
+        self, texts: List[str], json_escape: bool = False
+    ) -> List[TextDetokenizationResult]:
+        """
+        Restaura varios documentos con un único lookup masivo para todos.
+
+        Args:
+            texts: Documentos tokenizados
+            json_escape: Escapar los valores para insertarlos dentro de strings JSON
+
+        Returns:
+            Lista de TextDetokenizationResult alineada con ``texts``
+        """
+        finditer = self.token_pattern.finditer
+        spans = [[(m.start(), m.end(), m.group(0)) for m in finditer(text)] for text in texts]
+        distinct = dict.fromkeys(token for doc_spans in spans for _, _, token in doc_spans)
+        resolved = self.detokenize_many(list(distinct))
+
+        results: List[TextDetokenizationResult] = []
+        for text, doc_spans in zip(texts, spans):
+            pieces: List[str] = []
+            last = 0
+            unresolved: List[str] = []
+            for start, end, token in doc_spans:
+                value = resolved.get(token)
+                if value is None:
+                    unresolved.append(token)
+                    continue
+                if json_escape:
+                    value = json.dumps(value, ensure_ascii=False)[1:-1]
+                pieces.append(text[last:start])
+                pieces.append(value)
+                last = end
+            pieces.append(text[last:])
+
+            results.append(
+                TextDetokenizationResult(
+                    tokenized_data=text,
+                    detokenized_data="".join(pieces),
+                    tokens_found=len(doc_spans),
+                    tokens_resolved=len(doc_spans) - len(unresolved),
+                    unresolved_tokens=list(dict.fromkeys(unresolved)),
+                )
+            )
+        return results
+
+    def detokenize_ndjson(self, lines: Iterable[str], batch_size: int = 1000) -> Iterator[str]:
         """
-        Ejecuta análisis: tokenizar texto o detokenizar token.
+        Restaura un flujo NDJSON por lotes de líneas (memoria acotada).
+
+        Los valores restaurados se escapan para mantener cada línea como JSON
+        válido. Cada lote usa un único lookup en el vault.
+
+        Args:
+            lines: Iterable de líneas NDJSON tokenizadas
+            batch_size: Líneas por lote de lookup
+
+        Yields:
+            Líneas NDJSON restauradas (sin salto de línea final)
+        """
+        batch: List[str] = []
+        for line in lines:
+            batch.append(line.rstrip("\r\n"))
+            if len(batch) >= batch_size:
+                for result in self.detokenize_texts(batch, json_escape=True):
+                    yield result.detokenized_data
+                batch = []
+        if batch:
+            for result in self.detokenize_texts(batch, json_escape=True):
+                yield result.detokenized_data
+
+    def close(self) -> None:
+        """Cierra el vault de tokens (necesario en backends persistentes)."""
+        self.vault.close()
+
+    def analyze(
+        self,
+        text: Optional[str] = None,
+        token: Optional[str] = None,
+        tokenized_data: Optional[str] = None,
+    ) -> AnalysisResult:
+        """
+        Ejecuta análisis: tokenizar texto, detokenizar token o documento.
 
         Args:
             text: Texto a tokenizar
             token: Token a detokenizar
+            tokenized_data: Documento tokenizado a restaurar completo
 
         Returns:
             AnalysisResult con resultados
         """
+        if tokenized_data:
+            result = self.detokenize_text(tokenized_data)
+            return AnalysisResult(
+                status="success" if not result.unresolved_tokens else "warning",
+                message=f"Detokenized {result.tokens_resolved}/{result.tokens_found} tokens",
+                data=result.model_dump(),
+            )
+
         if token:
             # Detokenización
             result = self.detokenize(token)
@@ -269,6 +471,7 @@ class SimplexToken:
             "status": "Production",
             "token_format": self.token_format,
             "enable_detokenization": str(self.enable_detokenization),
+            "token_mapping_backend": self.vault.backend,
         }
 
 
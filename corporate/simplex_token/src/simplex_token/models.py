@@ -17,7 +17,15 @@ class ModuleConfig(BaseModel):
     name: str = Field(default="Simplex Token", description="Module name")
     token_format: str = Field(default="uuid", description="Token format (uuid/random/sequential)")
     preserve_format: bool = Field(default=True, description="Preserve original data format")
-    token_mapping_backend: str = Field(default="memory", description="Token mapping backend (memory/file/database)")
+    token_mapping_backend: str = Field(
+        default="memory", description="Token mapping backend (memory/sqlite)"
+    )
+    vault_path: Optional[str] = Field(
+        default=None, description="Persistent token vault file (sqlite backend)"
+    )
+    vault_cache_size: int = Field(
+        default=10000, ge=0, description="LRU cache entries in front of the vault"
+    )
     enable_detokenization: bool = Field(default=True, description="Enable detokenization")
     token_prefix: Optional[str] = Field(default=None, description="Optional token prefix")
     debug: bool = Field(default=False, description="Enable debug mode")
@@ -54,6 +62,18 @@ class DetokenizationResult(BaseModel):
     message: str = Field(description="Detokenization message")
 
 
+class TextDetokenizationResult(BaseModel):
+    """Result of whole-document detokenization"""
+
+    tokenized_data: str = Field(description="Tokenized document")
+    detokenized_data: str = Field(description="Document with tokens restored")
+    tokens_found: int = Field(description="Number of token occurrences found")
+    tokens_resolved: int = Field(description="Number of token occurrences restored")
+    unresolved_tokens: List[str] = Field(
+        default_factory=list, description="Distinct tokens not found in the vault"
+    )
+
+
 class AnalysisResult(BaseModel):
     """Result model for analysis operations"""
 
@@ -0,0 +1,342 @@
+"""
+Token vaults for SimplexToken.
+
+Un vault guarda el mapeo token <-> valor original con índice directo
+(valor -> token, para tokenización determinista) e índice inverso
+(token -> valor, para detokenización).
+
+Backends:
+    - MemoryTokenVault: diccionarios en proceso (comportamiento histórico)
+    - SQLiteTokenVault: archivo SQLite persistente con índice por hash del
+      valor y caché LRU en memoria para los valores más frecuentes
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Límite de parámetros por sentencia SQLite (SQLITE_MAX_VARIABLE_NUMBER conservador)
+_SQL_BATCH = 500
+
+
+class LRUCache:
+    """
+    Caché LRU acotada basada en OrderedDict.
+
+    ``get`` reordena el diccionario, así que get/put se serializan con un
+    lock: la caché puede compartirse entre hilos.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max(0, int(max_size))
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TokenVault:
+    """Interfaz común de los vaults de tokens."""
+
+    backend = "base"
+
+    def get_token(self, value: str) -> Optional[str]:
+        """Token existente para un valor (o None)."""
+        return self.get_tokens([value]).get(value)
+
+    def get_value(self, token: str) -> Optional[str]:
+        """Valor original de un token (o None)."""
+        return self.get_values([token]).get(token)
+
+    def put(self, token: str, value: str) -> str:
+        """Registra un par token/valor y devuelve el token canónico del valor."""
+        return self.put_many([(token, value)]).get(value, token)
+
+    def get_tokens(self, values: Iterable[str]) -> Dict[str, str]:
+        """Lookup masivo valor -> token (solo los encontrados)."""
+        raise NotImplementedError
+
+    def get_values(self, tokens: Iterable[str]) -> Dict[str, str]:
+        """Lookup masivo token -> valor (solo los encontrados)."""
+        raise NotImplementedError
+
+    def put_many(self, pairs: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        """
+        Inserción masiva de pares (token, valor).
+
+        Si un valor ya tenía token (p.ej. insertado por otro proceso), se
+        conserva el existente. Devuelve el mapeo canónico valor -> token.
+        """
+        raise NotImplementedError
+
+    def reserve_sequence(self, count: int = 1) -> int:
+        """
+        Reserva ``count`` números secuenciales consecutivos.
+
+        La reserva es atómica en el backend, así que varias instancias (o
+        procesos) sobre el mismo vault nunca reciben el mismo número.
+
+        Returns:
+            Primer número del bloque reservado
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """Estadísticas del vault."""
+        return {"entries": len(self)}
+
+    def close(self) -> None:
+        """Libera recursos del backend."""
+
+
+class MemoryTokenVault(TokenVault):
+    """Vault en memoria (se pierde al terminar el proceso)."""
+
+    backend = "memory"
+
+    def __init__(self, mapping: Optional[Dict[str, str]] = None):
+        # token -> valor; se acepta un dict externo para compartirlo con el llamador
+        self.mapping: Dict[str, str] = mapping if mapping is not None else {}
+        self.forward: Dict[str, str] = {value: token for token, value in self.mapping.items()}
+        self.sequence = len(self.mapping)
+
+    def get_token(self, value: str) -> Optional[str]:
+        return self.forward.get(value)
+
+    def get_value(self, token: str) -> Optional[str]:
+        return self.mapping.get(token)
+
+    def get_tokens(self, values: Iterable[str]) -> Dict[str, str]:
+        forward = self.forward
+        return {value: forward[value] for value in values if value in forward}
+
+    def get_values(self, tokens: Iterable[str]) -> Dict[str, str]:
+        mapping = self.mapping
+        return {token: mapping[token] for token in tokens if token in mapping}
+
+    def put_many(self, pairs: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        canonical: Dict[str, str] = {}
+        for token, value in pairs:
+            existing = self.forward.get(value)
+            if existing is None:
+                if self.mapping.get(token, value) != value:
+                    # Token ya asignado a otro valor: el llamador debe generar otro
+                    continue
+                self.forward[value] = existing = token
+                self.mapping[token] = value
+            canonical[value] = existing
+        return canonical
+
+    def reserve_sequence(self, count: int = 1) -> int:
+        first = self.sequence + 1
+        self.sequence += count
+        return first
+
+    def __len__(self) -> int:
+        return len(self.mapping)
+
+
+class SQLiteTokenVault(TokenVault):
+    """
+    Vault persistente en SQLite.
+
+    El índice directo usa el SHA-256 del valor (clave compacta de tamaño fijo)
+    y el índice inverso es la clave primaria ``token``. Una caché LRU por
+    dirección evita ir a disco para los identificadores más repetidos. La
+    conexión se comparte entre hilos protegida por un lock; con WAL, otros
+    procesos pueden leer el mismo archivo concurrentemente.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, cache_size: int = 10000):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            " token TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " value_hash BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS tokens_value_hash ON tokens (value_hash)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+        self.forward_cache = LRUCache(cache_size)
+        self.reverse_cache = LRUCache(cache_size)
+
+    @staticmethod
+    def _hash(value: str) -> bytes:
+        return hashlib.sha256(value.encode("utf-8")).digest()
+
+    def get_tokens(self, values: Iterable[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        pending: Dict[bytes, str] = {}
+        for value in values:
+            if value in found:
+                continue
+            token = self.forward_cache.get(value)
+            if token is not None:
+                found[value] = token
+            else:
+                pending[self._hash(value)] = value
+
+        hashes = list(pending)
+        with self._lock:
+            for i in range(0, len(hashes), _SQL_BATCH):
+                chunk = hashes[i : i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT value_hash, token FROM tokens WHERE value_hash IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for value_hash, token in rows:
+                    value = pending[value_hash]
+                    found[value] = token
+                    self.forward_cache.put(value, token)
+        return found
+
+    def get_values(self, tokens: Iterable[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        pending: List[str] = []
+        for token in tokens:
+            if token in found:
+                continue
+            value = self.reverse_cache.get(token)
+            if value is not None:
+                found[token] = value
+            else:
+                pending.append(token)
+
+        pending = list(dict.fromkeys(pending))
+        with self._lock:
+            for i in range(0, len(pending), _SQL_BATCH):
+                chunk = pending[i : i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT token, value FROM tokens WHERE token IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for token, value in rows:
+                    found[token] = value
+                    self.reverse_cache.put(token, value)
+        return found
+
+    def put_many(self, pairs: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        rows = [(token, value, self._hash(value)) for token, value in pairs]
+        if not rows:
+            return {}
+        with self._lock:
+            # Un valor ya presente conserva su token original (determinismo)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO tokens (token, value, value_hash) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        # Resolver el token canónico (otro proceso pudo insertar el mismo valor).
+        # Una fila ignorada por colisión de token no aparece: el llamador reintenta
+        canonical = self.get_tokens(value for _, value, _ in rows)
+        for value, token in canonical.items():
+            self.reverse_cache.put(token, value)
+        return canonical
+
+    def reserve_sequence(self, count: int = 1) -> int:
+        with self._lock:
+            # BEGIN IMMEDIATE toma el lock de escritura: lectura e incremento atómicos
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT value FROM counters WHERE name = 'sequence'"
+                ).fetchone()
+                if row is None:
+                    # Vaults anteriores a la tabla de contadores: continuar tras sus entradas
+                    row = self._conn.execute("SELECT COUNT(*) FROM tokens").fetchone()
+                current = int(row[0])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO counters (name, value) VALUES ('sequence', ?)",
+                    (current + count,),
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return current + 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM tokens").fetchone()[0])
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self),
+            "cache_hits": self.forward_cache.hits + self.reverse_cache.hits,
+            "cache_misses": self.forward_cache.misses + self.reverse_cache.misses,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_vault(
+    backend: str = "memory",
+    path: Optional[str] = None,
+    cache_size: int = 10000,
+    mapping: Optional[Dict[str, str]] = None,
+) -> TokenVault:
+    """
+    Crea un vault según el backend configurado.
+
+    Args:
+        backend: "memory" o "sqlite" (alias: "database", "file")
+        path: Ruta del archivo del vault (requerida para sqlite)
+        cache_size: Entradas de la caché LRU por dirección
+        mapping: Dict token -> valor a reutilizar en el backend memory
+
+    Returns:
+        TokenVault
+
+    Raises:
+        ValueError: Si el backend es desconocido o falta la ruta
+    """
+    if backend == "memory":
+        return MemoryTokenVault(mapping)
+    if backend in ("sqlite", "database", "file"):
+        if not path:
+            raise ValueError(f"vault_path is required for the '{backend}' token vault backend")
+        return SQLiteTokenVault(path, cache_size=cache_size)
+    raise ValueError(f"Unknown token mapping backend: {backend}")
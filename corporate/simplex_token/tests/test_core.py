@@ -2,7 +2,9 @@
 Unit tests for SimplexToken (Production)
 """
 
+import json
 import sys
+import threading
 from pathlib import Path
 
 # Add src directory to Python path for local imports
@@ -15,7 +17,8 @@ if str(SRC) not in sys.path:
 import pytest
 
 from simplex_token.core import SimplexToken
-from simplex_token.models import AnalysisResult, TokenizationResult
+from simplex_token.models import AnalysisResult, TextDetokenizationResult, TokenizationResult
+from simplex_token.vault import LRUCache
 
 
 @pytest.fixture
@@ -61,6 +64,148 @@ class TestTokenization:
             assert detoken_result.found is True
 
 
+class TestTokenVault:
+    """Tests para el vault de tokens"""
+
+    def test_tokenization_is_deterministic(self, modulo):
+        """Test que el mismo valor devuelve el mismo token"""
+        first = modulo.tokenize_value("test@example.com")
+        second = modulo.tokenize_value("test@example.com")
+        assert first == second
+        assert modulo.token_mapping == {first: "test@example.com"}
+
+    def test_tokenize_values_bulk(self, modulo):
+        """Test tokenización masiva alineada con la entrada"""
+        tokens = modulo.tokenize_values(["a", "b", "a"])
+        assert tokens[0] == tokens[2]
+        assert tokens[0] != tokens[1]
+        assert modulo.detokenize_many(tokens + ["missing"]) == {
+            tokens[0]: "a",
+            tokens[1]: "b",
+            "missing": None,
+        }
+
+    def test_sqlite_vault_persists(self, tmp_path):
+        """Test que el vault SQLite sobrevive entre instancias"""
+        config = {"token_mapping_backend": "sqlite", "vault_path": str(tmp_path / "vault.db")}
+        modulo = SimplexToken(config=config)
+        token = modulo.tokenize_value("123-45-6789")
+        modulo.close()
+
+        reopened = SimplexToken(config=config)
+        assert reopened.tokenize_value("123-45-6789") == token
+        assert reopened.detokenize(token).original_value == "123-45-6789"
+        assert reopened.vault.stats()["entries"] == 1
+        reopened.close()
+
+    def test_sqlite_vault_requires_path(self):
+        """Test que el backend sqlite exige vault_path"""
+        with pytest.raises(ValueError):
+            SimplexToken(config={"token_mapping_backend": "sqlite"})
+
+    def test_sequential_counter_resumes(self, tmp_path):
+        """Test que la numeración secuencial continúa en un vault existente"""
+        config = {
+            "token_format": "sequential",
+            "token_mapping_backend": "sqlite",
+            "vault_path": str(tmp_path / "vault.db"),
+        }
+        modulo = SimplexToken(config=config)
+        assert modulo.tokenize_value("a") == "SEQ_00000001"
+        modulo.close()
+
+        reopened = SimplexToken(config=config)
+        assert reopened.tokenize_value("b") == "SEQ_00000002"
+        reopened.close()
+
+    def test_sequential_instances_share_vault(self, tmp_path):
+        """Test que dos instancias sobre el mismo vault no repiten números"""
+        config = {
+            "token_format": "sequential",
+            "token_mapping_backend": "sqlite",
+            "vault_path": str(tmp_path / "vault.db"),
+        }
+        first, second = SimplexToken(config=config), SimplexToken(config=config)
+        alice = first.tokenize_value("alice")
+        bob = second.tokenize_values(["bob", "carol"])
+        assert len({alice, *bob}) == 3
+        assert first.detokenize_many([alice] + bob) == {
+            alice: "alice",
+            bob[0]: "bob",
+            bob[1]: "carol",
+        }
+        first.close()
+        second.close()
+
+    def test_lru_cache_is_thread_safe(self):
+        """Test que get/put concurrentes no corrompen la caché LRU"""
+        cache = LRUCache(max_size=64)
+
+        def worker(offset: int) -> None:
+            for i in range(5000):
+                key = f"k{(i + offset) % 200}"
+                cache.put(key, "v")
+                cache.get(key)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Forzar cambios de hilo frecuentes
+        try:
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert len(cache) <= 64
+        assert cache.hits + cache.misses == 8 * 5000
+
+    def test_colliding_token_is_regenerated(self, modulo):
+        """Test que un token ya asignado a otro valor no se reutiliza"""
+        token = modulo.tokenize_value("alice")
+        tokens = iter([token, "fresh-token"])
+        modulo._generate_token = lambda value="": next(tokens)
+        assert modulo.tokenize_value("bob") == "fresh-token"
+        assert modulo.detokenize(token).original_value == "alice"
+
+
+class TestTextDetokenization:
+    """Tests para detokenización de documentos completos"""
+
+    def test_detokenize_text_roundtrip(self, modulo):
+        """Test que tokenize_text + detokenize_text restaura el documento"""
+        text = "Email: test@example.com, SSN: 123-45-6789, again test@example.com"
+        tokenized = modulo.tokenize_text(text).tokenized_data
+        result = modulo.detokenize_text(tokenized)
+        assert isinstance(result, TextDetokenizationResult)
+        assert result.detokenized_data == text
+        assert result.tokens_found == 3
+        assert result.unresolved_tokens == []
+
+    def test_detokenize_text_prefix_and_unknown(self):
+        """Test tokens con prefijo y tokens desconocidos"""
+        modulo = SimplexToken(config={"token_format": "sequential", "token_prefix": "TK"})
+        token = modulo.tokenize_value("secret")
+        result = modulo.detokenize_text(f"{token} TK_SEQ_99999999 SEQ_00000001 x{token}")
+        assert result.detokenized_data == "secret TK_SEQ_99999999 SEQ_00000001 x" + token
+        assert result.unresolved_tokens == ["TK_SEQ_99999999"]
+
+    def test_detokenize_ndjson_escapes_values(self, modulo):
+        """Test NDJSON restaurado sigue siendo JSON válido"""
+        token = modulo.tokenize_value('say "hi"')
+        lines = [json.dumps({"note": token}) + "\n", json.dumps({"n": 1})]
+        restored = list(modulo.detokenize_ndjson(lines, batch_size=1))
+        assert json.loads(restored[0]) == {"note": 'say "hi"'}
+        assert json.loads(restored[1]) == {"n": 1}
+
+    def test_analyze_tokenized_data(self, modulo):
+        """Test analyze con documento tokenizado"""
+        tokenized = modulo.tokenize_text("Email: test@example.com").tokenized_data
+        result = modulo.analyze(tokenized_data=tokenized)
+        assert result.status == "success"
+        assert result.data["detokenized_data"] == "Email: test@example.com"
+
+
 class TestAnalyze:
     """Tests para funcionalidad de análisis"""
 
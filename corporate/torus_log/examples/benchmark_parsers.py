@@ -0,0 +1,82 @@
+"""
+Benchmark de los parsers de formato de TorusLog.
+
+Mide líneas por segundo de cada parser registrado sobre líneas sintéticas
+y las compara con el parser histórico (``re.compile`` por línea, pydantic
+con validación).
+
+Uso:
+    python examples/benchmark_parsers.py [n_lines]
+"""
+
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from torus_log.models import LogEntry  # noqa: E402
+from torus_log.parsers import create_parser  # noqa: E402
+
+SAMPLES = {
+    "simple": "2025-01-15 10:30:{s:02d} ERROR Connection {i} failed",
+    "json": (
+        '{{"timestamp": "2025-01-15T10:30:{s:02d}Z", "level": "warning",'
+        ' "message": "login {i} failed"}}'
+    ),
+    "cef": "CEF:0|Security|IDS|1.0|100|Port scan {i}|8|src=10.0.0.1 dst=10.0.0.2 rt=1736937045000",
+    "leef": "LEEF:1.0|Lancope|StealthWatch|1.0|41|src=10.0.1.8\tdst=10.0.0.5\tsev=5\tmsg=Flood {i}",
+    "rfc5424": "<34>1 2025-01-15T10:30:{s:02d}Z host sshd 42 ID47 - Failed login {i}",
+    "rfc3164": "<34>Jan 15 10:30:{s:02d} host sshd[42]: Failed password {i} for root",
+    "access": (
+        '203.0.113.9 - - [15/Jan/2025:10:30:{s:02d} +0000] "GET /item/{i} HTTP/1.1"'
+        ' 200 512 "-" "curl/8.0"'
+    ),
+}
+
+
+def legacy_parse(log_line: str):
+    """Parser histórico de TorusLog.parse_log_entry."""
+    pattern = re.compile(r"(\d{4}-\d{2}-\d{2}[\sT]\d{2}:\d{2}:\d{2})[\s-]+(\w+)[\s:]+(.+)")
+    match = pattern.match(log_line.strip())
+    if not match:
+        level_match = re.search(r"\b(ERROR|WARN|INFO|DEBUG|WARNING)\b", log_line, re.IGNORECASE)
+        if level_match:
+            return LogEntry(
+                timestamp=datetime.now().isoformat(),
+                level=level_match.group(1).upper(),
+                message=log_line,
+                metadata={},
+            )
+        return None
+    timestamp, level, message = match.groups()
+    return LogEntry(timestamp=timestamp, level=level.upper(), message=message, metadata={})
+
+
+def bench(label: str, parse, lines: list) -> float:
+    started = time.perf_counter()
+    for line in lines:
+        parse(line)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<20} {len(lines) / elapsed / 1000:8.0f} k líneas/s")
+    return elapsed
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    lines = {
+        name: [template.format(i=i, s=i % 60) for i in range(n)]
+        for name, template in SAMPLES.items()
+    }
+
+    bench("simple (histórico)", legacy_parse, lines["simple"])
+    for name, sample in lines.items():
+        parser = create_parser(name)
+        assert parser.parse(sample[0]) is not None, name
+        bench(name, parser.parse, sample)
+
+
+if __name__ == "__main__":
+    main()
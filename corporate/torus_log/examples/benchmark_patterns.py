@@ -0,0 +1,73 @@
+"""
+Benchmark de la detección de palabras clave de seguridad de TorusLog.
+
+Compara las regex separadas históricas (una búsqueda por patrón hasta la
+primera coincidencia) con ``PatternMatcher`` (una sola regex fusionada que
+además informa la familia), con las familias por defecto y con familias
+adicionales.
+
+Uso:
+    python examples/benchmark_patterns.py [n_lines]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from torus_log.patterns import PatternMatcher  # noqa: E402
+
+LEGACY_PATTERNS = [
+    re.compile(r"(?i)(failed|denied|unauthorized|forbidden)", re.IGNORECASE),
+    re.compile(r"(?i)(attack|intrusion|breach|compromise)", re.IGNORECASE),
+    re.compile(r"(?i)(sql injection|xss|csrf)", re.IGNORECASE),
+]
+
+EXTRA_FAMILIES = {
+    "ransomware": ["ransom", "encrypted files", "shadow copy"],
+    "recon": ["port scan", "nmap", "masscan", "enumeration"],
+    "malware": ["trojan", "backdoor", "reverse shell", "mimikatz"],
+}
+
+WORDS = (
+    "user session started request completed GET /index.html status ok cache hit "
+    "connection closed service heartbeat worker Queue Flushed Backup"
+).split()
+
+
+def legacy_family(message: str):
+    for index, pattern in enumerate(LEGACY_PATTERNS):
+        if pattern.search(message):
+            return index
+    return None
+
+
+def bench(label: str, detect, messages: list) -> int:
+    started = time.perf_counter()
+    hits = sum(1 for message in messages if detect(message) is not None)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {len(messages) / elapsed / 1000:8.0f} k líneas/s ({hits} coincidencias)")
+    return hits
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(7)
+    messages = [" ".join(rng.choices(WORDS, k=12)) for _ in range(n)]
+    for index in range(0, n, 50):
+        messages[index] += " Failed password for root"
+
+    legacy = bench("regex separadas (histórico)", legacy_family, messages)
+    fused = bench("PatternMatcher", PatternMatcher().family, messages)
+    assert legacy == fused
+    extended = PatternMatcher()
+    for family, keywords in EXTRA_FAMILIES.items():
+        extended.add_family(family, keywords)
+    bench("PatternMatcher (+3 familias)", extended.family, messages)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,17 @@ Misión: Goodbye, Dear Friend
 Rol: log-analyzer
 """
 
+import itertools
 import logging
-import re
-from collections import defaultdict
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .models import AnalysisResult, LogAnalysis, LogEntry
+from .correlation import CorrelationEngine, CorrelationRule, build_rule, default_rules
+from .follow import LogFollower
+from .merge import MergedRun, iter_log_files
+from .models import AnalysisResult, CorrelatedIncident, LogAnalysis, LogEntry
+from .parsers import AUTO_FORMAT, DEFAULT_FORMAT, LogParser, create_parser, detect_format
+from .patterns import DEFAULT_PATTERN_FAMILIES, PatternMatcher
+from .stream import LogAggregator, iter_lines
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +38,25 @@ class TorusLog:
             config: Diccionario de configuración opcional:
                 - log_levels: Niveles a procesar (default: ERROR, WARN, INFO, DEBUG)
                 - pattern_detection: Detectar patrones (default: True)
+                - pattern_families: Familias de palabras clave adicionales
+                  (nombre -> lista de palabras); amplían las de
+                  ``DEFAULT_PATTERN_FAMILIES``
                 - correlation_window: Ventana de correlación en segundos (default: 300)
+                - correlation: Correlacionar eventos en ventanas de tiempo (default: True)
+                - correlation_rules: Reglas (dicts con name, type threshold/sequence,
+                  count, window, group_by, match, levels, then); default:
+                  fuerza bruta por IP y fallos seguidos de éxito
+                - max_correlation_groups: Máximo de grupos vivos en la
+                  correlación (default: 100000)
+                - parse_workers: Procesos para parsear varios archivos en
+                  ``analyze_files`` con merge ordenado por timestamp (default: 1)
+                - max_samples: Máximo de errores y de warnings conservados como
+                  muestra en ``analyze_stream``/``analyze_files`` (default: 100)
+                - max_pattern_alerts: Alertas de patrón por lectura en ``follow``;
+                  el exceso se resume por familia (default: 100)
+                - log_format: Formato de los logs (json, journald, cef, leef,
+                  rfc5424, rfc3164, access, simple) o "auto" para detectarlo
+                  en cada flujo (default: "auto")
         """
         self.name = "Torus Log"
         self.mission = "Goodbye, Dear Friend"
@@ -44,13 +66,28 @@ class TorusLog:
         self.log_levels = self.config.get("log_levels", ["ERROR", "WARN", "INFO", "DEBUG"])
         self.pattern_detection = bool(self.config.get("pattern_detection", True))
         self.correlation_window = int(self.config.get("correlation_window", 300))
+        self.max_samples = int(self.config.get("max_samples", 100))
+        self.max_pattern_alerts = int(self.config.get("max_pattern_alerts", 100))
+        self.log_format = self.config.get("log_format", AUTO_FORMAT)
+        self.correlation = bool(self.config.get("correlation", True))
+        self.max_correlation_groups = int(self.config.get("max_correlation_groups", 100000))
+        self.parse_workers = max(1, int(self.config.get("parse_workers", 1)))
+        rule_specs = self.config.get("correlation_rules")
+        self.correlation_rules: List[CorrelationRule] = (
+            [build_rule(spec, self.correlation_window) for spec in rule_specs]
+            if rule_specs is not None
+            else default_rules(self.correlation_window)
+        )
+        self._parsers: Dict[str, LogParser] = {}
+        # Último formato detectado por parse_log_entry en modo "auto"
+        self._line_format = DEFAULT_FORMAT
+        if self.log_format != AUTO_FORMAT:
+            self._parser(self.log_format)  # ValueError si el formato no existe
 
-        # Patrones comunes de seguridad
-        self.security_patterns = [
-            re.compile(r"(?i)(failed|denied|unauthorized|forbidden)", re.IGNORECASE),
-            re.compile(r"(?i)(attack|intrusion|breach|compromise)", re.IGNORECASE),
-            re.compile(r"(?i)(sql injection|xss|csrf)", re.IGNORECASE),
-        ]
+        # Palabras clave de seguridad, fusionadas en un único detector
+        self.security_patterns = PatternMatcher(DEFAULT_PATTERN_FAMILIES)
+        for family, keywords in (self.config.get("pattern_families") or {}).items():
+            self.security_patterns.add_family(family, keywords)
 
         logger.info(
             "Initialized %s - %s (levels=%s, correlation=%ds)",
@@ -71,26 +108,47 @@ class TorusLog:
         Returns:
             LogEntry o None si no se puede parsear
         """
-        # Patrón simple para logs comunes
-        pattern = re.compile(r"(\d{4}-\d{2}-\d{2}[\sT]\d{2}:\d{2}:\d{2})[\s-]+(\w+)[\s:]+(.+)")
-        match = pattern.match(log_line.strip())
-
-        if not match:
-            # Intentar parsear sin timestamp
-            level_match = re.search(r"\b(ERROR|WARN|INFO|DEBUG|WARNING)\b", log_line, re.IGNORECASE)
-            if level_match:
-                level = level_match.group(1).upper()
-                message = log_line
-                timestamp = datetime.now().isoformat()
-                return LogEntry(
-                    timestamp=timestamp, level=level, message=message, source=source, metadata={}
-                )
-            return None
+        log_format = self.log_format
+        if log_format == AUTO_FORMAT:
+            # Se reutiliza el último formato detectado mientras reconozca las
+            # líneas; la detección completa solo se ejecuta con un fallo
+            log_format = self._line_format
+            if not self._parser(log_format).detect(log_line):
+                log_format = self._line_format = detect_format([log_line])
+        parser = self._parser(log_format)
+        entry = parser.parse(log_line, source)
+        if entry is None and parser.fallback is not None:
+            entry = parser.fallback.parse(log_line, source)
+        return entry
+
+    def _parser(self, log_format: str) -> LogParser:
+        parser = self._parsers.get(log_format)
+        if parser is None:
+            parser = self._parsers[log_format] = create_parser(log_format)
+            if log_format != DEFAULT_FORMAT:
+                # Las líneas que no encajan en el formato se prueban con el simple
+                parser.fallback = self._parser(DEFAULT_FORMAT)
+        return parser
+
+    def _parse_lines(
+        self, lines: Iterable[str], source: Optional[str] = None
+    ) -> Tuple[str, Iterator[Optional[LogEntry]]]:
+        """
+        Parsea un flujo de líneas con el formato configurado o detectado.
 
-        timestamp, level, message = match.groups()
-        return LogEntry(
-            timestamp=timestamp, level=level.upper(), message=message, source=source, metadata={}
-        )
+        En modo "auto" el formato se detecta con las primeras líneas del flujo,
+        que después se procesan normalmente.
+
+        Returns:
+            (formato, iterador de LogEntry o None por línea)
+        """
+        log_format = self.log_format
+        if log_format == AUTO_FORMAT:
+            lines = iter(lines)
+            head = list(itertools.islice(lines, 20))
+            log_format = detect_format(head)
+            lines = itertools.chain(head, lines)
+        return log_format, self._parser(log_format).parse_lines(lines, source)
 
     def analyze_logs(self, log_lines: List[str], source: Optional[str] = None) -> LogAnalysis:
         """
@@ -103,59 +161,218 @@ class TorusLog:
         Returns:
             LogAnalysis con resultados
         """
-        entries: List[LogEntry] = []
-        entries_by_level: Dict[str, int] = defaultdict(int)
-        errors: List[LogEntry] = []
-        warnings: List[LogEntry] = []
-        patterns_detected: List[str] = []
-
-        for line in log_lines:
-            entry = self.parse_log_entry(line, source)
-            if entry:
-                entries.append(entry)
-                entries_by_level[entry.level] += 1
-
-                if entry.level == "ERROR":
-                    errors.append(entry)
-                elif entry.level in ["WARN", "WARNING"]:
-                    warnings.append(entry)
-
-                # Detectar patrones
-                if self.pattern_detection:
-                    for pattern in self.security_patterns:
-                        if pattern.search(entry.message):
-                            patterns_detected.append(entry.message[:100])  # Primeros 100 chars
-                            break
-
-        return LogAnalysis(
-            total_entries=len(entries),
-            entries_by_level=dict(entries_by_level),
-            patterns_detected=patterns_detected[:50],  # Limitar a 50
-            errors_found=errors,
-            warnings_found=warnings,
-            analysis_summary={
-                "total_entries": len(entries),
-                "error_count": len(errors),
-                "warning_count": len(warnings),
-                "pattern_count": len(patterns_detected),
-                "most_common_level": max(entries_by_level.items(), key=lambda x: x[1])[0]
-                if entries_by_level
-                else None,
-            },
+        aggregator = self._new_aggregator(max_samples=None)
+        log_format, entries = self._parse_lines(aggregator.count_lines(log_lines), source)
+        for entry in entries:
+            aggregator.add(entry)
+        return aggregator.finish({"log_format": log_format})
+
+    def _new_aggregator(self, max_samples: Optional[int]) -> LogAggregator:
+        return LogAggregator(
+            patterns=self.security_patterns if self.pattern_detection else None,
+            max_samples=max_samples,
+            correlator=self.new_correlator() if self.correlation else None,
         )
 
-    def analyze(self, log_data: Optional[str] = None, log_lines: Optional[List[str]] = None) -> AnalysisResult:
+    def new_correlator(self) -> CorrelationEngine:
+        """Motor de correlación con las reglas configuradas (estado vacío)."""
+        return CorrelationEngine(self.correlation_rules, self.max_correlation_groups)
+
+    def correlate(
+        self, lines: Iterable[str], source: Optional[str] = None
+    ) -> Iterator[CorrelatedIncident]:
+        """
+        Correlaciona un flujo de líneas y emite los incidentes a medida que
+        se disparan, sin esperar al final del flujo.
+
+        Args:
+            lines: Iterable de líneas
+            source: Fuente del log (opcional)
+
+        Yields:
+            CorrelatedIncident
         """
-        Ejecuta análisis: string o lista de líneas.
+        correlator = self.new_correlator()
+        _, entries = self._parse_lines(lines, source)
+        for entry in entries:
+            if entry is not None:
+                yield from correlator.process(entry)
+
+    def _stream_summary(self, aggregator: LogAggregator) -> Dict[str, Any]:
+        return {
+            "lines_read": aggregator.lines_read,
+            "unparsed_lines": aggregator.unparsed_lines,
+            "sample_limit": self.max_samples,
+            "samples_truncated": aggregator.error_count > len(aggregator.errors)
+            or aggregator.warning_count > len(aggregator.warnings),
+        }
+
+    def analyze_stream(self, lines: Iterable[str], source: Optional[str] = None) -> LogAnalysis:
+        """
+        Analiza un flujo de líneas sin retenerlas en memoria.
+
+        Los contadores y las coincidencias de patrones se agregan sobre la
+        marcha; de errores y warnings solo se conservan las primeras
+        ``max_samples`` entradas (los totales siguen siendo exactos).
+
+        Args:
+            lines: Iterable de líneas (archivo abierto, generador, ...)
+            source: Fuente del log (opcional)
+
+        Returns:
+            LogAnalysis con resultados
+        """
+        aggregator = self._new_aggregator(self.max_samples)
+        log_format, entries = self._parse_lines(aggregator.count_lines(lines), source)
+        for entry in entries:
+            aggregator.add(entry)
+        summary = self._stream_summary(aggregator)
+        summary["log_format"] = log_format
+        return aggregator.finish(summary)
+
+    def analyze_files(
+        self, paths: Iterable[str], workers: Optional[int] = None, ordered: bool = False
+    ) -> LogAnalysis:
+        """
+        Analiza archivos de log (texto plano o gzip) en streaming.
+
+        Cada archivo se lee perezosamente y sus entradas llevan la ruta como
+        ``source``; los directorios se recorren recursivamente. Un archivo
+        ilegible no detiene el análisis: se informa en
+        ``analysis_summary["file_errors"]``.
+
+        Con ``workers`` > 1 u ``ordered``, los archivos se parsean por separado
+        (en un pool de procesos si hay varios workers) y sus entradas se
+        combinan en un único flujo ordenado por timestamp (``heapq.merge``)
+        antes de la detección de patrones y la correlación. El resultado es
+        idéntico con cualquier número de workers.
+
+        Args:
+            paths: Rutas de archivos o directorios
+            workers: Procesos de parseo (default: ``parse_workers``)
+            ordered: Combinar por timestamp aunque se use un solo proceso
+
+        Returns:
+            LogAnalysis agregado de todos los archivos
+        """
+        workers = self.parse_workers if workers is None else max(1, int(workers))
+        if workers > 1 or ordered:
+            return self._analyze_merged(paths, workers)
+
+        aggregator = self._new_aggregator(self.max_samples)
+        files_read = 0
+        file_errors: Dict[str, str] = {}
+        log_formats: Dict[str, int] = {}
+        for path in iter_log_files(paths):
+            try:
+                lines = aggregator.count_lines(iter_lines(path))
+                log_format, entries = self._parse_lines(lines, path)
+                for entry in entries:
+                    aggregator.add(entry)
+                log_formats[log_format] = log_formats.get(log_format, 0) + 1
+            except (OSError, EOFError) as exc:
+                logger.error("Error reading log %s: %s", path, exc)
+                file_errors[path] = str(exc)
+                continue
+            files_read += 1
+
+        summary = self._stream_summary(aggregator)
+        summary["files_read"] = files_read
+        summary["file_errors"] = file_errors
+        summary["log_formats"] = log_formats
+        return aggregator.finish(summary)
+
+    def _analyze_merged(self, paths: Iterable[str], workers: int) -> LogAnalysis:
+        aggregator = self._new_aggregator(self.max_samples)
+        with MergedRun(self, paths, workers) as run:
+            for entry in run.entries():
+                aggregator.add(entry)
+
+        file_errors: Dict[str, str] = {}
+        log_formats: Dict[str, int] = {}
+        for file_run in run.runs:
+            if file_run.error is not None:
+                logger.error("Error reading log %s: %s", file_run.path, file_run.error)
+                file_errors[file_run.path] = file_run.error
+                continue
+            aggregator.add_counts(file_run.lines, file_run.unparsed)
+            log_formats[file_run.log_format] = log_formats.get(file_run.log_format, 0) + 1
+
+        summary = self._stream_summary(aggregator)
+        summary["files_read"] = len(run.runs) - len(file_errors)
+        summary["file_errors"] = file_errors
+        summary["log_formats"] = log_formats
+        summary["ordered"] = True
+        summary["workers"] = workers
+        return aggregator.finish(summary)
+
+    def follow(
+        self,
+        paths: Iterable[str],
+        from_start: bool = False,
+        snapshot_interval: float = 60.0,
+        poll_interval: float = 1.0,
+        duration: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Sigue archivos de log en continuo (como ``tail -F``).
+
+        Solo se leen las líneas nuevas; se detectan rotaciones (cambio de
+        inode) y truncados. Los contadores por nivel, patrones y correlación
+        se actualizan de forma incremental, sin releer el histórico. La
+        espera usa inotify donde está disponible y sondeo en otro caso.
+
+        Args:
+            paths: Archivos a seguir
+            from_start: Procesar también el contenido existente
+            snapshot_interval: Segundos entre snapshots
+            poll_interval: Intervalo de sondeo (tope de espera con inotify)
+            duration: Segundos de seguimiento (None = hasta cerrar el generador)
+
+        Yields:
+            Eventos ``{"type": "alert", "kind": "pattern"|"incident", ...}``,
+            ``{"type": "alert", "kind": "pattern_summary", "suppressed": {...}}``
+            (coincidencias por encima de ``max_pattern_alerts`` en una lectura) y
+            ``{"type": "snapshot", "interval": {...}, "analysis": {...}}``
+        """
+        follower = LogFollower(
+            self,
+            paths,
+            from_start=from_start,
+            snapshot_interval=snapshot_interval,
+            poll_interval=poll_interval,
+            max_pattern_alerts=self.max_pattern_alerts,
+        )
+        return follower.follow(duration)
+
+    def analyze(
+        self,
+        log_data: Optional[str] = None,
+        log_lines: Optional[List[str]] = None,
+        log_paths: Optional[List[str]] = None,
+    ) -> AnalysisResult:
+        """
+        Ejecuta análisis: string, lista de líneas o archivos de log.
 
         Args:
             log_data: String con logs (será dividido en líneas)
             log_lines: Lista de líneas de log
+            log_paths: Rutas de archivos de log (texto plano o gzip, en streaming)
 
         Returns:
             AnalysisResult con resultados
         """
-        if log_lines:
+        if log_paths:
+            analysis = self.analyze_files(log_paths)
+            file_errors = analysis.analysis_summary["file_errors"]
+            if file_errors and not analysis.analysis_summary["files_read"]:
+                return AnalysisResult(
+                    status="error",
+                    message="No log file could be read",
+                    data=analysis.model_dump(),
+                    errors=[f"{path}: {error}" for path, error in file_errors.items()],
+                )
+        elif log_lines:
             analysis = self.analyze_logs(log_lines)
         elif log_data:
             lines = log_data.splitlines()
@@ -168,7 +385,11 @@ class TorusLog:
                 errors=["missing_input"],
             )
 
-        status = "warning" if analysis.errors_found or analysis.patterns_detected else "success"
+        status = (
+            "warning"
+            if analysis.errors_found or analysis.patterns_detected or analysis.incidents
+            else "success"
+        )
 
         return AnalysisResult(
             status=status,
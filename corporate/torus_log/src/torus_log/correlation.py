@@ -0,0 +1,366 @@
+"""
+Streaming event correlation for TorusLog.
+
+Agrupa eventos por claves configurables (source, ip, user o cualquier campo
+de ``metadata``) dentro de ventanas de tiempo deslizantes y emite incidentes
+a medida que las reglas se cumplen:
+
+    - threshold: ``count`` eventos que cumplen ``match`` dentro de ``window``
+    - sequence: ``count`` eventos ``match`` seguidos de un evento ``then``
+      dentro de ``window`` (p.ej. N fallos de login y después un éxito)
+
+El tiempo es el de los eventos (no el reloj del sistema): la marca de agua es
+el timestamp más reciente visto y los eventos sin timestamp usan esa marca.
+Cada grupo guarda solo los últimos ``count`` instantes (deque acotada); los
+grupos inactivos se expiran con un heap ordenado por vencimiento y el total
+de grupos vivos se limita con ``max_groups``.
+"""
+
+import heapq
+import re
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from .models import CorrelatedIncident, LogEntry
+from .parsers import epoch_to_iso, parse_timestamp
+
+# Campos de metadata equivalentes para las claves de agrupación habituales
+FIELD_ALIASES = {
+    "ip": ("client_ip", "src", "ip", "src_ip", "source_ip", "remote_addr"),
+    "user": ("user", "username", "suser", "duser", "usrName", "user_name"),
+    "host": ("host", "hostname", "dvchost"),
+}
+
+_IP_PATTERN = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
+_USER_PATTERN = re.compile(
+    r"\b(?:for(?:\s+invalid\s+user)?\s+|user[=:\s]\s*)([\w.@-]+)", re.IGNORECASE
+)
+_MESSAGE_EXTRACTORS = {"ip": _IP_PATTERN, "user": _USER_PATTERN}
+
+DEFAULT_FAILURE_PATTERN = r"failed|failure|denied|invalid (?:user|password)|unauthorized"
+DEFAULT_SUCCESS_PATTERN = r"accepted|success(?:ful)?|logged in|session opened"
+
+GroupKey = Tuple[Optional[str], ...]
+
+# Papel de un evento en una regla (ver CorrelationRule.classify)
+IGNORED, MATCH, THEN = 0, 1, 2
+
+
+def extract_field(entry: LogEntry, field: str) -> Optional[str]:
+    """
+    Valor de un campo de agrupación: ``source``, un campo de ``metadata`` (o
+    sus alias) o, para ``ip`` y ``user``, lo extraído del mensaje.
+    """
+    if field == "source":
+        return entry.source
+    metadata = entry.metadata
+    for name in FIELD_ALIASES.get(field, (field,)):
+        value = metadata.get(name)
+        if value:
+            return str(value)
+    extractor = _MESSAGE_EXTRACTORS.get(field)
+    if extractor is not None:
+        match = extractor.search(entry.message)
+        if match:
+            return match.group(match.lastindex or 0)
+    return None
+
+
+def _compile(pattern: Optional[str]) -> Optional[Pattern[str]]:
+    return re.compile(pattern, re.IGNORECASE) if pattern else None
+
+
+class CorrelationRule(ABC):
+    """
+    Regla de correlación (base abstracta; ver ThresholdRule y SequenceRule).
+
+    Args:
+        name: Nombre de la regla (se informa en el incidente)
+        count: Eventos necesarios
+        window: Ventana en segundos
+        group_by: Campos de agrupación
+        match: Regex (sin distinguir mayúsculas) que debe cumplir el mensaje
+        levels: Niveles aceptados (None = todos)
+    """
+
+    rule_type = "base"
+
+    def __init__(
+        self,
+        name: str,
+        count: int,
+        window: float,
+        group_by: Iterable[str] = ("ip",),
+        match: Optional[str] = None,
+        levels: Optional[Iterable[str]] = None,
+    ):
+        if count < 1:
+            raise ValueError("count must be >= 1")
+        self.name = name
+        self.count = int(count)
+        self.window = float(window)
+        self.group_by = tuple(group_by)
+        self.match = _compile(match)
+        self.levels = frozenset(level.upper() for level in levels) if levels else None
+
+    def matches(self, entry: LogEntry) -> bool:
+        if self.levels is not None and entry.level not in self.levels:
+            return False
+        return self.match is None or self.match.search(entry.message) is not None
+
+    def classify(self, entry: LogEntry) -> int:
+        """Papel del evento en la regla: IGNORED, MATCH o THEN."""
+        return MATCH if self.matches(entry) else IGNORED
+
+    def key(self, entry: LogEntry, fields: Dict[str, Optional[str]]) -> Optional[GroupKey]:
+        """
+        Clave de grupo del evento, o None si falta algún campo.
+
+        ``fields`` memoiza los campos ya extraídos del mismo evento por otras
+        reglas.
+        """
+        values = []
+        for field in self.group_by:
+            if field in fields:
+                value = fields[field]
+            else:
+                value = fields[field] = extract_field(entry, field)
+            if value is None:
+                return None
+            values.append(value)
+        return tuple(values)
+
+    @abstractmethod
+    def observe(self, state: Deque[float], role: int, when: float) -> Optional[Tuple[int, float]]:
+        """
+        Actualiza el estado del grupo con un evento de la regla.
+
+        Returns:
+            (eventos correlacionados, instante del primero) si la regla se dispara
+        """
+
+
+class ThresholdRule(CorrelationRule):
+    """``count`` eventos que cumplen ``match`` dentro de ``window``."""
+
+    rule_type = "threshold"
+
+    def observe(self, state: Deque[float], role: int, when: float) -> Optional[Tuple[int, float]]:
+        state.append(when)
+        if len(state) == self.count and when - state[0] <= self.window:
+            first = state[0]
+            state.clear()
+            return self.count, first
+        return None
+
+
+class SequenceRule(CorrelationRule):
+    """
+    ``count`` eventos ``match`` seguidos de un evento ``then`` dentro de
+    ``window`` (medida desde el primero de los ``count``).
+    """
+
+    rule_type = "sequence"
+
+    def __init__(self, name: str, count: int, window: float, then: str, **kwargs: Any):
+        super().__init__(name, count, window, **kwargs)
+        self.then = _compile(then)
+
+    def classify(self, entry: LogEntry) -> int:
+        if self.matches(entry):
+            return MATCH
+        return THEN if self.then.search(entry.message) is not None else IGNORED
+
+    def observe(self, state: Deque[float], role: int, when: float) -> Optional[Tuple[int, float]]:
+        if role == MATCH:
+            state.append(when)
+            return None
+        while state and when - state[0] > self.window:
+            state.popleft()
+        if len(state) >= self.count:
+            # La deque guarda los últimos ``count`` fallos: se informan esos + el "then"
+            correlated = (len(state) + 1, state[0])
+            state.clear()
+            return correlated
+        # Un éxito sin suficientes fallos previos reinicia la secuencia
+        state.clear()
+        return None
+
+
+RULE_TYPES = {"threshold": ThresholdRule, "sequence": SequenceRule}
+
+
+def build_rule(spec: Dict[str, Any], default_window: float) -> CorrelationRule:
+    """
+    Crea una regla desde un dict de configuración.
+
+    Claves: name, type (threshold/sequence), count, window (default: la
+    ventana de correlación), group_by, match, levels y, en sequence, then.
+    """
+    spec = dict(spec)
+    rule_type = spec.pop("type", "threshold")
+    rule_class = RULE_TYPES.get(rule_type)
+    if rule_class is None:
+        raise ValueError(f"Unknown correlation rule type: {rule_type}")
+    spec.setdefault("window", default_window)
+    return rule_class(**spec)
+
+
+def default_rules(window: float) -> List[CorrelationRule]:
+    """Reglas por defecto: fuerza bruta por IP y fallos seguidos de éxito."""
+    return [
+        ThresholdRule(
+            "brute_force", count=10, window=window, group_by=("ip",), match=DEFAULT_FAILURE_PATTERN
+        ),
+        SequenceRule(
+            "brute_force_success",
+            count=5,
+            window=window,
+            group_by=("ip",),
+            match=DEFAULT_FAILURE_PATTERN,
+            then=DEFAULT_SUCCESS_PATTERN,
+        ),
+    ]
+
+
+class _Group:
+    __slots__ = ("times", "last_seen")
+
+    def __init__(self, maxlen: int, when: float):
+        # Las reglas solo necesitan los últimos ``count`` instantes
+        self.times: Deque[float] = deque(maxlen=maxlen)
+        self.last_seen = when
+
+
+class CorrelationEngine:
+    """
+    Motor de correlación en streaming.
+
+    Args:
+        rules: Reglas a evaluar
+        max_groups: Máximo de grupos vivos entre todas las reglas; al
+            superarlo se descarta el que vence antes
+    """
+
+    def __init__(self, rules: Iterable[CorrelationRule], max_groups: int = 100000):
+        self.rules = list(rules)
+        self.max_groups = max(1, int(max_groups))
+        self.groups: Dict[Tuple[int, GroupKey], _Group] = {}
+        self._expiry: List[Tuple[float, int, GroupKey]] = []
+        self.watermark: Optional[float] = None
+        # Las líneas consecutivas suelen compartir timestamp
+        self._last_timestamp = ""
+        self._last_time: Optional[float] = None
+
+        self.events_seen = 0
+        self.incidents_emitted = 0
+        self.groups_expired = 0
+        self.groups_evicted = 0
+
+    def process(self, entry: LogEntry) -> List[CorrelatedIncident]:
+        """
+        Procesa un evento.
+
+        Returns:
+            Incidentes disparados por este evento (normalmente ninguno)
+        """
+        self.events_seen += 1
+        roles = [rule.classify(entry) for rule in self.rules]
+        if not any(roles):
+            return []
+
+        if entry.timestamp != self._last_timestamp:
+            self._last_timestamp = entry.timestamp
+            self._last_time = parse_timestamp(entry.timestamp)
+        when = self._last_time
+        if when is None:
+            when = self.watermark
+            if when is None:
+                return []
+        elif self.watermark is None or when > self.watermark:
+            self.watermark = when
+            self._expire(when)
+
+        incidents: List[CorrelatedIncident] = []
+        fields: Dict[str, Optional[str]] = {}
+        for index, role in enumerate(roles):
+            if role == IGNORED:
+                continue
+            rule = self.rules[index]
+            key = rule.key(entry, fields)
+            if key is None:
+                continue
+            group = self.groups.get((index, key))
+            if group is None:
+                if role != MATCH:
+                    # Un evento "then" sin eventos previos no inicia una secuencia
+                    continue
+                group = self._new_group(index, rule, key, when)
+            elif when > group.last_seen:
+                group.last_seen = when
+            fired = rule.observe(group.times, role, when)
+            if fired is not None:
+                incidents.append(self._incident(rule, key, fired, when, entry.message))
+        self.incidents_emitted += len(incidents)
+        return incidents
+
+    def _new_group(self, index: int, rule: CorrelationRule, key: GroupKey, when: float) -> _Group:
+        if len(self.groups) >= self.max_groups:
+            self._evict()
+        group = self.groups[(index, key)] = _Group(rule.count, when)
+        heapq.heappush(self._expiry, (when + rule.window, index, key))
+        return group
+
+    def _expire(self, now: float) -> None:
+        expiry = self._expiry
+        while expiry and expiry[0][0] < now:
+            _, index, key = heapq.heappop(expiry)
+            group = self.groups.get((index, key))
+            if group is None:
+                continue
+            deadline = group.last_seen + self.rules[index].window
+            if deadline >= now:
+                # Actividad reciente: se reprograma (borrado perezoso)
+                heapq.heappush(expiry, (deadline, index, key))
+            else:
+                del self.groups[(index, key)]
+                self.groups_expired += 1
+
+    def _evict(self) -> None:
+        while self._expiry:
+            _, index, key = heapq.heappop(self._expiry)
+            if self.groups.pop((index, key), None) is not None:
+                self.groups_evicted += 1
+                return
+
+    def _incident(
+        self,
+        rule: CorrelationRule,
+        key: GroupKey,
+        fired: Tuple[int, float],
+        when: float,
+        message: str,
+    ) -> CorrelatedIncident:
+        event_count, first_seen = fired
+        return CorrelatedIncident(
+            rule=rule.name,
+            rule_type=rule.rule_type,
+            key=dict(zip(rule.group_by, key)),
+            event_count=event_count,
+            first_seen=epoch_to_iso(first_seen),
+            last_seen=epoch_to_iso(when),
+            window=int(rule.window),
+            message=message[:200],
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Eventos, incidentes y grupos vivos/expirados/desalojados."""
+        return {
+            "rules": [rule.name for rule in self.rules],
+            "events_seen": self.events_seen,
+            "incidents": self.incidents_emitted,
+            "active_groups": len(self.groups),
+            "expired_groups": self.groups_expired,
+            "evicted_groups": self.groups_evicted,
+        }
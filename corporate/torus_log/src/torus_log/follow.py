@@ -0,0 +1,371 @@
+"""
+Follow/tail mode for TorusLog.
+
+Sigue uno o varios archivos de log como ``tail -F``: lee solo los bytes
+nuevos desde el último offset, detecta rotación (cambio de inode: se termina
+de leer el archivo anterior y se abre el nuevo desde el principio) y
+truncado (el tamaño baja del offset: se vuelve a leer desde el inicio). Las
+líneas incompletas se guardan hasta que llega su salto de línea.
+
+Las entradas nuevas se agregan de forma incremental (contadores por nivel,
+patrones, correlación) sin releer el histórico. El seguimiento emite eventos:
+
+    - alert: coincidencia de patrón o incidente de correlación, al momento
+      (con un tope de alertas de patrón por lectura; el exceso se resume)
+    - snapshot: análisis acumulado y contadores del último intervalo, cada
+      ``snapshot_interval`` segundos y al terminar
+
+La espera entre lecturas usa inotify (Linux, vía ctypes, sobre los
+directorios de los archivos para ver también creaciones y renombrados) y,
+donde no está disponible, sondeo con ``os.stat`` cada ``poll_interval``.
+"""
+
+import ctypes
+import ctypes.util
+import itertools
+import os
+import select
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import CorrelatedIncident, LogEntry
+from .parsers import AUTO_FORMAT, detect_format
+from .stream import LogAggregator
+
+READ_CHUNK = 1 << 20
+
+# Máscara inotify: escrituras y cambios de nombres en el directorio vigilado
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+class FileTail:
+    """
+    Lector incremental de un archivo que puede rotar o truncarse.
+
+    Args:
+        path: Ruta del log
+        from_start: Leer el contenido existente (default: solo lo nuevo)
+    """
+
+    def __init__(self, path: str, from_start: bool = False):
+        self.path = path
+        self.rotations = 0
+        self.truncations = 0
+        self.log_format: Optional[str] = None
+        self._handle: Optional[Any] = None
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._pending = b""
+        self._open(seek_end=not from_start)
+
+    def _open(self, seek_end: bool) -> None:
+        try:
+            handle = open(self.path, "rb")
+        except OSError:
+            self._handle = None
+            return
+        stat = os.fstat(handle.fileno())
+        self._file_id = (stat.st_dev, stat.st_ino)
+        if seek_end:
+            handle.seek(0, os.SEEK_END)
+        self._handle = handle
+
+    @property
+    def offset(self) -> int:
+        return self._handle.tell() if self._handle is not None else 0
+
+    def read_lines(self) -> Iterator[str]:
+        """
+        Líneas completas escritas desde la última lectura.
+
+        Un archivo que aún no existe se abre (desde el principio) en cuanto
+        aparece.
+        """
+        if self._handle is None:
+            self._open(seek_end=False)
+            if self._handle is None:
+                return
+        yield from self._drain()
+
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            # Rotado y aún sin reemplazo: se sigue leyendo el anterior
+            return
+        if (stat.st_dev, stat.st_ino) != self._file_id:
+            # Lo que quedara del archivo rotado ya se leyó arriba
+            if self._pending:
+                yield self._decode(self._pending)
+                self._pending = b""
+            self._handle.close()
+            self.rotations += 1
+            self._open(seek_end=False)
+            if self._handle is not None:
+                yield from self._drain()
+        elif stat.st_size < self._handle.tell():
+            self.truncations += 1
+            self._handle.seek(0)
+            self._pending = b""
+            yield from self._drain()
+
+    def _drain(self) -> Iterator[str]:
+        while True:
+            data = self._handle.read(READ_CHUNK)
+            if not data:
+                return
+            parts = (self._pending + data).split(b"\n")
+            self._pending = parts.pop()
+            for part in parts:
+                yield self._decode(part)
+
+    @staticmethod
+    def _decode(raw: bytes) -> str:
+        return raw.rstrip(b"\r").decode("utf-8", errors="replace")
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class PollWatcher:
+    """Espera por sondeo: duerme ``interval`` segundos entre lecturas."""
+
+    kind = "poll"
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+    def wait(self, timeout: float) -> None:
+        time.sleep(max(0.0, min(timeout, self.interval)))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """
+    Espera hasta que cambie algo en los directorios de los archivos (inotify).
+
+    El sondeo de ``interval`` se mantiene como tope de espera (sistemas de
+    archivos de red que no emiten eventos).
+    """
+
+    kind = "inotify"
+
+    def __init__(self, paths: Iterable[str], interval: float):
+        self.interval = interval
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        directories = {os.path.dirname(os.path.abspath(path)) for path in paths}
+        for directory in directories:
+            if libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK) < 0:
+                errno = ctypes.get_errno()
+                os.close(self._fd)
+                raise OSError(errno, f"inotify_add_watch failed: {directory}")
+
+    def wait(self, timeout: float) -> None:
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, min(timeout, self.interval)))
+        if ready:
+            # Basta con saber que hubo cambios: se vacía la cola de eventos
+            try:
+                while os.read(self._fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(paths: Iterable[str], interval: float, use_inotify: bool = True) -> Any:
+    """InotifyWatcher si el sistema lo soporta; PollWatcher en otro caso."""
+    if use_inotify and hasattr(os, "O_CLOEXEC"):
+        try:
+            return InotifyWatcher(paths, interval)
+        except (OSError, AttributeError):
+            pass
+    return PollWatcher(interval)
+
+
+class LogFollower:
+    """
+    Seguimiento continuo de archivos de log con análisis incremental.
+
+    Args:
+        trace: Instancia de TorusLog (formato, patrones y correlación)
+        paths: Archivos a seguir
+        from_start: Procesar también el contenido existente
+        snapshot_interval: Segundos entre snapshots
+        poll_interval: Tope de espera entre lecturas (intervalo de sondeo)
+        use_inotify: Usar inotify si está disponible
+        max_pattern_alerts: Alertas de patrón emitidas por lectura; las demás
+            se resumen por familia
+    """
+
+    def __init__(
+        self,
+        trace: Any,
+        paths: Iterable[str],
+        from_start: bool = False,
+        snapshot_interval: float = 60.0,
+        poll_interval: float = 1.0,
+        use_inotify: bool = True,
+        max_pattern_alerts: int = 100,
+    ):
+        self.trace = trace
+        self.paths = list(paths)
+        self.snapshot_interval = float(snapshot_interval)
+        self.poll_interval = float(poll_interval)
+        self.tails = [FileTail(path, from_start) for path in self.paths]
+        self.aggregator: LogAggregator = trace._new_aggregator(trace.max_samples)
+        self.aggregator.on_incident = self._on_incident
+        self.aggregator.on_pattern = self._on_pattern
+        self.watcher = create_watcher(self.paths, self.poll_interval, use_inotify)
+        self.max_pattern_alerts = max(0, int(max_pattern_alerts))
+        self.snapshots = 0
+        self._alerts: List[Dict[str, Any]] = []
+        self._pattern_alerts = 0
+        self._suppressed: Dict[str, int] = {}
+        self._last_levels: Dict[str, int] = {}
+        self._last_lines = 0
+        self._last_patterns = 0
+        self._last_incidents = 0
+
+    def _on_incident(self, incident: CorrelatedIncident) -> None:
+        alert = {"type": "alert", "kind": "incident", "incident": incident.model_dump()}
+        self._alerts.append(alert)
+
+    def _on_pattern(self, entry: LogEntry, family: str) -> None:
+        if self._pattern_alerts >= self.max_pattern_alerts:
+            # Por encima del tope solo se cuenta por familia (sin model_dump)
+            self._suppressed[family] = self._suppressed.get(family, 0) + 1
+            return
+        self._pattern_alerts += 1
+        alert = {"type": "alert", "kind": "pattern", "family": family, "entry": entry.model_dump()}
+        self._alerts.append(alert)
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """
+        Procesa las líneas nuevas de todos los archivos.
+
+        Returns:
+            Alertas generadas por esas líneas
+        """
+        return list(self.iter_poll())
+
+    def iter_poll(self) -> Iterator[Dict[str, Any]]:
+        """
+        Procesa las líneas nuevas de todos los archivos, en streaming.
+
+        Las líneas se parsean y agregan a medida que se leen (memoria
+        constante aunque haya mucho pendiente, p.ej. con ``from_start``) y
+        cada alerta se emite en cuanto se genera. Como mucho se emiten
+        ``max_pattern_alerts`` alertas de patrón por llamada; el resto se
+        resume al final en una alerta ``pattern_summary`` con el número de
+        coincidencias omitidas por familia.
+
+        Yields:
+            Alertas generadas por las líneas nuevas
+        """
+        self._pattern_alerts = 0
+        self._suppressed = {}
+        add = self.aggregator.add
+        for tail in self.tails:
+            lines = self.aggregator.count_lines(tail.read_lines())
+            if tail.log_format is None:
+                head = list(itertools.islice(lines, 20))
+                if not head:
+                    continue
+                log_format = self.trace.log_format
+                if log_format == AUTO_FORMAT:
+                    log_format = detect_format(head)
+                tail.log_format = log_format
+                lines = itertools.chain(head, lines)
+            parser = self.trace._parser(tail.log_format)
+            for entry in parser.parse_lines(lines, tail.path):
+                add(entry)
+                if self._alerts:
+                    alerts, self._alerts = self._alerts, []
+                    yield from alerts
+        if self._suppressed:
+            yield {"type": "alert", "kind": "pattern_summary", "suppressed": self._suppressed}
+            self._suppressed = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Análisis acumulado y contadores desde el snapshot anterior."""
+        aggregator = self.aggregator
+        levels = dict(aggregator.entries_by_level)
+        interval = {
+            "lines_read": aggregator.lines_read - self._last_lines,
+            "entries_by_level": {
+                level: count - self._last_levels.get(level, 0)
+                for level, count in levels.items()
+                if count != self._last_levels.get(level, 0)
+            },
+            "pattern_count": aggregator.pattern_count - self._last_patterns,
+            "incident_count": aggregator.incident_count - self._last_incidents,
+        }
+        self._last_levels = levels
+        self._last_lines = aggregator.lines_read
+        self._last_patterns = aggregator.pattern_count
+        self._last_incidents = aggregator.incident_count
+        self.snapshots += 1
+
+        summary = self.trace._stream_summary(aggregator)
+        summary["watcher"] = self.watcher.kind
+        summary["files"] = {
+            tail.path: {
+                "offset": tail.offset,
+                "log_format": tail.log_format,
+                "rotations": tail.rotations,
+                "truncations": tail.truncations,
+            }
+            for tail in self.tails
+        }
+        return {
+            "type": "snapshot",
+            "interval": interval,
+            "analysis": aggregator.finish(summary).model_dump(),
+        }
+
+    def follow(self, duration: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Sigue los archivos y emite alertas y snapshots.
+
+        Args:
+            duration: Segundos de seguimiento (None = hasta que se cierre el
+                generador); al terminar se emite un snapshot final
+        """
+        start = time.monotonic()
+        deadline = start + duration if duration is not None else None
+        next_snapshot = start + self.snapshot_interval
+        try:
+            yield from self.iter_poll()
+            while True:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                wake = next_snapshot if deadline is None else min(next_snapshot, deadline)
+                self.watcher.wait(wake - now)
+                yield from self.iter_poll()
+                if time.monotonic() >= next_snapshot:
+                    yield self.snapshot()
+                    next_snapshot = time.monotonic() + self.snapshot_interval
+            yield self.snapshot()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.watcher.close()
+        for tail in self.tails:
+            tail.close()
@@ -20,7 +20,24 @@ class ModuleConfig(BaseModel):
         description="Log levels to process",
     )
     pattern_detection: bool = Field(default=True, description="Enable pattern detection")
+    pattern_families: Optional[Dict[str, List[str]]] = Field(
+        default=None, description="Extra security keyword families (name -> keywords)"
+    )
     correlation_window: int = Field(default=300, ge=1, description="Correlation window in seconds")
+    max_samples: int = Field(
+        default=100, ge=0, description="Error/warning samples kept when streaming"
+    )
+    log_format: str = Field(default="auto", description="Log format name or 'auto' to detect it")
+    correlation: bool = Field(default=True, description="Correlate events in time windows")
+    correlation_rules: Optional[List[Dict[str, Any]]] = Field(
+        default=None, description="Correlation rules (threshold/sequence); None uses the defaults"
+    )
+    max_correlation_groups: int = Field(
+        default=100000, ge=1, description="Max live correlation groups"
+    )
+    parse_workers: int = Field(
+        default=1, ge=1, description="Processes parsing files in analyze_files"
+    )
     debug: bool = Field(default=False, description="Enable debug mode")
 
 
@@ -34,6 +51,21 @@ class LogEntry(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
 
 
+class CorrelatedIncident(BaseModel):
+    """Incident emitted by a correlation rule"""
+
+    rule: str = Field(description="Name of the rule that fired")
+    rule_type: str = Field(description="Rule type (threshold/sequence)")
+    key: Dict[str, Optional[str]] = Field(
+        default_factory=dict, description="Group key (source, ip, user, ...)"
+    )
+    event_count: int = Field(description="Correlated events")
+    first_seen: str = Field(description="Timestamp of the first correlated event")
+    last_seen: str = Field(description="Timestamp of the event that fired the rule")
+    window: int = Field(description="Correlation window in seconds")
+    message: str = Field(default="", description="Message of the event that fired the rule")
+
+
 class LogAnalysis(BaseModel):
     """Result of log analysis"""
 
@@ -42,6 +74,9 @@ class LogAnalysis(BaseModel):
     patterns_detected: List[str] = Field(default_factory=list, description="Patterns detected")
     errors_found: List[LogEntry] = Field(default_factory=list, description="Error entries")
     warnings_found: List[LogEntry] = Field(default_factory=list, description="Warning entries")
+    incidents: List[CorrelatedIncident] = Field(
+        default_factory=list, description="Correlated incidents"
+    )
     analysis_summary: Dict[str, Any] = Field(default_factory=dict, description="Summary statistics")
 
 
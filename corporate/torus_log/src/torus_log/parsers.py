@@ -0,0 +1,605 @@
+"""
+Log format parsers for TorusLog.
+
+Registro de parsers con detección automática de formato. Cada parser usa
+patrones precompilados (o cortes de cadena) y normaliza:
+    - level: ERROR, WARN, INFO o DEBUG (el formato simple conserva el nivel
+      tal como aparece, comportamiento histórico)
+    - timestamp: ISO 8601 cuando el formato lo trae; "" si la línea no tiene
+      timestamp (no se inventa uno con la hora actual)
+    - metadata: campos propios del formato (host, app, status HTTP, ...)
+
+Formatos incorporados (en orden de detección):
+    json, journald (export), cef, leef, rfc5424, rfc3164, access (nginx/apache
+    common/combined) y simple (``YYYY-MM-DD HH:MM:SS LEVEL mensaje``).
+
+Para añadir un formato: subclase de ``LogParser`` con ``name``, ``detect``
+y ``parse``, y ``register_parser(Clase)``.
+"""
+
+import calendar
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type
+
+from .models import LogEntry
+
+DEFAULT_FORMAT = "simple"
+AUTO_FORMAT = "auto"
+
+# Margen para relojes desajustados antes de atribuir una fecha al año anterior
+_FUTURE_TOLERANCE = timedelta(days=1)
+
+_MONTHS = {
+    name: index
+    for index, name in enumerate(
+        ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1
+    )
+}
+
+_LEVEL_ALIASES = {
+    "EMERG": "ERROR",
+    "EMERGENCY": "ERROR",
+    "ALERT": "ERROR",
+    "CRIT": "ERROR",
+    "CRITICAL": "ERROR",
+    "FATAL": "ERROR",
+    "ERR": "ERROR",
+    "ERROR": "ERROR",
+    "SEVERE": "ERROR",
+    "WARN": "WARN",
+    "WARNING": "WARN",
+    "NOTICE": "INFO",
+    "INFO": "INFO",
+    "INFORMATIONAL": "INFO",
+    "DEBUG": "DEBUG",
+    "TRACE": "DEBUG",
+}
+
+# Severidad syslog (0-7) -> nivel
+_SYSLOG_LEVELS = ("ERROR", "ERROR", "ERROR", "ERROR", "WARN", "INFO", "INFO", "DEBUG")
+
+_LEVEL_PATTERN = re.compile(r"\b(ERROR|WARN|INFO|DEBUG|WARNING)\b", re.IGNORECASE)
+
+
+def normalize_level(level: Any, default: str = "INFO") -> str:
+    """Nivel canónico (ERROR/WARN/INFO/DEBUG) de un nivel textual o syslog numérico."""
+    if level is None:
+        return default
+    if isinstance(level, int) or (isinstance(level, str) and level.isdigit()):
+        severity = int(level)
+        return _SYSLOG_LEVELS[severity] if 0 <= severity < 8 else default
+    return _LEVEL_ALIASES.get(str(level).strip().upper(), default)
+
+
+def epoch_to_iso(value: float) -> str:
+    """Segundos desde epoch -> ISO 8601 UTC."""
+    return datetime.fromtimestamp(value, timezone.utc).isoformat()
+
+
+def parse_timestamp(timestamp: str) -> Optional[float]:
+    """
+    Timestamp ISO 8601 (como lo normalizan los parsers) -> segundos epoch.
+
+    Los timestamps sin zona horaria se interpretan como UTC y el sufijo ``Z``
+    equivale a ``+00:00`` (``fromisoformat`` no lo acepta antes de Python
+    3.11). Devuelve None si está vacío o no es ISO 8601.
+    """
+    if not timestamp:
+        return None
+    if timestamp[-1] in "Zz":
+        timestamp = timestamp[:-1] + "+00:00"
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _sniff_level(message: str, default: str = "INFO") -> str:
+    match = _LEVEL_PATTERN.search(message)
+    return normalize_level(match.group(1), default) if match else default
+
+
+def _entry(
+    timestamp: str, level: str, message: str, source: Optional[str], metadata: Dict[str, Any]
+) -> LogEntry:
+    return LogEntry(
+        timestamp=timestamp, level=level, message=message, source=source, metadata=metadata
+    )
+
+
+class LogParser:
+    """Parser de un formato de log línea a línea."""
+
+    name = "base"
+
+    def __init__(self) -> None:
+        # Parser alternativo para líneas que este formato no reconoce
+        self.fallback: Optional["LogParser"] = None
+
+    def detect(self, line: str) -> bool:
+        """True si la línea parece de este formato (comprobación barata)."""
+        raise NotImplementedError
+
+    def parse(self, line: str, source: Optional[str] = None) -> Optional[LogEntry]:
+        """LogEntry de la línea o None si no es de este formato."""
+        raise NotImplementedError
+
+    def parse_lines(
+        self, lines: Iterable[str], source: Optional[str] = None
+    ) -> Iterator[Optional[LogEntry]]:
+        """Una entrada (o None) por línea; usa ``fallback`` si la línea no encaja."""
+        parse = self.parse
+        fallback = self.fallback.parse if self.fallback is not None else None
+        for line in lines:
+            entry = parse(line, source)
+            if entry is None and fallback is not None:
+                entry = fallback(line, source)
+            yield entry
+
+
+class SimpleParser(LogParser):
+    """``YYYY-MM-DD HH:MM:SS LEVEL mensaje``, o cualquier línea con un nivel."""
+
+    name = "simple"
+    pattern = re.compile(r"(\d{4}-\d{2}-\d{2}[\sT]\d{2}:\d{2}:\d{2})[\s-]+(\w+)[\s:]+(.+)")
+
+    def detect(self, line: str) -> bool:
+        return self.pattern.match(line.strip()) is not None
+
+    def parse(self, line: str, source: Optional[str] = None) -> Optional[LogEntry]:
+        match = self.pattern.match(line.strip())
+        if match is None:
+            # Sin timestamp: basta con un nivel reconocible
+            level_match = _LEVEL_PATTERN.search(line)
+            if level_match is None:
+                return None
+            return _entry("", level_match.group(1).upper(), line, source, {})
+        timestamp, level, message = match.groups()
+        return _entry(timestamp, level.upper(), message, source, {})
+
+
+class JSONLinesParser(LogParser):
+    """Un objeto JSON por línea (logs estructurados, ``journalctl -o json``)."""
+
+    name = "json"
+    timestamp_keys = ("timestamp", "@timestamp", "time", "ts", "datetime", "__REALTIME_TIMESTAMP")
+    level_keys = ("level", "severity", "levelname", "log.level", "PRIORITY")
+    message_keys = ("message", "msg", "MESSAGE", "log", "text")
+
+    def detect(self, line: str) -> bool:
+        return line.lstrip().startswith("{")
+
+    def parse(self, line: str, source: Optional[str] = None) -> Optional[LogEntry]:
+        text = line.strip()
+        if not text.startswith("{"):
+            return None
+        try:
+            record = json.loads(text)
+        except ValueError:
+            return None
+        if not isinstance(record, dict):
+            return None
+
+        timestamp = ""
+        for key in self.timestamp_keys:
+            value = record.get(key)
+            if value is not None:
+                timestamp = self._timestamp(key, value)
+                break
+        level = "INFO"
+        for key in self.level_keys:
+            value = record.get(key)
+            if value is not None:
+                level = normalize_level(value)
+                break
+        message = text
+        for key in self.message_keys:
+            value = record.get(key)
+            if value is not None:
+                message = value if isinstance(value, str) else json.dumps(value)
+                break
+        return _entry(timestamp, level, message, source, record)
+
+    @staticmethod
+    def _timestamp(key: str, value: Any) -> str:
+        if key == "__REALTIME_TIMESTAMP" and str(value).isdigit():
+            return epoch_to_iso(int(value) / 1e6)
+        if isinstance(value, (int, float)):
+            # Epoch en segundos o milisegundos
+            return epoch_to_iso(value / 1000 if value > 1e11 else value)
+        return str(value)
+
+
+class JournaldExportParser(LogParser):
+    """
+    Formato export de journald (``journalctl -o export``).
+
+    Cada registro son líneas ``CAMPO=valor`` terminadas por una línea vacía;
+    la entrada se emite al cerrar el registro. Los campos binarios (nombre
+    sin ``=`` seguido de longitud y datos) se omiten.
+    """
+
+    name = "journald"
+    field_pattern = re.compile(r"[A-Z_][A-Z0-9_]*=")
+    metadata_fields = ("_HOSTNAME", "SYSLOG_IDENTIFIER", "_SYSTEMD_UNIT", "_PID", "_UID", "_COMM")
+
+    def detect(self, line: str) -> bool:
+        return self.field_pattern.match(line) is not None
+
+    def parse(self, line: str, source: Optional[str] = None) -> Optional[LogEntry]:
+        # Una línea aislada no es un registro completo
+        return None
+
+    def parse_lines(
+        self, lines: Iterable[str], source: Optional[str] = None
+    ) -> Iterator[Optional[LogEntry]]:
+        fields: Dict[str, str] = {}
+        skip_binary = False
+        for line in lines:
+            if skip_binary:
+                skip_binary = False
+                continue
+            if not line:
+                if fields:
+                    yield self._record(fields, source)
+                    fields = {}
+                continue
+            key, sep, value = line.partition("=")
+            if sep:
+                fields[key] = value
+            else:
+                skip_binary = True
+        if fields:
+            yield self._record(fields, source)
+
+    def _record(self, fields: Dict[str, str], source: Optional[str]) -> LogEntry:
+        realtime = fields.get("__REALTIME_TIMESTAMP", "")
+        timestamp = epoch_to_iso(int(realtime) / 1e6) if realtime.isdigit() else ""
+        metadata = {
+            key.lstrip("_").lower(): fields[key] for key in self.metadata_fields if key in fields
+        }
+        return _entry(
+            timestamp,
+            normalize_level(fields.get("PRIORITY")),
+            fields.get("MESSAGE", ""),
+            source,
+            metadata,
+        )
+
+
+_PIPE_SPLIT = re.compile(r"(?<!\\)\|")
+
+
+def _split_unescaped_pipes(text: str, maxsplit: int) -> List[str]:
+    # Cabecera CEF/LEEF: "|" escapado como "\|"; la extensión queda intacta
+    parts = _PIPE_SPLIT.split(text, maxsplit)
+    return [part.replace("\\|", "|").replace("\\\\", "\\") for part in parts[:-1]] + parts[-1:]
+
+
+class CEFParser(LogParser):
+    """ArcSight Common Event Format, con o sin cabecera syslog."""
+
+    name = "cef"
+    # Inicio de cada clave de la extensión; el valor llega hasta la siguiente
+    key_pattern = re.compile(r"(?:^|(?<=\s))([\w.\-\[\]]+)=")
+    severity_names = {"LOW": "INFO", "MEDIUM": "WARN", "HIGH": "ERROR", "VERY-HIGH": "ERROR"}
+
+    def detect(self, line: str) -> bool:
+        return "CEF:" in line
+
+    def parse(self, line: str, source: Optional[str] = None) -> Optional[LogEntry]:
+        start = line.find("CEF:")
+        if start < 0:
+            return None
+        parts = _split_unescaped_pipes(line[start + 4 :], 7)
+        if len(parts) < 8:
+            return None
+        version, vendor, product, device_version, signature_id, name, severity, extension = parts
+        fields = self._extension(extension)
+        metadata: Dict[str, Any] = {
+            "cef_version": version,
+            "vendor": vendor,
+            "product": product,
+            "device_version": device_version,
+            "signature_id": signature_id,
+            "severity": severity,
+            **fields,
+        }
+        return _entry(
+            self._timestamp(fields.get("rt", "")), self._level(severity), name, source, metadata
+        )
+
+    def _extension(self, extension: str) -> Dict[str, str]:
+        fields: Dict[str, str] = {}
+        keys = list(self.key_pattern.finditer(extension))
+        for index, match in enumerate(keys):
+            end = keys[index + 1].start() if index + 1 < len(keys) else len(extension)
+            value = extension[match.end() : end].rstrip()
+            if "\\" in value:
+                value = value.replace("\\=", "=").replace("\\n", "\n").replace("\\\\", "\\")
+            fields[match.group(1)] = value
+        return fields
+
+    def _level(self, severity: str) -> str:
+        severity = severity.strip()
+        if severity.isdigit():
+            value = int(severity)
+            return "ERROR" if value >= 7 else "WARN" if value >= 4 else "INFO"
+        return self.severity_names.get(severity.upper(), "INFO")
+
+    @staticmethod
+    def _timestamp(value: str) -> str:
+        if value.isdigit():
+            return epoch_to_iso(int(value) / 1000)
+        return value
+
+
+class LEEFParser(LogParser):
+    """IBM QRadar Log Event Extended Format 1.0 y 2.0."""
+
+    name = "leef"
+
+    def detect(self, line: str) -> bool:
+        return "LEEF:" in line
+
+    def parse(self, line: str, source: Optional[str] = None) -> Optional[LogEntry]:
+        start = line.find("LEEF:")
+        if start < 0:
+            return None
+        text = line[start + 5 :]
+        delimiter = "\t"
+        if text.startswith("2."):
+            parts = _split_unescaped_pipes(text, 6)
+            if len(parts) < 7:
+                return None
+            delimiter = self._delimiter(parts[5]) or delimiter
+            del parts[5]
+        else:
+            parts = _split_unescaped_pipes(text, 5)
+            if len(parts) < 6:
+                return None
+        version, vendor, product, product_version, event_id, extension = parts
+
+        fields: Dict[str, str] = {}
+        for pair in extension.split(delimiter):
+            key, sep, value = pair.partition("=")
+            if sep:
+                fields[key.strip()] = value
+        metadata: Dict[str, Any] = {
+            "leef_version": version,
+            "vendor": vendor,
+            "product": product,
+            "product_version": product_version,
+            "event_id": event_id,
+            **fields,
+        }
+        severity = fields.get("sev", "")
+        level = "INFO"
+        if severity.isdigit():
+            level = "ERROR" if int(severity) >= 7 else "WARN" if int(severity) >= 4 else "INFO"
+        message = fields.get("msg") or event_id
+        return _entry(fields.get("devTime", ""), level, message, source, metadata)
+
+    @staticmethod
+    def _delimiter(spec: str) -> str:
+        spec = spec.strip()
+        if spec.lower().startswith(("0x", "x")) and len(spec) > 1:
+            try:
+                return chr(int(spec.lower().lstrip("0").lstrip("x"), 16))
+            except ValueError:
+                return ""
+        return spec[:1]
+
+
+class RFC5424Parser(LogParser):
+    """Syslog RFC 5424: ``<PRI>1 TIMESTAMP HOST APP PROCID MSGID SD MSG``."""
+
+    name = "rfc5424"
+    pattern = re.compile(
+        r"<(\d{1,3})>(\d{1,2}) (\S+) (\S+) (\S+) (\S+) (\S+) "
+        r"(-|(?:\[(?:[^\]\\]|\\.)*\])+)(?: (.*))?$"
+    )
+    prefix = re.compile(r"<\d{1,3}>\d{1,2} ")
+
+    def detect(self, line: str) -> bool:
+        return self.prefix.match(line) is not None
+
+    def parse(self, line: str, source: Optional[str] = None) -> Optional[LogEntry]:
+        match = self.pattern.match(line)
+        if match is None:
+            return None
+        pri, _version, timestamp, host, app, procid, msgid, structured, message = match.groups()
+        metadata = {
+            "facility": int(pri) >> 3,
+            "host": host,
+            "app": app,
+            "procid": procid,
+            "msgid": msgid,
+            "structured_data": structured,
+        }
+        return _entry(
+            "" if timestamp == "-" else timestamp,
+            _SYSLOG_LEVELS[int(pri) & 7],
+            (message or "").lstrip("\ufeff"),
+            source,
+            metadata,
+        )
+
+
+class RFC3164Parser(LogParser):
+    """
+    Syslog BSD (RFC 3164): ``[<PRI>]Mmm dd hh:mm:ss HOST TAG[PID]: MSG``.
+
+    El formato no incluye el año: se usa ``year`` o, si no se indica, se
+    infiere por línea (el año actual, o el anterior si la fecha quedaría más
+    de un día en el futuro, p.ej. líneas de diciembre leídas en enero).
+    Sin PRI, el nivel se deduce del mensaje.
+    """
+
+    name = "rfc3164"
+    pattern = re.compile(
+        r"(?:<(\d{1,3})>)?([A-Z][a-z]{2}) {1,2}(\d{1,2}) (\d{2}:\d{2}:\d{2}) "
+        r"(\S+) ([^:\[\s]+)(?:\[(\d+)\])?: ?(.*)$"
+    )
+
+    def __init__(self, year: Optional[int] = None) -> None:
+        super().__init__()
+        self.year = year
+
+    def _year(self, month: int, day: int, clock: str) -> int:
+        if self.year:
+            return self.year
+        now = datetime.now()
+        hour, minute, second = map(int, clock.split(":"))
+        try:
+            when = datetime(now.year, month, day, hour, minute, second)
+        except ValueError:
+            # 29 de febrero fuera de un año bisiesto: el bisiesto anterior
+            return max(year for year in range(now.year - 4, now.year) if calendar.isleap(year))
+        return now.year - 1 if when - now > _FUTURE_TOLERANCE else now.year
+
+    def detect(self, line: str) -> bool:
+        return self.pattern.match(line) is not None
+
+    def parse(self, line: str, source: Optional[str] = None) -> Optional[LogEntry]:
+        match = self.pattern.match(line)
+        if match is None:
+            return None
+        pri, month, day, clock, host, tag, pid, message = match.groups()
+        month_number = _MONTHS.get(month)
+        if month_number is None:
+            return None
+        level = _SYSLOG_LEVELS[int(pri) & 7] if pri else _sniff_level(message)
+        metadata: Dict[str, Any] = {"host": host, "app": tag, "procid": pid}
+        if pri:
+            metadata["facility"] = int(pri) >> 3
+        year = self._year(month_number, int(day), clock)
+        timestamp = f"{year}-{month_number:02d}-{int(day):02d}T{clock}"
+        return _entry(timestamp, level, message, source, metadata)
+
+
+class AccessLogParser(LogParser):
+    """Access log de nginx/apache (formatos common y combined)."""
+
+    name = "access"
+    pattern = re.compile(
+        r"(\S+) \S+ (\S+) \[(\d{2})/([A-Z][a-z]{2})/(\d{4}):(\d{2}:\d{2}:\d{2}) "
+        r"([+-])(\d{2})(\d{2})\] "
+        r'"((?:[^"\\]|\\.)*)" (\d{3}) (\S+)(?: "((?:[^"\\]|\\.)*)" "((?:[^"\\]|\\.)*)")?'
+    )
+
+    def detect(self, line: str) -> bool:
+        return self.pattern.match(line) is not None
+
+    def parse(self, line: str, source: Optional[str] = None) -> Optional[LogEntry]:
+        match = self.pattern.match(line)
+        if match is None:
+            return None
+        (
+            client,
+            user,
+            day,
+            month,
+            year,
+            clock,
+            sign,
+            tz_hours,
+            tz_minutes,
+            request,
+            status,
+            size,
+            referer,
+            user_agent,
+        ) = match.groups()
+        month_number = _MONTHS.get(month)
+        if month_number is None:
+            return None
+        code = int(status)
+        method, _, rest = request.partition(" ")
+        path = rest.rsplit(" ", 1)[0] if " " in rest else rest
+        metadata: Dict[str, Any] = {
+            "client_ip": client,
+            "user": None if user == "-" else user,
+            "method": method,
+            "path": path,
+            "status": code,
+            "bytes": int(size) if size.isdigit() else 0,
+            "referer": referer,
+            "user_agent": user_agent,
+        }
+        level = "ERROR" if code >= 500 else "WARN" if code >= 400 else "INFO"
+        timestamp = f"{year}-{month_number:02d}-{day}T{clock}{sign}{tz_hours}:{tz_minutes}"
+        return _entry(timestamp, level, f"{request} {status}", source, metadata)
+
+
+_REGISTRY: Dict[str, Type[LogParser]] = {}
+
+# Instancias usadas solo para detect() (sin estado)
+_detectors: Dict[str, LogParser] = {}
+
+
+def register_parser(parser_class: Type[LogParser]) -> Type[LogParser]:
+    """
+    Registra (o reemplaza) un parser por su ``name``.
+
+    Los formatos se prueban en orden de registro durante la detección; el
+    formato simple queda siempre como último recurso.
+    """
+    _REGISTRY[parser_class.name] = parser_class
+    return parser_class
+
+
+for _parser_class in (
+    JSONLinesParser,
+    JournaldExportParser,
+    CEFParser,
+    LEEFParser,
+    RFC5424Parser,
+    RFC3164Parser,
+    AccessLogParser,
+    SimpleParser,
+):
+    register_parser(_parser_class)
+
+
+def available_formats() -> List[str]:
+    """Nombres de los formatos registrados."""
+    return list(_REGISTRY)
+
+
+def create_parser(name: str) -> LogParser:
+    """Instancia el parser de un formato registrado."""
+    try:
+        return _REGISTRY[name]()
+    except KeyError:
+        raise ValueError(f"Unknown log format: {name}") from None
+
+
+def detect_format(lines: Iterable[str], sample_size: int = 20) -> str:
+    """
+    Detecta el formato de una muestra de líneas.
+
+    Gana el formato que reconoce más líneas no vacías; en caso de empate, el
+    registrado antes (los más específicos van primero). Sin coincidencias se
+    asume el formato simple.
+    """
+    sample = []
+    for line in lines:
+        if line.strip():
+            sample.append(line)
+            if len(sample) >= sample_size:
+                break
+    best, best_hits = DEFAULT_FORMAT, 0
+    for name, parser_class in _REGISTRY.items():
+        detector = _detectors.get(name)
+        if type(detector) is not parser_class:
+            detector = _detectors[name] = parser_class()
+        hits = sum(1 for line in sample if detector.detect(line))
+        if hits > best_hits:
+            best, best_hits = name, hits
+    return best
@@ -0,0 +1,92 @@
+"""
+Security keyword matching for TorusLog.
+
+Las familias de palabras clave (fallos de autenticación, intrusión, ataques
+web, ...) se fusionan en una única regex que se evalúa una sola vez por
+mensaje (en minúsculas). Las palabras de todas las familias se compilan como
+un trie (``fail|forbid`` -> ``f(?:ail|orbid)``): en cada posición del texto
+el motor solo sigue la rama del carácter actual, así que el coste por línea
+apenas crece con el número de palabras. La familia se obtiene de la palabra
+que coincidió.
+"""
+
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+DEFAULT_PATTERN_FAMILIES: Dict[str, Tuple[str, ...]] = {
+    "auth_failure": ("failed", "denied", "unauthorized", "forbidden"),
+    "intrusion": ("attack", "intrusion", "breach", "compromise"),
+    "web_attack": ("sql injection", "xss", "csrf"),
+}
+
+
+class PatternMatcher:
+    """
+    Detector de palabras clave de seguridad en una sola pasada.
+
+    Las palabras son literales y no distinguen mayúsculas. Si un mensaje
+    contiene palabras de varias familias se informa la que aparece primero
+    en el texto.
+
+    Args:
+        families: Familias (nombre -> palabras clave); default:
+            ``DEFAULT_PATTERN_FAMILIES``
+    """
+
+    def __init__(self, families: Optional[Dict[str, Iterable[str]]] = None):
+        self.families: Dict[str, Tuple[str, ...]] = {}
+        self._pattern: Optional["re.Pattern[str]"] = None
+        self._keyword_family: Dict[str, str] = {}
+        for name, keywords in (DEFAULT_PATTERN_FAMILIES if families is None else families).items():
+            self._merge(name, keywords)
+        self._compile()
+
+    def _merge(self, name: str, keywords: Iterable[str]) -> None:
+        merged = list(self.families.get(name, ()))
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if keyword and keyword not in merged:
+                merged.append(keyword)
+        self.families[name] = tuple(merged)
+
+    def add_family(self, name: str, keywords: Iterable[str]) -> None:
+        """Añade una familia o amplía una existente con más palabras."""
+        self._merge(name, keywords)
+        self._compile()
+
+    def _compile(self) -> None:
+        self._keyword_family = {}
+        for name, keywords in self.families.items():
+            for keyword in keywords:
+                # Una palabra repetida en varias familias cuenta para la primera
+                self._keyword_family.setdefault(keyword, name)
+        self._pattern = None
+        if self._keyword_family:
+            self._pattern = re.compile(_trie_regex(self._keyword_family))
+
+    def family(self, message: str) -> Optional[str]:
+        """Familia que coincide con el mensaje, o None."""
+        if self._pattern is None:
+            return None
+        match = self._pattern.search(message.lower())
+        return self._keyword_family[match.group()] if match else None
+
+
+def _trie_regex(keywords: Iterable[str]) -> str:
+    """Alternancia factorizada por prefijos; prefiere la palabra más larga."""
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Fin de palabra con continuaciones posibles: la continuación es opcional (voraz)
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
@@ -0,0 +1,165 @@
+"""
+Streaming log ingestion for TorusLog.
+
+Lee archivos de log (texto plano o gzip, detectado por los bytes mágicos)
+línea a línea y agrega los resultados sobre la marcha: contadores por nivel,
+coincidencias de patrones y muestras acotadas de errores y warnings. La
+memoria es constante respecto al volumen de logs; solo crecen las muestras,
+limitadas por ``max_samples``.
+"""
+
+import gzip
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from .correlation import CorrelationEngine
+from .models import CorrelatedIncident, LogAnalysis, LogEntry
+from .patterns import PatternMatcher
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def open_log(path: str) -> TextIO:
+    """
+    Abre un log en modo texto; los archivos gzip se descomprimen al vuelo.
+
+    Los bytes no UTF-8 se reemplazan en lugar de abortar la lectura.
+    """
+    with open(path, "rb") as handle:
+        compressed = handle.read(2) == GZIP_MAGIC
+    if compressed:
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def iter_lines(path: str) -> Iterator[str]:
+    """Líneas de un log (sin salto de línea final), leídas perezosamente."""
+    with open_log(path) as handle:
+        for line in handle:
+            yield line.rstrip("\r\n")
+
+
+class LogAggregator:
+    """
+    Acumula un análisis de logs entrada a entrada.
+
+    Args:
+        patterns: Detector de palabras clave (None = sin detección de patrones)
+        max_samples: Máximo de errores y de warnings conservados (None = todos)
+        max_patterns: Máximo de mensajes con patrón conservados
+        correlator: Motor de correlación (None = sin correlación)
+        on_incident: Se llama con cada incidente en cuanto se dispara
+        on_pattern: Se llama con cada entrada que coincide con un patrón y
+            la familia que coincidió
+    """
+
+    def __init__(
+        self,
+        patterns: Optional[PatternMatcher] = None,
+        max_samples: Optional[int] = None,
+        max_patterns: int = 50,
+        correlator: Optional[CorrelationEngine] = None,
+        on_incident: Optional[Callable[[CorrelatedIncident], None]] = None,
+        on_pattern: Optional[Callable[[LogEntry, str], None]] = None,
+    ):
+        self.patterns = patterns
+        self.max_samples = max_samples
+        self.max_patterns = max_patterns
+        self.correlator = correlator
+        self.on_incident = on_incident
+        self.on_pattern = on_pattern
+
+        self.lines_read = 0
+        self.unparsed_lines = 0
+        self.total_entries = 0
+        self.entries_by_level: Dict[str, int] = defaultdict(int)
+        self.error_count = 0
+        self.warning_count = 0
+        self.pattern_count = 0
+        self.pattern_families: Dict[str, int] = defaultdict(int)
+        self.errors: List[LogEntry] = []
+        self.warnings: List[LogEntry] = []
+        self.patterns_detected: List[str] = []
+        self.incident_count = 0
+        self.incidents: List[CorrelatedIncident] = []
+
+    def _sample(self, samples: List[Any], entry: Any) -> None:
+        if self.max_samples is None or len(samples) < self.max_samples:
+            samples.append(entry)
+
+    def count_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Cuenta las líneas crudas a medida que el parser las consume.
+
+        Un registro multilínea (p.ej. journald) produce una sola entrada, así
+        que ``lines_read`` se cuenta en la lectura y no por entrada.
+        """
+        for line in lines:
+            self.lines_read += 1
+            yield line
+
+    def add_counts(self, lines: int, unparsed: int) -> None:
+        """Suma líneas leídas y no reconocidas procesadas fuera del agregador."""
+        self.lines_read += lines
+        self.unparsed_lines += unparsed
+
+    def add(self, entry: Optional[LogEntry]) -> None:
+        """Agrega una entrada parseada (None = línea no reconocida)."""
+        if entry is None:
+            self.unparsed_lines += 1
+            return
+        self.total_entries += 1
+        self.entries_by_level[entry.level] += 1
+
+        if entry.level == "ERROR":
+            self.error_count += 1
+            self._sample(self.errors, entry)
+        elif entry.level in ("WARN", "WARNING"):
+            self.warning_count += 1
+            self._sample(self.warnings, entry)
+
+        if self.patterns is not None:
+            family = self.patterns.family(entry.message)
+            if family is not None:
+                self.pattern_count += 1
+                self.pattern_families[family] += 1
+                if len(self.patterns_detected) < self.max_patterns:
+                    self.patterns_detected.append(entry.message[:100])  # Primeros 100 chars
+                if self.on_pattern is not None:
+                    self.on_pattern(entry, family)
+
+        if self.correlator is not None:
+            for incident in self.correlator.process(entry):
+                self.incident_count += 1
+                self._sample(self.incidents, incident)
+                if self.on_incident is not None:
+                    self.on_incident(incident)
+
+    def finish(self, extra_summary: Optional[Dict[str, Any]] = None) -> LogAnalysis:
+        """Construye el LogAnalysis con los contadores acumulados."""
+        summary: Dict[str, Any] = {
+            "total_entries": self.total_entries,
+            "error_count": self.error_count,
+            "warning_count": self.warning_count,
+            "pattern_count": self.pattern_count,
+            "pattern_families": dict(self.pattern_families),
+            "incident_count": self.incident_count,
+            "most_common_level": (
+                max(self.entries_by_level.items(), key=lambda x: x[1])[0]
+                if self.entries_by_level
+                else None
+            ),
+        }
+        if self.correlator is not None:
+            summary["correlation"] = self.correlator.stats()
+        if extra_summary:
+            summary.update(extra_summary)
+        return LogAnalysis(
+            total_entries=self.total_entries,
+            entries_by_level=dict(self.entries_by_level),
+            patterns_detected=self.patterns_detected,
+            errors_found=self.errors,
+            warnings_found=self.warnings,
+            incidents=self.incidents,
+            analysis_summary=summary,
+        )
@@ -2,7 +2,9 @@
 Unit tests for TorusLog (Production)
 """
 
+import gzip
 import sys
+from datetime import datetime
 from pathlib import Path
 
 # Add src directory to Python path for local imports
@@ -15,7 +17,12 @@ if str(SRC) not in sys.path:
 import pytest
 
 from torus_log.core import TorusLog
+from torus_log.correlation import CorrelationRule
+from torus_log.follow import FileTail, LogFollower
+from torus_log.merge import read_spill, spill_file
 from torus_log.models import AnalysisResult, LogAnalysis
+from torus_log.parsers import create_parser, detect_format, parse_timestamp
+from torus_log.patterns import PatternMatcher
 
 
 @pytest.fixture
@@ -62,6 +69,454 @@ class TestLogParsing:
         assert analysis.total_entries == 2
 
 
+class TestParsers:
+    """Tests para el registro de formatos"""
+
+    @pytest.mark.parametrize(
+        "log_format,line,timestamp,level",
+        [
+            (
+                "json",
+                '{"ts": 1736937045, "level": "warning", "msg": "login failed"}',
+                "2025-01-15T10:30:45+00:00",
+                "WARN",
+            ),
+            (
+                "cef",
+                "Jan 15 10:30:45 fw CEF:0|Sec|IDS|1.0|100|Port scan|8|"
+                "src=10.0.0.1 msg=two words rt=1736937045000",
+                "2025-01-15T10:30:45+00:00",
+                "ERROR",
+            ),
+            (
+                "leef",
+                "LEEF:1.0|IBM|QRadar|1.0|42|src=10.0.0.1\tsev=5\tdevTime=2025-01-15 10:30:45",
+                "2025-01-15 10:30:45",
+                "WARN",
+            ),
+            (
+                "rfc5424",
+                "<34>1 2025-01-15T10:30:45Z host su - ID47 - 'su root' failed",
+                "2025-01-15T10:30:45Z",
+                "ERROR",
+            ),
+            (
+                "access",
+                '10.0.0.9 - - [15/Jan/2025:10:30:45 +0100] "GET /admin HTTP/1.1" 403 12 "-" "curl"',
+                "2025-01-15T10:30:45+01:00",
+                "WARN",
+            ),
+            (
+                "simple",
+                "2025-01-15 10:30:45 ERROR Connection failed",
+                "2025-01-15 10:30:45",
+                "ERROR",
+            ),
+        ],
+    )
+    def test_detect_and_parse(self, log_format, line, timestamp, level):
+        """Test detección y normalización de cada formato"""
+        assert detect_format([line]) == log_format
+        entry = create_parser(log_format).parse(line, "test")
+        assert (entry.timestamp, entry.level) == (timestamp, level)
+
+    def test_parse_timestamp_utc_suffix(self):
+        """Test que el sufijo Z de RFC 5424 se interpreta como UTC"""
+        assert parse_timestamp("2003-10-11T22:14:15.003Z") == pytest.approx(1065910455.003)
+        assert parse_timestamp("2003-10-11T22:14:15z") == 1065910455.0
+        assert parse_timestamp("2003-10-11T22:14:15") == 1065910455.0
+        assert parse_timestamp("2003-10-11T23:14:15+01:00") == 1065910455.0
+        assert parse_timestamp("Oct 11 22:14:15") is None
+
+    def test_rfc3164_and_metadata(self):
+        """Test syslog BSD: año configurado, host y tag"""
+        parser = create_parser("rfc3164")
+        parser.year = 2024
+        entry = parser.parse("<38>Jan  5 10:30:45 web1 sshd[42]: Accepted password for bob")
+        assert entry.timestamp == "2024-01-05T10:30:45"
+        assert entry.level == "INFO"
+        assert entry.metadata["host"] == "web1" and entry.metadata["procid"] == "42"
+
+    def test_rfc3164_year_rollover(self, monkeypatch):
+        """Test año inferido por línea: fechas futuras son del año anterior"""
+
+        class FixedDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return cls(2027, 1, 2, 10, 0, 0)
+
+        monkeypatch.setattr("torus_log.parsers.datetime", FixedDatetime)
+        parser = create_parser("rfc3164")
+        days = (
+            "Dec 31 23:59:59",
+            "Jan  2 09:00:00",
+            "Jan  3 09:00:00",
+            "Jan  5 00:00:00",
+            "Feb 29 12:00:00",
+        )
+        stamps = [parser.parse(f"<38>{day} web1 sshd: x").timestamp for day in days]
+        assert stamps == [
+            "2026-12-31T23:59:59",
+            "2027-01-02T09:00:00",
+            "2027-01-03T09:00:00",
+            "2026-01-05T00:00:00",
+            "2024-02-29T12:00:00",
+        ]
+
+    def test_journald_export_records(self, modulo):
+        """Test registros multilínea del formato export de journald"""
+        lines = [
+            "__CURSOR=s=1",
+            "__REALTIME_TIMESTAMP=1736937045000000",
+            "PRIORITY=3",
+            "MESSAGE=authentication failure",
+            "",
+            "__CURSOR=s=2",
+            "PRIORITY=6",
+            "MESSAGE=session opened",
+        ]
+        analysis = modulo.analyze_stream(lines)
+        assert analysis.analysis_summary["log_format"] == "journald"
+        assert analysis.entries_by_level == {"ERROR": 1, "INFO": 1}
+        assert analysis.errors_found[0].timestamp == "2025-01-15T10:30:45+00:00"
+        assert analysis.analysis_summary["lines_read"] == 8
+        assert analysis.analysis_summary["unparsed_lines"] == 0
+
+    def test_no_invented_timestamp(self, modulo):
+        """Test que una línea sin timestamp no recibe la hora actual"""
+        entry = modulo.parse_log_entry("something WARNING happened")
+        assert entry.level == "WARNING"
+        assert entry.timestamp == ""
+
+    def test_parse_log_entry_switches_format(self, modulo):
+        """Test que el modo auto por línea redetecta cuando cambia el formato"""
+        lines = [
+            "2025-01-15 10:30:45 ERROR Connection failed",
+            '{"ts": 1736937045, "level": "warning", "msg": "login failed"}',
+            '{"ts": 1736937046, "level": "info", "msg": "ok"}',
+            "<34>1 2025-01-15T10:30:45Z host su - ID47 - 'su root' failed",
+            "2025-01-15 10:30:47 DEBUG retry",
+        ]
+        entries = [modulo.parse_log_entry(line) for line in lines]
+        assert [entry.level for entry in entries] == ["ERROR", "WARN", "INFO", "ERROR", "DEBUG"]
+        assert entries[1].message == "login failed"
+        assert entries[3].metadata["host"] == "host"
+
+    def test_unknown_format(self):
+        """Test formato inexistente"""
+        with pytest.raises(ValueError):
+            TorusLog({"log_format": "nope"})
+
+
+class TestPatternMatcher:
+    """Tests para el detector de palabras clave de seguridad"""
+
+    def test_reports_family_in_one_pass(self):
+        """Test familia informada y coincidencia sin distinguir mayúsculas"""
+        matcher = PatternMatcher()
+        assert matcher.family("Login FAILED for admin") == "auth_failure"
+        assert matcher.family("Possible SQL Injection in /search") == "web_attack"
+        assert matcher.family("intrusion attempt, access denied") == "intrusion"
+        assert matcher.family("heartbeat ok") is None
+
+    def test_families_are_extensible(self):
+        """Test familias añadidas por configuración y con add_family"""
+        modulo = TorusLog(
+            config={"pattern_families": {"ransomware": ["Encrypted files", "ransom"]}}
+        )
+        modulo.security_patterns.add_family("web_attack", ["path traversal"])
+        analysis = modulo.analyze_logs(
+            [
+                "2025-01-15 10:00:00 ERROR encrypted files found on share",
+                "2025-01-15 10:00:01 WARN path traversal in /download",
+                "2025-01-15 10:00:02 WARN Failed password for root",
+                "2025-01-15 10:00:03 INFO backup completed",
+            ]
+        )
+        assert analysis.analysis_summary["pattern_count"] == 3
+        assert analysis.analysis_summary["pattern_families"] == {
+            "ransomware": 1,
+            "web_attack": 1,
+            "auth_failure": 1,
+        }
+
+    def test_longest_keyword_wins(self):
+        """Test palabras que son prefijo de otras en familias distintas"""
+        matcher = PatternMatcher({"extortion": ["ransom"], "malware": ["ransomware"]})
+        assert matcher.family("RansomWare detected") == "malware"
+        assert matcher.family("ransom note dropped") == "extortion"
+        assert PatternMatcher({}).family("attack") is None
+
+
+class TestCorrelation:
+    """Tests para el motor de correlación"""
+
+    @staticmethod
+    def _ssh(second, outcome, ip):
+        clock = f"{second // 60:02d}:{second % 60:02d}"
+        return f"2025-01-15T10:{clock} INFO {outcome} password for root from {ip}"
+
+    def test_failures_then_success(self, modulo):
+        """Test regla de secuencia: N fallos y después un éxito"""
+        lines = [self._ssh(i, "Failed", "203.0.113.7") for i in range(5)]
+        lines.append(self._ssh(30, "Accepted", "203.0.113.7"))
+        lines.append(self._ssh(31, "Accepted", "198.51.100.1"))
+        incidents = list(modulo.correlate(lines))
+        assert [i.rule for i in incidents] == ["brute_force_success"]
+        assert incidents[0].key == {"ip": "203.0.113.7"}
+        assert incidents[0].event_count == 6
+        assert incidents[0].first_seen == "2025-01-15T10:00:00+00:00"
+
+    def test_base_rule_is_abstract(self):
+        """Test que la regla base no se instancia sin observe"""
+        with pytest.raises(TypeError):
+            CorrelationRule("base", count=1, window=10)
+
+    def test_threshold_respects_window(self):
+        """Test regla de umbral dentro de la ventana deslizante"""
+        modulo = TorusLog(
+            {
+                "correlation_rules": [
+                    {
+                        "name": "scan",
+                        "count": 3,
+                        "window": 10,
+                        "group_by": ["ip"],
+                        "match": "denied",
+                    }
+                ]
+            }
+        )
+        spread = [self._ssh(i * 20, "Denied", "10.0.0.1") for i in range(5)]
+        assert list(modulo.correlate(spread)) == []
+        burst = [self._ssh(i, "Denied", "10.0.0.1") for i in range(3)]
+        analysis = modulo.analyze_logs(burst)
+        assert analysis.analysis_summary["incident_count"] == 1
+        assert analysis.incidents[0].rule == "scan"
+
+    def test_groups_expire_and_are_bounded(self):
+        """Test expiración por heap y límite de grupos"""
+        modulo = TorusLog({"correlation_window": 10, "max_correlation_groups": 50})
+        correlator = modulo.new_correlator()
+        parser = modulo._parser("simple")
+        for i in range(200):
+            correlator.process(parser.parse(self._ssh(i, "Failed", f"10.0.{i}.1")))
+        stats = correlator.stats()
+        assert stats["active_groups"] <= 50
+        assert stats["expired_groups"] > 0
+
+    def test_correlation_disabled(self):
+        """Test correlación desactivada"""
+        modulo = TorusLog({"correlation": False})
+        analysis = modulo.analyze_logs([self._ssh(i, "Failed", "10.0.0.1") for i in range(20)])
+        assert analysis.incidents == []
+        assert "correlation" not in analysis.analysis_summary
+
+
+class TestStreaming:
+    """Tests para ingesta en streaming"""
+
+    def test_analyze_stream_matches_batch(self, modulo):
+        """Test que el streaming produce los mismos contadores que analyze_logs"""
+        lines = [
+            "2025-01-15 10:30:45 ERROR Connection failed",
+            "2025-01-15 10:31:00 WARN High memory usage",
+            "2025-01-15 10:32:00 INFO Operation completed",
+            "garbage line",
+        ]
+        batch = modulo.analyze_logs(lines)
+        stream = modulo.analyze_stream(iter(lines))
+        assert stream.entries_by_level == batch.entries_by_level
+        assert stream.patterns_detected == batch.patterns_detected
+        assert stream.analysis_summary["lines_read"] == 4
+        assert stream.analysis_summary["unparsed_lines"] == 1
+
+    def test_bounded_samples(self):
+        """Test que solo se conservan max_samples errores, con totales exactos"""
+        modulo = TorusLog({"max_samples": 5})
+        lines = (f"2025-01-15 10:30:{i % 60:02d} ERROR Request {i} denied" for i in range(1000))
+        analysis = modulo.analyze_stream(lines)
+        assert analysis.total_entries == 1000
+        assert len(analysis.errors_found) == 5
+        assert analysis.analysis_summary["error_count"] == 1000
+        assert analysis.analysis_summary["pattern_count"] == 1000
+        assert len(analysis.patterns_detected) == 50
+        assert analysis.analysis_summary["samples_truncated"] is True
+
+    def test_analyze_files_plain_and_gzip(self, modulo, tmp_path):
+        """Test lectura de archivos planos y gzip"""
+        plain = tmp_path / "app.log"
+        plain.write_text(
+            "2025-01-15 10:30:45 ERROR Connection failed\n2025-01-15 10:31:00 INFO ok\n"
+        )
+        packed = tmp_path / "app.log.1.gz"
+        with gzip.open(packed, "wt") as handle:
+            handle.write("2025-01-14 09:00:00 WARN Disk almost full\n")
+
+        result = modulo.analyze(log_paths=[str(plain), str(packed), str(tmp_path / "missing.log")])
+        assert result.status == "warning"
+        assert result.data["total_entries"] == 3
+        assert result.data["warnings_found"][0]["source"] == str(packed)
+        summary = result.data["analysis_summary"]
+        assert summary["files_read"] == 2
+        assert list(summary["file_errors"]) == [str(tmp_path / "missing.log")]
+
+        failed = modulo.analyze(log_paths=[str(tmp_path / "missing.log")])
+        assert failed.status == "error"
+
+
+class TestMergedIngestion:
+    """Tests para ingesta multiarchivo ordenada por timestamp"""
+
+    @pytest.fixture
+    def hosts_dir(self, tmp_path):
+        root = tmp_path / "hosts"
+        (root / "dc2").mkdir(parents=True)
+        for host, offset in (("web1", 0), ("web2", 1), ("dc2/db1", 2)):
+            lines = [
+                f"2025-01-15T10:00:{second:02d} WARN Failed password for root from 10.0.0.{offset}"
+                for second in range(offset, 60, 3)
+            ]
+            lines.insert(3, "no timestamp INFO continuation")
+            (root / f"{host}.log").write_text("\n".join(lines) + "\n")
+        with gzip.open(root / "web1.log.1.gz", "wt") as handle:
+            handle.write("2025-01-15T09:59:59 ERROR Service restart failed\n")
+        return root
+
+    def test_parallel_matches_serial(self, modulo, hosts_dir):
+        """Test que el resultado no depende del número de workers"""
+        serial = modulo.analyze_files([str(hosts_dir)], ordered=True).model_dump()
+        parallel = modulo.analyze_files([str(hosts_dir)], workers=2).model_dump()
+        assert serial["analysis_summary"].pop("workers") == 1
+        assert parallel["analysis_summary"].pop("workers") == 2
+        assert parallel == serial
+        assert serial["analysis_summary"]["files_read"] == 4
+
+    def test_merged_stream_is_time_ordered(self, modulo, hosts_dir):
+        """Test orden global por timestamp y mismos totales que la lectura secuencial"""
+        analysis = modulo.analyze_files([str(hosts_dir)], ordered=True)
+        timestamps = [entry.timestamp for entry in analysis.warnings_found]
+        assert timestamps == sorted(timestamps)
+        assert analysis.errors_found[0].timestamp == "2025-01-15T09:59:59"
+        sequential = modulo.analyze_files([str(hosts_dir)])
+        assert analysis.entries_by_level == sequential.entries_by_level
+        assert (
+            analysis.analysis_summary["incident_count"]
+            == sequential.analysis_summary["incident_count"]
+        )
+
+    def test_external_sort_runs(self, modulo, tmp_path):
+        """Test que el volcado por tramos acotados da el mismo orden que uno solo"""
+        log = tmp_path / "shuffled.log"
+        seconds = [(second * 7) % 60 for second in range(60)]
+        log.write_text(
+            "".join(f"2025-01-15T10:00:{second:02d} INFO tick {second}\n" for second in seconds)
+        )
+        single = spill_file(modulo, 0, str(log), str(tmp_path))
+        expected = list(read_spill(single.spill_path))
+        runs = spill_file(modulo, 1, str(log), str(tmp_path), run_size=7)
+        merged = list(read_spill(runs.spill_path))
+        assert runs.entries == single.entries == 60
+        assert [item[3:] for item in merged] == [item[3:] for item in expected]
+        assert [item[0] for item in merged] == sorted(item[0] for item in merged)
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "000000.spill",
+            "000001.spill",
+            "shuffled.log",
+        ]
+
+
+class TestFollow:
+    """Tests para el seguimiento continuo de logs"""
+
+    def test_tail_reads_only_new_complete_lines(self, tmp_path):
+        """Test que se ignora el histórico y se espera al salto de línea"""
+        log = tmp_path / "app.log"
+        log.write_text("2025-01-15 10:00:00 INFO old\n")
+        tail = FileTail(str(log))
+        with open(log, "a") as handle:
+            handle.write("2025-01-15 10:00:01 ERROR new\n2025-01-15 10:00:02 INFO par")
+        assert list(tail.read_lines()) == ["2025-01-15 10:00:01 ERROR new"]
+        with open(log, "a") as handle:
+            handle.write("tial\n")
+        assert list(tail.read_lines()) == ["2025-01-15 10:00:02 INFO partial"]
+        tail.close()
+
+    def test_tail_handles_rotation_and_truncation(self, tmp_path):
+        """Test rotación por cambio de inode y truncado del archivo"""
+        log = tmp_path / "app.log"
+        log.write_text("")
+        tail = FileTail(str(log))
+        with open(log, "a") as handle:
+            handle.write("before rotation\n")
+        log.rename(tmp_path / "app.log.1")
+        log.write_text("after rotation\n")
+        assert list(tail.read_lines()) == ["before rotation", "after rotation"]
+        assert tail.rotations == 1
+
+        log.write_text("short\n")
+        assert list(tail.read_lines()) == ["short"]
+        assert tail.truncations == 1
+        tail.close()
+
+    def test_follower_alerts_and_snapshots(self, modulo, tmp_path):
+        """Test alertas inmediatas y contadores incrementales por intervalo"""
+        log = tmp_path / "auth.log"
+        log.write_text("2025-01-15 10:00:00 INFO boot\n")
+        follower = LogFollower(modulo, [str(log)], from_start=True, poll_interval=0.01)
+        assert follower.poll() == []
+        assert follower.snapshot()["interval"]["entries_by_level"] == {"INFO": 1}
+
+        with open(log, "a") as handle:
+            for second in range(10):
+                handle.write(
+                    f"2025-01-15 10:01:{second:02d} WARN Failed password for root from 10.0.0.9\n"
+                )
+        alerts = follower.poll()
+        assert [alert.get("family") for alert in alerts].count("auth_failure") == 10
+        assert alerts[-1]["incident"]["rule"] == "brute_force"
+
+        snapshot = follower.snapshot()
+        assert snapshot["interval"]["entries_by_level"] == {"WARN": 10}
+        assert snapshot["analysis"]["entries_by_level"] == {"INFO": 1, "WARN": 10}
+        assert snapshot["analysis"]["analysis_summary"]["files"][str(log)]["log_format"] == "simple"
+        follower.close()
+
+    def test_follower_bounds_pattern_alerts(self, modulo, tmp_path):
+        """Test tope de alertas de patrón por lectura con resumen del exceso"""
+        log = tmp_path / "auth.log"
+        log.write_text(
+            "".join(
+                f"2025-01-15 10:00:{i % 60:02d} WARN Failed password from 10.0.{i}.1\n"
+                for i in range(50)
+            )
+        )
+        follower = LogFollower(
+            modulo, [str(log)], from_start=True, poll_interval=0.01, max_pattern_alerts=5
+        )
+        events = follower.iter_poll()
+        first = next(events)
+        assert first["kind"] == "pattern" and follower.aggregator.lines_read < 50
+        alerts = [first, *events]
+        assert [alert["kind"] for alert in alerts].count("pattern") == 5
+        assert alerts[-1] == {
+            "type": "alert",
+            "kind": "pattern_summary",
+            "suppressed": {"auth_failure": 45},
+        }
+        assert follower.aggregator.pattern_count == 50
+        assert follower.poll() == []
+        follower.close()
+
+    def test_follow_generator_stops_after_duration(self, modulo, tmp_path):
+        """Test que follow() termina con un snapshot final"""
+        log = tmp_path / "app.log"
+        log.write_text("2025-01-15 10:00:00 ERROR disk full\n")
+        events = list(modulo.follow([str(log)], from_start=True, poll_interval=0.01, duration=0.05))
+        assert events[-1]["type"] == "snapshot"
+        assert events[-1]["analysis"]["total_entries"] == 1
+
+
 class TestAnalyze:
     """Tests para funcionalidad de análisis"""
 
@@ -6,16 +6,52 @@ Misión: Outlaws from the West
 Rol: data-redactor
 """
 
+import json
 import logging
 import re
 import secrets
 from collections import defaultdict
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .models import AnalysisResult, RedactionRecord, RedactionResult
+from .models import AnalysisResult, RedactionRecord, RedactionResult, StructuredRedactionResult
 
 logger = logging.getLogger(__name__)
 
+_PATH_TOKEN = re.compile(r"[^.\[\]]+|\[([^\]]*)\]")
+
+
+def _parse_json_path(path: str) -> Tuple[str, ...]:
+    """
+    Convierte una ruta JSON ("$.user.email", "events[*].ip") en segmentos.
+
+    Los índices de arreglo se representan como texto y "*" actúa como comodín
+    para cualquier clave o índice.
+    """
+    path = path.strip()
+    if path.startswith("$"):
+        path = path[1:]
+
+    segments: List[str] = []
+    for token in _PATH_TOKEN.finditer(path):
+        segment = token.group(1) if token.group(1) is not None else token.group(0)
+        segments.append(segment.strip("'\""))
+    return tuple(segments)
+
+
+def _path_matches(pattern: Tuple[str, ...], path: Tuple[str, ...]) -> bool:
+    """Indica si ``path`` coincide exactamente con ``pattern`` (con comodines)."""
+    if len(pattern) != len(path):
+        return False
+    return all(p == "*" or p == s for p, s in zip(pattern, path))
+
+
+def _format_json_path(path: Tuple[str, ...]) -> str:
+    """Representación "$.a.b[0]" de una ruta interna."""
+    parts = ["$"]
+    for segment in path:
+        parts.append(f"[{segment}]" if segment.isdigit() else f".{segment}")
+    return "".join(parts)
+
 
 class TorusRedact:
     """
@@ -35,6 +71,11 @@ class TorusRedact:
                 - redaction_style: Estilo de redacción (mask/tokenize/remove) (default: "mask")
                 - preserve_structure: Preservar estructura (default: True)
                 - pii_types: Tipos de PII a redactar (default: email, phone, ssn, credit_card, ip)
+                - json_keys: Nombres de clave JSON cuyos valores se escanean (default: todas)
+                - json_paths: Rutas JSON a escanear, p.ej. "$.user.email" o "events[*].msg"
+                  (default: todas)
+                - json_skip_keys: Claves JSON cuyos subárboles no se escanean (default: [])
+                - json_skip_paths: Rutas JSON cuyos subárboles no se escanean (default: [])
         """
         self.name = "Torus Redact"
         self.mission = "Outlaws from the West"
@@ -45,6 +86,12 @@ class TorusRedact:
         self.preserve_structure = bool(self.config.get("preserve_structure", True))
         self.pii_types = self.config.get("pii_types", ["email", "phone", "ssn", "credit_card", "ip"])
 
+        # Redacción estructurada (JSON/NDJSON)
+        self.json_keys = set(self.config.get("json_keys", []))
+        self.json_paths = [_parse_json_path(p) for p in self.config.get("json_paths", [])]
+        self.json_skip_keys = set(self.config.get("json_skip_keys", []))
+        self.json_skip_paths = [_parse_json_path(p) for p in self.config.get("json_skip_paths", [])]
+
         # Patrones PII
         self.patterns: Dict[str, Dict[str, Any]] = {
             "email": {
@@ -107,19 +154,26 @@ class TorusRedact:
         else:  # mask (default)
             return pattern_config.get("mask", "*" * len(match.group(0)))
 
-    def redact_text(self, text: str) -> RedactionResult:
+    def _redact_value(
+        self,
+        text: str,
+        redaction_records: List[RedactionRecord],
+        redactions_by_type: Dict[str, int],
+        path: Optional[str] = None,
+    ) -> str:
         """
-        Redacta PII de un texto.
+        Aplica todos los patrones PII habilitados sobre un texto.
 
         Args:
             text: Texto a redactar
+            redaction_records: Lista donde se acumulan los registros
+            redactions_by_type: Contador por tipo de PII
+            path: Ruta JSON del valor (solo en modo estructurado)
 
         Returns:
-            RedactionResult con resultados
+            Texto redactado
         """
         redacted_text = text
-        redaction_records: List[RedactionRecord] = []
-        redactions_by_type: Dict[str, int] = defaultdict(int)
 
         for pii_type in self.pii_types:
             if pii_type not in self.patterns:
@@ -142,6 +196,7 @@ class TorusRedact:
                     redacted_value=redacted_value,
                     position=start,
                     confidence=0.95,  # Simulado
+                    path=path,
                 )
                 redaction_records.append(record)
 
@@ -149,6 +204,22 @@ class TorusRedact:
                 redacted_text = redacted_text[:start] + redacted_value + redacted_text[end:]
                 redactions_by_type[pii_type] += 1
 
+        return redacted_text
+
+    def redact_text(self, text: str) -> RedactionResult:
+        """
+        Redacta PII de un texto.
+
+        Args:
+            text: Texto a redactar
+
+        Returns:
+            RedactionResult con resultados
+        """
+        redaction_records: List[RedactionRecord] = []
+        redactions_by_type: Dict[str, int] = defaultdict(int)
+        redacted_text = self._redact_value(text, redaction_records, redactions_by_type)
+
         total_redactions = sum(redactions_by_type.values())
 
         return RedactionResult(
@@ -164,17 +235,193 @@ class TorusRedact:
             },
         )
 
-    def analyze(self, text: Optional[str] = None, texts: Optional[List[str]] = None) -> AnalysisResult:
+    def _walk_json(
+        self,
+        document: Any,
+        redaction_records: List[RedactionRecord],
+        redactions_by_type: Dict[str, int],
+        stats: Dict[str, int],
+    ) -> Any:
+        """
+        Recorre un documento JSON ya decodificado y redacta solo hojas de texto.
+
+        El recorrido es iterativo (sin recursión) y reconstruye el documento
+        sin modificar el original. Claves, números y estructura nunca se escanean;
+        los subárboles configurados como no sensibles se copian tal cual.
+        """
+        scan_all = not self.json_keys and not self.json_paths
+        root: List[Any] = [None]
+        stack: List[Tuple[Any, Tuple[str, ...], bool, Any, Any]] = [
+            (document, (), scan_all, root, 0)
+        ]
+
+        while stack:
+            value, path, targeted, parent, slot = stack.pop()
+
+            if isinstance(value, dict):
+                children: Iterable[Tuple[Any, Any]] = value.items()
+                container: Any = dict.fromkeys(value)
+            elif isinstance(value, list):
+                children = enumerate(value)
+                container = [None] * len(value)
+            else:
+                if targeted and isinstance(value, str) and value:
+                    stats["strings_scanned"] += 1
+                    stats["chars_scanned"] += len(value)
+                    value = self._redact_value(
+                        value, redaction_records, redactions_by_type, _format_json_path(path)
+                    )
+                parent[slot] = value
+                continue
+
+            parent[slot] = container
+            is_object = isinstance(value, dict)
+            for key, child in children:
+                child_path = path + (str(key),)
+                if (is_object and key in self.json_skip_keys) or any(
+                    _path_matches(skip, child_path) for skip in self.json_skip_paths
+                ):
+                    stats["subtrees_skipped"] += 1
+                    container[key] = child
+                    continue
+
+                child_targeted = (
+                    targeted
+                    or (is_object and key in self.json_keys)
+                    or any(_path_matches(target, child_path) for target in self.json_paths)
+                )
+                stack.append((child, child_path, child_targeted, container, key))
+
+        return root[0]
+
+    def redact_json(self, document: Any) -> StructuredRedactionResult:
+        """
+        Redacta PII de un documento JSON escaneando solo valores de texto.
+
+        Args:
+            document: Texto JSON o estructura ya decodificada (dict/list)
+
+        Returns:
+            StructuredRedactionResult con el documento redactado
+
+        Raises:
+            ValueError: Si el texto no es JSON válido
+        """
+        if isinstance(document, (str, bytes)):
+            document = json.loads(document)
+
+        redaction_records: List[RedactionRecord] = []
+        redactions_by_type: Dict[str, int] = defaultdict(int)
+        stats: Dict[str, int] = defaultdict(int)
+
+        redacted_document = self._walk_json(document, redaction_records, redactions_by_type, stats)
+
+        return StructuredRedactionResult(
+            redacted_document=redacted_document,
+            redacted_text=json.dumps(redacted_document, ensure_ascii=False),
+            total_redactions=sum(redactions_by_type.values()),
+            redactions_by_type=dict(redactions_by_type),
+            redaction_records=redaction_records,
+            statistics={
+                "mode": "json",
+                "redaction_style": self.redaction_style,
+                "pii_types_enabled": self.pii_types,
+                "strings_scanned": stats["strings_scanned"],
+                "chars_scanned": stats["chars_scanned"],
+                "subtrees_skipped": stats["subtrees_skipped"],
+            },
+        )
+
+    def redact_ndjson(self, lines: Iterable[str]) -> Iterator[StructuredRedactionResult]:
         """
-        Ejecuta análisis: un texto o múltiples.
+        Redacta un flujo NDJSON línea a línea (generador, memoria constante).
+
+        Las líneas vacías se omiten. Una línea que no es JSON válido se redacta
+        como texto plano para no perder PII en registros mal formados.
+
+        Args:
+            lines: Iterable de líneas (p.ej. un archivo abierto)
+
+        Yields:
+            StructuredRedactionResult por cada línea no vacía
+        """
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield self.redact_json(line)
+            except ValueError:
+                fallback = self.redact_text(line)
+                yield StructuredRedactionResult(
+                    redacted_document=None,
+                    redacted_text=fallback.redacted_text,
+                    total_redactions=fallback.total_redactions,
+                    redactions_by_type=fallback.redactions_by_type,
+                    redaction_records=fallback.redaction_records,
+                    statistics={**fallback.statistics, "mode": "text"},
+                )
+
+    def analyze(
+        self,
+        text: Optional[str] = None,
+        texts: Optional[List[str]] = None,
+        document: Optional[Any] = None,
+        ndjson: Optional[str] = None,
+    ) -> AnalysisResult:
+        """
+        Ejecuta análisis: un texto, múltiples, un documento JSON o NDJSON.
 
         Args:
             text: Texto individual
             texts: Lista de textos
+            document: Documento JSON (texto o dict/list) para redacción estructurada
+            ndjson: Texto NDJSON (un documento JSON por línea)
 
         Returns:
             AnalysisResult con resultados
         """
+        if document is not None:
+            try:
+                result = self.redact_json(document)
+            except ValueError as exc:
+                return AnalysisResult(
+                    status="error",
+                    message=f"Invalid JSON document: {exc}",
+                    data={},
+                    errors=["invalid_json"],
+                )
+            return AnalysisResult(
+                status="success",
+                message=f"Redacted {result.total_redactions} PII items from JSON document",
+                data=result.model_dump(),
+            )
+
+        if ndjson:
+            lines_out: List[str] = []
+            total_redactions = 0
+            total_by_type: Dict[str, int] = defaultdict(int)
+
+            for result in self.redact_ndjson(ndjson.splitlines()):
+                lines_out.append(result.redacted_text)
+                total_redactions += result.total_redactions
+                for pii_type, count in result.redactions_by_type.items():
+                    total_by_type[pii_type] += count
+
+            return AnalysisResult(
+                status="success",
+                message=(
+                    f"Redacted PII from {len(lines_out)} NDJSON records: "
+                    f"{total_redactions} redactions total"
+                ),
+                data={
+                    "redacted_text": "\n".join(lines_out),
+                    "records": len(lines_out),
+                    "total_redactions": total_redactions,
+                    "total_by_type": dict(total_by_type),
+                },
+            )
+
         if texts:
             results = []
             total_redactions = 0
@@ -232,6 +479,7 @@ class TorusRedact:
             "status": "Production",
             "redaction_style": self.redaction_style,
             "pii_types": ", ".join(self.pii_types),
+            "structured_formats": "json, ndjson",
         }
 
 
@@ -33,6 +33,9 @@ class RedactionRecord(BaseModel):
     redacted_value: str = Field(description="Redacted value")
     position: int = Field(description="Position in document")
     confidence: float = Field(ge=0.0, le=1.0, description="Confidence score")
+    path: Optional[str] = Field(
+        default=None, description="JSON path of the redacted value (structured mode)"
+    )
 
 
 class RedactionResult(BaseModel):
@@ -46,6 +49,23 @@ class RedactionResult(BaseModel):
     statistics: Dict[str, Any] = Field(default_factory=dict, description="Redaction statistics")
 
 
+class StructuredRedactionResult(BaseModel):
+    """Result of structure-aware (JSON/NDJSON) redaction"""
+
+    redacted_document: Any = Field(
+        default=None, description="Redacted JSON document (None if not JSON)"
+    )
+    redacted_text: str = Field(description="Serialized redacted document")
+    total_redactions: int = Field(description="Total number of redactions")
+    redactions_by_type: Dict[str, int] = Field(
+        default_factory=dict, description="Redactions by PII type"
+    )
+    redaction_records: List[RedactionRecord] = Field(
+        default_factory=list, description="List of redaction records"
+    )
+    statistics: Dict[str, Any] = Field(default_factory=dict, description="Scan statistics")
+
+
 class AnalysisResult(BaseModel):
     """Result model for analysis operations"""
 
@@ -15,7 +15,7 @@ if str(SRC) not in sys.path:
 import pytest
 
 from torus_redact.core import TorusRedact
-from torus_redact.models import AnalysisResult, RedactionResult
+from torus_redact.models import AnalysisResult, RedactionResult, StructuredRedactionResult
 
 
 @pytest.fixture
@@ -58,6 +58,69 @@ class TestRedaction:
         assert result.total_redactions >= 1
 
 
+class TestStructuredRedaction:
+    """Tests para redacción estructurada JSON/NDJSON"""
+
+    def test_redact_json_scans_only_string_values(self, modulo):
+        """Test que claves y números no se modifican"""
+        doc = '{"test@example.com": 1, "user": {"email": "a@b.com", "zip": 5551234567}}'
+        result = modulo.redact_json(doc)
+        assert isinstance(result, StructuredRedactionResult)
+        assert result.redacted_document["test@example.com"] == 1
+        assert result.redacted_document["user"]["email"] == "[EMAIL_REDACTED]"
+        assert result.redacted_document["user"]["zip"] == 5551234567
+        assert result.redaction_records[0].path == "$.user.email"
+
+    def test_redact_json_target_paths_and_keys(self):
+        """Test que solo se escanean rutas y claves configuradas"""
+        modulo = TorusRedact(config={"json_paths": ["events[*].msg"], "json_keys": ["contact"]})
+        doc = {
+            "events": [{"msg": "from a@b.com", "other": "c@d.com"}],
+            "contact": {"mail": "e@f.com"},
+            "note": "g@h.com",
+        }
+        result = modulo.redact_json(doc)
+        out = result.redacted_document
+        assert out["events"][0]["msg"] == "from [EMAIL_REDACTED]"
+        assert out["events"][0]["other"] == "c@d.com"
+        assert out["contact"]["mail"] == "[EMAIL_REDACTED]"
+        assert out["note"] == "g@h.com"
+        assert doc["note"] == "g@h.com"
+
+    def test_redact_json_skips_subtrees(self):
+        """Test que los subárboles no sensibles no se escanean"""
+        modulo = TorusRedact(config={"json_skip_keys": ["headers"], "json_skip_paths": ["$.meta"]})
+        doc = {"headers": {"x": "a@b.com"}, "meta": ["c@d.com"], "body": "e@f.com"}
+        result = modulo.redact_json(doc)
+        assert result.redacted_document["headers"]["x"] == "a@b.com"
+        assert result.redacted_document["meta"] == ["c@d.com"]
+        assert result.redacted_document["body"] == "[EMAIL_REDACTED]"
+        assert result.statistics["subtrees_skipped"] == 2
+        assert result.statistics["strings_scanned"] == 1
+
+    def test_redact_ndjson_streams_lines(self, modulo):
+        """Test NDJSON con línea inválida redactada como texto"""
+        lines = ['{"email": "a@b.com"}', "", "not json b@c.com"]
+        results = list(modulo.redact_ndjson(lines))
+        assert len(results) == 2
+        assert results[0].redacted_document == {"email": "[EMAIL_REDACTED]"}
+        assert results[1].statistics["mode"] == "text"
+        assert "b@c.com" not in results[1].redacted_text
+
+    def test_analyze_document_invalid_json(self, modulo):
+        """Test analyze con documento JSON inválido"""
+        result = modulo.analyze(document="{broken")
+        assert result.status == "error"
+        assert result.errors == ["invalid_json"]
+
+    def test_analyze_ndjson(self, modulo):
+        """Test analyze con NDJSON"""
+        result = modulo.analyze(ndjson='{"a": "x@y.com"}\n{"b": 1}')
+        assert result.status == "success"
+        assert result.data["records"] == 2
+        assert result.data["total_redactions"] == 1
+
+
 class TestAnalyze:
     """Tests para funcionalidad de análisis"""
 
@@ -9,7 +9,7 @@ import logging
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 # Resolve project root (supports PyInstaller bundles via snocomm.paths)
 try:
@@ -41,9 +41,16 @@ class SecurityPipeline:
     3. Retorna un reporte consolidado
     """
 
-    def __init__(self):
-        """Inicializar el pipeline con los módulos necesarios"""
-        self.threat_filter = HelixFilter()
+    def __init__(self, threat_config: Optional[Dict[str, Any]] = None):
+        """
+        Inicializar el pipeline con los módulos necesarios
+
+        Args:
+            threat_config: Configuración opcional de Helix Filter (feeds,
+                verdict_cache_size, verdict_cache_ttl, ...)
+        """
+        # Una sola instancia: la caché de veredictos se comparte entre lotes de tráfico
+        self.threat_filter = HelixFilter(threat_config)
         self.data_protector = SimplexSecret()
 
         logger.info("Security Pipeline initialized with Helix Filter + Simplex Secret")
@@ -104,6 +111,10 @@ class SecurityPipeline:
             }
         }
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Estadísticas de la caché de veredictos de Helix Filter"""
+        return self.threat_filter.cache_stats()
+
     def get_pipeline_info(self) -> Dict[str, Any]:
         """Información sobre los módulos en el pipeline"""
         return {
@@ -115,5 +126,6 @@ class SecurityPipeline:
             "phases": [
                 "1. Threat Filtering (Helix Filter)",
                 "2. Data Protection (Simplex Secret)"
-            ]
+            ],
+            "verdict_cache": self.cache_stats()
         }
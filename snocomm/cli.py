@@ -10,6 +10,7 @@ from typing import Any
 import click
 
 from snocomm import __version__
+from snocomm.loader import load_class
 from snocomm.manifest import load_manifest, resolve_module
 from snocomm.posture import run_infra_posture
 from snocomm.runner import merge_overrides, run_analyze, run_info
@@ -246,6 +247,125 @@ def posture(
             click.echo(f"  - {item['module']} ({item['category']}): {item['reason']}")
 
 
+@main.command("trace-query")
+@click.argument("indicator")
+@click.option(
+    "--index",
+    "index_path",
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Índice de indicadores de Helix Trace (config index_path)",
+)
+@click.option(
+    "--max-postings", type=int, default=20, show_default=True, help="Postings por artifact"
+)
+@click.option("--json", "as_json", is_flag=True, help="Salida en JSON")
+@click.pass_context
+def trace_query(
+    ctx: click.Context, indicator: str, index_path: Path, max_postings: int, as_json: bool
+) -> None:
+    """Busca un indicador (IP, email, timestamp) en el índice forense."""
+    meta = resolve_module("helix_trace", ctx.obj["modules"])
+    if meta is None:
+        raise click.ClickException("Módulo no encontrado: helix_trace")
+
+    trace = load_class(meta)({"index_path": str(index_path)})
+    try:
+        result = trace.query(indicator, max_postings=max_postings).model_dump()
+    finally:
+        trace.close()
+
+    if as_json:
+        _echo_json(result)
+        return
+
+    if not result["artifacts"]:
+        click.echo(f"{indicator}: sin coincidencias")
+        return
+
+    click.echo(
+        f"{indicator} [{result['kind']}] — {result['total_occurrences']} ocurrencias "
+        f"en {len(result['artifacts'])} artifact(s)\n"
+    )
+    for artifact in result["artifacts"]:
+        click.echo(f"  {artifact['artifact_path']} ({artifact['occurrences']})")
+        for posting in artifact["postings"]:
+            click.echo(f"    línea {posting['line']}, offset {posting['offset']}")
+
+
+@main.command("log-follow")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(dir_okay=False, path_type=Path))
+@click.option(
+    "--config",
+    type=click.Path(exists=True, path_type=Path),
+    help="JSON de configuración de Torus Log",
+)
+@click.option("--from-start", is_flag=True, help="Procesar también el contenido existente")
+@click.option(
+    "--interval", type=float, default=60.0, show_default=True, help="Segundos entre snapshots"
+)
+@click.option(
+    "--poll", type=float, default=1.0, show_default=True, help="Intervalo de sondeo en segundos"
+)
+@click.option("--duration", type=float, help="Segundos de seguimiento (default: hasta Ctrl+C)")
+@click.option("--json", "as_json", is_flag=True, help="Salida JSON (un evento por línea)")
+@click.pass_context
+def log_follow(
+    ctx: click.Context,
+    paths: tuple[Path, ...],
+    config: Path | None,
+    from_start: bool,
+    interval: float,
+    poll: float,
+    duration: float | None,
+    as_json: bool,
+) -> None:
+    """Sigue archivos de log (tail -F) con alertas y snapshots periódicos."""
+    meta = resolve_module("torus_log", ctx.obj["modules"])
+    if meta is None:
+        raise click.ClickException("Módulo no encontrado: torus_log")
+
+    torus = load_class(meta)(_load_config(config))
+    events = torus.follow(
+        [str(path) for path in paths],
+        from_start=from_start,
+        snapshot_interval=interval,
+        poll_interval=poll,
+        duration=duration,
+    )
+    try:
+        for event in events:
+            if as_json:
+                click.echo(json.dumps(event, ensure_ascii=False, default=str))
+            elif event["type"] == "alert" and event["kind"] == "incident":
+                incident = event["incident"]
+                click.echo(
+                    f"[INCIDENT] {incident['rule']} {incident['key']} — "
+                    f"{incident['event_count']} eventos "
+                    f"({incident['first_seen']} → {incident['last_seen']})"
+                )
+            elif event["type"] == "alert" and event["kind"] == "pattern_summary":
+                counts = ", ".join(
+                    f"{family}={n}" for family, n in sorted(event["suppressed"].items())
+                )
+                click.echo(f"[PATTERN] ... más coincidencias omitidas: {counts}")
+            elif event["type"] == "alert":
+                entry = event["entry"]
+                message = entry["message"][:100]
+                click.echo(f"[PATTERN] {entry['source']}: {entry['level']} {message}")
+            else:
+                changes = sorted(event["interval"]["entries_by_level"].items())
+                levels = ", ".join(f"{level}={count}" for level, count in changes)
+                click.echo(
+                    f"[SNAPSHOT] {event['analysis']['total_entries']} entradas "
+                    f"(+{event['interval']['lines_read']} líneas: {levels or 'sin cambios'})"
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        events.close()
+
+
 @main.command("domains")
 @click.option("--json", "as_json", is_flag=True, help="Salida en JSON")
 @click.pass_context
@@ -125,3 +125,43 @@ def test_cli_posture_output_file(runner, tmp_path):
     assert out.exists()
     report = json.loads(out.read_text())
     assert len(report["checks"]) == 17
+
+
+def test_cli_trace_query(runner, tmp_path):
+    from snocomm.loader import load_class
+
+    artifact = tmp_path / "auth.log"
+    artifact.write_text("2025-01-15 10:30:45 login from 10.1.2.3\n")
+    index_path = tmp_path / "index.db"
+    meta = resolve_module("helix-trace", load_manifest())
+    trace = load_class(meta)({"index_path": str(index_path)})
+    trace.analyze_artifact(str(artifact))
+    trace.close()
+
+    result = runner.invoke(main, ["trace-query", "10.1.2.3", "--index", str(index_path), "--json"])
+    assert result.exit_code == 0
+    payload = json.loads(result.output)
+    assert payload["total_occurrences"] == 1
+    assert payload["artifacts"][0]["postings"][0]["line"] == 1
+
+    result = runner.invoke(main, ["trace-query", "10.9.9.9", "--index", str(index_path)])
+    assert result.exit_code == 0
+    assert "sin coincidencias" in result.output
+
+
+def test_cli_log_follow(runner, tmp_path):
+    log = tmp_path / "auth.log"
+    log.write_text("2025-01-15 10:00:00 ERROR unauthorized access from 10.0.0.5\n")
+
+    args = ["log-follow", str(log), "--from-start", "--poll", "0.01", "--duration", "0.05"]
+    result = runner.invoke(main, args + ["--json"])
+    assert result.exit_code == 0
+    events = [json.loads(line) for line in result.output.splitlines()]
+    assert events[0]["kind"] == "pattern"
+    assert events[-1]["type"] == "snapshot"
+    assert events[-1]["analysis"]["entries_by_level"] == {"ERROR": 1}
+
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0
+    assert "[PATTERN]" in result.output
+    assert "[SNAPSHOT] 1 entradas" in result.output
@@ -59,3 +59,14 @@ class TestSecurityPipeline:
         assert 'pipeline_version' in info
         assert len(info['modules_active']) == 2
         assert len(info['phases']) == 2
+
+    def test_verdict_cache_across_batches(self, pipeline):
+        """Test: Lotes repetidos se resuelven desde la caché de veredictos"""
+        urls = ["google.com", "github.com"]
+        pipeline.process_traffic(urls, "")
+        result = pipeline.process_traffic(urls + ["evil-snake-oil.com"], "")
+
+        assert result["status"] == "BLOCKED"
+        stats = pipeline.get_pipeline_info()["verdict_cache"]
+        assert stats["hits"] == 2
+        assert stats["misses"] == 3